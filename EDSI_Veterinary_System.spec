@@ -1,12 +1,20 @@
 # -*- mode: python ; coding: utf-8 -*-
+from PyInstaller.utils.hooks import collect_submodules
 
+# Screens, controllers and report generators are imported lazily (by name or
+# inside functions), so list them explicitly for the dependency analysis.
+lazy_imports = (
+    collect_submodules('views')
+    + collect_submodules('controllers')
+    + collect_submodules('reports')
+)
 
 a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
     datas=[('assets', 'assets'), ('config', 'config'), ('controllers', 'controllers'), ('models', 'models'), ('reports', 'reports'), ('services', 'services'), ('scripts', 'scripts'), ('views', 'views')],
-    hiddenimports=[],
+    hiddenimports=lazy_imports,
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
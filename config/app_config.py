@@ -2,13 +2,37 @@
 
 """
 EDSI Veterinary Management System - Application Configuration
-Version: 2.2.3
+Version: 2.8.0
 Purpose: Centralized configuration for application settings, paths, and constants.
          Now uses a fixed, common data directory (C:\EDMS_Data) for installed applications.
-Last Updated: July 1, 2025
+Last Updated: October 16, 2026
 Author: Gemini
 
 Changelog:
+- v2.8.0 (2026-10-16):
+    - Added `STATEMENT_RENDER_MAX_WORKERS`, the number of worker processes that
+      render a batch of owner statement PDFs (None for one per CPU).
+- v2.7.0 (2026-10-16):
+    - Added `RECONCILIATION_BATCH_SIZE`, the number of matched settlement rows
+      recorded per commit.
+- v2.6.0 (2026-10-16):
+    - Added `PAYMENT_LINK_TTL_DAYS`, how long a cached invoice payment link is
+      reused.
+- v2.5.0 (2026-10-16):
+    - Added `PAYMENT_SYNC_MAX_WORKERS` and `PAYMENT_API_TIMEOUT_SECONDS` for the
+      payment-status sync against the online payments backend.
+- v2.4.0 (2026-10-16):
+    - Added `BILLING_RUN_OWNERS_PER_CHUNK`, the number of owners a billing run
+      invoices per commit.
+- v2.3.2 (2026-10-16):
+    - Added `SPLASH_IMPORT_BUDGET_MS`, the import-time budget for everything loaded
+      before the splash screen is shown (checked by `scripts/import_profile.py`).
+- v2.3.1 (2026-10-16):
+    - Added `DB_COLD_START_BUDGET_MS`, the startup budget that
+      `EDSIApplication.initialize_database` measures itself against.
+- v2.3.0 (2026-10-16):
+    - Added `SQL_LOG_FILE` (`edsi_sql.jsonl` in `LOG_DIR`) and the `sql_log_file` key
+      in `get_logging_config()` for the SQL instrumentation JSON-lines log.
 - v2.2.3 (2025-07-01):
     - **FEATURE**: Modified default data paths (`DATABASE_URL`, `LOG_DIR`, `INVOICES_DIR`,
       `STATEMENTS_DIR`, `ACCOUNTING_REPORTS_DIR`) to use a new `_DEFAULT_BASE_DATA_DIR`
@@ -100,10 +124,41 @@ ACCOUNTING_REPORTS_DIR = config_manager.get_path(
 # --- Logging Configuration (uses LOG_DIR defined above) ---
 APP_LOG_FILE = os.path.join(LOG_DIR, "edsi_app.log")
 DB_LOG_FILE = os.path.join(LOG_DIR, "edsi_db.log")
+SQL_LOG_FILE = os.path.join(LOG_DIR, "edsi_sql.jsonl")
 LOGGING_LEVEL = logging.INFO
 LOG_MAX_BYTES = 1024 * 1024 * 5
 LOG_BACKUP_COUNT = 5
 
+# --- Startup Budget ---
+# Wall-clock budget for database initialization at launch; exceeding it logs a warning.
+DB_COLD_START_BUDGET_MS = 250
+# Import-time budget for main.py plus the splash screen module, as measured by
+# `python scripts/import_profile.py --check`.
+SPLASH_IMPORT_BUDGET_MS = 500
+
+# --- Billing Run ---
+# Owners invoiced per commit by a practice-wide billing run. Smaller chunks
+# lose less work to a crash and report progress more often.
+BILLING_RUN_OWNERS_PER_CHUNK = 25
+
+# --- Online Payments Backend ---
+# Concurrent status requests a payment sync keeps in flight (also the size of
+# its keep-alive connection pool), and the per-request timeout in seconds.
+PAYMENT_SYNC_MAX_WORKERS = 8
+PAYMENT_API_TIMEOUT_SECONDS = 10
+# Days a created payment link is reused before a fresh one is requested.
+PAYMENT_LINK_TTL_DAYS = 30
+
+# --- Settlement Reconciliation ---
+# Matched settlement rows recorded per commit when reconciling a bank or card
+# processor file. Only this many pending matches are held in memory.
+RECONCILIATION_BATCH_SIZE = 500
+
+# --- Statement Batches ---
+# Worker processes rendering a batch of owner statement PDFs. None uses one per
+# CPU; 1 renders in a single worker process.
+STATEMENT_RENDER_MAX_WORKERS = None
+
 # --- UI Configuration ---
 DEFAULT_FONT_FAMILY = "Inter"
 DEFAULT_FONT_SIZE = 10
@@ -160,9 +215,22 @@ class AppConfig:
     # Logging
     APP_LOG_FILE = APP_LOG_FILE
     DB_LOG_FILE = DB_LOG_FILE
+    SQL_LOG_FILE = SQL_LOG_FILE
     LOGGING_LEVEL = LOGGING_LEVEL
     LOG_MAX_BYTES = LOG_MAX_BYTES
     LOG_BACKUP_COUNT = LOG_BACKUP_COUNT
+    DB_COLD_START_BUDGET_MS = DB_COLD_START_BUDGET_MS
+    SPLASH_IMPORT_BUDGET_MS = SPLASH_IMPORT_BUDGET_MS
+
+    # Billing
+    BILLING_RUN_OWNERS_PER_CHUNK = BILLING_RUN_OWNERS_PER_CHUNK
+    PAYMENT_SYNC_MAX_WORKERS = PAYMENT_SYNC_MAX_WORKERS
+    PAYMENT_API_TIMEOUT_SECONDS = PAYMENT_API_TIMEOUT_SECONDS
+    PAYMENT_LINK_TTL_DAYS = PAYMENT_LINK_TTL_DAYS
+    RECONCILIATION_BATCH_SIZE = RECONCILIATION_BATCH_SIZE
+
+    # Reports
+    STATEMENT_RENDER_MAX_WORKERS = STATEMENT_RENDER_MAX_WORKERS
 
     # UI Settings
     DEFAULT_FONT_FAMILY = DEFAULT_FONT_FAMILY
@@ -225,6 +293,7 @@ class AppConfig:
             "level": cls.LOGGING_LEVEL,
             "app_log_file": os.path.join(cls.LOG_DIR, "edsi_app.log"),
             "db_log_file": os.path.join(cls.LOG_DIR, "edsi_db.log"),
+            "sql_log_file": os.path.join(cls.LOG_DIR, "edsi_sql.jsonl"),
             "log_dir": cls.LOG_DIR,
             "log_max_bytes": cls.LOG_MAX_BYTES,
             "log_backup_count": cls.LOG_BACKUP_COUNT,
@@ -2,13 +2,17 @@
 
 """
 EDSI Veterinary Management System - Configuration Manager
-Version: 1.0.3
+Version: 1.1.0
 Purpose: Manages user-configurable application paths for database, invoices, statements, and accounting reports.
          Uses a configuration file for persistent storage of these paths.
-Last Updated: June 29, 2025
+Last Updated: October 16, 2026
 Author: Gemini
 
 Changelog:
+- v1.1.0 (2026-10-16):
+    - Added a `[Database]` section with `SQLITE_PROFILE_KEY` for the SQLite
+      performance profile, plus generic `get_setting` / `set_setting` accessors
+      for non-path settings.
 - v1.0.3 (2025-06-29):
     - Added `ACCOUNTING_REPORTS_DIR_KEY` constant to define the key for the new
       configurable path for accounting reports.
@@ -48,6 +52,10 @@ class ConfigManager:
         "accounting_reports_directory"  # NEW: Key for accounting reports directory
     )
 
+    # Non-path settings live in their own sections
+    DATABASE_SECTION = "Database"
+    SQLITE_PROFILE_KEY = "sqlite_profile"
+
     # Define the default configuration file name
     CONFIG_FILE_NAME = "edms_config.ini"
 
@@ -139,6 +147,37 @@ class ConfigManager:
         self._save_config()
         self.logger.info(f"Path '{key}' set to '{path}' and saved.")
 
+    def get_setting(
+        self, section: str, key: str, fallback: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Retrieves a non-path setting.
+
+        Args:
+            section (str): The INI section (e.g., DATABASE_SECTION).
+            key (str): The key within the section.
+            fallback (Optional[str]): Value returned when the setting is absent.
+
+        Returns:
+            Optional[str]: The configured value, or `fallback` if not set.
+        """
+        return self.config.get(section, key, fallback=fallback)
+
+    def set_setting(self, section: str, key: str, value: str):
+        """
+        Sets a non-path setting, creating its section if needed, and saves the configuration.
+
+        Args:
+            section (str): The INI section.
+            key (str): The key within the section.
+            value (str): The value to set.
+        """
+        if section not in self.config:
+            self.config[section] = {}
+        self.config[section][key] = value
+        self._save_config()
+        self.logger.info(f"Setting '{section}.{key}' set to '{value}' and saved.")
+
 
 # Instantiate the ConfigManager to be used globally
 config_manager = ConfigManager()
@@ -2,13 +2,84 @@
 
 """
 EDSI Veterinary Management System - Database Configuration
-Version: 2.0.4
+Version: 2.11.0
 Purpose: Simplified database connection and session management using SQLAlchemy.
          Now receives ConfigManager instance via dependency injection.
-Last Updated: June 23, 2025
+Last Updated: October 16, 2026
 Author: Claude Assistant (Modified by Gemini)
 
 Changelog:
+- v2.11.0 (2026-10-16):
+    - `create_tables` now also calls `_backfill_charge_usage_rollups()`. While
+      `charge_usage_rollups` is empty, it fills it from the live charges and
+      from any yearly archive files.
+- v2.10.0 (2026-10-16):
+    - Added yearly archive files (`archive_path`, `archive_years`) next to the
+      live database. `services.transaction_archive` moves closed years of
+      `ARCHIVE_TABLES` into them.
+    - `report_scope` takes an `archive_range`. When archive files exist for
+      years in that range, they are ATTACHed to the report's connection. A TEMP
+      view per archived table unions the live rows with every attached archive.
+      SQLite resolves unqualified names in `temp` before `main`, so the
+      report's queries read both unchanged. Without archives in range, a report
+      runs exactly as before.
+- v2.9.0 (2026-10-16):
+    - `create_tables` now also calls `_migrate_billed_line_items()`. Invoice lines
+      stored as `BILLED` copies of a charge become `transaction_allocations` rows
+      on the charge they were copied from, and the copies are deleted.
+- v2.8.0 (2026-10-16):
+    - `create_tables` now also calls `_backfill_invoice_sequences()`. It seeds the
+      `invoice_sequences` allocator from the highest number used in each owner's
+      invoice month, so existing databases continue their numbering.
+- v2.7.0 (2026-10-16):
+    - `create_tables` now also calls `_ensure_columns()`. It adds nullable model
+      columns that are missing from existing tables with `ALTER TABLE ... ADD
+      COLUMN`, for example `owner_payments.invoice_id`.
+- v2.6.0 (2026-10-16):
+    - Added a `schema_version` table with a `schema` stamp and a `bootstrap` stamp.
+      The `schema` stamp is a fingerprint of `Base.metadata`: tables, columns and
+      indexes. The `bootstrap` stamp is `BOOTSTRAP_VERSION`.
+    - When both stamps match the code, `initialize_database` skips `create_all`,
+      index reflection, the `SELECT 1` probe and the bcrypt ADMIN check. It only
+      confirms that the ADMIN row exists. Any mismatch runs the full path and
+      re-stamps afterwards.
+    - Startup phases are timed into `startup_timings` and logged as one line.
+    - `_ensure_default_admin_user` now returns whether provisioning succeeded, so a
+      failed run is never stamped.
+- v2.5.0 (2026-10-16):
+    - Added `enable_sql_instrumentation()`. It attaches a
+      `services.sql_instrumentation.SQLInstrumentation` to the main and report
+      engines, including engines created after the call. `close()` writes the
+      per-method summary before disposing the engines.
+- v2.4.0 (2026-10-16):
+    - `create_tables` now also calls `_ensure_indexes()`. `create_all` never adds
+      indexes to tables that already exist, so this creates any index declared on
+      the models (e.g. the composite indexes in `__table_args__`) that is missing
+      from an existing database.
+- v2.3.0 (2026-10-16):
+    - Added a second, read-only engine for reports. It opens the same SQLite file
+      through a `mode=ro` URI and uses the profile's non-persistent pragmas.
+    - Added `report_scope()`. Each report runs inside one explicit SQLite read
+      transaction, so all of its queries see the same snapshot. Under WAL that
+      snapshot never blocks the billing screens' writers. Falls back to the main
+      engine if the read-only connection cannot be opened.
+- v2.2.0 (2026-10-16):
+    - Added named SQLite performance profiles (`SQLITE_PROFILES`). The active profile
+      is read from ConfigManager ([Database] sqlite_profile) and applied to every
+      pooled connection through a `connect` event hook. The default "balanced" profile
+      enables WAL, synchronous=NORMAL, a larger page cache, mmap, in-memory temp
+      storage, foreign keys and a busy timeout.
+    - Added `get_sqlite_pragma_status()` so the admin UI can show the pragmas in effect.
+- v2.1.0 (2026-10-16):
+    - The engine and its connection pool now live for the whole process. Controllers
+      no longer call `close()` (which disposed the engine) after every lookup.
+    - Added `session_scope()`, a unit-of-work context manager that commits on success,
+      rolls back on error and releases only the session. Scopes opened while another
+      scope is active on the same thread (or given an explicit session) join the
+      outer unit instead of committing or closing it.
+    - Session factory now uses `expire_on_commit=False` so objects returned from a
+      committed unit of work stay readable once detached.
+    - `close()` is now reserved for application shutdown and database restore.
 - v2.0.4 (2025-06-23):
     - **CRITICAL ARCHITECTURAL CHANGE & BUG FIX:** Removed direct import of `AppConfig`.
     - `DatabaseManager` now receives `AppConfig` and `ConfigManager` instances via dependency injection.
@@ -21,10 +92,34 @@ Changelog:
 # ... (previous changelog entries)
 """
 
+import hashlib
 import logging
 import os
-from typing import Optional
-from sqlalchemy import create_engine, text
+import re
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from decimal import Decimal
+from pathlib import Path
+from urllib.parse import quote
+from contextlib import contextmanager
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from sqlalchemy import (
+    Column,
+    DateTime,
+    String,
+    Table,
+    bindparam,
+    create_engine,
+    event,
+    exists,
+    func,
+    inspect,
+    select,
+    text,
+)
 from sqlalchemy.orm import sessionmaker, scoped_session, Session as SQLAlchemySession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.exc import SQLAlchemyError
@@ -38,6 +133,66 @@ Base = declarative_base()
 # Setup logger
 db_logger = logging.getLogger("database_operations")
 
+# Named SQLite PRAGMA profiles, applied to every new pooled connection. Pragmas are
+# applied in the order listed; journal_mode is persistent in the database file, so the
+# "compatibility" profile sets it explicitly to switch a WAL database back.
+SQLITE_PROFILES: Dict[str, Dict[str, Any]] = {
+    "balanced": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -16000,  # negative = KiB, i.e. ~16 MB page cache
+        "mmap_size": 134217728,  # 128 MB
+        "temp_store": "MEMORY",
+        "foreign_keys": "ON",
+    },
+    "durable": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -16000,
+        "mmap_size": 134217728,
+        "temp_store": "MEMORY",
+        "foreign_keys": "ON",
+    },
+    "compatibility": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "foreign_keys": "OFF",
+    },
+}
+DEFAULT_SQLITE_PROFILE = "balanced"
+
+# Bump when `_ensure_default_admin_user` (or any other one-time bootstrap step)
+# changes, so existing databases re-run it once on their next start.
+BOOTSTRAP_VERSION = "1"
+
+# Startup stamps: component ('schema' / 'bootstrap') -> version applied to this file.
+schema_version_table = Table(
+    "schema_version",
+    Base.metadata,
+    Column("component", String(50), primary_key=True),
+    Column("version", String(64), nullable=False),
+    Column("applied_date", DateTime, nullable=False, server_default=func.now()),
+)
+
+# Tables whose closed years are moved into yearly archive files
+# (services.transaction_archive), in the order reports union them.
+ARCHIVE_TABLES = (
+    "transactions",
+    "transaction_allocations",
+    "invoices",
+    "owner_payments",
+    "owner_billing_history",
+)
+ARCHIVE_DIR_NAME = "archive"
+
+# "(50.00% Share)" suffix of a co-owned invoice line's description
+_SHARE_SUFFIX_RE = re.compile(r"^ \((\d+(?:\.\d+)?)% Share\)$")
+
+# Pragmas that persist in the database file and cannot be set on a read-only connection.
+_PERSISTENT_SQLITE_PRAGMAS = ("journal_mode",)
+
 
 class DatabaseManager:
     """
@@ -46,16 +201,36 @@ class DatabaseManager:
     """
 
     def __init__(
-        self, app_config_instance, config_manager_instance
+        self,
+        app_config_instance,
+        config_manager_instance,
+        sqlite_profile: Optional[str] = None,
     ):  # NEW: Accept injected instances
         self.engine = None
         self.SessionLocal: Optional[scoped_session[SQLAlchemySession]] = None
+        # Read-only engine and session factory used by report_scope()
+        self.report_engine = None
+        self.ReportSessionLocal: Optional[sessionmaker] = None
         self.db_url: Optional[str] = None
         self.logger = logging.getLogger(self.__class__.__name__)
 
         self._app_config = app_config_instance  # Store injected AppConfig
         self._config_manager = config_manager_instance  # Store injected ConfigManager
 
+        # Per-thread nesting depth of session_scope(); only the outermost scope
+        # commits and releases the thread's session.
+        self._scope_state = threading.local()
+
+        # Explicit profile (e.g. from a benchmark) wins over the configured one.
+        self._sqlite_profile_override = sqlite_profile
+        self.sqlite_profile: Optional[str] = None
+
+        # Optional SQL statistics collector (see enable_sql_instrumentation)
+        self.sql_instrumentation = None
+
+        # Phase name -> milliseconds for the last initialize_database() call
+        self.startup_timings: Dict[str, float] = {}
+
     def initialize_database(
         self,
     ) -> None:  # Removed db_url argument, use injected AppConfig
@@ -73,6 +248,14 @@ class DatabaseManager:
             raise ValueError("DATABASE_URL is not configured in AppConfig.")
 
         self.logger.info(f"Initializing database: {self.db_url}")
+        self.startup_timings = {}
+        phase_start = time.perf_counter()
+
+        def _phase_done(name: str) -> None:
+            nonlocal phase_start
+            now = time.perf_counter()
+            self.startup_timings[name] = (now - phase_start) * 1000.0
+            phase_start = now
 
         try:
             self.engine = create_engine(
@@ -80,16 +263,56 @@ class DatabaseManager:
                 echo=False,  # Set to True for SQL logging, False for production
                 pool_pre_ping=True,
             )
+            if self.sql_instrumentation:
+                self.sql_instrumentation.attach(self.engine)
+            if self.engine.dialect.name == "sqlite":
+                self.sqlite_profile = self._resolve_sqlite_profile()
+                event.listen(self.engine, "connect", self._apply_sqlite_pragmas)
+                self.logger.info(f"SQLite profile '{self.sqlite_profile}' enabled")
 
             self.SessionLocal = scoped_session(
-                sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+                sessionmaker(
+                    autocommit=False,
+                    autoflush=False,
+                    expire_on_commit=False,
+                    bind=self.engine,
+                )
             )
 
             self.logger.info("Database engine and session factory created")
-            self.create_tables()
-            self._test_connection()
-            self._ensure_default_admin_user()
-            self.logger.info("Database initialization completed successfully")
+            self._import_models()
+            _phase_done("engine")
+
+            expected_stamps = {
+                "schema": self.schema_fingerprint(),
+                "bootstrap": BOOTSTRAP_VERSION,
+            }
+            stamps_current = self._read_version_stamps() == expected_stamps
+            _phase_done("version_check")
+
+            if stamps_current:
+                self.logger.info(
+                    "Schema and bootstrap stamps are current; skipping table creation "
+                    "and ADMIN provisioning."
+                )
+                if not self._admin_user_exists():
+                    self._ensure_default_admin_user()
+                _phase_done("admin_check")
+            else:
+                self.create_tables()
+                self._test_connection()
+                _phase_done("create_tables")
+                if self._ensure_default_admin_user():
+                    self._write_version_stamps(expected_stamps)
+                _phase_done("admin_provisioning")
+
+            self._init_report_engine()
+            _phase_done("report_engine")
+            self.logger.info(
+                "Database initialization completed successfully ("
+                + ", ".join(f"{k} {v:.1f} ms" for k, v in self.startup_timings.items())
+                + f"; total {sum(self.startup_timings.values()):.1f} ms)"
+            )
 
         except SQLAlchemyError as e:
             self.logger.error(f"SQLAlchemy error during database initialization: {e}")
@@ -98,6 +321,121 @@ class DatabaseManager:
             self.logger.error(f"Unexpected error during database initialization: {e}")
             raise
 
+    def _resolve_sqlite_profile(self) -> str:
+        """Returns the configured SQLite profile name, falling back to the default."""
+        profile_name = self._sqlite_profile_override
+        if not profile_name and self._config_manager is not None:
+            profile_name = self._config_manager.get_setting(
+                self._config_manager.DATABASE_SECTION,
+                self._config_manager.SQLITE_PROFILE_KEY,
+            )
+        profile_name = (profile_name or DEFAULT_SQLITE_PROFILE).strip().lower()
+        if profile_name not in SQLITE_PROFILES:
+            self.logger.warning(
+                f"Unknown SQLite profile '{profile_name}'; using '{DEFAULT_SQLITE_PROFILE}'."
+            )
+            profile_name = DEFAULT_SQLITE_PROFILE
+        return profile_name
+
+    def _apply_sqlite_pragmas(self, dbapi_connection, connection_record) -> None:
+        """`connect` event hook: applies the active profile to a new DBAPI connection."""
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma, value in SQLITE_PROFILES[self.sqlite_profile].items():
+                cursor.execute(f"PRAGMA {pragma}={value}")
+        finally:
+            cursor.close()
+
+    def _apply_sqlite_report_pragmas(self, dbapi_connection, connection_record) -> None:
+        """
+        `connect` hook for the read-only engine. Applies the profile's per-connection
+        pragmas and hands transaction control to SQLAlchemy (see `_begin_report_transaction`).
+        """
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma, value in SQLITE_PROFILES[self.sqlite_profile].items():
+                if pragma not in _PERSISTENT_SQLITE_PRAGMAS:
+                    cursor.execute(f"PRAGMA {pragma}={value}")
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _begin_report_transaction(connection) -> None:
+        """
+        `begin` hook for the read-only engine. pysqlite never opens a transaction
+        for plain SELECTs, so each query would otherwise see its own snapshot.
+        """
+        connection.exec_driver_sql("BEGIN")
+
+    def _init_report_engine(self) -> None:
+        """
+        Opens the read-only reporting engine on the same SQLite file. Non-SQLite and
+        in-memory databases (or a failed read-only open) keep reports on the main engine.
+        """
+        db_path = self.engine.url.database
+        if self.engine.dialect.name != "sqlite" or not db_path or db_path == ":memory:":
+            self.logger.info("Reports will use the main database engine.")
+            return
+
+        ro_url = f"sqlite:///file:{quote(Path(db_path).resolve().as_posix(), safe='/:')}?mode=ro&uri=true"
+        try:
+            report_engine = create_engine(ro_url, echo=False, pool_pre_ping=True)
+            event.listen(report_engine, "connect", self._apply_sqlite_report_pragmas)
+            event.listen(report_engine, "begin", self._begin_report_transaction)
+            with report_engine.connect() as connection:
+                connection.exec_driver_sql("SELECT 1")
+        except SQLAlchemyError as e:
+            self.logger.warning(
+                f"Read-only report engine unavailable ({e}); reports will use the main engine."
+            )
+            return
+
+        self.report_engine = report_engine
+        if self.sql_instrumentation:
+            self.sql_instrumentation.attach(self.report_engine)
+        self.ReportSessionLocal = sessionmaker(
+            autocommit=False,
+            autoflush=False,
+            expire_on_commit=False,
+            bind=self.report_engine,
+        )
+        self.logger.info(f"Read-only report engine created: {ro_url}")
+
+    def enable_sql_instrumentation(self, log_file: Optional[str] = None, **options):
+        """
+        Collects per-controller query counts, latency histograms and N+1 warnings
+        for every engine this manager owns, writing JSON lines to `log_file`.
+        May be called before or after `initialize_database()`.
+
+        Args:
+            log_file: Path of the rotating JSON-lines file; None keeps stats in memory.
+            **options: Passed through to `SQLInstrumentation` (e.g. n_plus_one_threshold).
+        """
+        from services.sql_instrumentation import SQLInstrumentation
+
+        if self.sql_instrumentation:
+            return self.sql_instrumentation
+        self.sql_instrumentation = SQLInstrumentation(log_file, **options)
+        for engine in (self.engine, self.report_engine):
+            if engine:
+                self.sql_instrumentation.attach(engine)
+        self.logger.info(f"SQL instrumentation enabled (log: {log_file})")
+        return self.sql_instrumentation
+
+    def get_sqlite_pragma_status(self) -> Dict[str, Any]:
+        """
+        Reports the active SQLite profile and the pragma values actually in effect
+        on a pooled connection. Returns an empty dict for non-SQLite databases.
+        """
+        if not self.engine or self.engine.dialect.name != "sqlite":
+            return {}
+        status: Dict[str, Any] = {"profile": self.sqlite_profile}
+        with self.engine.connect() as connection:
+            for pragma in SQLITE_PROFILES[DEFAULT_SQLITE_PROFILE]:
+                status[pragma] = connection.exec_driver_sql(f"PRAGMA {pragma}").scalar()
+        return status
+
     def get_session(self) -> SQLAlchemySession:
         """
         Get a database session.
@@ -108,6 +446,181 @@ class DatabaseManager:
             )
         return self.SessionLocal()
 
+    @contextmanager
+    def session_scope(
+        self, session: Optional[SQLAlchemySession] = None
+    ) -> Iterator[SQLAlchemySession]:
+        """
+        Provide a transactional unit of work.
+
+        The outermost scope on a thread commits when the block exits normally,
+        rolls back if it raises, and then releases the session back to the pool.
+        The engine itself is never disposed here.
+
+        Args:
+            session: An externally managed session (e.g. from an import script).
+                When given, or when a scope is already open on this thread, the
+                block joins that unit of work: it is rolled back on error but
+                committing and closing are left to the owner.
+        """
+        if session is not None:
+            try:
+                yield session
+            except Exception:
+                session.rollback()
+                raise
+            return
+
+        depth = getattr(self._scope_state, "depth", 0)
+        scoped = self.get_session()
+        self._scope_state.depth = depth + 1
+        try:
+            yield scoped
+            if depth == 0:
+                scoped.commit()
+        except Exception:
+            scoped.rollback()
+            raise
+        finally:
+            self._scope_state.depth = depth
+            if depth == 0:
+                self.SessionLocal.remove()
+
+    @contextmanager
+    def report_scope(
+        self,
+        session: Optional[SQLAlchemySession] = None,
+        archive_range: Optional[Tuple[date, date]] = None,
+    ) -> Iterator[SQLAlchemySession]:
+        """
+        Provide a read-only, snapshot-consistent session for a report.
+
+        Every query in the block runs in a single SQLite read transaction on the
+        read-only engine, so totals stay consistent while charges are being posted.
+        The transaction is released when the block exits; nothing is ever committed.
+
+        Args:
+            session: A session already opened by an enclosing report; when given, the
+                block simply reuses it (and its snapshot).
+            archive_range: (start, end) dates the report covers. Yearly archives
+                for those years are attached and read together with the live tables.
+        """
+        if session is not None:
+            yield session
+            return
+
+        years = self.archive_years(*archive_range) if archive_range else []
+        if years:
+            with self._archive_report_session(years) as archive_session:
+                yield archive_session
+            return
+
+        if not self.ReportSessionLocal:
+            # No read-only engine available; fall back to a normal unit of work.
+            with self.session_scope() as fallback_session:
+                yield fallback_session
+            return
+
+        report_session = self.ReportSessionLocal()
+        try:
+            yield report_session
+        finally:
+            # close() ends the read transaction without expiring loaded objects
+            report_session.close()
+
+    def archive_path(self, year: int) -> Optional[Path]:
+        """
+        The yearly archive file for `year`, in an `archive` folder next to the
+        live database. None when the database is not a SQLite file.
+        """
+        if not self.engine or self.engine.dialect.name != "sqlite":
+            return None
+        db_path = self.engine.url.database
+        if not db_path or db_path == ":memory:":
+            return None
+        live_path = Path(db_path).resolve()
+        return live_path.parent / ARCHIVE_DIR_NAME / f"{live_path.stem}_{year}.db"
+
+    def archive_years(self, start: date, end: date) -> List[int]:
+        """Years from `start` to `end` that have an archive file."""
+        return [
+            year
+            for year in range(start.year, end.year + 1)
+            if (path := self.archive_path(year)) is not None and path.is_file()
+        ]
+
+    @contextmanager
+    def _archive_report_session(
+        self, years: Sequence[int]
+    ) -> Iterator[SQLAlchemySession]:
+        """
+        A report session whose connection has the `years` archives ATTACHed, with
+        a TEMP view per `ARCHIVE_TABLES` table that unions the live table with the
+        archived ones. ATTACH is not allowed inside a transaction, so it all
+        happens on the DBAPI connection before the report's read transaction
+        begins. The views and attachments are dropped before the connection goes
+        back to the pool; if that fails the connection is discarded.
+        """
+        engine = self.report_engine or self.engine
+        connection = engine.connect()
+        dbapi_connection = connection.connection.driver_connection
+        aliases = []
+        views = []
+        try:
+            for year in years:
+                alias = f"archive_{year}"
+                path = self.archive_path(year)
+                target = (
+                    f"file:{quote(path.as_posix(), safe='/:')}?mode=ro"
+                    if self.report_engine is not None
+                    else str(path)
+                )
+                dbapi_connection.execute(f"ATTACH DATABASE ? AS {alias}", (target,))
+                aliases.append(alias)
+            for table_name in ARCHIVE_TABLES:
+                columns = [c.name for c in Base.metadata.tables[table_name].columns]
+                selects = [f"SELECT {', '.join(columns)} FROM main.{table_name}"]
+                for alias in aliases:
+                    archived = {
+                        row[1]
+                        for row in dbapi_connection.execute(
+                            f"PRAGMA {alias}.table_info({table_name})"
+                        )
+                    }
+                    if archived:
+                        selects.append(
+                            "SELECT "
+                            + ", ".join(
+                                c if c in archived else f"NULL AS {c}" for c in columns
+                            )
+                            + f" FROM {alias}.{table_name}"
+                        )
+                dbapi_connection.execute(
+                    f"CREATE TEMP VIEW {table_name} AS " + " UNION ALL ".join(selects)
+                )
+                views.append(table_name)
+            self.logger.debug(f"Report reads archives for {list(years)}")
+
+            report_session = SQLAlchemySession(
+                bind=connection, autoflush=False, expire_on_commit=False
+            )
+            try:
+                yield report_session
+            finally:
+                report_session.close()
+        finally:
+            try:
+                if connection.in_transaction():
+                    connection.rollback()
+                for view in views:
+                    dbapi_connection.execute(f"DROP VIEW IF EXISTS temp.{view}")
+                for alias in aliases:
+                    dbapi_connection.execute(f"DETACH DATABASE {alias}")
+            except Exception as e:
+                self.logger.warning(f"Discarding report connection after archive read: {e}")
+                connection.invalidate()
+            connection.close()
+
     def create_tables(self) -> None:
         """
         Create all database tables.
@@ -121,11 +634,290 @@ class DatabaseManager:
             Base.metadata.create_all(bind=self.engine)
             table_names = list(Base.metadata.tables.keys())
             self.logger.info(f"Database tables created/verified: {table_names}")
+            self._ensure_columns()
+            self._ensure_indexes()
+            self._backfill_invoice_sequences()
+            self._migrate_billed_line_items()
+            self._backfill_charge_usage_rollups()
 
         except Exception as e:
             self.logger.error(f"Error creating database tables: {e}")
             raise
 
+    @staticmethod
+    def schema_fingerprint() -> str:
+        """
+        Short hash of every table, column (type, nullability) and index declared on
+        `Base.metadata`. Any model change produces a new fingerprint.
+        """
+        parts = []
+        for table in sorted(Base.metadata.sorted_tables, key=lambda t: t.name):
+            parts.append(f"T:{table.name}")
+            for column in table.columns:
+                parts.append(f"C:{column.name}:{column.type}:{column.nullable}")
+            for index in sorted(table.indexes, key=lambda ix: ix.name or ""):
+                columns = ",".join(c.name for c in index.columns)
+                parts.append(f"I:{index.name}:{columns}:{index.unique}")
+        return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()[:16]
+
+    def _read_version_stamps(self) -> Dict[str, str]:
+        """Returns the stored stamps, or {} if the table does not exist yet."""
+        try:
+            with self.engine.connect() as connection:
+                rows = connection.execute(
+                    schema_version_table.select().with_only_columns(
+                        schema_version_table.c.component,
+                        schema_version_table.c.version,
+                    )
+                ).all()
+        except SQLAlchemyError:
+            return {}
+        return {component: version for component, version in rows}
+
+    def _write_version_stamps(self, stamps: Dict[str, str]) -> None:
+        with self.engine.begin() as connection:
+            connection.execute(schema_version_table.delete())
+            connection.execute(
+                schema_version_table.insert(),
+                [
+                    {"component": component, "version": version}
+                    for component, version in stamps.items()
+                ],
+            )
+        self.logger.info(f"Schema/bootstrap stamps written: {stamps}")
+
+    def _admin_user_exists(self) -> bool:
+        """Cheap existence check for the ADMIN account (no password hashing)."""
+        with self.engine.connect() as connection:
+            return (
+                connection.execute(
+                    text("SELECT 1 FROM users WHERE user_id = 'ADMIN'")
+                ).first()
+                is not None
+            )
+
+    def _ensure_columns(self) -> None:
+        """
+        Add any nullable model column missing from an existing table with
+        `ALTER TABLE ... ADD COLUMN`. `create_all` never alters existing tables;
+        new NOT NULL columns still need a hand-written migration.
+        """
+        inspector = inspect(self.engine)
+        added = []
+        with self.engine.begin() as connection:
+            for table in Base.metadata.sorted_tables:
+                existing = {c["name"] for c in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name in existing:
+                        continue
+                    if not column.nullable:
+                        self.logger.error(
+                            f"Column {table.name}.{column.name} is NOT NULL and "
+                            f"cannot be added automatically."
+                        )
+                        continue
+                    column_type = column.type.compile(dialect=self.engine.dialect)
+                    connection.exec_driver_sql(
+                        f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"
+                    )
+                    added.append(f"{table.name}.{column.name}")
+        if added:
+            self.logger.info(f"Added missing columns: {added}")
+
+    def _ensure_indexes(self) -> None:
+        """
+        Create any model-declared index missing from the database. Safe to run on
+        every start: existing indexes are detected up front and left untouched.
+        """
+        inspector = inspect(self.engine)
+        created = []
+        for table in Base.metadata.sorted_tables:
+            existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing:
+                    index.create(bind=self.engine)
+                    created.append(index.name)
+        if created:
+            self.logger.info(f"Created missing indexes: {created}")
+
+    def _backfill_invoice_sequences(self) -> None:
+        """
+        Seed `invoice_sequences` from existing invoices so the allocator continues
+        after the highest number already used in each owner's month. Idempotent:
+        a counter is only ever raised, never lowered.
+        """
+        with self.engine.begin() as connection:
+            result = connection.exec_driver_sql(
+                "INSERT INTO invoice_sequences (owner_id, period_ym, next_value) "
+                "SELECT owner_id, invoice_period_ym, MAX(monthly_sequence_number) + 1 "
+                "FROM invoices "
+                "WHERE invoice_period_ym IS NOT NULL "
+                "AND monthly_sequence_number IS NOT NULL "
+                "GROUP BY owner_id, invoice_period_ym "
+                "ON CONFLICT (owner_id, period_ym) DO UPDATE "
+                "SET next_value = excluded.next_value "
+                "WHERE excluded.next_value > invoice_sequences.next_value"
+            )
+        if result.rowcount:
+            self.logger.info(
+                f"Invoice sequence counters seeded/raised: {result.rowcount}"
+            )
+
+    def _migrate_billed_line_items(self) -> None:
+        """
+        Convert invoice lines stored as `BILLED` copies of a charge into
+        `transaction_allocations` rows. A copy is matched to a PROCESSED charge
+        of the same horse, charge code, date and quantity whose description it
+        starts with; identical charges are paired in ID order. The share comes
+        from the copy's "(NN.NN% Share)" suffix, or else from its amount. Matched copies
+        are deleted. A copy with no match is allocated to itself at a share of
+        1, so its invoice still lists it. Idempotent: copies that already have
+        an allocation are skipped.
+        """
+        from models.financial_models import Transaction, TransactionAllocation
+
+        transactions = Transaction.__table__
+        allocations = TransactionAllocation.__table__
+        with self.engine.begin() as connection:
+            copies = connection.execute(
+                select(transactions)
+                .where(
+                    transactions.c.status == "BILLED",
+                    transactions.c.invoice_id.isnot(None),
+                    ~exists().where(
+                        allocations.c.transaction_id == transactions.c.transaction_id
+                    ),
+                )
+                .order_by(transactions.c.transaction_id)
+            ).all()
+            if not copies:
+                return
+
+            def match_key(row):
+                return (
+                    row.horse_id,
+                    row.charge_code_id,
+                    row.transaction_date,
+                    row.quantity,
+                )
+
+            sources = defaultdict(list)
+            for row in connection.execute(
+                select(transactions)
+                .where(
+                    transactions.c.status == "PROCESSED",
+                    transactions.c.horse_id.in_({c.horse_id for c in copies}),
+                )
+                .order_by(transactions.c.transaction_id)
+            ):
+                sources[match_key(row)].append(row)
+            allocated = set(
+                connection.execute(
+                    select(allocations.c.transaction_id, allocations.c.owner_id)
+                ).all()
+            )
+
+            new_allocations = []
+            matched_copy_ids = []
+            for copy in copies:
+                source = next(
+                    (
+                        candidate
+                        for candidate in sources[match_key(copy)]
+                        if (candidate.transaction_id, copy.owner_id) not in allocated
+                        and copy.description.startswith(candidate.description)
+                    ),
+                    None,
+                )
+                if source is None:
+                    source, share = copy, Decimal("1")
+                else:
+                    matched_copy_ids.append({"copy_id": copy.transaction_id})
+                    # Co-owned lines carry the percentage in their description
+                    suffix = _SHARE_SUFFIX_RE.search(
+                        copy.description[len(source.description) :]
+                    )
+                    if suffix:
+                        share = Decimal(suffix.group(1)) / 100
+                    elif source.total_price:
+                        share = copy.total_price / source.total_price
+                    else:
+                        share = Decimal("1")
+                    share = share.quantize(Decimal("0.000001"))
+                allocated.add((source.transaction_id, copy.owner_id))
+                new_allocations.append(
+                    {
+                        "transaction_id": source.transaction_id,
+                        "owner_id": copy.owner_id,
+                        "invoice_id": copy.invoice_id,
+                        "share": share,
+                        "amount": copy.total_price,
+                    }
+                )
+
+            connection.execute(allocations.insert(), new_allocations)
+            if matched_copy_ids:
+                connection.execute(
+                    transactions.delete().where(
+                        transactions.c.transaction_id == bindparam("copy_id")
+                    ),
+                    matched_copy_ids,
+                )
+        self.logger.info(
+            f"Migrated {len(new_allocations)} billed line item(s) to allocations; "
+            f"{len(matched_copy_ids)} duplicate charge row(s) removed, "
+            f"{len(new_allocations) - len(matched_copy_ids)} kept without a source charge."
+        )
+
+    def _backfill_charge_usage_rollups(self) -> None:
+        """
+        Fill `charge_usage_rollups` from the charges, live and archived, when the
+        table is empty (a database from before it existed). Once it has rows,
+        `services.usage_rollup` keeps it current and this does nothing.
+        """
+        upsert = (
+            "INSERT INTO charge_usage_rollups (month_start, charge_code_id, "
+            "administered_by_user_id, category_id, usage_count, total_revenue) "
+            "VALUES (?, ?, ?, (SELECT category_id FROM charge_codes WHERE id = ?), ?, ?) "
+            "ON CONFLICT (month_start, charge_code_id, administered_by_user_id) "
+            "DO UPDATE SET usage_count = usage_count + excluded.usage_count, "
+            "total_revenue = total_revenue + excluded.total_revenue"
+        )
+        grouped = (
+            "SELECT date(transaction_date, 'start of month'), charge_code_id, "
+            "COALESCE(administered_by_user_id, ''), charge_code_id, "
+            "COUNT(transaction_id), SUM(total_price) FROM transactions "
+            "GROUP BY 1, 2, 3"
+        )
+        with self.engine.begin() as connection:
+            if connection.exec_driver_sql(
+                "SELECT 1 FROM charge_usage_rollups LIMIT 1"
+            ).first():
+                return
+            rows = connection.exec_driver_sql(grouped).all()
+            archive_files = []
+            sample_path = self.archive_path(date.today().year)
+            if sample_path is not None and sample_path.parent.is_dir():
+                db_stem = Path(self.engine.url.database).stem
+                archive_files = [
+                    path
+                    for path in sorted(sample_path.parent.glob(f"{db_stem}_*.db"))
+                    if path.stem[len(db_stem) + 1 :].isdigit()
+                ]
+            for path in archive_files:
+                archive = sqlite3.connect(f"{path.as_uri()}?mode=ro", uri=True)
+                try:
+                    rows.extend(archive.execute(grouped).fetchall())
+                finally:
+                    archive.close()
+            if rows:
+                connection.exec_driver_sql(upsert, [tuple(row) for row in rows])
+        if rows:
+            self.logger.info(
+                f"Charge usage rollups built from {len(rows)} monthly group(s) "
+                f"({len(archive_files)} archive file(s))."
+            )
+
     def _import_models(self) -> None:
         """
         Import all model classes to ensure they are registered with Base.
@@ -189,11 +981,12 @@ class DatabaseManager:
             self.logger.error(f"Database connection test failed: {e}")
             raise
 
-    def _ensure_default_admin_user(self) -> None:
+    def _ensure_default_admin_user(self) -> bool:
         """
         Ensure default admin user always exists with correct credentials
         (password hashed using bcrypt via User.set_password).
         Handles pre-existing non-bcrypt hashes for ADMIN by resetting the password.
+        Returns True if the ADMIN account was verified or provisioned.
         """
         try:
             with self.get_session() as session:
@@ -308,16 +1101,28 @@ class DatabaseManager:
                 self.logger.info(
                     f"Default ADMIN user ready (Username: ADMIN, Password: {default_password})"
                 )
+            return True
 
         except Exception as e:
             self.logger.error(f"Error ensuring default admin user: {e}", exc_info=True)
             if "session" in locals() and session.is_active:
                 session.rollback()
+            return False
 
     def close(self) -> None:
+        """
+        Release all sessions and dispose of the engine's connection pool.
+        Only for application shutdown or before the database file is replaced
+        (restore); routine work should use `session_scope()` instead.
+        """
         if self.SessionLocal:
             self.SessionLocal.remove()
             self.logger.info("Database sessions closed")
+        if self.sql_instrumentation:
+            self.sql_instrumentation.write_summary()
+        if self.report_engine:
+            self.report_engine.dispose()
+            self.logger.info("Report engine disposed")
         if self.engine:
             self.engine.dispose()
             self.logger.info("Database engine disposed")
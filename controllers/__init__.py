@@ -1,25 +1,37 @@
 # controllers/__init__.py
 """
 EDSI Veterinary Management System - Controllers Package
+
+Controllers are imported on first attribute access (PEP 562), so
+`from controllers import FinancialController` only loads the financial
+controller and its dependencies instead of every controller in the package.
 """
-from .user_controller import UserController
-from .location_controller import LocationController
-from .charge_code_controller import ChargeCodeController
-from .owner_controller import OwnerController
-from .financial_controller import FinancialController
-from .horse_controller import HorseController
-from .company_profile_controller import CompanyProfileController
-from .veterinarian_controller import VeterinarianController
-from .reports_controller import ReportsController
+import importlib
+
+_CONTROLLER_MODULES = {
+    "UserController": ".user_controller",
+    "LocationController": ".location_controller",
+    "ChargeCodeController": ".charge_code_controller",
+    "OwnerController": ".owner_controller",
+    "FinancialController": ".financial_controller",
+    "HorseController": ".horse_controller",
+    "CompanyProfileController": ".company_profile_controller",
+    "VeterinarianController": ".veterinarian_controller",
+    "ReportsController": ".reports_controller",
+    "BillingRunController": ".billing_run_controller",
+}
+
+__all__ = list(_CONTROLLER_MODULES)
+
+
+def __getattr__(name):
+    module_name = _CONTROLLER_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
 
-__all__ = [
-    "UserController",
-    "LocationController",
-    "ChargeCodeController",
-    "OwnerController",
-    "FinancialController",
-    "HorseController",
-    "CompanyProfileController",
-    "VeterinarianController",
-    "ReportsController",
-]
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
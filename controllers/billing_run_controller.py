@@ -0,0 +1,441 @@
+# controllers/billing_run_controller.py
+"""
+EDSI Veterinary Management System - Billing Run Controller
+Version: 1.3.0
+Purpose: Practice-wide month-end billing. Finds every unbilled (ACTIVE) charge in a
+         date range across all horses and invoices it in chunks of owners, one
+         commit per chunk. The run and its owners are journaled (`BillingRun`,
+         `BillingRunOwner`). The journal holds the owners who will be invoiced:
+         every co-owner (`HorseOwner`) of a horse with charges in the period. A
+         chunk bills all of those charges for each horse its owners own, so a
+         horse is never split across chunks. Each owner left with nothing to bill,
+         co-owners included, is marked DONE in the same commit, so a cancelled or
+         crashed run resumes with the owners that are still PENDING and never
+         bills anyone twice.
+Last Updated: October 16, 2026
+Author: Gemini
+
+Changelog:
+- v1.3.0 (2026-10-16):
+    - The journal and the chunks follow the owners who are invoiced, not the
+      charges' `owner_id`. Invoicing bills every co-owner of a horse, so a horse
+      whose charges carried different `owner_id` values used to be split across
+      chunks and invoiced once per chunk for each co-owner. Chunks now bill by
+      horse, and `owners_total`/`owners_done` count every co-owner.
+- v1.2.2 (2026-10-16):
+    - Each chunk records the invoices it created in `BillingRunInvoice`, in the
+      same commit. `get_run_invoice_ids` reads them from there instead of
+      guessing by owner and creation time, which missed co-owners' invoices.
+- v1.2.1 (2026-10-16):
+    - `get_run_invoice_ids` only returns invoices of owners the run billed (its
+      DONE `BillingRunOwner` entries), so an invoice entered by hand for another
+      owner while the run was billing no longer gets its payment link
+      pre-generated with the run's.
+- v1.2.0 (2026-10-16):
+    - Added `get_run_invoice_ids` and `pregenerate_payment_links`. The second
+      creates the online payment links of a finished run's invoices concurrently,
+      for a background thread.
+- v1.1.0 (2026-10-16):
+    - A completed run takes the month-close owner balance snapshots
+      (`OwnerLedger.ensure_month_close_snapshot`) if they are missing.
+- v1.0.0 (2026-10-16):
+    - Initial creation with `start_billing_run`, `run_billing`, `get_billing_run`
+      and `get_resumable_run`.
+"""
+
+import logging
+from collections import Counter
+from datetime import date, datetime
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, func, insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from config.app_config import AppConfig
+from config.database_config import db_manager
+from controllers.financial_controller import FinancialController
+from models import (
+    BillingRun,
+    BillingRunInvoice,
+    BillingRunOwner,
+    HorseOwner,
+    Invoice,
+    Transaction,
+)
+from services.owner_ledger import OwnerLedger
+
+# progress_callback(owners_done, owners_total, invoices_created)
+ProgressCallback = Callable[[int, int, int], None]
+
+
+class BillingRunError(Exception):
+    """A chunk of a billing run could not be billed; the chunk is rolled back."""
+
+
+class BillingRunController:
+    """Controller for practice-wide billing runs."""
+
+    RESUMABLE_STATUSES = ("IN_PROGRESS", "CANCELLED", "FAILED")
+
+    def __init__(self, financial_controller: Optional[FinancialController] = None):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.financial_controller = financial_controller or FinancialController()
+        self.ledger = OwnerLedger()
+
+    def get_billing_run(self, run_id: int) -> Optional[BillingRun]:
+        with db_manager().session_scope() as session:
+            return session.get(BillingRun, run_id)
+
+    def get_resumable_run(self) -> Optional[BillingRun]:
+        """The newest run that was cancelled, failed or interrupted, if any."""
+        try:
+            with db_manager().session_scope() as session:
+                return (
+                    session.query(BillingRun)
+                    .filter(BillingRun.status.in_(self.RESUMABLE_STATUSES))
+                    .order_by(BillingRun.run_id.desc())
+                    .first()
+                )
+        except SQLAlchemyError as e:
+            self.logger.error(
+                f"Error fetching resumable billing run: {e}", exc_info=True
+            )
+            return None
+
+    def start_billing_run(
+        self, period_start: date, period_end: date, current_user_id: str
+    ) -> Tuple[bool, str, Optional[BillingRun]]:
+        """
+        Journals a new run: one PENDING row per owner of a horse with ACTIVE
+        charges dated in [period_start, period_end]. Nothing is billed until
+        `run_billing`.
+        """
+        if period_start > period_end:
+            return False, "The period start date must not be after the end date.", None
+
+        unfinished = self.get_resumable_run()
+        if unfinished:
+            return (
+                False,
+                f"Billing run #{unfinished.run_id} ({unfinished.period_start} to "
+                f"{unfinished.period_end}) has not finished. Resume it before "
+                f"starting a new run.",
+                None,
+            )
+
+        try:
+            with db_manager().session_scope() as session:
+                owner_ids = list(
+                    session.scalars(
+                        select(HorseOwner.owner_id)
+                        .where(
+                            HorseOwner.horse_id.in_(
+                                self._horses_to_bill(period_start, period_end)
+                            )
+                        )
+                        .distinct()
+                        .order_by(HorseOwner.owner_id)
+                    )
+                )
+                if not owner_ids:
+                    return (
+                        False,
+                        f"No unbilled charges between {period_start} and {period_end}.",
+                        None,
+                    )
+
+                run = BillingRun(
+                    period_start=period_start,
+                    period_end=period_end,
+                    status="IN_PROGRESS",
+                    owners_total=len(owner_ids),
+                    created_by=current_user_id,
+                    modified_by=current_user_id,
+                )
+                session.add(run)
+                session.flush()
+                session.bulk_insert_mappings(
+                    BillingRunOwner,
+                    [
+                        {
+                            "run_id": run.run_id,
+                            "owner_id": owner_id,
+                            "status": "PENDING",
+                            "created_by": current_user_id,
+                        }
+                        for owner_id in owner_ids
+                    ],
+                )
+                self.logger.info(
+                    f"Billing run #{run.run_id} journaled: {len(owner_ids)} owner(s), "
+                    f"{period_start} to {period_end}."
+                )
+                return True, f"Billing run #{run.run_id} created.", run
+        except SQLAlchemyError as e:
+            self.logger.error(f"Error starting billing run: {e}", exc_info=True)
+            return False, f"A database error occurred: {e}", None
+
+    def run_billing(
+        self,
+        run_id: int,
+        current_user_id: str,
+        progress_callback: Optional[ProgressCallback] = None,
+        cancel_requested: Optional[Callable[[], bool]] = None,
+        owners_per_chunk: Optional[int] = None,
+    ) -> Tuple[bool, str, Optional[BillingRun]]:
+        """
+        Bills a journaled run's PENDING owners, `owners_per_chunk` at a time. Each
+        chunk is one commit. `cancel_requested` is checked between chunks, and
+        `progress_callback` is called after each commit. Intended to run off the
+        GUI thread; both callbacks are invoked on the calling thread.
+        """
+        chunk_size = owners_per_chunk or AppConfig.BILLING_RUN_OWNERS_PER_CHUNK
+        self.logger.info(
+            f"Billing run #{run_id}: billing pending owners, {chunk_size} per chunk."
+        )
+        try:
+            while True:
+                if cancel_requested and cancel_requested():
+                    run = self._finish_run(run_id, "CANCELLED", current_user_id)
+                    return (
+                        False,
+                        f"Billing run #{run_id} cancelled after {run.owners_done} of "
+                        f"{run.owners_total} owner(s). It can be resumed.",
+                        run,
+                    )
+
+                with db_manager().session_scope() as session:
+                    run = session.get(BillingRun, run_id)
+                    if run is None:
+                        return False, f"Billing run #{run_id} not found.", None
+                    if run.status == "COMPLETED":
+                        return True, f"Billing run #{run_id} is already complete.", run
+                    if not self._bill_next_chunk(
+                        session, run, chunk_size, current_user_id
+                    ):
+                        break
+                    progress = (run.owners_done, run.owners_total, run.invoices_created)
+
+                if progress_callback:
+                    progress_callback(*progress)
+
+            self._snapshot_balances()
+            run = self._finish_run(run_id, "COMPLETED", current_user_id)
+            return (
+                True,
+                f"Billing run #{run_id} complete: {run.invoices_created} invoice(s) "
+                f"for {run.owners_total} owner(s).",
+                run,
+            )
+
+        except (SQLAlchemyError, BillingRunError) as e:
+            self.logger.error(f"Billing run #{run_id} failed: {e}", exc_info=True)
+            try:
+                run = self._finish_run(run_id, "FAILED", current_user_id, error=str(e))
+            except SQLAlchemyError:
+                run = None
+            return (
+                False,
+                f"Billing run #{run_id} stopped: {e}. Completed chunks are saved; "
+                f"resume the run to continue.",
+                run,
+            )
+
+    @staticmethod
+    def _horses_to_bill(period_start: date, period_end: date):
+        """SELECT of the horses with ACTIVE charges dated in the period."""
+        return select(Transaction.horse_id).where(
+            Transaction.status == "ACTIVE",
+            Transaction.transaction_date.between(period_start, period_end),
+        )
+
+    def _bill_next_chunk(
+        self, session: Session, run: BillingRun, chunk_size: int, current_user_id: str
+    ) -> bool:
+        """
+        Bills every period charge of the horses owned by the next `chunk_size`
+        PENDING owners of `run`, in the caller's unit of work. Those owners, and
+        any co-owner left with nothing to bill, are marked DONE. Returns False
+        when no owner is pending.
+        """
+        owner_ids: List[int] = [
+            owner_id
+            for (owner_id,) in session.query(BillingRunOwner.owner_id)
+            .filter(
+                BillingRunOwner.run_id == run.run_id,
+                BillingRunOwner.status == "PENDING",
+            )
+            .order_by(BillingRunOwner.owner_id)
+            .limit(chunk_size)
+        ]
+        if not owner_ids:
+            return False
+
+        # Whole horses: each horse's charges are invoiced to all its co-owners
+        charges = (
+            session.query(Transaction.transaction_id, Transaction.horse_id)
+            .filter(
+                Transaction.status == "ACTIVE",
+                Transaction.transaction_date.between(run.period_start, run.period_end),
+                Transaction.horse_id.in_(
+                    select(HorseOwner.horse_id).where(HorseOwner.owner_id.in_(owner_ids))
+                ),
+            )
+            .all()
+        )
+        invoices = []
+        if charges:
+            # Joins this session, so the invoices commit together with the journal
+            success, message, invoices = (
+                self.financial_controller.generate_invoices_from_transactions(
+                    [transaction_id for transaction_id, _ in charges], current_user_id
+                )
+            )
+            if not success:
+                raise BillingRunError(message)
+
+        charges_per_horse = Counter(horse_id for _, horse_id in charges)
+        charges_per_owner = Counter({owner_id: 0 for owner_id in owner_ids})
+        for horse_id, owner_id in session.execute(
+            select(HorseOwner.horse_id, HorseOwner.owner_id).where(
+                HorseOwner.horse_id.in_(list(charges_per_horse))
+            )
+        ):
+            charges_per_owner[owner_id] += charges_per_horse[horse_id]
+        # Co-owners who still own another horse with charges stay PENDING
+        still_pending = set(
+            session.scalars(
+                select(HorseOwner.owner_id)
+                .where(
+                    HorseOwner.owner_id.in_(list(charges_per_owner)),
+                    HorseOwner.horse_id.in_(
+                        self._horses_to_bill(run.period_start, run.period_end)
+                    ),
+                )
+                .distinct()
+            )
+        )
+
+        now = datetime.utcnow()
+        journal = BillingRunOwner.__table__
+        session.connection().execute(
+            journal.update()
+            .where(
+                journal.c.run_id == bindparam("b_run_id"),
+                journal.c.owner_id == bindparam("b_owner_id"),
+            )
+            .values(
+                status=bindparam("b_status"),
+                charges_billed=journal.c.charges_billed + bindparam("b_charges"),
+                completed_at=bindparam("b_completed_at"),
+                modified_date=now,
+                modified_by=current_user_id,
+            ),
+            [
+                {
+                    "b_run_id": run.run_id,
+                    "b_owner_id": owner_id,
+                    "b_charges": charges_billed,
+                    "b_status": "PENDING" if owner_id in still_pending else "DONE",
+                    "b_completed_at": None if owner_id in still_pending else now,
+                }
+                for owner_id, charges_billed in charges_per_owner.items()
+            ],
+        )
+        if invoices:
+            session.execute(
+                insert(BillingRunInvoice),
+                [
+                    {
+                        "run_id": run.run_id,
+                        "invoice_id": invoice.invoice_id,
+                        "created_by": current_user_id,
+                    }
+                    for invoice in invoices
+                ],
+            )
+        run.owners_done = session.scalar(
+            select(func.count()).where(
+                BillingRunOwner.run_id == run.run_id,
+                BillingRunOwner.status == "DONE",
+            )
+        )
+        run.invoices_created += len(invoices)
+        run.status = "IN_PROGRESS"
+        run.modified_by = current_user_id
+        session.flush()
+        self.logger.info(
+            f"Billing run #{run.run_id}: {len(owner_ids)} owner(s), "
+            f"{len(charges_per_horse)} horse(s), {len(charges)} charge(s), "
+            f"{len(invoices)} invoice(s); {run.owners_done}/{run.owners_total} done."
+        )
+        return True
+
+    def get_run_invoice_ids(self, run_id: int) -> List[int]:
+        """IDs of the invoices the run created that still have a balance due."""
+        try:
+            with db_manager().session_scope() as session:
+                query = (
+                    session.query(Invoice.invoice_id)
+                    .join(
+                        BillingRunInvoice,
+                        BillingRunInvoice.invoice_id == Invoice.invoice_id,
+                    )
+                    .filter(
+                        BillingRunInvoice.run_id == run_id,
+                        Invoice.balance_due > 0,
+                    )
+                    .order_by(Invoice.invoice_id)
+                )
+                return [invoice_id for (invoice_id,) in query]
+        except SQLAlchemyError as e:
+            self.logger.error(
+                f"Error fetching invoices of billing run #{run_id}: {e}", exc_info=True
+            )
+            return []
+
+    def pregenerate_payment_links(
+        self, run_id: int, doctor_stripe_secret_key: str, doctor_identifier: str
+    ) -> Tuple[int, int]:
+        """
+        Creates the online payment links of a run's invoices up front, so printing
+        and emailing them does not wait on the backend. Meant for a background
+        thread. Returns (links created, failures).
+        """
+        created, failed = self.financial_controller.pregenerate_payment_links(
+            self.get_run_invoice_ids(run_id),
+            doctor_stripe_secret_key,
+            doctor_identifier,
+        )
+        self.logger.info(
+            f"Billing run #{run_id}: {created} payment link(s) created, {failed} failed."
+        )
+        return created, failed
+
+    def _snapshot_balances(self) -> None:
+        """Takes this month's close-of-month balance snapshots if still missing."""
+        try:
+            with db_manager().session_scope() as session:
+                self.ledger.ensure_month_close_snapshot(session)
+        except SQLAlchemyError as e:
+            # The invoices are committed; a missing snapshot only costs speed
+            self.logger.warning(f"Month-close balance snapshot failed: {e}")
+
+    def _finish_run(
+        self,
+        run_id: int,
+        status: str,
+        current_user_id: str,
+        error: Optional[str] = None,
+    ) -> BillingRun:
+        with db_manager().session_scope() as session:
+            run = session.get(BillingRun, run_id)
+            run.status = status
+            run.last_error = error
+            run.modified_by = current_user_id
+            if status == "COMPLETED":
+                run.finished_at = datetime.utcnow()
+            session.flush()
+            self.logger.info(f"Billing run #{run_id} marked {status}.")
+            return run
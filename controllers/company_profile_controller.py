@@ -1,10 +1,15 @@
 # controllers/company_profile_controller.py
 """
 EDSI Veterinary Management System - Company Profile Controller
-Version: 1.0.0
+Version: 1.1.0
 Purpose: Business logic for managing the company's profile information.
-Last Updated: June 8, 2025
+Last Updated: October 16, 2026
 Author: Gemini
+
+Changelog:
+- v1.1.0 (2026-10-16):
+    - Both methods now use `db_manager().session_scope()` instead of disposing the
+      database engine after every call.
 """
 
 import logging
@@ -24,17 +29,15 @@ class CompanyProfileController:
         """
         Retrieves the company profile. Assumes a single profile with id=1.
         """
-        session = db_manager().get_session()  # Corrected line
         try:
-            profile = (
-                session.query(CompanyProfile).filter(CompanyProfile.id == 1).first()
-            )
-            return profile
+            with db_manager().session_scope() as session:
+                profile = (
+                    session.query(CompanyProfile).filter(CompanyProfile.id == 1).first()
+                )
+                return profile
         except SQLAlchemyError as e:
             self.logger.error(f"Error retrieving company profile: {e}", exc_info=True)
             return None
-        finally:
-            db_manager().close()  # Corrected line
 
     def update_company_profile(
         self, data: Dict[str, Any], current_user_id: str
@@ -42,31 +45,30 @@ class CompanyProfileController:
         """
         Creates or updates the company profile. Assumes a single profile with id=1.
         """
-        session = db_manager().get_session()  # Corrected line
         try:
-            profile = (
-                session.query(CompanyProfile).filter(CompanyProfile.id == 1).first()
-            )
+            with db_manager().session_scope() as session:
+                profile = (
+                    session.query(CompanyProfile).filter(CompanyProfile.id == 1).first()
+                )
 
-            if not profile:
-                self.logger.info("No existing company profile found. Creating new one.")
-                profile = CompanyProfile(id=1, created_by=current_user_id)
-                session.add(profile)
+                if not profile:
+                    self.logger.info(
+                        "No existing company profile found. Creating new one."
+                    )
+                    profile = CompanyProfile(id=1, created_by=current_user_id)
+                    session.add(profile)
 
-            for key, value in data.items():
-                if hasattr(profile, key):
-                    setattr(profile, key, value)
+                for key, value in data.items():
+                    if hasattr(profile, key):
+                        setattr(profile, key, value)
 
-            profile.modified_by = current_user_id
-            session.commit()
-            self.logger.info(f"Company profile updated by {current_user_id}.")
-            return True, "Company profile updated successfully."
+                profile.modified_by = current_user_id
+                session.flush()
+                self.logger.info(f"Company profile updated by {current_user_id}.")
+                return True, "Company profile updated successfully."
 
         except SQLAlchemyError as e:
-            session.rollback()
             self.logger.error(
                 f"Database error updating company profile: {e}", exc_info=True
             )
             return False, f"A database error occurred: {e}"
-        finally:
-            db_manager().close()  # Corrected line
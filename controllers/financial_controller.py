@@ -2,13 +2,93 @@
 
 """
 EDSI Veterinary Management System - Financial Controller
-Version: 2.6.1
+Version: 2.17.0
 Purpose: Handles business logic for financial operations like creating invoices and recording payments.
          Now refactored to remove direct Stripe API key storage, receiving it per request.
-Last Updated: July 1, 2025
+Last Updated: October 16, 2026
 Author: Gemini
 
 Changelog:
+- v2.17.0 (2026-10-16):
+    - Adding, editing and deleting a charge now updates its month's
+      `ChargeUsageRollup` row through `services.usage_rollup` in the same
+      transaction. An edit removes the charge's old values and adds the new
+      ones, so a change of date, code or price moves it between rows.
+- v2.16.0 (2026-10-16):
+    - Invoicing no longer copies each charge into a new `BILLED` `Transaction`
+      per owner. `generate_invoices_from_transactions` bulk-inserts one
+      `TransactionAllocation` (charge, invoice, owner, share, amount) per line and
+      marks the charge PROCESSED.
+    - Replaced `get_transactions_for_invoice` with `get_invoice_line_items`, which
+      returns the invoice's allocations. `get_invoice_history_for_horse`
+      prefetches `Invoice.allocations`.
+    - `update_charge_transaction` and `delete_charge_transaction` refuse any charge
+      that is no longer ACTIVE. Billed charges carry no `invoice_id` now.
+- v2.15.0 (2026-10-16):
+    - Added `get_invoice_history_for_horse`. It loads the invoices of all the
+      horse's owners, with their owners, line items and charge codes, in two
+      queries.
+- v2.14.0 (2026-10-16):
+    - Added `allocate_owner_payment`. It applies one owner payment to their open
+      invoices, oldest first or to chosen invoices, in one transaction. Open
+      invoices come from an indexed query on (owner_id, invoice_date). Any
+      remainder is recorded as an unapplied OwnerPayment (no invoice) and held as
+      credit on the owner's balance.
+    - `_apply_payments` accepts unapplied lines (no invoice).
+- v2.13.0 (2026-10-16):
+    - Added `record_payments_batch`. It validates every line of a deposit against
+      current balances, then applies all payments, invoice balances and ledger
+      entries in one commit. Nothing is recorded if any line is invalid.
+    - Added `_apply_payments` (shared with `apply_confirmed_online_payments`) and
+      `get_open_invoices`.
+- v2.12.0 (2026-10-16):
+    - Payment links are stored per invoice (`InvoicePaymentLink`) with their
+      amount and expiry. `get_or_create_payment_link` reuses a stored link until
+      it expires or the balance due changes.
+    - Added `pregenerate_payment_links`: concurrent link creation over the pooled
+      backend client, stored in one commit. Also added `get_cached_payment_links`,
+      `get_invoices_needing_payment_links` and `save_payment_links`.
+    - `create_stripe_payment_link` posts through the pooled session with a timeout.
+- v2.11.0 (2026-10-16):
+    - Added `apply_confirmed_online_payments`. It records the full payment of
+      every backend-confirmed invoice in one transaction: one bulk OwnerPayment
+      insert and one `OwnerLedger.post_many`. Invoices already settled are skipped.
+    - `get_stripe_payment_status` now goes through a pooled
+      `services.payment_status_sync.PaymentStatusClient`, which adds a request
+      timeout. Its error branches now return 3-tuples as documented; before, they
+      returned 4-tuples.
+- v2.10.0 (2026-10-16):
+    - Invoice sequence numbers now come from the `invoice_sequences` allocator
+      (`_allocate_monthly_sequence_numbers`), which replaces the MAX(...) + 1
+      lookup. Each owner's whole range for a generation call, or a billing-run
+      chunk, is reserved with one atomic `UPDATE ... RETURNING`. Two workstations
+      can no longer hand out the same number, and numbers of deleted invoices are
+      not reused.
+- v2.9.1 (2026-10-16):
+    - `record_payment` stores the invoice on the new `OwnerPayment.invoice_id`.
+- v2.9.0 (2026-10-16):
+    - Owner balance changes go through `services.owner_ledger.OwnerLedger`. That
+      covers invoice generation, `record_payment` and `delete_invoice`. The
+      balance is incremented in SQL and the ledger row's `new_balance` is read back
+      after the UPDATE. The Python read-modify-write on `Owner.balance` is gone.
+- v2.8.0 (2026-10-16):
+    - `generate_invoices_from_transactions` is now set-based. One grouped query
+      (`_last_monthly_sequence_numbers`) finds every owner's last sequence number
+      for the month. Invoices go in as one multi-row INSERT ... RETURNING and line
+      items as one executemany. `_apply_invoice_totals_to_owners` raises owner
+      balances with an executemany `balance = balance + :amount` UPDATE and bulk
+      inserts the billing history. Invoice numbers, line items, totals, balances and
+      history rows are unchanged. 200 horses: 1426 statements -> 10.
+- v2.7.2 (2026-10-16):
+    - `requests` is imported inside `create_stripe_payment_link` and
+      `get_stripe_payment_status`. The HTTP client is then only loaded the first
+      time the backend API is called, not at application startup.
+- v2.7.1 (2026-10-16):
+    - `get_invoices_for_owner` breaks same-day ties by newest invoice first. The
+      order is now deterministic and served straight from `ix_invoices_owner_date`.
+- v2.7.0 (2026-10-16):
+    - All database methods now run inside `db_manager().session_scope()`. The engine
+      and its connection pool are no longer disposed after every call.
 - v2.6.1 (2025-07-01):
     - **BUG FIX**: Modified `get_transaction_by_id` to eagerly load the `charge_code`
       relationship using `joinedload(Transaction.charge_code)` to prevent
@@ -61,35 +141,42 @@ Changelog:
       charges for a single horse are correctly grouped onto one invoice per owner.
 """
 import logging
-from typing import List, Optional, Dict, Any, Tuple
+from typing import List, Optional, Dict, Any, Set, Tuple
 from decimal import Decimal, InvalidOperation
-from datetime import date, datetime
-from collections import defaultdict
+from datetime import date, datetime, timedelta
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import joinedload, selectinload
-from sqlalchemy import func, desc
+from sqlalchemy.orm import Session, contains_eager, joinedload, selectinload
+from sqlalchemy import and_, case, func, insert, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
+from config.app_config import AppConfig
 from config.database_config import db_manager
+from services.owner_ledger import LedgerEntry, OwnerLedger
+from services.usage_rollup import UsageRollup
 from models import (
     Transaction,
+    TransactionAllocation,
     Invoice,
+    InvoiceSequence,
+    InvoicePaymentLink,
     Horse,
     Owner,
     ChargeCode,
     User,
     ChargeCodeCategory,
-    OwnerBillingHistory,
     HorseOwner,
     OwnerPayment,
 )
 
-import requests
-
 
 class FinancialController:
     def __init__(self):
         self.logger = logging.getLogger(self.__class__.__name__)
+        self.ledger = OwnerLedger()
+        self.usage_rollup = UsageRollup()
         # Configure the base URL of your centralized backend API
         # IMPORTANT: Replace this with your ngrok HTTPS URL for local testing,
         # then with your permanent VPS URL when deployed.
@@ -97,6 +184,8 @@ class FinancialController:
             "https://3474-109-169-39-102.ngrok-free.app"  # REPLACE WITH YOUR NGROK URL!
         )
 
+        self._payment_status_client = None
+
         # REMOVED: self.stripe_secret_key = "sk_test_YOUR_STRIPE_SECRET_KEY"
         # REMOVED: stripe.api_key = self.stripe_secret_key
 
@@ -133,8 +222,13 @@ class FinancialController:
             "doctor_identifier": doctor_identifier,
         }
 
+        import requests
+
+        client = self._get_payment_status_client()
         try:
-            response = requests.post(endpoint, json=payload)
+            response = client.session.post(
+                endpoint, json=payload, timeout=client.timeout
+            )
             response.raise_for_status()
 
             response_data = response.json()
@@ -185,363 +279,942 @@ class FinancialController:
             Tuple[bool, Optional[bool], str]: (success, is_paid_status, message)
                 is_paid_status is True if paid, False if not yet confirmed, None on error.
         """
-        endpoint = f"{self.backend_api_base_url}/get-payment-status/{doctor_identifier}/{internal_invoice_id}"
+        status = self._get_payment_status_client().get_status(
+            doctor_identifier, internal_invoice_id
+        )
+        if status.ok:
+            self.logger.info(
+                f"Received payment status for Invoice {internal_invoice_id} (Doctor {doctor_identifier}): {'Paid' if status.is_paid else 'Unpaid'}"
+            )
+        return status.ok, status.is_paid, status.message
 
-        try:
-            response = requests.get(endpoint)
-            response.raise_for_status()
+    def _get_payment_status_client(self):
+        """The pooled backend client, created (and `requests` imported) on first use."""
+        client = self._payment_status_client
+        if client is None or client.base_url != self.backend_api_base_url.rstrip("/"):
+            from services.payment_status_sync import PaymentStatusClient
 
-            response_data = response.json()
-            if "is_paid" in response_data:
-                is_paid = response_data["is_paid"]
-                self.logger.info(
-                    f"Received payment status for Invoice {internal_invoice_id} (Doctor {doctor_identifier}): {'Paid' if is_paid else 'Unpaid'}"
+            self._payment_status_client = PaymentStatusClient(self.backend_api_base_url)
+        return self._payment_status_client
+
+    def get_cached_payment_links(self, invoice_ids: List[int]) -> Dict[int, str]:
+        """
+        Stored payment links that can still be used: not expired, and created for
+        exactly the invoice's current balance due.
+        """
+        if not invoice_ids:
+            return {}
+        try:
+            with db_manager().session_scope() as session:
+                return dict(
+                    session.query(InvoicePaymentLink.invoice_id, InvoicePaymentLink.url)
+                    .join(Invoice, Invoice.invoice_id == InvoicePaymentLink.invoice_id)
+                    .filter(
+                        InvoicePaymentLink.invoice_id.in_(invoice_ids),
+                        InvoicePaymentLink.amount == Invoice.balance_due,
+                        InvoicePaymentLink.expires_at > datetime.utcnow(),
+                    )
+                    .all()
                 )
-                return True, is_paid, "Payment status retrieved successfully."
-            else:
-                self.logger.error(
-                    f"Backend API response missing 'is_paid' field for Invoice {internal_invoice_id}: {response_data}"
+        except SQLAlchemyError as e:
+            self.logger.error(f"Error reading cached payment links: {e}", exc_info=True)
+            return {}
+
+    def get_invoices_needing_payment_links(
+        self, invoice_ids: List[int]
+    ) -> List[Invoice]:
+        """Invoices with a balance due and no usable cached payment link."""
+        if not invoice_ids:
+            return []
+        try:
+            with db_manager().session_scope() as session:
+                return (
+                    session.query(Invoice)
+                    .outerjoin(
+                        InvoicePaymentLink,
+                        and_(
+                            InvoicePaymentLink.invoice_id == Invoice.invoice_id,
+                            InvoicePaymentLink.amount == Invoice.balance_due,
+                            InvoicePaymentLink.expires_at > datetime.utcnow(),
+                        ),
+                    )
+                    .options(joinedload(Invoice.owner))
+                    .filter(
+                        Invoice.invoice_id.in_(invoice_ids),
+                        Invoice.balance_due > 0,
+                        InvoicePaymentLink.invoice_id.is_(None),
+                    )
+                    .order_by(Invoice.invoice_id)
+                    .all()
+                )
+        except SQLAlchemyError as e:
+            self.logger.error(
+                f"Error finding invoices without payment links: {e}", exc_info=True
+            )
+            return []
+
+    def save_payment_links(
+        self, links: Dict[int, Tuple[Decimal, str]], current_user_id: str
+    ) -> bool:
+        """Stores {invoice_id: (amount, url)}, replacing older links, in one commit."""
+        if not links:
+            return True
+        now = datetime.utcnow()
+        expires_at = now + timedelta(days=AppConfig.PAYMENT_LINK_TTL_DAYS)
+        statement = sqlite_insert(InvoicePaymentLink)
+        try:
+            with db_manager().session_scope() as session:
+                session.execute(
+                    statement.on_conflict_do_update(
+                        index_elements=[InvoicePaymentLink.invoice_id],
+                        set_={
+                            "url": statement.excluded.url,
+                            "amount": statement.excluded.amount,
+                            "expires_at": statement.excluded.expires_at,
+                            "modified_date": now,
+                            "modified_by": current_user_id,
+                        },
+                    ),
+                    [
+                        {
+                            "invoice_id": invoice_id,
+                            "url": url,
+                            "amount": amount,
+                            "expires_at": expires_at,
+                            "created_by": current_user_id,
+                            "modified_by": current_user_id,
+                        }
+                        for invoice_id, (amount, url) in links.items()
+                    ],
                 )
-                return False, None, "Invalid response from backend API."
+            return True
+        except SQLAlchemyError as e:
+            self.logger.error(f"Error saving payment links: {e}", exc_info=True)
+            return False
+
+    @staticmethod
+    def _payment_link_request(invoice: Invoice) -> Dict[str, Any]:
+        """`create_stripe_payment_link` arguments describing `invoice`."""
+        owner = invoice.owner
+        owner_name = (
+            owner.farm_name or f"{owner.first_name} {owner.last_name}"
+            if owner
+            else "N/A"
+        )
+        return {
+            "invoice_id": invoice.invoice_id,
+            "amount": invoice.balance_due,
+            "description": f"Payment for Invoice #{invoice.display_invoice_id} for {owner_name}",
+            "customer_email": owner.email if owner and owner.email else None,
+        }
 
-        except requests.exceptions.RequestException as e:
-            self.logger.warning(
-                f"Network or API communication error checking payment status for Invoice {internal_invoice_id}: {e}"
+    def get_or_create_payment_link(
+        self,
+        invoice: Invoice,
+        doctor_stripe_secret_key: str,
+        doctor_identifier: str,
+    ) -> Tuple[bool, str, Optional[str]]:
+        """
+        The invoice's cached payment link, or a new one from the backend if there
+        is none, it has expired, or the balance due has changed since.
+        """
+        cached = self.get_cached_payment_links([invoice.invoice_id])
+        if invoice.invoice_id in cached:
+            return True, "Using the existing payment link.", cached[invoice.invoice_id]
+
+        success, message, payment_link_url = self.create_stripe_payment_link(
+            doctor_stripe_secret_key=doctor_stripe_secret_key,
+            doctor_identifier=doctor_identifier,
+            **self._payment_link_request(invoice),
+        )
+        if success and payment_link_url:
+            self.save_payment_links(
+                {invoice.invoice_id: (invoice.balance_due, payment_link_url)},
+                doctor_identifier,
             )
-            return False, None, f"Network/API communication error: {e}", None
-        except Exception as e:
+        return success, message, payment_link_url
+
+    def pregenerate_payment_links(
+        self,
+        invoice_ids: List[int],
+        doctor_stripe_secret_key: str,
+        doctor_identifier: str,
+    ) -> Tuple[int, int]:
+        """
+        Creates payment links for every invoice in `invoice_ids` that has a balance
+        due and no usable cached link. Requests run concurrently over the pooled
+        backend client; the links are stored in one commit. Meant for a
+        background thread. Returns (links created, failures).
+        """
+        invoices = self.get_invoices_needing_payment_links(invoice_ids)
+        if not invoices:
+            return 0, 0
+
+        client = self._get_payment_status_client()
+        with ThreadPoolExecutor(
+            max_workers=client.max_workers, thread_name_prefix="PaymentLink"
+        ) as pool:
+            results = list(
+                pool.map(
+                    lambda invoice: self.create_stripe_payment_link(
+                        doctor_stripe_secret_key=doctor_stripe_secret_key,
+                        doctor_identifier=doctor_identifier,
+                        **self._payment_link_request(invoice),
+                    ),
+                    invoices,
+                )
+            )
+
+        links = {
+            invoice.invoice_id: (invoice.balance_due, payment_link_url)
+            for invoice, (success, _, payment_link_url) in zip(invoices, results)
+            if success and payment_link_url
+        }
+        if not self.save_payment_links(links, doctor_identifier):
+            return 0, len(invoices)
+        self.logger.info(
+            f"Pre-generated {len(links)} payment link(s); "
+            f"{len(invoices) - len(links)} failed."
+        )
+        return len(links), len(invoices) - len(links)
+
+    def apply_confirmed_online_payments(
+        self, invoice_ids: List[int], current_user_id: str = "SYSTEM_SYNC"
+    ) -> Tuple[bool, str, List[int]]:
+        """
+        Records a full payment for every invoice the online payments backend
+        confirmed as paid, in one transaction. Balances are re-read inside that
+        transaction, so an invoice that was settled in the meantime (for example
+        by a sync on another workstation) is skipped rather than paid twice.
+        Returns the IDs of the invoices marked Paid.
+        """
+        today = date.today()
+        try:
+            with db_manager().session_scope() as session:
+                invoices = (
+                    session.query(Invoice)
+                    .options(joinedload(Invoice.owner))
+                    .filter(
+                        Invoice.invoice_id.in_(invoice_ids),
+                        Invoice.balance_due > 0,
+                    )
+                    .order_by(Invoice.invoice_id)
+                    .all()
+                )
+                if not invoices:
+                    return True, "No confirmed invoice still had a balance due.", []
+
+                self._apply_payments(
+                    session,
+                    [
+                        (
+                            invoice,
+                            {
+                                "amount": invoice.balance_due,
+                                "payment_date": today,
+                                "payment_method": "Stripe (Webhook Confirmed)",
+                                "reference_number": f"WEBHOOK_INV{invoice.invoice_id}",
+                                "notes": "Automatically confirmed via Stripe webhook.",
+                            },
+                        )
+                        for invoice in invoices
+                    ],
+                    current_user_id,
+                )
+                paid_ids = [invoice.invoice_id for invoice in invoices]
+                self.logger.info(
+                    f"Recorded {len(paid_ids)} online payment(s) confirmed by the backend."
+                )
+                return (
+                    True,
+                    f"{len(paid_ids)} invoice(s) marked as paid.",
+                    paid_ids,
+                )
+        except SQLAlchemyError as e:
             self.logger.error(
-                f"Unexpected error processing backend API response for Invoice {internal_invoice_id}: {e}",
+                f"Database error recording confirmed online payments: {e}",
                 exc_info=True,
             )
-            return False, None, f"An unexpected error occurred: {str(e)}", None
+            return (
+                False,
+                "A database error occurred while recording confirmed payments.",
+                [],
+            )
 
     def get_invoice_by_id(self, invoice_id: int) -> Optional[Invoice]:
-        session = db_manager().get_session()
         try:
-            invoice = (
-                session.query(Invoice)
-                # Ensure owner is eagerly loaded for display_invoice_id
-                .options(joinedload(Invoice.owner))
-                .filter(Invoice.invoice_id == invoice_id)
-                .first()
-            )
-            return invoice
+            with db_manager().session_scope() as session:
+                invoice = (
+                    session.query(Invoice)
+                    # Ensure owner is eagerly loaded for display_invoice_id
+                    .options(joinedload(Invoice.owner))
+                    .filter(Invoice.invoice_id == invoice_id)
+                    .first()
+                )
+                return invoice
         except SQLAlchemyError as e:
             self.logger.error(
                 f"Error retrieving invoice {invoice_id}: {e}", exc_info=True
             )
             return None
-        finally:
-            db_manager().close()
 
     def get_invoices_for_owner(self, owner_id: int) -> List[Invoice]:
-        session = db_manager().get_session()
         try:
-            invoices = (
-                session.query(Invoice)
-                # Ensure owner is eagerly loaded for display_invoice_id
-                .options(joinedload(Invoice.owner))
-                .filter(
-                    Invoice.owner_id == owner_id, Invoice.status != "INTERNAL_PROCESSED"
-                )
-                .order_by(Invoice.invoice_date.desc())
-                .all()
-            )
-            return invoices
+            with db_manager().session_scope() as session:
+                invoices = (
+                    session.query(Invoice)
+                    # Ensure owner is eagerly loaded for display_invoice_id
+                    .options(joinedload(Invoice.owner))
+                    .filter(
+                        Invoice.owner_id == owner_id,
+                        Invoice.status != "INTERNAL_PROCESSED",
+                    )
+                    .order_by(Invoice.invoice_date.desc(), Invoice.invoice_id.desc())
+                    .all()
+                )
+                return invoices
         except SQLAlchemyError as e:
             self.logger.error(
                 f"Error retrieving invoices for owner {owner_id}: {e}", exc_info=True
             )
             return []
-        finally:
-            db_manager().close()
 
-    def get_transactions_for_invoice(self, invoice_id: int) -> List[Transaction]:
-        session = db_manager().get_session()
+    def get_invoice_history_for_horse(self, horse_id: int) -> List[Invoice]:
+        """
+        Invoices of every owner of the horse, newest first, with `owner` and
+        `allocations` (each with its charge and charge code) loaded: one query
+        for the invoices and one for all their line items.
+        """
         try:
-            transactions = (
-                session.query(Transaction)
-                .filter(Transaction.invoice_id == invoice_id)
-                .options(joinedload(Transaction.charge_code))
-                .order_by(Transaction.transaction_date.asc())
-                .all()
+            with db_manager().session_scope() as session:
+                owner_ids = (
+                    session.query(HorseOwner.owner_id)
+                    .filter(HorseOwner.horse_id == horse_id)
+                    .scalar_subquery()
+                )
+                return (
+                    session.query(Invoice)
+                    .options(
+                        joinedload(Invoice.owner),
+                        selectinload(Invoice.allocations)
+                        .joinedload(TransactionAllocation.transaction)
+                        .joinedload(Transaction.charge_code),
+                    )
+                    .filter(
+                        Invoice.owner_id.in_(owner_ids),
+                        Invoice.status != "INTERNAL_PROCESSED",
+                    )
+                    .order_by(Invoice.invoice_date.desc(), Invoice.invoice_id.desc())
+                    .all()
+                )
+        except SQLAlchemyError as e:
+            self.logger.error(
+                f"Error retrieving invoice history for horse {horse_id}: {e}",
+                exc_info=True,
             )
-            return transactions
+            return []
+
+    def get_invoice_line_items(self, invoice_id: int) -> List[TransactionAllocation]:
+        """The invoice's line items, oldest charge first, with charge codes loaded."""
+        try:
+            with db_manager().session_scope() as session:
+                return (
+                    session.query(TransactionAllocation)
+                    .join(TransactionAllocation.transaction)
+                    .filter(TransactionAllocation.invoice_id == invoice_id)
+                    .options(
+                        contains_eager(TransactionAllocation.transaction).joinedload(
+                            Transaction.charge_code
+                        )
+                    )
+                    .order_by(Transaction.transaction_date, Transaction.transaction_id)
+                    .all()
+                )
         except SQLAlchemyError as e:
             self.logger.error(
-                f"Error retrieving transactions for invoice {invoice_id}: {e}",
+                f"Error retrieving line items for invoice {invoice_id}: {e}",
                 exc_info=True,
             )
             return []
-        finally:
-            db_manager().close()
 
     def generate_invoices_from_transactions(
         self, source_transaction_ids: List[int], current_user_id: str
     ) -> Tuple[bool, str, List[Invoice]]:
+        """
+        Bills the given ACTIVE charges: one invoice per (horse, owner), with each
+        line a `TransactionAllocation` of the charge prorated by the owner's
+        percentage, owner balances increased and a billing-history entry per
+        invoice. The charges themselves are marked PROCESSED, not copied. Rows are built in memory and written
+        with a handful of bulk statements, whatever the number of horses.
+        """
         self.logger.info(
             f"--- Starting Invoice Generation for transaction IDs: {source_transaction_ids} ---"
         )
-        session = db_manager().get_session()
         try:
-            if not source_transaction_ids:
-                return False, "No charges were selected to be invoiced.", []
-
-            source_transactions = (
-                session.query(Transaction)
-                .filter(Transaction.transaction_id.in_(source_transaction_ids))
-                .options(
-                    joinedload(Transaction.horse)
-                    .selectinload(Horse.owner_associations)
-                    .joinedload(HorseOwner.owner)
-                )
-                .all()
-            )
-
-            for t in source_transactions:
-                if t.status != "ACTIVE":
-                    return (
-                        False,
-                        f"Charge '{t.description}' (ID: {t.transaction_id}) has already been processed.",
-                        [],
+            with db_manager().session_scope() as session:
+                if not source_transaction_ids:
+                    return False, "No charges were selected to be invoiced.", []
+
+                source_transactions = (
+                    session.query(Transaction)
+                    .filter(Transaction.transaction_id.in_(source_transaction_ids))
+                    .options(
+                        joinedload(Transaction.horse)
+                        .selectinload(Horse.owner_associations)
+                        .joinedload(HorseOwner.owner)
                     )
+                    .all()
+                )
 
-            generated_invoices = []
+                for t in source_transactions:
+                    if t.status != "ACTIVE":
+                        return (
+                            False,
+                            f"Charge '{t.description}' (ID: {t.transaction_id}) has already been processed.",
+                            [],
+                        )
 
-            transactions_by_horse = defaultdict(list)
-            for t in source_transactions:
-                transactions_by_horse[t.horse_id].append(t)
+                transactions_by_horse = defaultdict(list)
+                for t in source_transactions:
+                    transactions_by_horse[t.horse_id].append(t)
 
-            self.logger.info(
-                f"Generating invoices for {len(transactions_by_horse)} horse(s)."
-            )
-
-            for horse_id, transactions_for_horse in transactions_by_horse.items():
-                horse = transactions_for_horse[0].horse
+                self.logger.info(
+                    f"Generating invoices for {len(transactions_by_horse)} horse(s)."
+                )
 
-                unique_associations = {
-                    assoc.owner_id: assoc for assoc in horse.owner_associations
-                }
+                today = date.today()
+                current_ym = today.strftime("%y%m")
+
+                # (horse, association, source transactions), in billing order
+                billing_plan = []
+                for transactions_for_horse in transactions_by_horse.values():
+                    horse = transactions_for_horse[0].horse
+                    unique_associations = {
+                        assoc.owner_id: assoc for assoc in horse.owner_associations
+                    }
+                    if not unique_associations:
+                        self.logger.warning(
+                            f"Horse '{horse.horse_name}' has no owners assigned, skipping."
+                        )
+                        continue
+                    for association in unique_associations.values():
+                        billing_plan.append(
+                            (horse, association, transactions_for_horse)
+                        )
 
-                if not unique_associations:
-                    self.logger.warning(
-                        f"Horse '{horse.horse_name}' has no owners assigned, skipping."
-                    )
-                    continue
+                next_sequence = self._allocate_monthly_sequence_numbers(
+                    session,
+                    Counter(
+                        association.owner_id for _, association, _ in billing_plan
+                    ),
+                    current_ym,
+                )
 
-                for owner_id, association in unique_associations.items():
-                    owner = association.owner
+                invoice_rows = []
+                line_item_rows = []  # per invoice, filled in once IDs are known
+                for horse, association, transactions_for_horse in billing_plan:
+                    owner_id = association.owner_id
                     ownership_percentage = association.percentage_ownership / Decimal(
                         "100"
                     )
-
-                    # NEW: Determine invoice sequence for the current month and owner
-                    current_ym = date.today().strftime("%y%m")
-                    last_invoice_in_month = (
-                        session.query(Invoice)
-                        .filter(
-                            Invoice.owner_id == owner.owner_id,
-                            Invoice.invoice_period_ym == current_ym,
-                        )
-                        .order_by(desc(Invoice.monthly_sequence_number))
-                        .first()
-                    )
-
-                    next_sequence_number = 1
-                    if (
-                        last_invoice_in_month
-                        and last_invoice_in_month.monthly_sequence_number is not None
-                    ):
-                        next_sequence_number = (
-                            last_invoice_in_month.monthly_sequence_number + 1
-                        )
-
-                    owner_invoice = Invoice(
-                        owner_id=owner.owner_id,
-                        invoice_date=date.today(),
-                        invoice_period_ym=current_ym,  # NEW
-                        monthly_sequence_number=next_sequence_number,  # NEW
-                        created_by=current_user_id,
-                        modified_by=current_user_id,
-                        status="Unpaid",
-                    )
-                    session.add(owner_invoice)
-                    session.flush()
+                    sequence_number = next_sequence[owner_id]
+                    next_sequence[owner_id] += 1
 
                     invoice_total = Decimal("0.00")
-
+                    lines = []
                     for src_trans in transactions_for_horse:
                         prorated_price = (
                             src_trans.total_price * ownership_percentage
                         ).quantize(Decimal("0.01"))
                         invoice_total += prorated_price
+                        lines.append(
+                            {
+                                "transaction_id": src_trans.transaction_id,
+                                "owner_id": owner_id,
+                                "share": ownership_percentage,
+                                "amount": prorated_price,
+                            }
+                        )
 
-                        line_item_desc = src_trans.description
-                        if len(unique_associations) > 1:
-                            line_item_desc += (
-                                f" ({association.percentage_ownership:.2f}% Share)"
-                            )
-
-                        new_line_item = Transaction(
-                            horse_id=src_trans.horse_id,
-                            owner_id=owner.owner_id,
-                            invoice_id=owner_invoice.invoice_id,
-                            charge_code_id=src_trans.charge_code_id,
-                            administered_by_user_id=src_trans.administered_by_user_id,
-                            transaction_date=src_trans.transaction_date,
-                            description=line_item_desc,
-                            quantity=src_trans.quantity,
-                            unit_price=(src_trans.unit_price * ownership_percentage),
-                            total_price=prorated_price,
-                            taxable=src_trans.taxable,
-                            item_notes=src_trans.item_notes,
-                            created_by=current_user_id,
-                            modified_by=current_user_id,
-                            status="BILLED",
+                    invoice_rows.append(
+                        {
+                            "owner_id": owner_id,
+                            "invoice_date": today,
+                            "invoice_period_ym": current_ym,
+                            "monthly_sequence_number": sequence_number,
+                            "subtotal": invoice_total,
+                            "grand_total": invoice_total,
+                            "balance_due": invoice_total,
+                            "created_by": current_user_id,
+                            "modified_by": current_user_id,
+                            "status": "Unpaid",
+                        }
+                    )
+                    line_item_rows.append(lines)
+
+                generated_invoices: List[Invoice] = []
+                if invoice_rows:
+                    # One multi-row INSERT ... RETURNING. SQLite does not promise the
+                    # RETURNING order, so match rows back on (owner, sequence number),
+                    # which is unique within this run.
+                    inserted = {
+                        (invoice.owner_id, invoice.monthly_sequence_number): invoice
+                        for invoice in session.scalars(
+                            insert(Invoice).returning(Invoice), invoice_rows
                         )
-                        session.add(new_line_item)
-
-                    owner_invoice.subtotal = invoice_total
-                    owner_invoice.grand_total = invoice_total
-                    owner_invoice.balance_due = invoice_total
-                    owner.balance = (owner.balance or Decimal("0.00")) + invoice_total
-
-                    history_entry = OwnerBillingHistory(
-                        owner_id=owner.owner_id,
-                        description=f"Invoice #{owner_invoice.display_invoice_id} generated for {horse.horse_name}.",
-                        amount_change=invoice_total,
-                        new_balance=owner.balance,
-                        created_by=current_user_id,
+                    }
+                    generated_invoices = [
+                        inserted[(row["owner_id"], row["monthly_sequence_number"])]
+                        for row in invoice_rows
+                    ]
+
+                    for invoice, lines in zip(generated_invoices, line_item_rows):
+                        for line in lines:
+                            line["invoice_id"] = invoice.invoice_id
+                    # Line items are allocations of the source charges, not copies
+                    session.execute(
+                        insert(TransactionAllocation),
+                        [line for lines in line_item_rows for line in lines],
                     )
-                    session.add(history_entry)
-                    generated_invoices.append(owner_invoice)
 
-            for src_trans in source_transactions:
-                src_trans.status = "PROCESSED"
+                    self._apply_invoice_totals_to_owners(
+                        session,
+                        [
+                            (association.owner, invoice, horse)
+                            for (horse, association, _), invoice in zip(
+                                billing_plan, generated_invoices
+                            )
+                        ],
+                        current_user_id,
+                    )
+
+                session.execute(
+                    update(Transaction)
+                    .where(Transaction.transaction_id.in_(source_transaction_ids))
+                    .values(status="PROCESSED")
+                )
                 self.logger.debug(
-                    f"Marking source TXN ID {src_trans.transaction_id} as PROCESSED."
+                    f"Marked source TXN IDs {source_transaction_ids} as PROCESSED."
                 )
 
-            session.commit()
-            self.logger.info(
-                f"--- Invoice Generation Complete. {len(generated_invoices)} invoices created. ---"
-            )
-            return (
-                True,
-                f"{len(generated_invoices)} invoice(s) created successfully.",
-                generated_invoices,
-            )
+                session.flush()
+                self.logger.info(
+                    f"--- Invoice Generation Complete. {len(generated_invoices)} invoices created. ---"
+                )
+                return (
+                    True,
+                    f"{len(generated_invoices)} invoice(s) created successfully.",
+                    generated_invoices,
+                )
 
         except SQLAlchemyError as e:
-            session.rollback()
             self.logger.error(
                 f"Database error during invoice generation: {e}", exc_info=True
             )
             return False, f"A database error occurred: {e}", []
-        finally:
-            db_manager().close()
+
+    def _allocate_monthly_sequence_numbers(
+        self, session: Session, counts: Dict[int, int], period_ym: str
+    ) -> Dict[int, int]:
+        """
+        Reserves `counts[owner_id]` consecutive sequence numbers per owner in
+        `period_ym` and returns the first number of each owner's range. Missing
+        `invoice_sequences` rows are created at 1, then every range is taken with
+        one `UPDATE ... RETURNING`, which is atomic across workstations.
+        """
+        if not counts:
+            return {}
+        session.execute(
+            sqlite_insert(InvoiceSequence).on_conflict_do_nothing(),
+            [
+                {"owner_id": owner_id, "period_ym": period_ym, "next_value": 1}
+                for owner_id in counts
+            ],
+        )
+        allocated = session.execute(
+            update(InvoiceSequence)
+            .where(
+                InvoiceSequence.period_ym == period_ym,
+                InvoiceSequence.owner_id.in_(list(counts)),
+            )
+            .values(
+                next_value=InvoiceSequence.next_value
+                + case(counts, value=InvoiceSequence.owner_id)
+            )
+            .returning(InvoiceSequence.owner_id, InvoiceSequence.next_value)
+            .execution_options(synchronize_session=False)
+        ).all()
+        return {
+            owner_id: next_value - counts[owner_id]
+            for owner_id, next_value in allocated
+        }
+
+    def _apply_invoice_totals_to_owners(
+        self,
+        session: Session,
+        billed: List[Tuple[Owner, Invoice, Horse]],
+        current_user_id: str,
+    ) -> None:
+        """Posts each invoice's total to its owner's ledger in one batch."""
+        self.ledger.post_many(
+            session,
+            [
+                LedgerEntry(
+                    owner.owner_id,
+                    invoice.grand_total,
+                    f"Invoice #{invoice.display_invoice_id} generated for {horse.horse_name}.",
+                )
+                for owner, invoice, horse in billed
+            ],
+            current_user_id,
+        )
 
     def record_payment(self, payment_data: Dict[str, Any]) -> Tuple[bool, str]:
         """Records a payment against an invoice and updates balances."""
-        session = db_manager().get_session()
         try:
-            invoice_id = payment_data.get("invoice_id")
-            amount = payment_data.get("amount")
-            current_user_id = payment_data.get("user_id")
-
-            if not all([invoice_id, amount, current_user_id]):
-                return False, "Missing required payment data."
-
-            invoice = (
-                session.query(Invoice)
-                .options(joinedload(Invoice.owner))
-                .filter(Invoice.invoice_id == invoice_id)
-                .first()
+            with db_manager().session_scope() as session:
+                invoice_id = payment_data.get("invoice_id")
+                amount = payment_data.get("amount")
+                current_user_id = payment_data.get("user_id")
+
+                if not all([invoice_id, amount, current_user_id]):
+                    return False, "Missing required payment data."
+
+                invoice = (
+                    session.query(Invoice)
+                    .options(joinedload(Invoice.owner))
+                    .filter(Invoice.invoice_id == invoice_id)
+                    .first()
+                )
+                if not invoice:
+                    return False, "Invoice not found."
+
+                owner = invoice.owner
+                if not owner:
+                    return False, "Owner for the invoice could not be found."
+
+                # Create the payment record
+                new_payment = OwnerPayment(
+                    owner_id=invoice.owner_id,
+                    invoice_id=invoice.invoice_id,
+                    amount=amount,
+                    payment_date=payment_data.get("payment_date", date.today()),
+                    payment_method=payment_data.get("payment_method", "Unknown"),
+                    reference_number=payment_data.get("reference_number"),
+                    notes=payment_data.get("notes"),
+                    created_by=current_user_id,
+                    modified_by=current_user_id,
+                )
+                session.add(new_payment)
+
+                # Update invoice balances
+                invoice.amount_paid = (invoice.amount_paid or Decimal("0.00")) + amount
+                invoice.balance_due = (invoice.balance_due or Decimal("0.00")) - amount
+                if invoice.balance_due <= Decimal("0.00"):
+                    invoice.status = "Paid"
+                    self.logger.info(f"Invoice #{invoice.invoice_id} marked as Paid.")
+
+                # Reduce the owner's balance and log it in the billing history
+                self.ledger.post(
+                    session,
+                    owner.owner_id,
+                    -amount,
+                    f"Payment received for Invoice #{invoice.display_invoice_id}. Ref: {new_payment.reference_number or new_payment.payment_method}",
+                    current_user_id,
+                )
+
+                session.flush()
+                self.logger.info(
+                    f"Payment of ${amount} successfully recorded for Invoice #{invoice.invoice_id}."
+                )
+                return True, "Payment recorded successfully."
+
+        except SQLAlchemyError as e:
+            self.logger.error(
+                f"Database error recording payment for invoice {invoice_id}: {e}",
+                exc_info=True,
             )
-            if not invoice:
-                return False, "Invoice not found."
-
-            owner = invoice.owner
-            if not owner:
-                return False, "Owner for the invoice could not be found."
-
-            # Create the payment record
-            new_payment = OwnerPayment(
-                owner_id=invoice.owner_id,
-                amount=amount,
-                payment_date=payment_data.get("payment_date", date.today()),
-                payment_method=payment_data.get("payment_method", "Unknown"),
-                reference_number=payment_data.get("reference_number"),
-                notes=payment_data.get("notes"),
-                created_by=current_user_id,
-                modified_by=current_user_id,
+            return False, "A database error occurred while recording the payment."
+
+    def record_payments_batch(
+        self, payments: List[Dict[str, Any]], current_user_id: str
+    ) -> Tuple[bool, str, List[str]]:
+        """
+        Records many payments (e.g. the checks of one bank deposit) in a single
+        transaction. Each entry has the `record_payment` keys: `invoice_id`,
+        `amount`, `payment_date`, `payment_method`, `reference_number`, `notes`.
+        Every line is validated against the invoices' current balances first; if
+        any line is invalid nothing is recorded and the third element lists the
+        problems by line number.
+        """
+        if not payments:
+            return False, "The deposit has no payment lines.", []
+
+        try:
+            with db_manager().session_scope() as session:
+                invoice_ids = {p.get("invoice_id") for p in payments} - {None}
+                invoices = {
+                    invoice.invoice_id: invoice
+                    for invoice in session.query(Invoice)
+                    .options(joinedload(Invoice.owner))
+                    .filter(Invoice.invoice_id.in_(invoice_ids))
+                }
+
+                errors = []
+                lines = []
+                applied_per_invoice: Dict[int, Decimal] = defaultdict(Decimal)
+                for line_number, payment in enumerate(payments, start=1):
+                    invoice = invoices.get(payment.get("invoice_id"))
+                    amount = payment.get("amount")
+                    if payment.get("invoice_id") is None:
+                        errors.append(f"Line {line_number}: no invoice selected.")
+                        continue
+                    if invoice is None:
+                        errors.append(
+                            f"Line {line_number}: invoice {payment['invoice_id']} was not found."
+                        )
+                        continue
+                    if amount is None or amount <= 0:
+                        errors.append(
+                            f"Line {line_number}: the amount must be greater than zero."
+                        )
+                        continue
+                    applied_per_invoice[invoice.invoice_id] += amount
+                    if applied_per_invoice[invoice.invoice_id] > invoice.balance_due:
+                        errors.append(
+                            f"Line {line_number}: payments to Invoice #{invoice.display_invoice_id} "
+                            f"exceed its balance due of ${invoice.balance_due:.2f}."
+                        )
+                        continue
+                    lines.append((invoice, payment))
+
+                if errors:
+                    return (
+                        False,
+                        f"{len(errors)} line(s) need attention. Nothing was recorded.",
+                        errors,
+                    )
+
+                self._apply_payments(session, lines, current_user_id)
+                session.flush()
+                total = sum(payment["amount"] for _, payment in lines)
+                self.logger.info(
+                    f"Recorded a batch of {len(lines)} payment(s) totalling ${total:.2f}."
+                )
+                return (
+                    True,
+                    f"{len(lines)} payment(s) totalling ${total:.2f} recorded.",
+                    [],
+                )
+
+        except SQLAlchemyError as e:
+            self.logger.error(
+                f"Database error recording payment batch: {e}", exc_info=True
+            )
+            return (
+                False,
+                "A database error occurred while recording the payments. Nothing was recorded.",
+                [],
             )
-            session.add(new_payment)
 
-            # Update invoice balances
+    def _apply_payments(
+        self,
+        session: Session,
+        lines: List[Tuple[Optional[Invoice], Dict[str, Any]]],
+        current_user_id: str,
+    ) -> None:
+        """
+        Applies validated (invoice, payment) lines in the caller's unit of work:
+        one bulk OwnerPayment insert, the invoices' paid/balance/status, and one
+        `OwnerLedger.post_many` for the owners' balances and history. A line
+        without an invoice is an unapplied payment for `payment["owner_id"]`: it
+        lowers the owner's balance and is held as credit.
+        """
+        payment_rows = []
+        ledger_entries = []
+        for invoice, payment in lines:
+            amount = payment["amount"]
+            reference = payment.get("reference_number")
+            method = payment.get("payment_method", "Unknown")
+            owner_id = invoice.owner_id if invoice else payment["owner_id"]
+            payment_rows.append(
+                {
+                    "owner_id": owner_id,
+                    "invoice_id": invoice.invoice_id if invoice else None,
+                    "amount": amount,
+                    "payment_date": payment.get("payment_date") or date.today(),
+                    "payment_method": method,
+                    "reference_number": reference,
+                    "notes": payment.get("notes"),
+                    "created_by": current_user_id,
+                    "modified_by": current_user_id,
+                }
+            )
+            if invoice is None:
+                ledger_entries.append(
+                    LedgerEntry(
+                        owner_id,
+                        -amount,
+                        f"Unapplied payment held as credit. Ref: {reference or method}",
+                    )
+                )
+                continue
             invoice.amount_paid = (invoice.amount_paid or Decimal("0.00")) + amount
             invoice.balance_due = (invoice.balance_due or Decimal("0.00")) - amount
             if invoice.balance_due <= Decimal("0.00"):
                 invoice.status = "Paid"
-                self.logger.info(f"Invoice #{invoice.invoice_id} marked as Paid.")
-
-            # Update owner's total balance
-            owner.balance = (owner.balance or Decimal("0.00")) - amount
-
-            # Create billing history log for the payment
-            history_entry = OwnerBillingHistory(
-                owner_id=owner.owner_id,
-                description=f"Payment received for Invoice #{invoice.display_invoice_id}. Ref: {new_payment.reference_number or new_payment.payment_method}",
-                amount_change=-amount,
-                new_balance=owner.balance,
-                created_by=current_user_id,
+            ledger_entries.append(
+                LedgerEntry(
+                    owner_id,
+                    -amount,
+                    f"Payment received for Invoice #{invoice.display_invoice_id}. Ref: {reference or method}",
+                )
             )
-            session.add(history_entry)
 
-            session.commit()
-            self.logger.info(
-                f"Payment of ${amount} successfully recorded for Invoice #{invoice.invoice_id}."
-            )
-            return True, "Payment recorded successfully."
+        session.execute(
+            insert(OwnerPayment).execution_options(render_nulls=True), payment_rows
+        )
+        self.ledger.post_many(session, ledger_entries, current_user_id)
+
+    def allocate_owner_payment(
+        self,
+        owner_id: int,
+        payment_data: Dict[str, Any],
+        current_user_id: str,
+        invoice_ids: Optional[List[int]] = None,
+    ) -> Tuple[bool, str, Dict[str, Any]]:
+        """
+        Applies one payment from an owner across their open invoices in one
+        transaction: oldest first, or only `invoice_ids` in the order given. Any
+        amount left once those invoices are paid is recorded as an unapplied
+        payment and held as credit on the owner's balance. `payment_data` has the
+        `record_payment` keys except `invoice_id`.
+
+        Returns (success, message, allocation) where allocation is
+        {"applied": [(invoice_id, display_invoice_id, amount), ...],
+        "credit": Decimal}.
+        """
+        amount = payment_data.get("amount")
+        if amount is None or amount <= 0:
+            return False, "Payment amount must be greater than zero.", {}
+
+        try:
+            with db_manager().session_scope() as session:
+                if session.get(Owner, owner_id) is None:
+                    return False, "Owner not found.", {}
+
+                # Served by ix_invoices_owner_date; never loads Owner.invoices
+                query = (
+                    session.query(Invoice)
+                    .options(joinedload(Invoice.owner))
+                    .filter(Invoice.owner_id == owner_id, Invoice.balance_due > 0)
+                )
+                if invoice_ids is not None:
+                    by_id = {
+                        invoice.invoice_id: invoice
+                        for invoice in query.filter(Invoice.invoice_id.in_(invoice_ids))
+                    }
+                    missing = [i for i in invoice_ids if i not in by_id]
+                    if missing:
+                        return (
+                            False,
+                            f"Invoice(s) {', '.join(map(str, missing))} are not open "
+                            f"invoices of this owner.",
+                            {},
+                        )
+                    open_invoices = [by_id[i] for i in invoice_ids]
+                else:
+                    open_invoices = query.order_by(
+                        Invoice.invoice_date, Invoice.invoice_id
+                    ).all()
+
+                lines = []
+                remaining = amount
+                for invoice in open_invoices:
+                    if remaining <= 0:
+                        break
+                    applied = min(remaining, invoice.balance_due)
+                    lines.append((invoice, {**payment_data, "amount": applied}))
+                    remaining -= applied
+                if remaining > 0:
+                    lines.append(
+                        (
+                            None,
+                            {**payment_data, "amount": remaining, "owner_id": owner_id},
+                        )
+                    )
+
+                allocation = {
+                    "applied": [
+                        (invoice.invoice_id, invoice.display_invoice_id, line["amount"])
+                        for invoice, line in lines
+                        if invoice is not None
+                    ],
+                    "credit": remaining if remaining > 0 else Decimal("0.00"),
+                }
+                self._apply_payments(session, lines, current_user_id)
+                session.flush()
+
+                message = (
+                    f"${amount - allocation['credit']:.2f} applied to "
+                    f"{len(allocation['applied'])} invoice(s)"
+                )
+                if allocation["credit"]:
+                    message += f"; ${allocation['credit']:.2f} held as credit"
+                self.logger.info(f"Owner {owner_id} payment allocated: {message}.")
+                return True, message + ".", allocation
 
         except SQLAlchemyError as e:
-            session.rollback()
             self.logger.error(
-                f"Database error recording payment for invoice {invoice_id}: {e}",
+                f"Database error allocating payment for owner {owner_id}: {e}",
                 exc_info=True,
             )
-            return False, "A database error occurred while recording the payment."
-        finally:
-            db_manager().close()
+            return (
+                False,
+                "A database error occurred while recording the payment.",
+                {},
+            )
+
+    def get_open_invoices(self) -> List[Invoice]:
+        """Every invoice with a balance due, with its owner, oldest first."""
+        try:
+            with db_manager().session_scope() as session:
+                return (
+                    session.query(Invoice)
+                    .options(joinedload(Invoice.owner))
+                    .filter(Invoice.balance_due > 0)
+                    .order_by(Invoice.invoice_date, Invoice.invoice_id)
+                    .all()
+                )
+        except SQLAlchemyError as e:
+            self.logger.error(f"Error retrieving open invoices: {e}", exc_info=True)
+            return []
 
     def get_transactions_for_horse(self, horse_id: int) -> List[Transaction]:
-        session = db_manager().get_session()
         try:
-            transactions = (
-                session.query(Transaction)
-                .filter(
-                    Transaction.horse_id == horse_id, Transaction.status == "ACTIVE"
+            with db_manager().session_scope() as session:
+                transactions = (
+                    session.query(Transaction)
+                    .filter(
+                        Transaction.horse_id == horse_id, Transaction.status == "ACTIVE"
+                    )
+                    .options(
+                        joinedload(Transaction.charge_code),
+                        joinedload(Transaction.administered_by),
+                    )
+                    .order_by(Transaction.transaction_date.desc())
+                    .all()
                 )
-                .options(
-                    joinedload(Transaction.charge_code),
-                    joinedload(Transaction.administered_by),
+                self.logger.info(
+                    f"Retrieved {len(transactions)} ACTIVE transactions for horse ID {horse_id}."
                 )
-                .order_by(Transaction.transaction_date.desc())
-                .all()
-            )
-            self.logger.info(
-                f"Retrieved {len(transactions)} ACTIVE transactions for horse ID {horse_id}."
-            )
-            return transactions
+                return transactions
         except SQLAlchemyError as e:
             self.logger.error(
                 f"Error retrieving transactions for horse ID {horse_id}: {e}",
                 exc_info=True,
             )
             return []
-        finally:
-            db_manager().close()
 
     def add_charge_batch_to_horse(
         self,
@@ -551,211 +1224,210 @@ class FinancialController:
         batch_transaction_date: date,
         administered_by_user_id: str,
     ) -> Tuple[bool, str, Optional[List[Transaction]]]:
-        session = db_manager().get_session()
         new_transactions = []
         try:
-            for item in charge_items:
-                total_price = item.get("quantity", Decimal(0)) * item.get(
-                    "unit_price", Decimal(0)
-                )
-                new_transaction = Transaction(
-                    horse_id=horse_id,
-                    owner_id=owner_id,
-                    charge_code_id=item.get("charge_code_id"),
-                    administered_by_user_id=administered_by_user_id,
-                    transaction_date=batch_transaction_date,
-                    description=item.get("description"),
-                    quantity=item.get("quantity"),
-                    unit_price=item.get("unit_price"),
-                    total_price=total_price,
-                    taxable=item.get("taxable", False),
-                    item_notes=item.get("item_notes"),
-                    created_by=administered_by_user_id,
-                    modified_by=administered_by_user_id,
-                )
-                session.add(new_transaction)
-                new_transactions.append(new_transaction)
-            session.commit()
-            for trans in new_transactions:
-                session.refresh(trans)
-            self.logger.info(
-                f"Successfully added {len(new_transactions)} charges for horse ID {horse_id}."
-            )
-            return (
-                True,
-                f"{len(new_transactions)} charges added successfully.",
-                new_transactions,
-            )
+            with db_manager().session_scope() as session:
+                for item in charge_items:
+                    total_price = item.get("quantity", Decimal(0)) * item.get(
+                        "unit_price", Decimal(0)
+                    )
+                    new_transaction = Transaction(
+                        horse_id=horse_id,
+                        owner_id=owner_id,
+                        charge_code_id=item.get("charge_code_id"),
+                        administered_by_user_id=administered_by_user_id,
+                        transaction_date=batch_transaction_date,
+                        description=item.get("description"),
+                        quantity=item.get("quantity"),
+                        unit_price=item.get("unit_price"),
+                        total_price=total_price,
+                        taxable=item.get("taxable", False),
+                        item_notes=item.get("item_notes"),
+                        created_by=administered_by_user_id,
+                        modified_by=administered_by_user_id,
+                    )
+                    session.add(new_transaction)
+                    new_transactions.append(new_transaction)
+                session.flush()
+                self.usage_rollup.record(session, new_transactions)
+                for trans in new_transactions:
+                    session.refresh(trans)
+                self.logger.info(
+                    f"Successfully added {len(new_transactions)} charges for horse ID {horse_id}."
+                )
+                return (
+                    True,
+                    f"{len(new_transactions)} charges added successfully.",
+                    new_transactions,
+                )
         except SQLAlchemyError as e:
-            session.rollback()
             self.logger.error(
                 f"Database error adding charge batch for horse ID {horse_id}: {e}",
                 exc_info=True,
             )
             return False, f"A database error occurred: {e}", None
         except Exception as e:
-            session.rollback()
             self.logger.error(
                 f"Unexpected error adding charge batch for horse ID {horse_id}: {e}",
                 exc_info=True,
             )
             return False, f"An unexpected error occurred: {e}", None
-        finally:
-            db_manager().close()
 
     def update_charge_transaction(
         self, transaction_id: int, data: Dict[str, Any], current_user_id: str
     ) -> Tuple[bool, str]:
-        session = db_manager().get_session()
         try:
-            transaction = (
-                session.query(Transaction)
-                .filter(Transaction.transaction_id == transaction_id)
-                .first()
-            )
-            if not transaction:
-                return False, "Transaction not found."
-            if transaction.invoice_id:
-                return False, "Cannot edit a charge that has already been invoiced."
-            transaction.transaction_date = data.get(
-                "transaction_date", transaction.transaction_date
-            )
-            transaction.description = data.get("description", transaction.description)
-            transaction.quantity = data.get("quantity", transaction.quantity)
-            transaction.unit_price = data.get("unit_price", transaction.unit_price)
-            transaction.taxable = data.get("taxable", transaction.taxable)
-            transaction.item_notes = data.get("item_notes", transaction.item_notes)
-            transaction.total_price = transaction.quantity * transaction.unit_price
-            transaction.modified_by = current_user_id
-            session.commit()
-            self.logger.info(f"Transaction ID {transaction_id} updated successfully.")
-            return True, "Charge updated successfully."
+            with db_manager().session_scope() as session:
+                transaction = (
+                    session.query(Transaction)
+                    .filter(Transaction.transaction_id == transaction_id)
+                    .first()
+                )
+                if not transaction:
+                    return False, "Transaction not found."
+                # Billed charges are PROCESSED and referenced by their allocations
+                if transaction.invoice_id or transaction.status != "ACTIVE":
+                    return False, "Cannot edit a charge that has already been invoiced."
+                self.usage_rollup.record(session, [transaction], sign=-1)
+                transaction.transaction_date = data.get(
+                    "transaction_date", transaction.transaction_date
+                )
+                transaction.description = data.get(
+                    "description", transaction.description
+                )
+                transaction.quantity = data.get("quantity", transaction.quantity)
+                transaction.unit_price = data.get("unit_price", transaction.unit_price)
+                transaction.taxable = data.get("taxable", transaction.taxable)
+                transaction.item_notes = data.get("item_notes", transaction.item_notes)
+                transaction.total_price = transaction.quantity * transaction.unit_price
+                transaction.modified_by = current_user_id
+                session.flush()
+                self.usage_rollup.record(session, [transaction])
+                self.logger.info(
+                    f"Transaction ID {transaction_id} updated successfully."
+                )
+                return True, "Charge updated successfully."
         except SQLAlchemyError as e:
-            session.rollback()
             self.logger.error(
                 f"Database error updating transaction {transaction_id}: {e}",
                 exc_info=True,
             )
             return False, f"A database error occurred: {e}"
-        finally:
-            db_manager().close()
 
     def delete_charge_transaction(self, transaction_id: int) -> Tuple[bool, str]:
-        session = db_manager().get_session()
         try:
-            transaction_to_delete = (
-                session.query(Transaction)
-                .filter(Transaction.transaction_id == transaction_id)
-                .first()
-            )
-            if not transaction_to_delete:
-                self.logger.warning(
-                    f"Delete failed: Transaction ID {transaction_id} not found."
-                )
-                return False, "Transaction not found."
-            if transaction_to_delete.invoice_id is not None:
-                self.logger.warning(
-                    f"Attempted to delete invoiced transaction ID {transaction_id}."
-                )
-                return False, "Cannot delete a charge that has already been invoiced."
-            session.delete(transaction_to_delete)
-            session.commit()
-            self.logger.info(f"Transaction ID {transaction_id} deleted successfully.")
-            return True, "Charge deleted successfully."
+            with db_manager().session_scope() as session:
+                transaction_to_delete = (
+                    session.query(Transaction)
+                    .filter(Transaction.transaction_id == transaction_id)
+                    .first()
+                )
+                if not transaction_to_delete:
+                    self.logger.warning(
+                        f"Delete failed: Transaction ID {transaction_id} not found."
+                    )
+                    return False, "Transaction not found."
+                if (
+                    transaction_to_delete.invoice_id is not None
+                    or transaction_to_delete.status != "ACTIVE"
+                ):
+                    self.logger.warning(
+                        f"Attempted to delete invoiced transaction ID {transaction_id}."
+                    )
+                    return (
+                        False,
+                        "Cannot delete a charge that has already been invoiced.",
+                    )
+                self.usage_rollup.record(session, [transaction_to_delete], sign=-1)
+                session.delete(transaction_to_delete)
+                session.flush()
+                self.logger.info(
+                    f"Transaction ID {transaction_id} deleted successfully."
+                )
+                return True, "Charge deleted successfully."
         except SQLAlchemyError as e:
-            session.rollback()
             self.logger.error(
                 f"Database error deleting transaction ID {transaction_id}: {e}",
                 exc_info=True,
             )
             return False, f"A database error occurred while deleting the charge: {e}"
-        finally:
-            db_manager().close()
 
     def get_transaction_by_id(self, transaction_id: int) -> Optional[Transaction]:
-        session = db_manager().get_session()
         try:
-            transaction = (
-                session.query(Transaction)
-                .options(
-                    joinedload(Transaction.charge_code)
-                )  # NEW: Eager load charge_code
-                .filter(Transaction.transaction_id == transaction_id)
-                .first()
-            )
-            if transaction:
-                self.logger.info(
-                    f"Retrieved transaction ID {transaction_id} with its charge code."
+            with db_manager().session_scope() as session:
+                transaction = (
+                    session.query(Transaction)
+                    .options(
+                        joinedload(Transaction.charge_code)
+                    )  # NEW: Eager load charge_code
+                    .filter(Transaction.transaction_id == transaction_id)
+                    .first()
                 )
-            else:
-                self.logger.warning(f"Transaction ID {transaction_id} not found.")
-            return transaction
+                if transaction:
+                    self.logger.info(
+                        f"Retrieved transaction ID {transaction_id} with its charge code."
+                    )
+                else:
+                    self.logger.warning(f"Transaction ID {transaction_id} not found.")
+                return transaction
         except SQLAlchemyError as e:
             self.logger.error(
                 f"Error retrieving transaction ID {transaction_id}: {e}", exc_info=True
             )
             return None
-        finally:
-            db_manager().close()
 
     def delete_invoice(self, invoice_id: int, current_user_id: str) -> Tuple[bool, str]:
         """
         Deletes an invoice and reverses the owner's balance.
         NOTE: This does NOT make the original charges billable again.
         """
-        session = db_manager().get_session()
         try:
-            invoice_to_delete = (
-                session.query(Invoice)
-                .options(joinedload(Invoice.owner))
-                .filter(Invoice.invoice_id == invoice_id)
-                .first()
-            )
-
-            if not invoice_to_delete:
-                return False, "Invoice not found."
-
-            if not invoice_to_delete.owner:
-                return (
-                    False,
-                    "Cannot delete invoice: Owner record is missing or detached.",
+            with db_manager().session_scope() as session:
+                invoice_to_delete = (
+                    session.query(Invoice)
+                    .options(joinedload(Invoice.owner))
+                    .filter(Invoice.invoice_id == invoice_id)
+                    .first()
                 )
 
-            owner = invoice_to_delete.owner
-            reversal_amount = invoice_to_delete.grand_total
+                if not invoice_to_delete:
+                    return False, "Invoice not found."
 
-            self.logger.info(
-                f"Deleting Invoice #{invoice_to_delete.display_invoice_id} for owner '{owner.owner_id}'. "
-                f"Reversing balance by ${reversal_amount}."
-            )
+                if not invoice_to_delete.owner:
+                    return (
+                        False,
+                        "Cannot delete invoice: Owner record is missing or detached.",
+                    )
 
-            owner.balance = (owner.balance or Decimal("0.00")) - reversal_amount
+                owner = invoice_to_delete.owner
+                reversal_amount = invoice_to_delete.grand_total
 
-            history_entry = OwnerBillingHistory(
-                owner_id=owner.owner_id,
-                description=f"Invoice #{invoice_to_delete.display_invoice_id} deleted by user. Reversal of charges.",
-                amount_change=-reversal_amount,
-                new_balance=owner.balance,
-                created_by=current_user_id,
-            )
-            session.add(history_entry)
+                self.logger.info(
+                    f"Deleting Invoice #{invoice_to_delete.display_invoice_id} for owner '{owner.owner_id}'. "
+                    f"Reversing balance by ${reversal_amount}."
+                )
 
-            session.delete(invoice_to_delete)
-            session.commit()
+                self.ledger.post(
+                    session,
+                    owner.owner_id,
+                    -reversal_amount,
+                    f"Invoice #{invoice_to_delete.display_invoice_id} deleted by user. Reversal of charges.",
+                    current_user_id,
+                )
 
-            self.logger.info(
-                f"Successfully deleted Invoice #{invoice_to_delete.display_invoice_id} and adjusted owner balance."
-            )
-            return (
-                True,
-                f"Invoice #{invoice_to_delete.display_invoice_id} has been deleted.",
-            )
+                session.delete(invoice_to_delete)
+                session.flush()
+
+                self.logger.info(
+                    f"Successfully deleted Invoice #{invoice_to_delete.display_invoice_id} and adjusted owner balance."
+                )
+                return (
+                    True,
+                    f"Invoice #{invoice_to_delete.display_invoice_id} has been deleted.",
+                )
 
         except SQLAlchemyError as e:
-            session.rollback()
             self.logger.error(
                 f"Database error deleting invoice {invoice_id}: {e}", exc_info=True
             )
             return False, f"A database error occurred during deletion: {e}"
-        finally:
-            db_manager().close()
@@ -1,13 +1,16 @@
 # controllers/location_controller.py
 """
 EDSI Veterinary Management System - Location Controller
-Version: 1.2.2
+Version: 1.3.0
 Purpose: Handles business logic for locations.
          Methods now accept an optional session parameter for transactional control.
-Last Updated: July 15, 2025
+Last Updated: October 16, 2026
 Author: Gemini
 
 Changelog:
+- v1.3.0 (2026-10-16):
+    - Methods now use `db_manager().session_scope(session)`. A caller-supplied session
+      is joined (never committed or closed here), replacing the `_close_session` flag.
 - v1.2.2 (2025-07-15):
     - **BUG FIX**: Removed `_session.refresh(new_location)` from `create_location` method.
       The `refresh` call was happening before the object was committed in the external session,
@@ -49,45 +52,37 @@ class LocationController:
     def get_all_locations(
         self, status_filter: str = "all", session: Optional[Session] = None
     ) -> List[models.Location]:
-        _session = session if session else db_manager().get_session()
-        _close_session = session is None
         try:
-            query = _session.query(models.Location).options(
-                joinedload(models.Location.state)
-            )
-            if status_filter == "active":
-                query = query.filter(models.Location.is_active == True)
-            elif status_filter == "inactive":
-                query = query.filter(models.Location.is_active == False)
-            locations = query.order_by(models.Location.location_name).all()
-            return locations
+            with db_manager().session_scope(session) as _session:
+                query = _session.query(models.Location).options(
+                    joinedload(models.Location.state)
+                )
+                if status_filter == "active":
+                    query = query.filter(models.Location.is_active == True)
+                elif status_filter == "inactive":
+                    query = query.filter(models.Location.is_active == False)
+                locations = query.order_by(models.Location.location_name).all()
+                return locations
         except sqlalchemy_exc.SQLAlchemyError as e:
             self.logger.error(f"Error fetching all locations: {e}", exc_info=True)
             return []
-        finally:
-            if _close_session:
-                _session.close()
 
     def get_location_by_id(
         self, location_id: int, session: Optional[Session] = None
     ) -> Optional[models.Location]:
-        _session = session if session else db_manager().get_session()
-        _close_session = session is None
         try:
-            return (
-                _session.query(models.Location)
-                .options(joinedload(models.Location.state))
-                .filter(models.Location.location_id == location_id)
-                .first()
-            )
+            with db_manager().session_scope(session) as _session:
+                return (
+                    _session.query(models.Location)
+                    .options(joinedload(models.Location.state))
+                    .filter(models.Location.location_id == location_id)
+                    .first()
+                )
         except sqlalchemy_exc.SQLAlchemyError as e:
             self.logger.error(
                 f"Error fetching location by ID {location_id}: {e}", exc_info=True
             )
             return None
-        finally:
-            if _close_session:
-                _session.close()
 
     def validate_location_data(
         self,
@@ -99,31 +94,28 @@ class LocationController:
         errors = []
         name = location_data.get("location_name", "").strip()
 
-        _session = session if session else db_manager().get_session()
-        _close_session = session is None
         try:
-            if not name:
-                errors.append("Location Name is required.")
-            elif len(name) > 100:
-                errors.append("Location Name cannot exceed 100 characters.")
-            else:
-                query = _session.query(models.Location.location_id).filter(
-                    models.Location.location_name.collate("NOCASE") == name
-                )
-                if not is_new and location_id_to_check_for_unique is not None:
-                    query = query.filter(
-                        models.Location.location_id != location_id_to_check_for_unique
+            with db_manager().session_scope(session) as _session:
+                if not name:
+                    errors.append("Location Name is required.")
+                elif len(name) > 100:
+                    errors.append("Location Name cannot exceed 100 characters.")
+                else:
+                    query = _session.query(models.Location.location_id).filter(
+                        models.Location.location_name.collate("NOCASE") == name
                     )
-                if query.first():
-                    errors.append(f"Location Name '{name}' already exists.")
+                    if not is_new and location_id_to_check_for_unique is not None:
+                        query = query.filter(
+                            models.Location.location_id
+                            != location_id_to_check_for_unique
+                        )
+                    if query.first():
+                        errors.append(f"Location Name '{name}' already exists.")
         except sqlalchemy_exc.SQLAlchemyError as e:
             self.logger.error(
                 f"Error validating location name uniqueness: {e}", exc_info=True
             )
             errors.append("Database error validating location name.")
-        finally:
-            if _close_session:
-                _session.close()
         return not errors, errors
 
     def create_location(
@@ -132,55 +124,48 @@ class LocationController:
         current_user_id: str,
         session: Optional[Session] = None,
     ) -> Tuple[bool, str, Optional[models.Location]]:
-        _session = session if session else db_manager().get_session()
-        _close_session = session is None
         try:
-            is_valid, errors = self.validate_location_data(
-                location_data, is_new=True, session=_session
-            )
-            if not is_valid:
-                return False, "Validation failed: " + "; ".join(errors), None
+            with db_manager().session_scope(session) as _session:
+                is_valid, errors = self.validate_location_data(
+                    location_data, is_new=True, session=_session
+                )
+                if not is_valid:
+                    return False, "Validation failed: " + "; ".join(errors), None
 
-            def process_string(value: Any) -> Optional[str]:
-                return value.strip() if isinstance(value, str) else None
+                def process_string(value: Any) -> Optional[str]:
+                    return value.strip() if isinstance(value, str) else None
 
-            new_location = models.Location(  # Use models. prefix
-                location_name=location_data.get("location_name", "").strip(),
-                address_line1=process_string(location_data.get("address_line1")),
-                address_line2=process_string(location_data.get("address_line2")),
-                city=process_string(location_data.get("city")),
-                state_code=process_string(location_data.get("state_code")),
-                zip_code=process_string(location_data.get("zip_code")),
-                phone=process_string(location_data.get("phone")),
-                contact_person=process_string(location_data.get("contact_person")),
-                email=process_string(location_data.get("email")),
-                is_active=location_data.get("is_active", True),
-                created_by=current_user_id,
-                modified_by=current_user_id,
-            )
-            _session.add(new_location)
-            # REMOVED: _session.refresh(new_location) - Refresh happens after commit in import script
+                new_location = models.Location(  # Use models. prefix
+                    location_name=location_data.get("location_name", "").strip(),
+                    address_line1=process_string(location_data.get("address_line1")),
+                    address_line2=process_string(location_data.get("address_line2")),
+                    city=process_string(location_data.get("city")),
+                    state_code=process_string(location_data.get("state_code")),
+                    zip_code=process_string(location_data.get("zip_code")),
+                    phone=process_string(location_data.get("phone")),
+                    contact_person=process_string(location_data.get("contact_person")),
+                    email=process_string(location_data.get("email")),
+                    is_active=location_data.get("is_active", True),
+                    created_by=current_user_id,
+                    modified_by=current_user_id,
+                )
+                _session.add(new_location)
+                # REMOVED: _session.refresh(new_location) - Refresh happens after commit in import script
 
-            # Only commit if this method opened the session
-            if _close_session:
-                _session.commit()
-                _session.refresh(new_location)  # Refresh here if committed internally
+                # Only commit if this method opened the session
+                _session.flush()
+                _session.refresh(new_location)
 
-            self.logger.info(
-                f"Location '{new_location.location_name}' created by {current_user_id}."
-            )
-            return True, "Location created successfully.", new_location
+                self.logger.info(
+                    f"Location '{new_location.location_name}' created by {current_user_id}."
+                )
+                return True, "Location created successfully.", new_location
         except sqlalchemy_exc.IntegrityError as e:
-            _session.rollback()
             self.logger.error(f"Error creating location: {e.orig}", exc_info=True)
             return False, f"Database integrity error: {e.orig}", None
         except Exception as e:
-            _session.rollback()
             self.logger.error(f"Error creating location: {e}", exc_info=True)
             return False, f"Failed to create location: {e}", None
-        finally:
-            if _close_session:
-                _session.close()
 
     def update_location(
         self,
@@ -189,47 +174,43 @@ class LocationController:
         current_user_id: str,
         session: Optional[Session] = None,
     ) -> Tuple[bool, str]:
-        _session = session if session else db_manager().get_session()
-        _close_session = session is None
         try:
-            is_valid, errors = self.validate_location_data(
-                location_data,
-                is_new=False,
-                location_id_to_check_for_unique=location_id,
-                session=_session,
-            )
-            if not is_valid:
-                return False, "Validation failed: " + "; ".join(errors)
+            with db_manager().session_scope(session) as _session:
+                is_valid, errors = self.validate_location_data(
+                    location_data,
+                    is_new=False,
+                    location_id_to_check_for_unique=location_id,
+                    session=_session,
+                )
+                if not is_valid:
+                    return False, "Validation failed: " + "; ".join(errors)
 
-            location = (
-                _session.query(models.Location)
-                .filter(models.Location.location_id == location_id)
-                .first()
-            )
-            if not location:
-                return False, "Location not found."
+                location = (
+                    _session.query(models.Location)
+                    .filter(models.Location.location_id == location_id)
+                    .first()
+                )
+                if not location:
+                    return False, "Location not found."
 
-            for key, value in location_data.items():
-                if hasattr(location, key):
-                    processed_value = value.strip() if isinstance(value, str) else value
-                    setattr(location, key, processed_value)
+                for key, value in location_data.items():
+                    if hasattr(location, key):
+                        processed_value = (
+                            value.strip() if isinstance(value, str) else value
+                        )
+                        setattr(location, key, processed_value)
 
-            location.modified_by = current_user_id
-            if _close_session:
-                _session.commit()
-            self.logger.info(
-                f"Location '{location.location_name}' (ID: {location_id}) updated by {current_user_id}."
-            )
-            return True, "Location updated successfully."
+                location.modified_by = current_user_id
+                _session.flush()
+                self.logger.info(
+                    f"Location '{location.location_name}' (ID: {location_id}) updated by {current_user_id}."
+                )
+                return True, "Location updated successfully."
         except Exception as e:
-            _session.rollback()
             self.logger.error(
                 f"Error updating location ID {location_id}: {e}", exc_info=True
             )
             return False, f"Failed to update location: {e}"
-        finally:
-            if _close_session:
-                _session.close()
 
     def toggle_location_active_status(
         self,
@@ -237,83 +218,71 @@ class LocationController:
         current_user_id: Optional[str] = None,
         session: Optional[Session] = None,
     ) -> Tuple[bool, str]:
-        _session = session if session else db_manager().get_session()
-        _close_session = session is None
         try:
-            location = (
-                _session.query(models.Location)
-                .filter(models.Location.location_id == location_id)
-                .first()
-            )
-            if not location:
-                return False, f"Location with ID {location_id} not found."
+            with db_manager().session_scope(session) as _session:
+                location = (
+                    _session.query(models.Location)
+                    .filter(models.Location.location_id == location_id)
+                    .first()
+                )
+                if not location:
+                    return False, f"Location with ID {location_id} not found."
 
-            location.is_active = not location.is_active
-            location.modified_by = current_user_id
+                location.is_active = not location.is_active
+                location.modified_by = current_user_id
 
-            if _close_session:
-                _session.commit()
+                _session.flush()
 
-            new_status = "activated" if location.is_active else "deactivated"
-            self.logger.info(
-                f"Location '{location.location_name}' (ID: {location_id}) status changed to {new_status} by {current_user_id}."
-            )
-            return (
-                True,
-                f"Location '{location.location_name}' has been successfully {new_status}.",
-            )
+                new_status = "activated" if location.is_active else "deactivated"
+                self.logger.info(
+                    f"Location '{location.location_name}' (ID: {location_id}) status changed to {new_status} by {current_user_id}."
+                )
+                return (
+                    True,
+                    f"Location '{location.location_name}' has been successfully {new_status}.",
+                )
 
         except sqlalchemy_exc.SQLAlchemyError as e:
-            _session.rollback()
             self.logger.error(
                 f"Database error toggling status for location ID {location_id}: {e}",
                 exc_info=True,
             )
             return False, "A database error occurred while toggling location status."
-        finally:
-            if _close_session:
-                _session.close()
 
     def delete_location(
         self, location_id: int, current_user_id: str, session: Optional[Session] = None
     ) -> Tuple[bool, str]:
-        _session = session if session else db_manager().get_session()
-        _close_session = session is None
         try:
-            linked_horses_count = (
-                _session.query(models.HorseLocation)
-                .filter(models.HorseLocation.location_id == location_id)
-                .count()
-            )
+            with db_manager().session_scope(session) as _session:
+                linked_horses_count = (
+                    _session.query(models.HorseLocation)
+                    .filter(models.HorseLocation.location_id == location_id)
+                    .count()
+                )
 
-            if linked_horses_count > 0:
-                message = f"Cannot delete location. It is currently or was previously assigned to {linked_horses_count} horse(s)."
-                self.logger.warning(message)
-                return False, message
+                if linked_horses_count > 0:
+                    message = f"Cannot delete location. It is currently or was previously assigned to {linked_horses_count} horse(s)."
+                    self.logger.warning(message)
+                    return False, message
 
-            location_to_delete = (
-                _session.query(models.Location)
-                .filter(models.Location.location_id == location_id)
-                .first()
-            )
+                location_to_delete = (
+                    _session.query(models.Location)
+                    .filter(models.Location.location_id == location_id)
+                    .first()
+                )
 
-            if not location_to_delete:
-                return False, "Location not found."
+                if not location_to_delete:
+                    return False, "Location not found."
 
-            location_name = location_to_delete.location_name
-            _session.delete(location_to_delete)
-            if _close_session:
-                _session.commit()
-            self.logger.info(
-                f"Location '{location_name}' (ID: {location_id}) deleted by {current_user_id}."
-            )
-            return True, f"Location '{location_name}' was deleted."
+                location_name = location_to_delete.location_name
+                _session.delete(location_to_delete)
+                _session.flush()
+                self.logger.info(
+                    f"Location '{location_name}' (ID: {location_id}) deleted by {current_user_id}."
+                )
+                return True, f"Location '{location_name}' was deleted."
         except sqlalchemy_exc.SQLAlchemyError as e:
-            _session.rollback()
             self.logger.error(
                 f"Database error deleting location ID {location_id}: {e}", exc_info=True
             )
             return False, f"A database error occurred: {e}"
-        finally:
-            if _close_session:
-                _session.close()
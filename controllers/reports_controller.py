@@ -2,12 +2,66 @@
 
 """
 EDSI Veterinary Management System - Reports Controller
-Version: 1.7.2
+Version: 1.16.0
 Purpose: Business logic for generating reports.
-Last Updated: June 28, 2025
+Last Updated: October 16, 2026
 Author: Gemini
 
 Changelog:
+- v1.16.0 (2026-10-16):
+    - Added `get_invoice_register_export`, `get_payment_history_export` and
+      `get_horse_transaction_history_export`. Each describes its report as a
+      column-only `ExportSpec` (same rows and order as the PDF, names split into
+      columns) for `services.report_export` to stream into CSV or XLSX.
+- v1.15.0 (2026-10-16):
+    - `get_data_for_all_owner_statements` no longer calls
+      `get_owner_statement_data` per owner. It loads the owners, their opening
+      balances, and the period's invoices and payments in at most six queries
+      in total, then groups them by owner in memory. Owners are loaded before
+      invoices, so `display_invoice_id` finds each owner in the session. The
+      returned dicts are unchanged; statements now come in owner ID order.
+    - Statement lines on the same date keep a fixed order: invoices, then
+      payments, each by ID (`_statement_items`, shared by both methods).
+- v1.14.0 (2026-10-16):
+    - `get_charge_code_usage_data` reads the whole months of its range from
+      `ChargeUsageRollup`, a few rows per month, and only the partial months at
+      either end from the charges themselves. Only those ends need yearly
+      archives attached, since the rollups also count archived charges.
+- v1.13.0 (2026-10-16):
+    - Every report passes its date range to `report_scope(archive_range=...)`, so
+      yearly archives covering the range are read along with the live tables.
+      A/R aging passes only its as-of date. An archived invoice was fully paid
+      within its year, so only that year's archive can hold invoices still open
+      on the date.
+- v1.12.0 (2026-10-16):
+    - `get_horse_transaction_history_data` loads each charge's
+      `TransactionAllocation` rows, which tell whether and to whom it was
+      invoiced. Invoicing no longer copies charges, so this report and
+      `get_charge_code_usage_data` see each charge once instead of once plus once
+      per billed owner.
+- v1.11.0 (2026-10-16):
+    - `get_ar_aging_data` is now one grouped SQL query. It buckets by invoice age
+      with `CASE` (`AGING_BUCKETS`) instead of loading every owner's invoices and
+      looping in Python. It also supports true as-of dates: invoices issued after
+      the date are left out, and payments recorded against an invoice after the
+      date are added back to its open amount. Line and total shapes for
+      `ARAgingGenerator` are unchanged.
+- v1.10.0 (2026-10-16):
+    - Statement opening balances now come from `services.owner_ledger`. That is
+      the latest month-close `OwnerBalanceSnapshot` plus the ledger entries after
+      it, instead of sorting the owner's whole billing history.
+      `get_data_for_all_owner_statements` fetches every opening balance in two
+      queries and passes each one to `get_owner_statement_data` through the new
+      `starting_balance` argument.
+- v1.9.0 (2026-10-16):
+    - All report queries now run inside `db_manager().report_scope()`. That uses
+      the read-only engine, and each report is one snapshot-consistent read
+      transaction. `get_data_for_all_owner_statements` shares its snapshot with
+      every per-owner `get_owner_statement_data` call.
+- v1.8.0 (2026-10-16):
+    - Report queries now run inside `db_manager().session_scope()`.
+      `get_owner_statement_data` joins the session passed in by
+      `get_data_for_all_owner_statements`.
 - v1.7.2 (2025-06-28):
     - **BUG FIX**: Corrected `db_manager.get_session()` to `db_manager().get_session()`
       in `get_charge_code_usage_data`, `get_horse_transaction_history_data`,
@@ -26,12 +80,13 @@ Changelog:
 """
 
 import logging
+from collections import defaultdict
 from typing import List, Dict, Any, Tuple, Optional
 from datetime import date
 from decimal import Decimal
 
-from sqlalchemy import and_, or_, func
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import Numeric, and_, case, or_, func, select
+from sqlalchemy.orm import Session, joinedload, selectinload
 
 from config.database_config import db_manager
 from models import (
@@ -40,12 +95,17 @@ from models import (
     OwnerPayment,
     OwnerBillingHistory,
     Transaction,
+    TransactionAllocation,
     ChargeCode,
     ChargeCodeCategory,
+    ChargeUsageRollup,
     Horse,
     User,
 )
 from controllers.company_profile_controller import CompanyProfileController
+from services.owner_ledger import OwnerLedger
+from services.report_export import DATE, MONEY, NUMBER, TEXT, ExportSpec
+from services.usage_rollup import UsageRollup
 
 
 class ReportsController:
@@ -54,6 +114,7 @@ class ReportsController:
     def __init__(self):
         self.logger = logging.getLogger(self.__class__.__name__)
         self.logger.info("ReportsController initialized.")
+        self.ledger = OwnerLedger()
         self.company_profile = CompanyProfileController().get_company_profile()
 
     def get_charge_code_usage_data(self, options: Dict[str, Any]) -> Dict[str, Any]:
@@ -66,124 +127,171 @@ class ReportsController:
         Returns:
             A dictionary containing the processed data ready for the PDF generator.
         """
-        session = db_manager().get_session()  # Corrected call
         try:
             start_date = options["start_date"]
             end_date = options["end_date"]
-
-            # Base query to get usage count and revenue
-            query = (
-                session.query(
-                    ChargeCode.code,
-                    ChargeCode.description,
-                    ChargeCodeCategory.name.label("category_name"),
-                    func.count(Transaction.transaction_id).label("usage_count"),
-                    func.sum(Transaction.total_price).label("total_revenue"),
-                )
-                .join(ChargeCode, Transaction.charge_code_id == ChargeCode.id)
-                # MODIFIED: Corrected ChargeCodeCategory.id to ChargeCodeCategory.category_id
-                .join(
-                    ChargeCodeCategory,
-                    ChargeCodeCategory.category_id == ChargeCode.category_id,
-                )
-                .filter(
-                    and_(
-                        Transaction.transaction_date >= start_date,
-                        Transaction.transaction_date <= end_date,
+            months, edges = UsageRollup.split_range(start_date, end_date)
+            with db_manager().report_scope(
+                archive_range=(edges[0][0], edges[-1][1]) if edges else None
+            ) as session:
+                totals: Dict[Tuple[str, str, str], List] = {}
+                usage_queries = [
+                    self._charge_code_usage_from_charges(session, edge_start, edge_end)
+                    for edge_start, edge_end in edges
+                ]
+                if months:
+                    usage_queries.append(
+                        self._charge_code_usage_from_rollups(session, *months)
                     )
-                )
-                .group_by(
-                    ChargeCode.code, ChargeCode.description, ChargeCodeCategory.name
-                )
-            )
+                for query in usage_queries:
+                    for r in query:
+                        entry = totals.setdefault(
+                            (r.code, r.description, r.category_name), [0, Decimal("0")]
+                        )
+                        entry[0] += r.usage_count or 0
+                        entry[1] += Decimal(str(r.total_revenue or 0))
+                details = [
+                    {
+                        "code": code,
+                        "description": description,
+                        "category_name": category_name,
+                        "usage_count": usage_count,
+                        "total_revenue": float(total_revenue),
+                    }
+                    for (code, description, category_name), (
+                        usage_count,
+                        total_revenue,
+                    ) in totals.items()
+                    if usage_count
+                ]
 
-            results = query.all()
+                if not details:
+                    return {"details": [], "summary": {}, "options": options}
 
-            if not results:
-                return {"details": [], "summary": {}, "options": options}
+                # Sorting logic
+                sort_by = options.get("sort_by", "Usage Count (High to Low)")
+                reverse_sort = True
+                sort_key = "usage_count"
+                if sort_by == "Total Revenue (High to Low)":
+                    sort_key = "total_revenue"
+                elif sort_by == "Charge Code (A-Z)":
+                    sort_key = "code"
+                    reverse_sort = False
+                elif sort_by == "Category (A-Z)":
+                    sort_key = "category_name"
+                    reverse_sort = False
 
-            details = [
-                {
-                    "code": r.code,
-                    "description": r.description,
-                    "category_name": r.category_name,
-                    "usage_count": r.usage_count,
-                    "total_revenue": float(r.total_revenue) if r.total_revenue else 0.0,
+                details.sort(key=lambda x: x[sort_key], reverse=reverse_sort)
+
+                summary = {
+                    "unique_codes_used": len(details),
+                    "total_usage_count": sum(item["usage_count"] for item in details),
+                    "total_revenue": sum(item["total_revenue"] for item in details),
                 }
-                for r in results
-            ]
-
-            # Sorting logic
-            sort_by = options.get("sort_by", "Usage Count (High to Low)")
-            reverse_sort = True
-            sort_key = "usage_count"
-            if sort_by == "Total Revenue (High to Low)":
-                sort_key = "total_revenue"
-            elif sort_by == "Charge Code (A-Z)":
-                sort_key = "code"
-                reverse_sort = False
-            elif sort_by == "Category (A-Z)":
-                sort_key = "category_name"
-                reverse_sort = False
-
-            details.sort(key=lambda x: x[sort_key], reverse=reverse_sort)
-
-            summary = {
-                "unique_codes_used": len(details),
-                "total_usage_count": sum(item["usage_count"] for item in details),
-                "total_revenue": sum(item["total_revenue"] for item in details),
-            }
 
-            return {
-                "options": options,
-                "summary": summary,
-                "details": details,
-            }
+                return {
+                    "options": options,
+                    "summary": summary,
+                    "details": details,
+                }
 
         except Exception as e:
             self.logger.error(
                 f"Error fetching charge code usage data: {e}", exc_info=True
             )
             return {"error": str(e)}
-        finally:
-            session.close()
+
+    @staticmethod
+    def _charge_code_usage_from_charges(
+        session: Session, start_date: date, end_date: date
+    ):
+        """Usage count and revenue per charge code, from the charges in a range."""
+        return (
+            session.query(
+                ChargeCode.code,
+                ChargeCode.description,
+                ChargeCodeCategory.name.label("category_name"),
+                func.count(Transaction.transaction_id).label("usage_count"),
+                func.sum(Transaction.total_price).label("total_revenue"),
+            )
+            .join(ChargeCode, Transaction.charge_code_id == ChargeCode.id)
+            .join(
+                ChargeCodeCategory,
+                ChargeCodeCategory.category_id == ChargeCode.category_id,
+            )
+            .filter(
+                and_(
+                    Transaction.transaction_date >= start_date,
+                    Transaction.transaction_date <= end_date,
+                )
+            )
+            .group_by(ChargeCode.code, ChargeCode.description, ChargeCodeCategory.name)
+        )
+
+    @staticmethod
+    def _charge_code_usage_from_rollups(
+        session: Session, first_month: date, last_month: date
+    ):
+        """Usage count and revenue per charge code, from whole-month rollups."""
+        return (
+            session.query(
+                ChargeCode.code,
+                ChargeCode.description,
+                ChargeCodeCategory.name.label("category_name"),
+                func.sum(ChargeUsageRollup.usage_count).label("usage_count"),
+                func.sum(ChargeUsageRollup.total_revenue).label("total_revenue"),
+            )
+            .join(ChargeCode, ChargeUsageRollup.charge_code_id == ChargeCode.id)
+            .join(
+                ChargeCodeCategory,
+                ChargeCodeCategory.category_id == ChargeUsageRollup.category_id,
+            )
+            .filter(
+                ChargeUsageRollup.month_start >= first_month,
+                ChargeUsageRollup.month_start <= last_month,
+            )
+            .group_by(ChargeCode.code, ChargeCode.description, ChargeCodeCategory.name)
+        )
 
     def get_horse_transaction_history_data(
         self, horse_id: int, start_date: date, end_date: date
     ) -> Dict[str, Any]:
         """Fetches all transactions for a single horse within a date range."""
-        session = db_manager().get_session()  # Corrected call
         try:
-            horse = session.query(Horse).filter(Horse.horse_id == horse_id).first()
-            if not horse:
+            with db_manager().report_scope(
+                archive_range=(start_date, end_date)
+            ) as session:
+                horse = session.query(Horse).filter(Horse.horse_id == horse_id).first()
+                if not horse:
+                    return {
+                        "error": "Horse not found",
+                        "horse": None,
+                        "transactions": [],
+                        "start_date": start_date,
+                        "end_date": end_date,
+                    }
+
+                transactions = (
+                    session.query(Transaction)
+                    .filter(
+                        Transaction.horse_id == horse_id,
+                        Transaction.transaction_date.between(start_date, end_date),
+                    )
+                    .options(
+                        joinedload(Transaction.charge_code),
+                        joinedload(Transaction.administered_by),
+                        selectinload(Transaction.allocations),
+                    )
+                    .order_by(Transaction.transaction_date.asc())
+                    .all()
+                )
+
                 return {
-                    "error": "Horse not found",
-                    "horse": None,
-                    "transactions": [],
+                    "horse": horse,
+                    "transactions": transactions,
                     "start_date": start_date,
                     "end_date": end_date,
                 }
-
-            transactions = (
-                session.query(Transaction)
-                .filter(
-                    Transaction.horse_id == horse_id,
-                    Transaction.transaction_date.between(start_date, end_date),
-                )
-                .options(
-                    joinedload(Transaction.charge_code),
-                    joinedload(Transaction.administered_by),
-                )
-                .order_by(Transaction.transaction_date.asc())
-                .all()
-            )
-
-            return {
-                "horse": horse,
-                "transactions": transactions,
-                "start_date": start_date,
-                "end_date": end_date,
-            }
         except Exception as e:
             self.logger.error(
                 f"Error generating horse transaction history for horse_id {horse_id}: {e}",
@@ -196,158 +304,398 @@ class ReportsController:
                 "start_date": start_date,
                 "end_date": end_date,
             }
-        finally:
-            session.close()
 
     def get_payment_history_data(
         self, start_date: date, end_date: date, owner_id: Optional[Any] = None
     ) -> Dict[str, Any]:
-        session = db_manager().get_session()  # Corrected call
         try:
-            query = (
-                session.query(OwnerPayment)
-                .filter(OwnerPayment.payment_date.between(start_date, end_date))
-                .options(joinedload(OwnerPayment.owner))
-                .order_by(OwnerPayment.payment_date, OwnerPayment.owner_id)
-            )
-            if owner_id and owner_id != "all":
-                query = query.filter(OwnerPayment.owner_id == owner_id)
-            payments = query.all()
-            return {
-                "payments": payments,
-                "start_date": start_date,
-                "end_date": end_date,
-            }
+            with db_manager().report_scope(
+                archive_range=(start_date, end_date)
+            ) as session:
+                query = (
+                    session.query(OwnerPayment)
+                    .filter(OwnerPayment.payment_date.between(start_date, end_date))
+                    .options(joinedload(OwnerPayment.owner))
+                    .order_by(OwnerPayment.payment_date, OwnerPayment.owner_id)
+                )
+                if owner_id and owner_id != "all":
+                    query = query.filter(OwnerPayment.owner_id == owner_id)
+                payments = query.all()
+                return {
+                    "payments": payments,
+                    "start_date": start_date,
+                    "end_date": end_date,
+                }
         except Exception as e:
             self.logger.error(
                 f"Error generating payment history data: {e}", exc_info=True
             )
             return {"payments": [], "start_date": start_date, "end_date": end_date}
-        finally:
-            session.close()
 
     def get_invoice_register_data(
         self, start_date: date, end_date: date
     ) -> Dict[str, Any]:
-        session = db_manager().get_session()  # Corrected call
         try:
-            invoices = (
-                session.query(Invoice)
-                .filter(Invoice.invoice_date.between(start_date, end_date))
-                .options(joinedload(Invoice.owner))
-                .order_by(Invoice.invoice_date, Invoice.invoice_id)
-                .all()
-            )
-            return {
-                "invoices": invoices,
-                "start_date": start_date,
-                "end_date": end_date,
-            }
+            with db_manager().report_scope(
+                archive_range=(start_date, end_date)
+            ) as session:
+                invoices = (
+                    session.query(Invoice)
+                    .filter(Invoice.invoice_date.between(start_date, end_date))
+                    .options(joinedload(Invoice.owner))
+                    .order_by(Invoice.invoice_date, Invoice.invoice_id)
+                    .all()
+                )
+                return {
+                    "invoices": invoices,
+                    "start_date": start_date,
+                    "end_date": end_date,
+                }
         except Exception as e:
             self.logger.error(
                 f"Error generating invoice register data: {e}", exc_info=True
             )
             return {"invoices": [], "start_date": start_date, "end_date": end_date}
-        finally:
-            session.close()
+
+    # --- Spreadsheet exports (streamed by services.report_export) ---
+
+    def get_invoice_register_export(self, start_date: date, end_date: date) -> ExportSpec:
+        """The invoice register as rows, one per invoice, in register order."""
+        statement = (
+            select(
+                Owner.account_number,
+                Owner.owner_id,
+                Invoice.invoice_period_ym,
+                Invoice.invoice_date,
+                Invoice.monthly_sequence_number,
+                Owner.farm_name,
+                Owner.first_name,
+                Owner.last_name,
+                Invoice.grand_total,
+                Invoice.amount_paid,
+                Invoice.balance_due,
+                Invoice.status,
+            )
+            .outerjoin(Owner, Owner.owner_id == Invoice.owner_id)
+            .where(Invoice.invoice_date.between(start_date, end_date))
+            .order_by(Invoice.invoice_date, Invoice.invoice_id)
+        )
+        return ExportSpec(
+            title="Invoice Register",
+            headers=[
+                "Invoice #",
+                "Date",
+                "Account #",
+                "Farm Name",
+                "First Name",
+                "Last Name",
+                "Total",
+                "Amount Paid",
+                "Balance Due",
+                "Status",
+            ],
+            kinds=[TEXT, DATE, TEXT, TEXT, TEXT, TEXT, MONEY, MONEY, MONEY, TEXT],
+            statement=statement,
+            archive_range=(start_date, end_date),
+            row_formatter=lambda r: (
+                Invoice.format_display_id(*r[:5]),
+                r.invoice_date,
+                r.account_number,
+                *r[5:],
+            ),
+        )
+
+    def get_payment_history_export(
+        self, start_date: date, end_date: date, owner_id: Optional[Any] = None
+    ) -> ExportSpec:
+        """Payment history as rows, one per payment, in report order."""
+        statement = (
+            select(
+                OwnerPayment.payment_date,
+                Owner.account_number,
+                Owner.farm_name,
+                Owner.first_name,
+                Owner.last_name,
+                OwnerPayment.amount,
+                OwnerPayment.payment_method,
+                OwnerPayment.reference_number,
+            )
+            .outerjoin(Owner, Owner.owner_id == OwnerPayment.owner_id)
+            .where(OwnerPayment.payment_date.between(start_date, end_date))
+            .order_by(OwnerPayment.payment_date, OwnerPayment.owner_id)
+        )
+        if owner_id and owner_id != "all":
+            statement = statement.where(OwnerPayment.owner_id == owner_id)
+        return ExportSpec(
+            title="Payment History",
+            headers=[
+                "Date",
+                "Account #",
+                "Farm Name",
+                "First Name",
+                "Last Name",
+                "Amount",
+                "Method",
+                "Reference #",
+            ],
+            kinds=[DATE, TEXT, TEXT, TEXT, TEXT, MONEY, TEXT, TEXT],
+            statement=statement,
+            archive_range=(start_date, end_date),
+        )
+
+    def get_horse_transaction_history_export(
+        self, horse_id: int, start_date: date, end_date: date
+    ) -> ExportSpec:
+        """A horse's charges as rows, oldest first, with whether each was billed."""
+        billed = or_(
+            Transaction.invoice_id.isnot(None),
+            select(TransactionAllocation.transaction_id)
+            .where(TransactionAllocation.transaction_id == Transaction.transaction_id)
+            .exists(),
+        )
+        statement = (
+            select(
+                Transaction.transaction_date,
+                ChargeCode.code,
+                Transaction.description,
+                Transaction.quantity,
+                Transaction.unit_price,
+                Transaction.total_price,
+                case((billed, "Yes"), else_="No"),
+                User.user_name,
+            )
+            .outerjoin(ChargeCode, ChargeCode.id == Transaction.charge_code_id)
+            .outerjoin(User, User.user_id == Transaction.administered_by_user_id)
+            .where(
+                Transaction.horse_id == horse_id,
+                Transaction.transaction_date.between(start_date, end_date),
+            )
+            .order_by(Transaction.transaction_date, Transaction.transaction_id)
+        )
+        return ExportSpec(
+            title="Transaction History",
+            headers=[
+                "Date",
+                "Code",
+                "Description",
+                "Qty",
+                "Unit Price",
+                "Total",
+                "Billed?",
+                "Admin by",
+            ],
+            kinds=[DATE, TEXT, TEXT, NUMBER, MONEY, MONEY, TEXT, TEXT],
+            statement=statement,
+            archive_range=(start_date, end_date),
+        )
+
+    # (bucket key, first day, last day) of invoice age; None means open-ended
+    AGING_BUCKETS = (
+        ("current", None, 30),
+        ("31-60", 31, 60),
+        ("61-90", 61, 90),
+        ("over_90", 91, None),
+    )
 
     def get_ar_aging_data(self, as_of_date: date) -> Dict[str, Any]:
-        session = db_manager().get_session()  # Corrected call
+        """
+        Open receivables per active owner, bucketed by invoice age on `as_of_date`,
+        in one grouped query. An invoice's amount open on that date is its
+        current `balance_due` plus the payments recorded against it after the
+        date. Invoices issued after the date are excluded, so past agings can be
+        reproduced.
+        """
         try:
-            owners_with_balance = (
-                session.query(Owner)
-                .filter(Owner.is_active == True, Owner.balance > 0)
-                .options(joinedload(Owner.invoices))
-                .order_by(Owner.last_name)
-                .all()
-            )
-            report_lines = []
-            totals = {
-                "current": Decimal("0.00"),
-                "31-60": Decimal("0.00"),
-                "61-90": Decimal("0.00"),
-                "over_90": Decimal("0.00"),
-                "total": Decimal("0.00"),
-            }
-            for owner in owners_with_balance:
-                owner_buckets = {
-                    "current": Decimal("0.00"),
-                    "31-60": Decimal("0.00"),
-                    "61-90": Decimal("0.00"),
-                    "over_90": Decimal("0.00"),
-                }
-                unpaid_invoices = [inv for inv in owner.invoices if inv.balance_due > 0]
-                for inv in unpaid_invoices:
-                    age = (as_of_date - inv.invoice_date).days
-                    if age <= 30:
-                        owner_buckets["current"] += inv.balance_due
-                    elif 31 <= age <= 60:
-                        owner_buckets["31-60"] += inv.balance_due
-                    elif 61 <= age <= 90:
-                        owner_buckets["61-90"] += inv.balance_due
-                    else:
-                        owner_buckets["over_90"] += inv.balance_due
-                owner_total = sum(owner_buckets.values())
-                if owner_total > 0:
+            with db_manager().report_scope(
+                archive_range=(as_of_date, as_of_date)
+            ) as session:
+                later_payments = (
+                    session.query(
+                        OwnerPayment.invoice_id.label("invoice_id"),
+                        func.sum(OwnerPayment.amount).label("amount"),
+                    )
+                    .filter(
+                        OwnerPayment.invoice_id.isnot(None),
+                        OwnerPayment.payment_date > as_of_date,
+                    )
+                    .group_by(OwnerPayment.invoice_id)
+                    .subquery()
+                )
+                open_amount = Invoice.balance_due + func.coalesce(
+                    later_payments.c.amount, 0
+                )
+                age_days = func.julianday(as_of_date) - func.julianday(
+                    Invoice.invoice_date
+                )
+                bucket_columns = []
+                for key, first_day, last_day in self.AGING_BUCKETS:
+                    conditions = []
+                    if first_day is not None:
+                        conditions.append(age_days >= first_day)
+                    if last_day is not None:
+                        conditions.append(age_days <= last_day)
+                    bucket_columns.append(
+                        func.sum(case((and_(*conditions), open_amount), else_=0))
+                        .cast(Numeric(12, 2))
+                        .label(key)
+                    )
+
+                rows = (
+                    session.query(
+                        Owner.farm_name,
+                        Owner.first_name,
+                        Owner.last_name,
+                        *bucket_columns,
+                    )
+                    .join(Invoice, Invoice.owner_id == Owner.owner_id)
+                    .outerjoin(
+                        later_payments,
+                        later_payments.c.invoice_id == Invoice.invoice_id,
+                    )
+                    .filter(
+                        Owner.is_active == True,
+                        Invoice.invoice_date <= as_of_date,
+                        open_amount > 0,
+                    )
+                    .group_by(Owner.owner_id)
+                    .order_by(Owner.last_name, Owner.owner_id)
+                    .all()
+                )
+
+                keys = [key for key, _, _ in self.AGING_BUCKETS]
+                totals = {key: Decimal("0.00") for key in keys + ["total"]}
+                report_lines = []
+                for row in rows:
+                    owner_buckets = {key: getattr(row, key) for key in keys}
+                    owner_total = sum(owner_buckets.values())
                     report_lines.append(
                         {
-                            "name": owner.farm_name
-                            or f"{owner.first_name or ''} {owner.last_name or ''}".strip(),
+                            "name": row.farm_name
+                            or f"{row.first_name or ''} {row.last_name or ''}".strip(),
                             "buckets": owner_buckets,
                             "total": owner_total,
                         }
                     )
-                    for key in totals:
-                        if key != "total":
-                            totals[key] += owner_buckets[key]
-                totals["total"] += owner_total
-            return {"lines": report_lines, "totals": totals, "as_of_date": as_of_date}
+                    for key in keys:
+                        totals[key] += owner_buckets[key]
+                    totals["total"] += owner_total
+                return {
+                    "lines": report_lines,
+                    "totals": totals,
+                    "as_of_date": as_of_date,
+                }
         except Exception as e:
             self.logger.error(f"Error generating A/R aging data: {e}", exc_info=True)
             return {"lines": [], "totals": {}, "as_of_date": as_of_date}
-        finally:
-            session.close()
 
     def get_data_for_all_owner_statements(
         self, start_date: date, end_date: date
     ) -> List[Dict[str, Any]]:
-        session = db_manager().get_session()  # Corrected call
+        """
+        Statement data for every owner with an invoice or payment in the period,
+        or an active owner with a balance, in owner ID order. Loads the owners,
+        their opening balances, and the period's invoices and payments in a fixed
+        number of set-based queries whatever the number of owners, then groups
+        them in memory into the `get_owner_statement_data` shape.
+        """
         try:
-            owners_with_invoices = (
-                session.query(Invoice.owner_id)
-                .filter(Invoice.invoice_date.between(start_date, end_date))
-                .distinct()
-            )
-            owners_with_payments = (
-                session.query(OwnerPayment.owner_id)
-                .filter(OwnerPayment.payment_date.between(start_date, end_date))
-                .distinct()
-            )
-            owners_with_balance = (
-                session.query(Owner.owner_id)
-                .filter(Owner.is_active == True, Owner.balance != Decimal("0.00"))
-                .distinct()
-            )
-            owner_ids = {r[0] for r in owners_with_invoices}
-            owner_ids.update(r[0] for r in owners_with_payments)
-            owner_ids.update(r[0] for r in owners_with_balance)
-            all_statements_data = [
-                s_data
-                for owner_id in owner_ids
-                if (
-                    s_data := self.get_owner_statement_data(
-                        owner_id, start_date, end_date, session
+            with db_manager().report_scope(
+                archive_range=(start_date, end_date)
+            ) as session:
+                invoice_owner_ids = select(Invoice.owner_id).where(
+                    Invoice.invoice_date.between(start_date, end_date)
+                )
+                payment_owner_ids = select(OwnerPayment.owner_id).where(
+                    OwnerPayment.payment_date.between(start_date, end_date)
+                )
+                # Loaded first, so each invoice's display ID finds its owner in
+                # the session instead of querying for it
+                owners = (
+                    session.query(Owner)
+                    .filter(
+                        or_(
+                            Owner.owner_id.in_(invoice_owner_ids),
+                            Owner.owner_id.in_(payment_owner_ids),
+                            and_(
+                                Owner.is_active == True,
+                                Owner.balance != Decimal("0.00"),
+                            ),
+                        )
                     )
+                    .order_by(Owner.owner_id)
+                    .all()
                 )
-            ]
-            return all_statements_data
+                if not owners:
+                    return []
+                starting_balances = self.ledger.balances_as_of(
+                    session, [owner.owner_id for owner in owners], start_date
+                )
+
+                invoices_by_owner = defaultdict(list)
+                for inv in (
+                    session.query(Invoice)
+                    .filter(Invoice.invoice_date.between(start_date, end_date))
+                    .order_by(Invoice.invoice_date, Invoice.invoice_id)
+                ):
+                    invoices_by_owner[inv.owner_id].append(inv)
+                payments_by_owner = defaultdict(list)
+                for pmt in (
+                    session.query(OwnerPayment)
+                    .filter(OwnerPayment.payment_date.between(start_date, end_date))
+                    .order_by(OwnerPayment.payment_date, OwnerPayment.payment_id)
+                ):
+                    payments_by_owner[pmt.owner_id].append(pmt)
+
+                return [
+                    {
+                        "owner": owner,
+                        "start_date": start_date,
+                        "end_date": end_date,
+                        "starting_balance": starting_balances.get(
+                            owner.owner_id, Decimal("0.00")
+                        ),
+                        "items": self._statement_items(
+                            invoices_by_owner[owner.owner_id],
+                            payments_by_owner[owner.owner_id],
+                        ),
+                    }
+                    for owner in owners
+                ]
         except Exception as e:
             self.logger.error(
                 f"Error gathering data for all owner statements: {e}", exc_info=True
             )
             return []
-        finally:
-            session.close()
+
+    @staticmethod
+    def _statement_items(
+        invoices: List[Invoice], payments: List[OwnerPayment]
+    ) -> List[Dict[str, Any]]:
+        """An owner's invoices and payments as statement lines, by date."""
+        statement_items = []
+        for inv in invoices:
+            statement_items.append(
+                {
+                    "date": inv.invoice_date,
+                    "type": "Invoice",
+                    "description": f"Invoice #{inv.display_invoice_id}",  # Using the new display ID
+                    "charge": inv.grand_total,
+                    "payment": Decimal("0.00"),
+                }
+            )
+        for pmt in payments:
+            ref = f" (Ref: {pmt.reference_number})" if pmt.reference_number else ""
+            statement_items.append(
+                {
+                    "date": pmt.payment_date,
+                    "type": "Payment",
+                    "description": f"Payment - {pmt.payment_method}{ref}",
+                    "charge": Decimal("0.00"),
+                    "payment": pmt.amount,
+                }
+            )
+        statement_items.sort(key=lambda x: x["date"])
+        return statement_items
 
     def get_owner_statement_data(
         self,
@@ -355,79 +703,53 @@ class ReportsController:
         start_date: date,
         end_date: date,
         session: Optional[Session] = None,
+        starting_balance: Optional[Decimal] = None,
     ) -> Optional[Dict[str, Any]]:
-        close_session = False
-        if session is None:
-            session = db_manager().get_session()  # Corrected call
-            close_session = True
+        """
+        Statement lines for one owner over a period. `starting_balance` is the
+        balance at the start of `start_date`; it is read from the owner ledger
+        unless the caller already has it.
+        """
         try:
-            owner = session.query(Owner).filter(Owner.owner_id == owner_id).first()
-            if not owner:
-                return None
-            last_history = (
-                session.query(OwnerBillingHistory)
-                .filter(
-                    OwnerBillingHistory.owner_id == owner_id,
-                    OwnerBillingHistory.entry_date < start_date,
-                )
-                .order_by(OwnerBillingHistory.entry_date.desc())
-                .first()
-            )
-            starting_balance = (
-                last_history.new_balance if last_history else Decimal("0.00")
-            )
-            invoices = (
-                session.query(Invoice)
-                .filter(
-                    Invoice.owner_id == owner_id,
-                    Invoice.invoice_date.between(start_date, end_date),
-                )
-                .all()
-            )
-            payments = (
-                session.query(OwnerPayment)
-                .filter(
-                    OwnerPayment.owner_id == owner_id,
-                    OwnerPayment.payment_date.between(start_date, end_date),
-                )
-                .all()
-            )
-            statement_items = []
-            for inv in invoices:
-                statement_items.append(
-                    {
-                        "date": inv.invoice_date,
-                        "type": "Invoice",
-                        "description": f"Invoice #{inv.display_invoice_id}",  # Using the new display ID
-                        "charge": inv.grand_total,
-                        "payment": Decimal("0.00"),
-                    }
+            with db_manager().report_scope(
+                session, archive_range=(start_date, end_date)
+            ) as session:
+                owner = session.query(Owner).filter(Owner.owner_id == owner_id).first()
+                if not owner:
+                    return None
+                if starting_balance is None:
+                    starting_balance = self.ledger.balance_as_of(
+                        session, owner_id, start_date
+                    )
+                invoices = (
+                    session.query(Invoice)
+                    .filter(
+                        Invoice.owner_id == owner_id,
+                        Invoice.invoice_date.between(start_date, end_date),
+                    )
+                    .order_by(Invoice.invoice_date, Invoice.invoice_id)
+                    .all()
                 )
-            for pmt in payments:
-                ref = f" (Ref: {pmt.reference_number})" if pmt.reference_number else ""
-                statement_items.append(
-                    {
-                        "date": pmt.payment_date,
-                        "type": "Payment",
-                        "description": f"Payment - {pmt.payment_method}{ref}",
-                        "charge": Decimal("0.00"),
-                        "payment": pmt.amount,
-                    }
+                payments = (
+                    session.query(OwnerPayment)
+                    .filter(
+                        OwnerPayment.owner_id == owner_id,
+                        OwnerPayment.payment_date.between(start_date, end_date),
+                    )
+                    .order_by(OwnerPayment.payment_date, OwnerPayment.payment_id)
+                    .all()
                 )
-            statement_items.sort(key=lambda x: x["date"])
-            return {
-                "owner": owner,
-                "start_date": start_date,
-                "end_date": end_date,
-                "starting_balance": starting_balance,
-                "items": statement_items,
-            }
+                statement_items = self._statement_items(invoices, payments)
+                return {
+                    "owner": owner,
+                    "start_date": start_date,
+                    "end_date": end_date,
+                    "starting_balance": starting_balance,
+                    "items": statement_items,
+                }
         except Exception as e:
             self.logger.error(
                 f"Error generating owner statement data for owner ID {owner_id}: {e}",
                 exc_info=True,
             )
             return None
-        finally:
-            if close_session:
-                session.close()
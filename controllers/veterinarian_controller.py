@@ -1,12 +1,15 @@
 # controllers/veterinarian_controller.py
 """
 EDSI Veterinary Management System - Veterinarian Controller
-Version: 1.1.1
+Version: 1.2.0
 Purpose: Handles business logic for veterinarian records.
-Last Updated: June 28, 2025
+Last Updated: October 16, 2026
 Author: Gemini
 
 Changelog:
+- v1.2.0 (2026-10-16):
+    - All methods now run inside `db_manager().session_scope()` instead of disposing
+      the engine after every call.
 - v1.1.1 (2025-06-28):
     - **BUG FIX**: Modified `validate_veterinarian_data` to explicitly check if `email`
       is `None` before attempting to call `.strip()`, resolving `AttributeError`.
@@ -34,37 +37,35 @@ class VeterinarianController:
         self.logger = logging.getLogger(self.__class__.__name__)
 
     def get_all_veterinarians(self, status_filter: str = "all") -> List[Veterinarian]:
-        session = db_manager().get_session()
         try:
-            query = session.query(Veterinarian)
-            if status_filter == "active":
-                query = query.filter(Veterinarian.is_active == True)
-            elif status_filter == "inactive":
-                query = query.filter(Veterinarian.is_active == False)
-
-            vets = query.order_by(Veterinarian.last_name, Veterinarian.first_name).all()
-            return vets
+            with db_manager().session_scope() as session:
+                query = session.query(Veterinarian)
+                if status_filter == "active":
+                    query = query.filter(Veterinarian.is_active == True)
+                elif status_filter == "inactive":
+                    query = query.filter(Veterinarian.is_active == False)
+
+                vets = query.order_by(
+                    Veterinarian.last_name, Veterinarian.first_name
+                ).all()
+                return vets
         except sqlalchemy_exc.SQLAlchemyError as e:
             self.logger.error(f"Error fetching all veterinarians: {e}", exc_info=True)
             return []
-        finally:
-            db_manager().close()
 
     def get_veterinarian_by_id(self, vet_id: int) -> Optional[Veterinarian]:
-        session = db_manager().get_session()
         try:
-            return (
-                session.query(Veterinarian)
-                .filter(Veterinarian.vet_id == vet_id)
-                .first()
-            )
+            with db_manager().session_scope() as session:
+                return (
+                    session.query(Veterinarian)
+                    .filter(Veterinarian.vet_id == vet_id)
+                    .first()
+                )
         except sqlalchemy_exc.SQLAlchemyError as e:
             self.logger.error(
                 f"Error fetching veterinarian by ID {vet_id}: {e}", exc_info=True
             )
             return None
-        finally:
-            db_manager().close()
 
     def validate_veterinarian_data(
         self,
@@ -89,8 +90,7 @@ class VeterinarianController:
             else None
         )
 
-        session = db_manager().get_session()
-        try:
+        with db_manager().session_scope() as session:
             # Check license number uniqueness
             if license_number:
                 query = session.query(Veterinarian).filter(
@@ -119,8 +119,6 @@ class VeterinarianController:
                         query = query.filter(Veterinarian.vet_id != vet_id_to_ignore)
                     if query.first():
                         errors.append(f"Email '{email}' is already in use.")
-        finally:
-            db_manager().close()
 
         return not errors, errors
 
@@ -132,36 +130,32 @@ class VeterinarianController:
         if not is_valid:
             return False, "Validation failed: " + "; ".join(errors), None
 
-        session = db_manager().get_session()
         try:
-            new_vet = Veterinarian(
-                first_name=vet_data["first_name"],
-                last_name=vet_data["last_name"],
-                license_number=vet_data["license_number"],
-                specialty=vet_data.get("specialty"),
-                phone=vet_data.get("phone"),
-                email=vet_data.get("email"),
-                is_active=vet_data.get("is_active", True),
-                created_by=current_user_id,
-                modified_by=current_user_id,
-            )
-            session.add(new_vet)
-            session.commit()
-            session.refresh(new_vet)
-            self.logger.info(
-                f"Veterinarian '{new_vet.first_name} {new_vet.last_name}' created by {current_user_id}."
-            )
-            return True, "Veterinarian created successfully.", new_vet
+            with db_manager().session_scope() as session:
+                new_vet = Veterinarian(
+                    first_name=vet_data["first_name"],
+                    last_name=vet_data["last_name"],
+                    license_number=vet_data["license_number"],
+                    specialty=vet_data.get("specialty"),
+                    phone=vet_data.get("phone"),
+                    email=vet_data.get("email"),
+                    is_active=vet_data.get("is_active", True),
+                    created_by=current_user_id,
+                    modified_by=current_user_id,
+                )
+                session.add(new_vet)
+                session.flush()
+                session.refresh(new_vet)
+                self.logger.info(
+                    f"Veterinarian '{new_vet.first_name} {new_vet.last_name}' created by {current_user_id}."
+                )
+                return True, "Veterinarian created successfully.", new_vet
         except sqlalchemy_exc.IntegrityError as e:
-            session.rollback()
             self.logger.error(f"Error creating veterinarian: {e.orig}", exc_info=True)
             return False, f"Database integrity error: {e.orig}", None
         except Exception as e:
-            session.rollback()
             self.logger.error(f"Error creating veterinarian: {e}", exc_info=True)
             return False, f"Failed to create veterinarian: {e}", None
-        finally:
-            db_manager().close()
 
     def update_veterinarian(
         self, vet_id: int, vet_data: Dict[str, Any], current_user_id: str
@@ -173,60 +167,56 @@ class VeterinarianController:
         if not is_valid:
             return False, "Validation failed: " + "; ".join(errors)
 
-        session = db_manager().get_session()
         try:
-            vet = (
-                session.query(Veterinarian)
-                .filter(Veterinarian.vet_id == vet_id)
-                .first()
-            )
-            if not vet:
-                return False, "Veterinarian not found."
+            with db_manager().session_scope() as session:
+                vet = (
+                    session.query(Veterinarian)
+                    .filter(Veterinarian.vet_id == vet_id)
+                    .first()
+                )
+                if not vet:
+                    return False, "Veterinarian not found."
 
-            for key, value in vet_data.items():
-                if hasattr(vet, key):
-                    setattr(vet, key, value)
+                for key, value in vet_data.items():
+                    if hasattr(vet, key):
+                        setattr(vet, key, value)
 
-            vet.modified_by = current_user_id
-            session.commit()
-            self.logger.info(f"Veterinarian ID {vet_id} updated by {current_user_id}.")
-            return True, "Veterinarian updated successfully."
+                vet.modified_by = current_user_id
+                session.flush()
+                self.logger.info(
+                    f"Veterinarian ID {vet_id} updated by {current_user_id}."
+                )
+                return True, "Veterinarian updated successfully."
         except Exception as e:
-            session.rollback()
             self.logger.error(
                 f"Error updating veterinarian ID {vet_id}: {e}", exc_info=True
             )
             return False, f"Failed to update veterinarian: {e}"
-        finally:
-            db_manager().close()
 
     def toggle_veterinarian_status(
         self, vet_id: int, current_user_id: str
     ) -> Tuple[bool, str]:
         """Toggles the active status of a veterinarian."""
-        session = db_manager().get_session()
         try:
-            vet = (
-                session.query(Veterinarian)
-                .filter(Veterinarian.vet_id == vet_id)
-                .first()
-            )
-            if not vet:
-                return False, "Veterinarian not found."
-
-            vet.is_active = not vet.is_active
-            vet.modified_by = current_user_id
-            new_status = "activated" if vet.is_active else "deactivated"
-            session.commit()
-            self.logger.info(
-                f"Veterinarian '{vet.first_name} {vet.last_name}' status changed to {new_status} by {current_user_id}."
-            )
-            return True, f"Veterinarian has been {new_status}."
+            with db_manager().session_scope() as session:
+                vet = (
+                    session.query(Veterinarian)
+                    .filter(Veterinarian.vet_id == vet_id)
+                    .first()
+                )
+                if not vet:
+                    return False, "Veterinarian not found."
+
+                vet.is_active = not vet.is_active
+                vet.modified_by = current_user_id
+                new_status = "activated" if vet.is_active else "deactivated"
+                session.flush()
+                self.logger.info(
+                    f"Veterinarian '{vet.first_name} {vet.last_name}' status changed to {new_status} by {current_user_id}."
+                )
+                return True, f"Veterinarian has been {new_status}."
         except Exception as e:
-            session.rollback()
             self.logger.error(
                 f"Error toggling status for vet ID {vet_id}: {e}", exc_info=True
             )
             return False, f"Failed to toggle status: {e}"
-        finally:
-            db_manager().close()
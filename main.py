@@ -2,14 +2,46 @@
 
 """
 EDSI Veterinary Management System - Main Application Entry Point
-Version: 2.1.5
+Version: 2.5.0
 Purpose: Configured to use user-defined paths from AppConfig for logging and database.
          Now imports all top-level managers/controllers directly and passes them
          down using dependency injection to resolve persistent ModuleNotFoundError.
-Last Updated: June 30, 2025
+Last Updated: October 16, 2026
 Author: Claude Assistant (Modified by Gemini, further modified by Coding partner)
 
 Changelog:
+- v2.5.0 (2026-10-16):
+    - Calls `multiprocessing.freeze_support()` first thing in the `__main__`
+      block, so the packaged executable can start the worker processes that
+      render statement batches.
+- v2.4.0 (2026-10-16):
+    - Start-up phases (imports + QApplication, logging, database, splash, main
+      screen) are timed and logged as one "Startup timeline" line once the main
+      screen is shown. Time spent waiting on the user is listed but excluded from
+      the total.
+    - After database init, a `StartupWarmup` worker thread imports the horse
+      screen's module tree, configures the SQLAlchemy mappers and runs the
+      reference-data queries while the splash screen and login dialog wait.
+      When it finishes, the `HorseUnifiedManagement` widget tree is pre-built on
+      the GUI thread. Login then only binds the user and shows it.
+- v2.3.0 (2026-10-16):
+    - Screens are resolved through `views.screen_registry.get_screen_class` and
+      imported the first time they are shown. The horse and setup screens, with
+      their tab/dialog trees, ReportLab and `requests`, no longer load before the
+      splash screen. Their types are imported under `TYPE_CHECKING` only.
+- v2.2.1 (2026-10-16):
+    - `initialize_database` times itself and logs the database cold start, with
+      the per-phase breakdown from `db_manager().startup_timings`, against
+      `AppConfig.DB_COLD_START_BUDGET_MS`. Over budget is logged as a warning.
+- v2.2.0 (2026-10-16):
+    - `setup_logging` records the SQL instrumentation log path (`edsi_sql.jsonl`,
+      next to `edsi_app.log`). `initialize_database` enables
+      `db_manager().enable_sql_instrumentation()` before the engine is created,
+      so per-controller query stats and N+1 warnings cover the whole session.
+- v2.1.6 (2026-10-16):
+    - The startup connectivity probe now runs inside `db_manager().session_scope()`.
+    - `quit_application` disposes of the shared engine via `db_manager().close()`
+      now that controllers no longer tear it down after every call.
 - v2.1.5 (2025-06-30):
     - **CRITICAL BUG FIX (Persistent PermissionError):** Implemented an aggressive check
       at the beginning of `EDSIApplication.setup_logging()` to ensure that if `AppConfig.LOG_DIR`
@@ -42,7 +74,12 @@ Changelog:
 
 import sys
 import os
+import multiprocessing
 import tempfile
+import time
+
+# Reference point for the startup timeline (see EDSIApplication._mark_startup_phase)
+_PROCESS_START = time.perf_counter()
 
 # CRITICAL BUG FIX: Add project root to sys.path at the very beginning of the script.
 # This ensures Python can find top-level packages like 'config' and 'services'.
@@ -59,7 +96,7 @@ if _PROJECT_ROOT_FOR_PATHING not in sys.path:
 
 import logging
 from logging.handlers import RotatingFileHandler
-from typing import Optional
+from typing import List, Optional, Tuple, TYPE_CHECKING
 import traceback
 
 from PySide6.QtWidgets import (
@@ -69,23 +106,34 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtCore import (
     Qt,
+    Signal,
 )
 from sqlalchemy import text
 
 # Now, with the sys.path fixed above, these imports should resolve correctly.
 from config.config_manager import config_manager as _config_manager_instance
 from services.backup_manager import backup_manager as _backup_manager_instance
+from services.startup_warmup import StartupWarmup, reference_data_tasks
 
 # Import AppConfig (which now pulls paths from _config_manager_instance)
 from config.database_config import db_manager
 from config.app_config import AppConfig
 
-# These imports are dependent on AppConfig's paths being set up correctly
-# For instance, SplashScreen may try to load assets.
-from views.auth.splash_screen import SplashScreen
-from views.auth.small_login_dialog import SmallLoginDialog
-from views.horse.horse_unified_management import HorseUnifiedManagement
-from views.admin.user_management_screen import UserManagementScreen
+# Screens are imported on first use through the registry, after AppConfig's
+# paths are set up. See scripts/import_profile.py for the splash-path budget.
+from views.screen_registry import (
+    get_screen_class,
+    SPLASH_SCREEN,
+    LOGIN_DIALOG,
+    HORSE_MANAGEMENT_SCREEN,
+    USER_MANAGEMENT_SCREEN,
+)
+
+if TYPE_CHECKING:
+    from views.auth.splash_screen import SplashScreen
+    from views.auth.small_login_dialog import SmallLoginDialog
+    from views.horse.horse_unified_management import HorseUnifiedManagement
+    from views.admin.user_management_screen import UserManagementScreen
 
 # The global exception hook logger is defined here for early availability
 exception_logger = logging.getLogger("GlobalExceptionHook")
@@ -114,8 +162,16 @@ class EDSIApplication(QApplication):
     Handles application lifecycle, logging, database initialization, and screen flow.
     """
 
+    # Emitted from the warm-up worker thread; delivered on the GUI thread.
+    warmup_finished = Signal()
+
     def __init__(self, config_manager_instance, backup_manager_instance):
         super().__init__(sys.argv)
+        # (phase, elapsed ms, spent waiting on the user)
+        self.startup_timeline: List[Tuple[str, float, bool]] = []
+        self._last_startup_mark = _PROCESS_START
+        self._startup_timeline_logged = False
+        self._mark_startup_phase("imports + QApplication")
         # Set the global exception hook early
         sys.excepthook = global_exception_hook
 
@@ -123,11 +179,13 @@ class EDSIApplication(QApplication):
         self._backup_manager = backup_manager_instance
 
         self.current_user_id: Optional[str] = None
-        self.splash_screen: Optional[SplashScreen] = None
-        self.login_dialog: Optional[SmallLoginDialog] = None
-        self.horse_management_screen: Optional[HorseUnifiedManagement] = None
-        self.user_management_screen: Optional[UserManagementScreen] = None
+        self.splash_screen: Optional["SplashScreen"] = None
+        self.login_dialog: Optional["SmallLoginDialog"] = None
+        self.horse_management_screen: Optional["HorseUnifiedManagement"] = None
+        self.user_management_screen: Optional["UserManagementScreen"] = None
         self.active_screen_name: Optional[str] = None
+        self._warmup: Optional[StartupWarmup] = None
+        self._prebuilt_horse_screen: Optional["HorseUnifiedManagement"] = None
 
         # Ensure core application directories exist (now uses AppConfig's resolved paths)
         AppConfig.ensure_directories()
@@ -139,9 +197,11 @@ class EDSIApplication(QApplication):
 
         # Initialize the logger for this instance *before* calling setup_logging
         self.logger = logging.getLogger(self.__class__.__name__)
+        self.sql_log_file: Optional[str] = None
 
         # Setup logging using the paths resolved by AppConfig
         self.setup_logging()
+        self._mark_startup_phase("logging setup")
 
         self.logger.info(f"Starting {AppConfig.APP_NAME} v{AppConfig.APP_VERSION}")
         self.logger.info(f"Python version: {sys.version}")
@@ -149,9 +209,14 @@ class EDSIApplication(QApplication):
 
         # Initialize the database using the URL from AppConfig
         self.initialize_database()
+        self._mark_startup_phase("database init")
 
         # Start the application flow with the splash screen
         self.show_splash_screen()
+        self._mark_startup_phase("splash screen")
+
+        # Warm up in the background while the splash screen waits for the user
+        self.start_warmup()
 
     def setup_logging(self):
         """
@@ -187,6 +252,7 @@ class EDSIApplication(QApplication):
             final_log_dir = temp_log_dir
             log_config["app_log_file"] = os.path.join(final_log_dir, "edsi_app.log")
             log_config["db_log_file"] = os.path.join(final_log_dir, "edsi_db.log")
+            log_config["sql_log_file"] = os.path.join(final_log_dir, "edsi_sql.jsonl")
             log_config["log_dir"] = (
                 final_log_dir  # Update log_config with the safe path
             )
@@ -237,6 +303,7 @@ class EDSIApplication(QApplication):
             )
             file_handler.setFormatter(formatter)
             root_logger.addHandler(file_handler)
+            self.sql_log_file = log_config["sql_log_file"]
             self.logger.info("Logging configured (Console and File)")
         except Exception as e:
             print(f"Error setting up file logger: {e}", file=sys.stderr)
@@ -250,13 +317,16 @@ class EDSIApplication(QApplication):
         Ensures the database is accessible before proceeding.
         """
         self.logger.info("Initializing database...")
+        start = time.perf_counter()
         try:
             # db_manager is a function that returns the instance, so call it first
+            db_manager().enable_sql_instrumentation(self.sql_log_file)
             db_manager().initialize_database()
             # Perform a simple query to verify connection
-            with db_manager().get_session() as session:
+            with db_manager().session_scope() as session:
                 session.execute(text("SELECT 1"))
             self.logger.info("Database initialized successfully")
+            self._log_cold_start_budget((time.perf_counter() - start) * 1000.0)
         except Exception as e:
             self.logger.critical(f"Database initialization failed: {e}", exc_info=True)
             QMessageBox.critical(
@@ -266,11 +336,88 @@ class EDSIApplication(QApplication):
             )
             sys.exit(1)
 
+    def _log_cold_start_budget(self, elapsed_ms: float):
+        """Reports database startup time against AppConfig.DB_COLD_START_BUDGET_MS."""
+        budget_ms = AppConfig.DB_COLD_START_BUDGET_MS
+        phases = ", ".join(
+            f"{name} {ms:.1f} ms" for name, ms in db_manager().startup_timings.items()
+        )
+        message = (
+            f"Database cold start: {elapsed_ms:.1f} ms of {budget_ms} ms budget "
+            f"({phases})"
+        )
+        if elapsed_ms > budget_ms:
+            self.logger.warning(f"{message} - OVER BUDGET")
+        else:
+            self.logger.info(message)
+
+    def _mark_startup_phase(self, phase: str, user_wait: bool = False):
+        """Records the time since the previous mark as `phase` on the startup timeline."""
+        if self._startup_timeline_logged:
+            return
+        now = time.perf_counter()
+        self.startup_timeline.append(
+            (phase, (now - self._last_startup_mark) * 1000.0, user_wait)
+        )
+        self._last_startup_mark = now
+
+    def _log_startup_timeline(self):
+        """Writes the startup timeline to the log once, when the main screen is up."""
+        if self._startup_timeline_logged:
+            return
+        self._startup_timeline_logged = True
+        phases = " | ".join(
+            f"{phase} {ms:.1f} ms" + (" (user)" if user_wait else "")
+            for phase, ms, user_wait in self.startup_timeline
+        )
+        total = sum(ms for _, ms, user_wait in self.startup_timeline if not user_wait)
+        self.logger.info(
+            f"Startup timeline: {phases} | total excluding user wait {total:.1f} ms"
+        )
+
+    def start_warmup(self):
+        """
+        Starts the background warm-up. The horse screen module is imported first,
+        so `_prebuild_horse_screen` only has widget construction left to do.
+        """
+        tasks = [
+            (
+                "horse screen import",
+                lambda: get_screen_class(HORSE_MANAGEMENT_SCREEN),
+            )
+        ] + reference_data_tasks()
+        self.warmup_finished.connect(self._prebuild_horse_screen)
+        self._warmup = StartupWarmup(tasks, on_finished=self.warmup_finished.emit)
+        self._warmup.start()
+
+    def _prebuild_horse_screen(self):
+        """Builds the (hidden) horse screen on the GUI thread ahead of login."""
+        if self.horse_management_screen or self._prebuilt_horse_screen:
+            return
+        start = time.perf_counter()
+        try:
+            self._prebuilt_horse_screen = get_screen_class(HORSE_MANAGEMENT_SCREEN)()
+        except Exception as e:
+            self.logger.warning(
+                f"Could not pre-build Horse Management screen: {e}", exc_info=True
+            )
+            return
+        self.logger.info(
+            f"Pre-built Horse Management screen in "
+            f"{(time.perf_counter() - start) * 1000.0:.1f} ms"
+        )
+
+    def _discard_prebuilt_horse_screen(self):
+        if self._prebuilt_horse_screen:
+            self._prebuilt_horse_screen.close()
+            self._prebuilt_horse_screen.deleteLater()
+            self._prebuilt_horse_screen = None
+
     def show_splash_screen(self):
         """Displays the application splash screen."""
         self.logger.info("Showing splash screen")
         self._cleanup_screens(keep_main=False)
-        self.splash_screen = SplashScreen()
+        self.splash_screen = get_screen_class(SPLASH_SCREEN)()
         self.splash_screen.login_requested.connect(self.show_login_dialog)
         self.splash_screen.exit_requested.connect(self.quit_application)
         self.splash_screen.show()
@@ -278,6 +425,7 @@ class EDSIApplication(QApplication):
     def show_login_dialog(self):
         """Displays the login dialog, potentially over the splash screen."""
         self.logger.info("Showing login dialog")
+        self._mark_startup_phase("splash wait", user_wait=True)
         if self.login_dialog and self.login_dialog.isVisible():
             self.login_dialog.raise_()
             self.login_dialog.activateWindow()
@@ -288,7 +436,7 @@ class EDSIApplication(QApplication):
             if self.splash_screen and self.splash_screen.isVisible()
             else None
         )
-        self.login_dialog = SmallLoginDialog(parent=parent_widget)
+        self.login_dialog = get_screen_class(LOGIN_DIALOG)(parent=parent_widget)
         self.login_dialog.login_successful.connect(self.handle_login_success)
         self.login_dialog.dialog_closed.connect(self.handle_login_dialog_closed)
         self.login_dialog.setModal(True)
@@ -298,6 +446,7 @@ class EDSIApplication(QApplication):
         """Handles a successful login event."""
         self.current_user_id = user_id
         self.logger.info(f"User '{user_id}' logged in successfully")
+        self._mark_startup_phase("login wait", user_wait=True)
 
         if self.login_dialog:
             try:
@@ -341,10 +490,16 @@ class EDSIApplication(QApplication):
         self.logger.info(
             f"Showing Horse Management screen for user: {self.current_user_id}"
         )
+        prebuilt_screen = self._prebuilt_horse_screen
+        self._prebuilt_horse_screen = None
         self._cleanup_screens(keep_main=False)
-        self.horse_management_screen = HorseUnifiedManagement(
-            current_user=self.current_user_id
-        )
+        if prebuilt_screen is not None:
+            prebuilt_screen.set_current_user(self.current_user_id)
+            self.horse_management_screen = prebuilt_screen
+        else:
+            self.horse_management_screen = get_screen_class(HORSE_MANAGEMENT_SCREEN)(
+                current_user=self.current_user_id
+            )
         self.active_screen_name = "Horse Management"
 
         self.horse_management_screen.exit_requested.connect(self.handle_logout)
@@ -353,7 +508,14 @@ class EDSIApplication(QApplication):
             self.show_user_management_screen
         )
         self.horse_management_screen.showMaximized()
-        self.logger.info("Horse Management Screen shown.")
+        self.logger.info(
+            "Horse Management Screen shown"
+            + (" (pre-built)." if prebuilt_screen is not None else ".")
+        )
+        self._mark_startup_phase(
+            "main screen (pre-built)" if prebuilt_screen is not None else "main screen"
+        )
+        self._log_startup_timeline()
 
     def show_user_management_screen(self):
         """Displays the user and system management screen."""
@@ -384,7 +546,7 @@ class EDSIApplication(QApplication):
             return
 
         self.logger.info("Creating new User Management Screen instance.")
-        self.user_management_screen = UserManagementScreen(
+        self.user_management_screen = get_screen_class(USER_MANAGEMENT_SCREEN)(
             current_user_id=self.current_user_id,
             config_manager_instance=self._config_manager,
             backup_manager_instance=self._backup_manager,
@@ -426,6 +588,10 @@ class EDSIApplication(QApplication):
         """Initiates a clean shutdown of the entire application."""
         self.logger.info("Application quit requested.")
         self._cleanup_screens(keep_main=False)
+        self._discard_prebuilt_horse_screen()
+        if self._warmup and not self._warmup.wait(timeout=5.0):
+            self.logger.warning("Startup warm-up still running at shutdown.")
+        db_manager().close()
         self.quit()
 
     def _cleanup_screens(self, keep_main: bool = False):
@@ -582,6 +748,10 @@ def main():
 
 
 if __name__ == "__main__":
+    # In the packaged executable, a statement-rendering worker process starts
+    # here too; this hands it over to multiprocessing instead of the app.
+    multiprocessing.freeze_support()
+
     # Ensure initial log directory for main's own logging is robust
     # Using a platform-appropriate temporary directory for early logging
     _initial_log_dir_fallback = os.path.join(tempfile.gettempdir(), "EDMS_temp_logs")
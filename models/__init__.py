@@ -6,7 +6,12 @@ EDSI Veterinary Management System - Models Package
 from .base_model import Base, BaseModel
 from .user_models import User, Role, UserRole
 from .horse_models import Horse, HorseOwner, HorseLocation
-from .owner_models import Owner, OwnerBillingHistory, OwnerPayment
+from .owner_models import (
+    Owner,
+    OwnerBillingHistory,
+    OwnerPayment,
+    OwnerBalanceSnapshot,
+)
 from .reference_models import (
     StateProvince,
     ChargeCodeCategory,
@@ -21,7 +26,17 @@ from .reference_models import (
     Reminder,
     Appointment,
 )
-from .financial_models import Transaction, Invoice
+from .financial_models import (
+    Transaction,
+    Invoice,
+    TransactionAllocation,
+    InvoiceSequence,
+    InvoicePaymentLink,
+    ChargeUsageRollup,
+    BillingRun,
+    BillingRunOwner,
+    BillingRunInvoice,
+)
 from .company_profile_model import CompanyProfile  # ADDED
 
 __all__ = [
@@ -36,6 +51,7 @@ __all__ = [
     "Owner",
     "OwnerBillingHistory",
     "OwnerPayment",
+    "OwnerBalanceSnapshot",
     "StateProvince",
     "ChargeCodeCategory",
     "ChargeCode",
@@ -50,5 +66,12 @@ __all__ = [
     "Appointment",
     "Transaction",
     "Invoice",
+    "TransactionAllocation",
+    "InvoiceSequence",
+    "InvoicePaymentLink",
+    "ChargeUsageRollup",
+    "BillingRun",
+    "BillingRunOwner",
+    "BillingRunInvoice",
     "CompanyProfile",  # ADDED
 ]
@@ -1,12 +1,48 @@
 # models/financial_models.py
 """
 EDSI Veterinary Management System - Financial Data Models
-Version: 1.4.0
+Version: 1.12.0
 Purpose: Defines SQLAlchemy models for financial records like Transactions and Invoices.
-Last Updated: June 28, 2025
+Last Updated: October 16, 2026
 Author: Gemini
 
 Changelog:
+- v1.12.0 (2026-10-16):
+    - Added `BillingRunInvoice` (`billing_run_invoices`): the invoices a billing
+      run created, written in the same commit as the chunk that created them.
+- v1.11.0 (2026-10-16):
+    - Added `Invoice.format_display_id`, the `display_invoice_id` format from
+      plain column values, for exports that read rows rather than objects.
+- v1.10.0 (2026-10-16):
+    - Added `ChargeUsageRollup` (`charge_usage_rollups`): charge count and
+      revenue per month, charge code and administering user, kept up to date
+      by `services.usage_rollup` as charges are added, edited and deleted.
+- v1.9.0 (2026-10-16):
+    - Added `TransactionAllocation` (`transaction_allocations`): one owner's share
+      of a billed charge, which is that owner's invoice line. Invoicing writes
+      these instead of copying each charge into a new `BILLED` `Transaction` per
+      owner. Added the `Invoice.allocations` and `Transaction.allocations`
+      relationships.
+- v1.8.0 (2026-10-16):
+    - Added `InvoicePaymentLink` (`invoice_payment_links`), the cached online
+      payment link of an invoice with the amount it was created for and its
+      expiry, and the `Invoice.payment_link` relationship.
+- v1.7.0 (2026-10-16):
+    - Added `InvoiceSequence` (`invoice_sequences`), the per-owner, per-month
+      allocator for invoice sequence numbers.
+- v1.6.0 (2026-10-16):
+    - Added `BillingRun` and `BillingRunOwner`. Together they are the journal of a
+      practice-wide month-end billing run: one row per run and one row per owner
+      to be billed, marked DONE in the same commit that creates that owner's
+      invoices.
+    - Added the (status, owner_id, transaction_date) index on `Transaction`. A
+      billing run uses it to find each chunk's unbilled charges in the period.
+- v1.5.0 (2026-10-16):
+    - Declared composite indexes in `__table_args__` for the hot filter/sort paths.
+      `Transaction` gets (horse_id, status, transaction_date), (horse_id, transaction_date)
+      and (transaction_date). `Invoice` gets (owner_id, invoice_period_ym,
+      monthly_sequence_number), (owner_id, invoice_date) and (invoice_date).
+      `DatabaseManager` creates any that are missing on existing databases.
 - v1.4.0 (2025-06-28):
     - [cite_start]Added `monthly_sequence_number` (Integer) and `invoice_period_ym` (String) columns to `Invoice` model. [cite: 584, 585, 587]
     - Implemented `display_invoice_id` as a `hybrid_property` in the `Invoice` model to generate
@@ -33,13 +69,15 @@ from sqlalchemy import (
     Date,
     Numeric,
     DateTime,
+    Index,
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import date
+from decimal import Decimal
 from sqlalchemy.ext.hybrid import hybrid_property  # Added for display_invoice_id
 
-from .base_model import BaseModel
+from .base_model import Base, BaseModel
 
 
 class Transaction(BaseModel):
@@ -49,6 +87,26 @@ class Transaction(BaseModel):
     """
 
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Horse screen: a horse's unbilled (ACTIVE) charges, newest first
+        Index(
+            "ix_transactions_horse_status_date",
+            "horse_id",
+            "status",
+            "transaction_date",
+        ),
+        # Horse transaction history report: one horse over a date range
+        Index("ix_transactions_horse_date", "horse_id", "transaction_date"),
+        # Charge code usage report: all charges in a date range
+        Index("ix_transactions_transaction_date", "transaction_date"),
+        # Billing run: unbilled (ACTIVE) charges in a period, per owner chunk
+        Index(
+            "ix_transactions_status_owner_date",
+            "status",
+            "owner_id",
+            "transaction_date",
+        ),
+    )
 
     transaction_id = Column(Integer, primary_key=True, index=True)
     horse_id = Column(
@@ -85,6 +143,7 @@ class Transaction(BaseModel):
     invoice = relationship("Invoice", back_populates="transactions")
     charge_code = relationship("ChargeCode")
     administered_by = relationship("User")
+    allocations = relationship("TransactionAllocation", back_populates="transaction")
 
     def __repr__(self):
         return f"<Transaction(id={self.transaction_id}, horse_id={self.horse_id}, total={self.total_price})>"
@@ -96,6 +155,19 @@ class Invoice(BaseModel):
     """
 
     __tablename__ = "invoices"
+    __table_args__ = (
+        # Next monthly sequence number for an owner's invoice
+        Index(
+            "ix_invoices_owner_period_seq",
+            "owner_id",
+            "invoice_period_ym",
+            "monthly_sequence_number",
+        ),
+        # Owner invoice list and statements, by date
+        Index("ix_invoices_owner_date", "owner_id", "invoice_date"),
+        # Invoice register and statement runs over a date range
+        Index("ix_invoices_invoice_date", "invoice_date"),
+    )
 
     invoice_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     owner_id = Column(
@@ -129,9 +201,19 @@ class Invoice(BaseModel):
 
     # Relationships
     owner = relationship("Owner", backref="invoices")
+    # Line items billed before `transaction_allocations` existed and that could
+    # not be matched to their source charge; new invoices never have any.
     transactions = relationship(
         "Transaction", back_populates="invoice", cascade="all, delete-orphan"
     )
+    allocations = relationship(
+        "TransactionAllocation",
+        back_populates="invoice",
+        cascade="all, delete-orphan",
+    )
+    payment_link = relationship(
+        "InvoicePaymentLink", uselist=False, cascade="all, delete-orphan"
+    )
 
     @hybrid_property
     def display_invoice_id(self):
@@ -139,19 +221,221 @@ class Invoice(BaseModel):
         Generates a human-readable invoice ID.
         Format: OWNER_ACCT-YYMM-SEQ (e.g., WC001-2506-0001)
         """
-        owner_prefix = "NOACCT"
-        if self.owner:
-            owner_prefix = self.owner.account_number or f"OWNER{self.owner.owner_id}"
-
-        ym_part = self.invoice_period_ym or self.invoice_date.strftime("%y%m")
-        seq_part = (
-            f"{self.monthly_sequence_number:04d}"
-            if self.monthly_sequence_number is not None
-            else "0000"
+        return self.format_display_id(
+            self.owner.account_number if self.owner else None,
+            self.owner.owner_id if self.owner else None,
+            self.invoice_period_ym,
+            self.invoice_date,
+            self.monthly_sequence_number,
         )
 
+    @staticmethod
+    def format_display_id(
+        account_number, owner_id, invoice_period_ym, invoice_date, sequence_number
+    ) -> str:
+        """`display_invoice_id` from column values; owner_id None means no owner."""
+        owner_prefix = "NOACCT"
+        if owner_id is not None:
+            owner_prefix = account_number or f"OWNER{owner_id}"
+
+        ym_part = invoice_period_ym or invoice_date.strftime("%y%m")
+        seq_part = f"{sequence_number:04d}" if sequence_number is not None else "0000"
+
         return f"{owner_prefix}-{ym_part}-{seq_part}"
 
     def __repr__(self):
         # Updated to use the new display_invoice_id
         return f"<Invoice(id={self.invoice_id}, display_id='{self.display_invoice_id}', owner_id={self.owner_id}, total={self.grand_total}, status='{self.status}')>"
+
+
+class TransactionAllocation(Base):
+    """
+    One owner's share of a billed charge, i.e. a line of that owner's invoice.
+    A charge split between co-owners gets one allocation per owner, all pointing
+    at the same `Transaction`. Date, description, quantity, prices and charge
+    code read through to the charge, so an allocation renders like the line item
+    it replaces.
+    """
+
+    __tablename__ = "transaction_allocations"
+
+    transaction_id = Column(
+        Integer, ForeignKey("transactions.transaction_id"), primary_key=True
+    )
+    owner_id = Column(Integer, ForeignKey("owners.owner_id"), primary_key=True)
+    invoice_id = Column(
+        Integer,
+        ForeignKey("invoices.invoice_id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    # Fraction of the charge billed to this owner (percentage_ownership / 100)
+    share = Column(Numeric(7, 6), nullable=False)
+    amount = Column(Numeric(10, 2), nullable=False)
+
+    transaction = relationship("Transaction", back_populates="allocations")
+    invoice = relationship("Invoice", back_populates="allocations")
+
+    @property
+    def transaction_date(self):
+        return self.transaction.transaction_date
+
+    @property
+    def description(self) -> str:
+        if self.share < 1:
+            return f"{self.transaction.description} ({self.share * 100:.2f}% Share)"
+        return self.transaction.description
+
+    @property
+    def quantity(self):
+        return self.transaction.quantity
+
+    @property
+    def unit_price(self) -> Decimal:
+        return (self.transaction.unit_price * self.share).quantize(Decimal("0.01"))
+
+    @property
+    def total_price(self):
+        return self.amount
+
+    @property
+    def charge_code(self):
+        return self.transaction.charge_code
+
+    def __repr__(self):
+        return f"<TransactionAllocation(transaction_id={self.transaction_id}, invoice_id={self.invoice_id}, share={self.share}, amount={self.amount})>"
+
+
+class InvoiceSequence(Base):
+    """
+    Next `Invoice.monthly_sequence_number` to hand out for an owner in a month
+    (YYMM). Numbers are taken with one atomic `UPDATE ... RETURNING`, so two
+    workstations invoicing the same owner can never get the same number, and a
+    number is never reused after an invoice is deleted.
+    """
+
+    __tablename__ = "invoice_sequences"
+
+    owner_id = Column(Integer, ForeignKey("owners.owner_id"), primary_key=True)
+    period_ym = Column(String(4), primary_key=True)
+    next_value = Column(Integer, nullable=False, default=1)
+
+    def __repr__(self):
+        return f"<InvoiceSequence(owner_id={self.owner_id}, period='{self.period_ym}', next={self.next_value})>"
+
+
+class ChargeUsageRollup(Base):
+    """
+    Charges and revenue for one month, charge code and administering user. The
+    charge code's category is carried along so reports can group by it without
+    joining back. Maintained in the same transaction as the charges themselves
+    (`services.usage_rollup`); archiving a year leaves its rows in place, so
+    usage over any span of whole months is read here alone.
+    """
+
+    __tablename__ = "charge_usage_rollups"
+    __table_args__ = (
+        # Charge code delete check and category re-sync, by code
+        Index("ix_charge_usage_rollups_charge_code", "charge_code_id"),
+    )
+
+    month_start = Column(Date, primary_key=True)
+    charge_code_id = Column(
+        Integer, ForeignKey("charge_codes.id"), primary_key=True
+    )
+    # "" when the charge has no administering user (primary keys cannot be NULL)
+    administered_by_user_id = Column(String(20), primary_key=True, default="")
+    category_id = Column(Integer, nullable=True)
+    usage_count = Column(Integer, nullable=False, default=0)
+    total_revenue = Column(Numeric(12, 2), nullable=False, default=Decimal("0.00"))
+
+    def __repr__(self):
+        return f"<ChargeUsageRollup(month={self.month_start}, charge_code_id={self.charge_code_id}, user='{self.administered_by_user_id}', count={self.usage_count})>"
+
+
+class InvoicePaymentLink(BaseModel):
+    """
+    The online payment link last created for an invoice. It is reused until it
+    expires or the invoice's balance due no longer equals `amount`.
+    """
+
+    __tablename__ = "invoice_payment_links"
+
+    invoice_id = Column(
+        Integer,
+        ForeignKey("invoices.invoice_id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    url = Column(String(500), nullable=False)
+    amount = Column(Numeric(10, 2), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<InvoicePaymentLink(invoice_id={self.invoice_id}, amount={self.amount}, expires_at={self.expires_at})>"
+
+
+class BillingRun(BaseModel):
+    """
+    A practice-wide billing run over a date range. The run's owners are journaled
+    in `BillingRunOwner`, so an interrupted run can be resumed where it stopped.
+    """
+
+    __tablename__ = "billing_runs"
+
+    run_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    period_start = Column(Date, nullable=False)
+    period_end = Column(Date, nullable=False)
+    # IN_PROGRESS, CANCELLED, FAILED or COMPLETED
+    status = Column(String(20), nullable=False, default="IN_PROGRESS", index=True)
+    owners_total = Column(Integer, nullable=False, default=0)
+    owners_done = Column(Integer, nullable=False, default=0)
+    invoices_created = Column(Integer, nullable=False, default=0)
+    started_at = Column(DateTime, nullable=False, default=func.now())
+    finished_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    owners = relationship(
+        "BillingRunOwner", back_populates="run", cascade="all, delete-orphan"
+    )
+
+    def __repr__(self):
+        return f"<BillingRun(id={self.run_id}, period={self.period_start}..{self.period_end}, status='{self.status}', done={self.owners_done}/{self.owners_total})>"
+
+
+class BillingRunOwner(BaseModel):
+    """One owner's entry in a billing run's journal."""
+
+    __tablename__ = "billing_run_owners"
+    __table_args__ = (
+        # Next chunk of a run: its PENDING owners in owner order
+        Index("ix_billing_run_owners_run_status_owner", "run_id", "status", "owner_id"),
+    )
+
+    run_id = Column(Integer, ForeignKey("billing_runs.run_id"), primary_key=True)
+    owner_id = Column(Integer, ForeignKey("owners.owner_id"), primary_key=True)
+    # PENDING until the owner's invoices are committed, then DONE
+    status = Column(String(20), nullable=False, default="PENDING")
+    charges_billed = Column(Integer, nullable=False, default=0)
+    completed_at = Column(DateTime, nullable=True)
+
+    run = relationship("BillingRun", back_populates="owners")
+
+    def __repr__(self):
+        return f"<BillingRunOwner(run_id={self.run_id}, owner_id={self.owner_id}, status='{self.status}')>"
+
+
+class BillingRunInvoice(BaseModel):
+    """An invoice created by a billing run."""
+
+    __tablename__ = "billing_run_invoices"
+
+    run_id = Column(Integer, ForeignKey("billing_runs.run_id"), primary_key=True)
+    invoice_id = Column(
+        Integer,
+        ForeignKey("invoices.invoice_id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True,
+    )
+
+    def __repr__(self):
+        return f"<BillingRunInvoice(run_id={self.run_id}, invoice_id={self.invoice_id})>"
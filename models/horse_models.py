@@ -1,12 +1,16 @@
 # models/horse_models.py
 """
 EDSI Veterinary Management System - Horse Related SQLAlchemy Models
-Version: 1.3.0
+Version: 1.4.0
 Purpose: Defines the data models for horses, owners, and their relationships.
-Last Updated: June 10, 2025
+Last Updated: October 16, 2026
 Author: Gemini
 
 Changelog:
+- v1.4.0 (2026-10-16):
+    - Added a composite index on `HorseLocation` (horse_id, date_arrived). It serves
+      the `Horse.location_history` selectin load and its order_by. That load was a
+      full scan of `horse_locations` for every horse list.
 - v1.3.0 (2025-06-10):
     - Added missing columns to the Horse model: `reg_number`, `brand`, `band_tag`.
       This resolves warnings during horse creation and ensures all form data is saved.
@@ -18,7 +22,17 @@ Changelog:
 - v1.2.15 (2025-05-23):
     - Horse model: Removed `species_id` column and `species` relationship.
 """
-from sqlalchemy import Column, Integer, String, Date, Boolean, ForeignKey, Numeric, Text
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Date,
+    Boolean,
+    ForeignKey,
+    Numeric,
+    Text,
+    Index,
+)
 from sqlalchemy.orm import relationship, validates
 from sqlalchemy.ext.hybrid import hybrid_property
 from datetime import date
@@ -38,6 +52,10 @@ class HorseOwner(Base):
 
 class HorseLocation(BaseModel):
     __tablename__ = "horse_locations"
+    __table_args__ = (
+        # Horse.location_history: a horse's locations, most recent arrival first
+        Index("ix_horse_locations_horse_date_arrived", "horse_id", "date_arrived"),
+    )
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     horse_id = Column(Integer, ForeignKey("horses.horse_id"), nullable=False)
     location_id = Column(Integer, ForeignKey("locations.location_id"), nullable=False)
@@ -1,14 +1,25 @@
 # models/owner_models.py
 """
 EDSI Veterinary Management System - Owner Related Models
-Version: 1.1.7
+Version: 1.4.0
 Purpose: Defines SQLAlchemy models for Owner and related entities.
          - Removed the placeholder Invoice model to avoid conflict with the
            definitive Invoice model in financial_models.py.
-Last Updated: June 4, 2025
+Last Updated: October 16, 2026
 Author: Claude Assistant (Modified by Gemini)
 
 Changelog:
+- v1.4.0 (2026-10-16):
+    - Added the nullable `OwnerPayment.invoice_id` (indexed). `record_payment` sets
+      it, so the A/R aging can add back payments made after its as-of date.
+- v1.3.0 (2026-10-16):
+    - Added `OwnerBalanceSnapshot`, the month-close balance checkpoints of the
+      `OwnerBillingHistory` ledger, keyed by (owner_id, as_of_date).
+- v1.2.0 (2026-10-16):
+    - Declared composite indexes in `__table_args__`: `OwnerBillingHistory`
+      (owner_id, entry_date) for statement opening balances, and `OwnerPayment`
+      (owner_id, payment_date) plus (payment_date) for statements and the payment
+      history report.
 - v1.1.7 (2025-06-04):
     - Removed the placeholder `Invoice` class definition. The definitive `Invoice`
       model is now in `models/financial_models.py`.
@@ -29,6 +40,7 @@ from sqlalchemy import (
     ForeignKey,
     Date,
     DateTime,
+    Index,
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -110,6 +122,10 @@ class OwnerBillingHistory(BaseModel):
     """Billing history entries for an owner."""
 
     __tablename__ = "owner_billing_history"
+    __table_args__ = (
+        # Statement opening balance: latest entry for an owner before a date
+        Index("ix_owner_billing_history_owner_entry_date", "owner_id", "entry_date"),
+    )
 
     history_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     owner_id = Column(
@@ -130,11 +146,24 @@ class OwnerPayment(BaseModel):
     """Payments made by an owner."""
 
     __tablename__ = "owner_payments"
+    __table_args__ = (
+        # Owner statements: an owner's payments in a date range
+        Index("ix_owner_payments_owner_payment_date", "owner_id", "payment_date"),
+        # Payment history report and statement runs over a date range
+        Index("ix_owner_payments_payment_date", "payment_date"),
+    )
 
     payment_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     owner_id = Column(
         Integer, ForeignKey("owners.owner_id"), nullable=False, index=True
     )
+    # Invoice the payment was recorded against; NULL for older payments
+    invoice_id = Column(
+        Integer,
+        ForeignKey("invoices.invoice_id", ondelete="SET NULL"),
+        nullable=True,
+        index=True,
+    )
     payment_date = Column(Date, nullable=False, default=func.current_date)
     amount = Column(Numeric(10, 2), nullable=False)
     payment_method = Column(String(50), nullable=False)  # Made non-nullable
@@ -149,5 +178,24 @@ class OwnerPayment(BaseModel):
         return f"<OwnerPayment(owner_id={self.owner_id}, date='{self.payment_date}', amount={self.amount})>"
 
 
+class OwnerBalanceSnapshot(BaseModel):
+    """
+    An owner's balance at the start of `as_of_date`: the sum of every
+    `OwnerBillingHistory.amount_change` dated before it. Taken at month close so a
+    balance as of any date is one snapshot lookup plus the entries after it.
+    """
+
+    __tablename__ = "owner_balance_snapshots"
+
+    owner_id = Column(Integer, ForeignKey("owners.owner_id"), primary_key=True)
+    as_of_date = Column(Date, primary_key=True)
+    balance = Column(Numeric(10, 2), nullable=False)
+
+    owner = relationship("Owner")
+
+    def __repr__(self):
+        return f"<OwnerBalanceSnapshot(owner_id={self.owner_id}, as_of='{self.as_of_date}', balance={self.balance})>"
+
+
 # class Invoice(BaseModel): # REMOVED - Definitive model is in financial_models.py
 #    pass
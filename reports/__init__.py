@@ -1,22 +1,34 @@
 """
 Report generator classes.
+
+Generators are imported on first attribute access (PEP 562), so ReportLab is
+only loaded once a report is actually produced.
 """
 
-from .owner_statement_generator import OwnerStatementGenerator
-from .ar_aging_generator import ARAgingGenerator
-from .invoice_register_generator import InvoiceRegisterGenerator
-from .payment_history_generator import PaymentHistoryGenerator
-from .charge_code_usage_generator import ChargeCodeUsageGenerator
-from .horse_transaction_history_generator import HorseTransactionHistoryGenerator
-from .invoice_generator import InvoiceGenerator
-
-
-__all__ = [
-    "OwnerStatementGenerator",
-    "ARAgingGenerator",
-    "InvoiceRegisterGenerator",
-    "PaymentHistoryGenerator",
-    "ChargeCodeUsageGenerator",
-    "HorseTransactionHistoryGenerator",
-    "InvoiceGenerator",
-]
+import importlib
+
+_GENERATOR_MODULES = {
+    "OwnerStatementGenerator": ".owner_statement_generator",
+    "ARAgingGenerator": ".ar_aging_generator",
+    "InvoiceRegisterGenerator": ".invoice_register_generator",
+    "PaymentHistoryGenerator": ".payment_history_generator",
+    "ChargeCodeUsageGenerator": ".charge_code_usage_generator",
+    "HorseTransactionHistoryGenerator": ".horse_transaction_history_generator",
+    "InvoiceGenerator": ".invoice_generator",
+}
+
+
+__all__ = list(_GENERATOR_MODULES)
+
+
+def __getattr__(name):
+    module_name = _GENERATOR_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,12 +1,15 @@
 # reports/horse_transaction_history_generator.py
 """
 EDSI Veterinary Management System - Horse Transaction History PDF Generator
-Version: 1.1.0
+Version: 1.1.1
 Purpose: Generates a PDF report detailing all financial transactions for a horse.
-Last Updated: June 12, 2025
+Last Updated: October 16, 2026
 Author: Gemini
 
 Changelog:
+- v1.1.1 (2026-10-16):
+    - The "Invoiced" column reads the charge's allocations. Billed charges keep
+      no `invoice_id` since invoicing stopped copying them.
 - v1.1.0 (2025-06-12):
     - Refactored to be a standalone class, removing the dependency on
       ReportGeneratorBase to fix import errors.
@@ -192,7 +195,7 @@ class HorseTransactionHistoryGenerator:
                 f"{trans.quantity:.2f}",
                 f"${trans.unit_price:.2f}",
                 f"${trans.total_price:.2f}",
-                "Yes" if trans.invoice_id else "No",
+                "Yes" if trans.allocations or trans.invoice_id else "No",
                 trans.administered_by.user_name if trans.administered_by else "N/A",
             ]
             data.append(row)
@@ -1,13 +1,17 @@
 # reports/invoice_generator.py
 """
 EDSI Veterinary Management System - Invoice PDF Generator
-Version: 1.2.6
+Version: 1.2.7
 Purpose: Generates a professional, print-friendly PDF for a single invoice.
          Now includes an optional payment link URL embedded directly into the invoice.
-Last Updated: June 28, 2025
+Last Updated: October 16, 2026
 Author: Gemini
 
 Changelog:
+- v1.2.7 (2026-10-16):
+    - Line items now come from `FinancialController.get_invoice_line_items`, i.e.
+      the invoice's `TransactionAllocation` rows, instead of per-owner copies of
+      the charges.
 - v1.2.6 (2025-06-28):
     - Modified `_create_info_tables` to use `invoice.display_invoice_id` for the
       invoice number display.
@@ -61,7 +65,7 @@ from reportlab.lib.enums import TA_RIGHT, TA_LEFT, TA_CENTER
 
 from config.app_config import AppConfig
 from controllers import FinancialController, CompanyProfileController
-from models import Invoice, Transaction
+from models import Invoice
 
 
 class InvoiceGenerator:
@@ -135,9 +139,7 @@ class InvoiceGenerator:
             if not owner:
                 return False, f"Owner with ID {invoice.owner_id} not found."
 
-            transactions = self.financial_controller.get_transactions_for_invoice(
-                invoice_id
-            )
+            line_items = self.financial_controller.get_invoice_line_items(invoice_id)
 
             doc = SimpleDocTemplate(
                 file_path,
@@ -153,7 +155,7 @@ class InvoiceGenerator:
             story.append(Spacer(1, 0.25 * inch))
             story.append(self._create_info_tables(owner, invoice))
             story.append(Spacer(1, 0.25 * inch))
-            story.append(self._create_transactions_table(transactions))
+            story.append(self._create_transactions_table(line_items))
             story.append(Spacer(1, 0.2 * inch))
             story.append(self._create_summary_table(invoice))
             story.append(Spacer(1, 0.4 * inch))
@@ -1,12 +1,20 @@
 # reports/owner_statement_generator.py
 """
 EDSI Veterinary Management System - Owner Statement PDF Generator
-Version: 1.2.2
+Version: 1.3.0
 Purpose: Creates a PDF statement for a given owner.
-Last Updated: June 12, 2025
+Last Updated: October 16, 2026
 Author: Gemini
 
 Changelog:
+- v1.3.0 (2026-10-16):
+    - The constructor takes an optional `company_profile`. Statement batch
+      workers pass a plain copy so they never open the database;
+      `CompanyProfileController` is only imported when none is given.
+    - The header no longer fails when no company profile has been set up; it
+      falls back to the default company name with no address block.
+    - `owner` may be any object with the owner's attributes, such as the plain
+      copy a batch worker receives.
 - v1.2.2 (2025-06-12):
     - Final corrected version based on user-provided code.
     - Ensured all styled text is correctly wrapped in Paragraph objects.
@@ -19,7 +27,7 @@ Changelog:
 import logging
 import os
 from decimal import Decimal, InvalidOperation
-from typing import Dict, Any, Tuple
+from typing import Any, Dict, Optional, Tuple
 
 from reportlab.platypus import (
     SimpleDocTemplate,
@@ -34,18 +42,23 @@ from reportlab.lib import colors
 from reportlab.lib.units import inch
 from reportlab.lib.enums import TA_LEFT, TA_RIGHT, TA_CENTER
 
-from models import Owner
-from controllers import CompanyProfileController
 from config.app_config import AppConfig
 
+# Default for `company_profile`: read it from the database
+_FROM_DATABASE = object()
+
 
 class OwnerStatementGenerator:
     """Generates a professionally styled Owner Statement PDF."""
 
-    def __init__(self):
+    def __init__(self, company_profile: Optional[Any] = _FROM_DATABASE):
         self.logger = logging.getLogger(self.__class__.__name__)
         self.styles = getSampleStyleSheet()
-        self.company_profile = CompanyProfileController().get_company_profile()
+        if company_profile is _FROM_DATABASE:
+            from controllers import CompanyProfileController
+
+            company_profile = CompanyProfileController().get_company_profile()
+        self.company_profile = company_profile
         self._setup_styles()
 
     def _setup_styles(self):
@@ -123,21 +136,25 @@ class OwnerStatementGenerator:
 
     def _add_header(self, story, data):
         """Adds the header section with company logo, address, and statement details."""
-        owner: Owner = data["owner"]
+        owner = data["owner"]
 
         company_name = (
             self.company_profile.company_name
             if self.company_profile
             else "EDSI Veterinary Management"
         )
-        company_details_parts = [
-            self.company_profile.address_line1,
-            self.company_profile.address_line2,
-            f"{self.company_profile.city}, {self.company_profile.state} {self.company_profile.zip_code}",
-            self.company_profile.phone,
-            self.company_profile.email,
-            self.company_profile.website,
-        ]
+        company_details_parts = (
+            [
+                self.company_profile.address_line1,
+                self.company_profile.address_line2,
+                f"{self.company_profile.city}, {self.company_profile.state} {self.company_profile.zip_code}",
+                self.company_profile.phone,
+                self.company_profile.email,
+                self.company_profile.website,
+            ]
+            if self.company_profile
+            else []
+        )
         company_details = "<br/>".join(filter(None, company_details_parts))
 
         story.append(Paragraph(company_name, self.styles["Company_Title"]))
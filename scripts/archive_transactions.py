@@ -0,0 +1,83 @@
+# scripts/archive_transactions.py
+"""
+EDSI Veterinary Management System - Transaction Archive Utility
+Version: 1.0.0
+Purpose: Moves closed years of charges, invoices, payments and owner billing
+         history out of the live database into yearly archive files
+         (`services.transaction_archive`). Reports covering an archived year
+         attach its file automatically.
+Last Updated: October 16, 2026
+Author: Gemini
+
+Usage:
+    python scripts/archive_transactions.py --list
+    python scripts/archive_transactions.py --year YYYY [--year YYYY ...]
+        [--user ID] [--vacuum]
+
+Changelog:
+- v1.0.0 (2026-10-16):
+    - Initial creation.
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+# This allows the script to find the 'config' module
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from config.app_config import AppConfig
+from config.config_manager import config_manager
+from config.database_config import DatabaseManager, set_db_manager_instance
+from services.transaction_archive import TransactionArchiver
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument(
+        "--list",
+        action="store_true",
+        help="Show ended years with live rows, and existing archive files.",
+    )
+    group.add_argument(
+        "--year", type=int, action="append", help="Year to archive (repeatable)."
+    )
+    parser.add_argument("--user", default="ADMIN", help="User running the archive.")
+    parser.add_argument(
+        "--vacuum",
+        action="store_true",
+        help="Compact the live database file afterwards.",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    manager = DatabaseManager(AppConfig, config_manager)
+    set_db_manager_instance(manager)
+    manager.initialize_database()
+    archiver = TransactionArchiver()
+    failed = False
+    try:
+        if args.list:
+            for year in archiver.archivable_years():
+                path = manager.archive_path(year)
+                existing = " (archive exists)" if path and path.is_file() else ""
+                print(f"{year}: {path}{existing}")
+            return
+        for year in sorted(args.year):
+            success, message, _ = archiver.archive_year(
+                year, args.user, vacuum=args.vacuum
+            )
+            print(message)
+            failed = failed or not success
+    finally:
+        manager.close()
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,966 @@
+# scripts/benchmark_db.py
+"""
+EDSI Veterinary Management System - Database Benchmark Utility
+Version: 1.12.0
+Purpose: Times the controller calls behind common screens against a copy of a
+         seeded database, so performance changes can be compared before/after.
+         The source database is never modified; every run works on a temp copy.
+Last Updated: October 16, 2026
+Author: Gemini
+
+Usage:
+    python scripts/benchmark_db.py screens [--db PATH] [--repeat N] [--sql-log FILE] [--warmup]
+    python scripts/benchmark_db.py startup [--db PATH] [--repeat N]
+    python scripts/benchmark_db.py commits [--db PATH] [--count N] [--profile NAME ...]
+    python scripts/benchmark_db.py invoices [--db PATH] [--horses N]
+    python scripts/benchmark_db.py billing-run [--db PATH] [--horses N] [--chunk N]
+    python scripts/benchmark_db.py aging [--db PATH] [--invoices N] [--repeat N]
+    python scripts/benchmark_db.py payment-sync [--db PATH] [--invoices N] [--latency-ms MS]
+    python scripts/benchmark_db.py payment-links [--db PATH] [--invoices N] [--latency-ms MS]
+    python scripts/benchmark_db.py reconcile [--db PATH] [--invoices N] [--rows N] [--check]
+
+Changelog:
+- v1.12.0 (2026-10-16):
+    - `reconcile --check` first runs settlement files that once broke the
+      reconciler (a trailing comma, re-imports without a reference column, a
+      second installment under the same reference) and exits non-zero if any
+      behaves wrongly.
+- v1.11.0 (2026-10-16):
+    - Added the `reconcile` benchmark. It writes an N-row settlement CSV (default
+      100,000) against synthetic open invoices and reports the time of
+      `SettlementReconciler.reconcile_file`, and its peak traced memory from a
+      dry run.
+- v1.10.0 (2026-10-16):
+    - Added the `payment-links` benchmark. It pre-generates links for N open
+      invoices over the stand-in backend, then times the print path's cached
+      lookups. The stand-in backend now also serves `/create-payment-link`.
+- v1.9.0 (2026-10-16):
+    - Added the `payment-sync` benchmark. It serves the payment-status endpoint
+      from a local stand-in backend with fixed latency, then times N status
+      requests one at a time against `PaymentStatusSync.sync`, which polls over
+      the pool and records the confirmed payments.
+- v1.8.0 (2026-10-16):
+    - Added the `aging` benchmark. It seeds N synthetic invoices (default 50,000),
+      with payments on half of them, and times `get_ar_aging_data` for today and for
+      60 days ago.
+- v1.7.0 (2026-10-16):
+    - Added the `billing-run` benchmark. It posts charges to N horses and times
+      `BillingRunController.run_billing`, reporting the median and longest chunk.
+      The longest chunk is the most a Cancel can wait.
+- v1.6.0 (2026-10-16):
+    - Added the `invoices` benchmark. It posts a two-line charge batch to N
+      owned horses, then times one `generate_invoices_from_transactions` call over
+      all of them.
+- v1.5.0 (2026-10-16):
+    - `screens --warmup` runs the start-up warm-up tasks (`services.startup_warmup`)
+      before timing, to compare the first screen open with and without them. The
+      first run is now printed separately from min/median/max.
+- v1.4.0 (2026-10-16):
+    - Added the `startup` benchmark, which times `DatabaseManager.initialize_database`.
+      It measures the first start on an unstamped copy (full create_all plus bcrypt
+      ADMIN check) and the later starts that the schema/bootstrap stamps short-circuit.
+- v1.3.0 (2026-10-16):
+    - `screens --sql-log FILE` enables SQL instrumentation. Each screen open is
+      one action, so N+1 warnings fire as they would in the UI. Prints
+      per-controller-method query counts.
+- v1.2.0 (2026-10-16):
+    - `prepare_database` is now public so other developer scripts (index advisor)
+      can reuse the temp-copy setup.
+- v1.1.0 (2026-10-16):
+    - Added the `commits` benchmark: commits/sec for `add_charge_batch_to_horse`
+      under each SQLite profile, each on its own fresh copy of the database.
+    - `screens` accepts `--profile` to pick the SQLite profile to run under.
+- v1.0.0 (2026-10-16):
+    - Initial creation with the `screens` benchmark: opening the horse screen
+      (horse list, first horse and its tabs) and the admin charge-code tab
+      (charge code list plus the per-row category path lookups).
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional
+
+# This allows the script to find the 'config' module
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from config.app_config import AppConfig
+from config.config_manager import config_manager
+from config.database_config import (
+    DatabaseManager,
+    SQLITE_PROFILES,
+    DEFAULT_SQLITE_PROFILE,
+    set_db_manager_instance,
+)
+
+DEFAULT_SOURCE_DB = os.path.join(PROJECT_ROOT, "edsi_database.db")
+
+
+class _BenchmarkConfig:
+    """Minimal stand-in for AppConfig that points DatabaseManager at a temp copy."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+
+    def get_database_url(self) -> str:
+        return f"sqlite:///{self.db_path}"
+
+
+def prepare_database(
+    source_db: str, work_dir: str, sqlite_profile: Optional[str] = None
+) -> DatabaseManager:
+    """Copies `source_db` into `work_dir` and installs a DatabaseManager for the copy."""
+    if not os.path.isfile(source_db):
+        raise FileNotFoundError(f"Seeded database not found: {source_db}")
+    db_copy = os.path.join(work_dir, f"benchmark_{sqlite_profile or 'default'}.db")
+    shutil.copyfile(source_db, db_copy)
+    manager = DatabaseManager(
+        _BenchmarkConfig(db_copy), config_manager, sqlite_profile=sqlite_profile
+    )
+    set_db_manager_instance(manager)
+    manager.initialize_database()
+    return manager
+
+
+def _time_it(label: str, action: Callable[[], None], repeat: int) -> Dict[str, float]:
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        action()
+        timings.append((time.perf_counter() - start) * 1000.0)
+    result = {
+        "first_ms": timings[0],
+        "min_ms": min(timings),
+        "median_ms": statistics.median(timings),
+        "max_ms": max(timings),
+    }
+    print(
+        f"{label:<32} first {result['first_ms']:9.1f} ms   "
+        f"min {result['min_ms']:9.1f} ms   "
+        f"median {result['median_ms']:9.1f} ms   max {result['max_ms']:9.1f} ms"
+    )
+    return result
+
+
+def open_horse_screen() -> None:
+    """Controller calls made when HorseUnifiedManagement opens and selects a horse."""
+    from controllers.horse_controller import HorseController
+    from controllers.location_controller import LocationController
+    from controllers.financial_controller import FinancialController
+
+    horse_controller = HorseController()
+    financial_controller = FinancialController()
+
+    horses = horse_controller.search_horses(status="active", search_term="")
+    if not horses:
+        return
+    horse = horse_controller.get_horse_by_id(horses[0].horse_id)
+    horse_controller.get_horse_owners(horse.horse_id)
+    LocationController().get_all_locations(status_filter="active")
+    financial_controller.get_transactions_for_horse(horse.horse_id)
+    for owner in horse.owners:
+        financial_controller.get_invoices_for_owner(owner.owner_id)
+
+
+def open_charge_code_tab() -> None:
+    """Controller calls made by UserManagementScreen.load_charge_codes_data."""
+    from controllers.charge_code_controller import ChargeCodeController
+
+    controller = ChargeCodeController()
+    for charge_code in controller.get_all_charge_codes(status_filter="all"):
+        if charge_code.category_id:
+            controller.get_category_path(charge_code.category_id)
+
+
+def run_screens(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as work_dir:
+        manager = prepare_database(args.db, work_dir, args.profile)
+        try:
+            print(
+                f"Source database: {args.db} (repeat={args.repeat}, "
+                f"profile={manager.sqlite_profile})"
+            )
+            if args.warmup:
+                from services.startup_warmup import StartupWarmup
+
+                warmup = StartupWarmup()
+                warmup.run()
+                print(
+                    "Warm-up: "
+                    + ", ".join(
+                        f"{label} {ms:.1f} ms"
+                        for label, ms in warmup.timings_ms.items()
+                    )
+                )
+            instrumentation = None
+            if args.sql_log:
+                instrumentation = manager.enable_sql_instrumentation(args.sql_log)
+            for label, action in (
+                ("Open horse screen", open_horse_screen),
+                ("Open admin charge-code tab", open_charge_code_tab),
+            ):
+                if instrumentation:
+                    action = _as_instrumented_action(instrumentation, label, action)
+                _time_it(label, action, args.repeat)
+            if instrumentation:
+                _print_sql_summary(instrumentation, args.repeat)
+        finally:
+            manager.close()
+
+
+def _as_instrumented_action(instrumentation, label: str, action: Callable[[], None]):
+    def _run() -> None:
+        with instrumentation.action(label):
+            action()
+
+    return _run
+
+
+def _print_sql_summary(instrumentation, repeat: int) -> None:
+    print(f"\nQueries per controller method (per screen open, repeat={repeat}):")
+    for method, stats in instrumentation.get_summary().items():
+        print(
+            f"  {method:<55} {stats['count'] / repeat:8.1f} queries   "
+            f"avg {stats['avg_ms']:7.3f} ms   max {stats['max_ms']:7.3f} ms"
+        )
+    print(f"JSON lines written to {instrumentation.log_file}")
+
+
+def run_startup(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as work_dir:
+        first = prepare_database(args.db, work_dir)
+        db_copy = first.engine.url.database
+        first.close()
+        print(f"Source database: {args.db} (repeat={args.repeat})")
+        print(f"First start (unstamped):  {_format_timings(first.startup_timings)}")
+
+        totals: List[float] = []
+        for _ in range(args.repeat):
+            manager = DatabaseManager(
+                _BenchmarkConfig(first.db_url[10:]), config_manager
+            )
+            manager.initialize_database()
+            manager.close()
+            totals.append(sum(manager.startup_timings.values()))
+        print(f"Later start (stamped):    {_format_timings(manager.startup_timings)}")
+        print(
+            f"Stamped total over {args.repeat} runs: min {min(totals):.1f} ms   "
+            f"median {statistics.median(totals):.1f} ms"
+        )
+
+
+def _format_timings(timings: Dict[str, float]) -> str:
+    phases = ", ".join(f"{name} {ms:.1f}" for name, ms in timings.items())
+    return f"total {sum(timings.values()):7.1f} ms  ({phases})"
+
+
+def _billable_horses(limit: int) -> List[tuple]:
+    """Returns up to `limit` (horse_id, owner_id, charge_code) for horses with an owner."""
+    from controllers.charge_code_controller import ChargeCodeController
+    from controllers.horse_controller import HorseController
+
+    charge_codes = ChargeCodeController().get_all_charge_codes(status_filter="active")
+    if not charge_codes:
+        return []
+    horse_controller = HorseController()
+    billable = []
+    for horse in horse_controller.search_horses(status="active", search_term=""):
+        owners = horse_controller.get_horse_owners(horse.horse_id)
+        if owners:
+            billable.append((horse.horse_id, owners[0]["owner_id"], charge_codes[0]))
+            if len(billable) >= limit:
+                break
+    return billable
+
+
+def _find_billable_horse() -> Optional[tuple]:
+    """Returns (horse_id, owner_id, charge_code) for the first horse with an owner."""
+    billable = _billable_horses(1)
+    return billable[0] if billable else None
+
+
+def _commit_charge_batches(count: int) -> float:
+    """Adds `count` three-line charge batches (one commit each); returns commits/sec."""
+    from controllers.financial_controller import FinancialController
+
+    target = _find_billable_horse()
+    if target is None:
+        raise RuntimeError("Seeded database has no horse with an owner to charge.")
+    horse_id, owner_id, charge_code = target
+    charge_items = [
+        {
+            "charge_code_id": charge_code.id,
+            "description": charge_code.description,
+            "quantity": Decimal("1.00"),
+            "unit_price": charge_code.standard_charge or Decimal("0.00"),
+        }
+        for _ in range(3)
+    ]
+    controller = FinancialController()
+
+    start = time.perf_counter()
+    for _ in range(count):
+        success, message, _ = controller.add_charge_batch_to_horse(
+            horse_id, owner_id, charge_items, date.today(), "ADMIN"
+        )
+        if not success:
+            raise RuntimeError(f"add_charge_batch_to_horse failed: {message}")
+    elapsed = time.perf_counter() - start
+    return count / elapsed
+
+
+def run_commits(args: argparse.Namespace) -> None:
+    print(f"Source database: {args.db} (count={args.count})")
+    for profile in args.profile or list(SQLITE_PROFILES):
+        with tempfile.TemporaryDirectory() as work_dir:
+            manager = prepare_database(args.db, work_dir, profile)
+            try:
+                rate = _commit_charge_batches(args.count)
+                print(
+                    f"add_charge_batch_to_horse [{profile:<13}] {rate:9.1f} commits/sec"
+                )
+            finally:
+                manager.close()
+
+
+def _post_charges(horses: List[tuple]) -> List[int]:
+    """Posts a two-line charge batch to each (horse_id, owner_id, charge_code)."""
+    from controllers.financial_controller import FinancialController
+
+    controller = FinancialController()
+    transaction_ids: List[int] = []
+    for horse_id, owner_id, charge_code in horses:
+        success, message, transactions = controller.add_charge_batch_to_horse(
+            horse_id,
+            owner_id,
+            [
+                {
+                    "charge_code_id": charge_code.id,
+                    "description": charge_code.description,
+                    "quantity": quantity,
+                    "unit_price": charge_code.standard_charge or Decimal("10.00"),
+                }
+                for quantity in (Decimal("1.00"), Decimal("2.00"))
+            ],
+            date.today(),
+            "ADMIN",
+        )
+        if not success:
+            raise RuntimeError(f"add_charge_batch_to_horse failed: {message}")
+        transaction_ids.extend(t.transaction_id for t in transactions)
+    return transaction_ids
+
+
+def run_invoices(args: argparse.Namespace) -> None:
+    from controllers.financial_controller import FinancialController
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        manager = prepare_database(args.db, work_dir)
+        try:
+            controller = FinancialController()
+            horses = _billable_horses(args.horses)
+            transaction_ids = _post_charges(horses)
+
+            start = time.perf_counter()
+            success, message, invoices = controller.generate_invoices_from_transactions(
+                transaction_ids, "ADMIN"
+            )
+            elapsed_ms = (time.perf_counter() - start) * 1000.0
+            if not success:
+                raise RuntimeError(f"Invoice generation failed: {message}")
+            print(f"Source database: {args.db}")
+            print(
+                f"generate_invoices_from_transactions: {len(transaction_ids)} charges "
+                f"on {len(horses)} horses -> {len(invoices)} invoices in "
+                f"{elapsed_ms:.1f} ms"
+            )
+        finally:
+            manager.close()
+
+
+def run_billing_run(args: argparse.Namespace) -> None:
+    from controllers.billing_run_controller import BillingRunController
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        manager = prepare_database(args.db, work_dir)
+        try:
+            horses = _billable_horses(args.horses)
+            transaction_ids = _post_charges(horses)
+            controller = BillingRunController()
+            success, message, run = controller.start_billing_run(
+                date.today().replace(day=1), date.today(), "ADMIN"
+            )
+            if not success:
+                raise RuntimeError(message)
+
+            chunk_times_ms: List[float] = []
+            last = [time.perf_counter()]
+
+            def on_progress(owners_done: int, owners_total: int, invoices: int):
+                now = time.perf_counter()
+                chunk_times_ms.append((now - last[0]) * 1000.0)
+                last[0] = now
+
+            start = time.perf_counter()
+            success, message, run = controller.run_billing(
+                run.run_id,
+                "ADMIN",
+                progress_callback=on_progress,
+                owners_per_chunk=args.chunk,
+            )
+            elapsed_ms = (time.perf_counter() - start) * 1000.0
+            if not success:
+                raise RuntimeError(message)
+            print(f"Source database: {args.db}")
+            print(
+                f"Billing run: {len(transaction_ids)} charges, {run.owners_total} "
+                f"owners, {run.invoices_created} invoices in {elapsed_ms:.1f} ms"
+            )
+            print(
+                f"    {len(chunk_times_ms)} chunks of {args.chunk} owners: "
+                f"{statistics.median(chunk_times_ms):.1f} ms median, "
+                f"{max(chunk_times_ms):.1f} ms max (longest wait for Cancel)"
+            )
+        finally:
+            manager.close()
+
+
+def _seed_invoices(count: int) -> None:
+    """
+    Bulk-inserts `count` synthetic invoices spread over the active owners and the
+    last 180 days. Every other invoice gets a partial payment recorded against it.
+    """
+    from datetime import timedelta
+
+    from sqlalchemy import insert, select
+
+    from config.database_config import db_manager
+    from models import Invoice, Owner, OwnerPayment
+
+    today = date.today()
+    with db_manager().session_scope() as session:
+        owner_ids = session.scalars(
+            select(Owner.owner_id).where(Owner.is_active == True)
+        ).all()
+        invoice_rows = []
+        for n in range(count):
+            total = Decimal(50 + n % 400)
+            paid = total / 2 if n % 2 else Decimal("0.00")
+            invoice_date = today - timedelta(days=n % 180)
+            invoice_rows.append(
+                {
+                    "owner_id": owner_ids[n % len(owner_ids)],
+                    "invoice_date": invoice_date,
+                    "subtotal": total,
+                    "grand_total": total,
+                    "amount_paid": paid,
+                    "balance_due": total - paid,
+                    "status": "Partial" if paid else "Unpaid",
+                    "invoice_period_ym": invoice_date.strftime("%y%m"),
+                    "monthly_sequence_number": 9000 + n,
+                }
+            )
+        invoices = session.execute(
+            insert(Invoice).returning(
+                Invoice.invoice_id,
+                Invoice.owner_id,
+                Invoice.invoice_date,
+                Invoice.amount_paid,
+            ),
+            invoice_rows,
+        ).all()
+        session.execute(
+            insert(OwnerPayment),
+            [
+                {
+                    "owner_id": owner_id,
+                    "invoice_id": invoice_id,
+                    "amount": amount_paid,
+                    "payment_date": min(invoice_date + timedelta(days=20), today),
+                    "payment_method": "Check",
+                }
+                for invoice_id, owner_id, invoice_date, amount_paid in invoices
+                if amount_paid
+            ],
+        )
+
+
+def run_aging(args: argparse.Namespace) -> None:
+    from datetime import timedelta
+
+    from controllers.reports_controller import ReportsController
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        manager = prepare_database(args.db, work_dir)
+        try:
+            start = time.perf_counter()
+            _seed_invoices(args.invoices)
+            print(
+                f"Source database: {args.db} (+{args.invoices} synthetic invoices in "
+                f"{(time.perf_counter() - start) * 1000.0:.0f} ms, repeat={args.repeat})"
+            )
+            controller = ReportsController()
+            for label, as_of in (
+                ("A/R aging as of today", date.today()),
+                ("A/R aging as of 60 days ago", date.today() - timedelta(days=60)),
+            ):
+                _time_it(
+                    label, lambda: controller.get_ar_aging_data(as_of), args.repeat
+                )
+        finally:
+            manager.close()
+
+
+class _StandInPaymentBackend:
+    """
+    Local stand-in for the online payments backend. Every request waits
+    `latency_ms`. The status endpoint reports invoices whose ID is a multiple of
+    three as paid; `/create-payment-link` returns a new link each time. Serves
+    HTTP/1.1 so clients can keep connections alive.
+    """
+
+    def __init__(self, latency_ms: float):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        latency_s = latency_ms / 1000.0
+        backend = self
+        self.requests_served = 0
+        self.connections_opened = 0
+        self.links_created = 0
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                backend.connections_opened += 1
+
+            def do_GET(self):
+                time.sleep(latency_s)
+                invoice_id = int(self.path.rstrip("/").rsplit("/", 1)[-1])
+                body = json.dumps({"is_paid": invoice_id % 3 == 0}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                backend.requests_served += 1
+
+            def do_POST(self):
+                time.sleep(latency_s)
+                payload = json.loads(
+                    self.rfile.read(int(self.headers["Content-Length"]))
+                )
+                backend.links_created += 1
+                body = json.dumps(
+                    {
+                        "success": True,
+                        "payment_link_url": f"{backend.base_url}/pay/"
+                        f"{payload['internal_invoice_id']}-{backend.links_created}",
+                    }
+                ).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                backend.requests_served += 1
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def __enter__(self) -> "_StandInPaymentBackend":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def run_payment_sync(args: argparse.Namespace) -> None:
+    from sqlalchemy import select
+
+    from config.database_config import db_manager
+    from controllers.financial_controller import FinancialController
+    from models import Invoice
+    from services.payment_status_sync import PaymentStatusClient, PaymentStatusSync
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        manager = prepare_database(args.db, work_dir)
+        try:
+            _seed_invoices(args.invoices * 2)
+            with db_manager().session_scope() as session:
+                invoice_ids = session.scalars(
+                    select(Invoice.invoice_id)
+                    .where(Invoice.status == "Unpaid", Invoice.balance_due > 0)
+                    .order_by(Invoice.invoice_id)
+                    .limit(args.invoices)
+                ).all()
+            print(
+                f"Source database: {args.db} ({len(invoice_ids)} unpaid invoices, "
+                f"stand-in backend latency {args.latency_ms:.0f} ms)"
+            )
+
+            controller = FinancialController()
+            with _StandInPaymentBackend(args.latency_ms) as backend:
+                client = PaymentStatusClient(backend.base_url, max_workers=1)
+                start = time.perf_counter()
+                for invoice_id in invoice_ids:
+                    client.get_status("BENCH", invoice_id)
+                sequential_ms = (time.perf_counter() - start) * 1000.0
+                client.close()
+                print(f"    {'one request at a time':<40} {sequential_ms:8.1f} ms")
+
+                backend.connections_opened = 0
+                sync = PaymentStatusSync(
+                    controller, PaymentStatusClient(backend.base_url)
+                )
+                start = time.perf_counter()
+                result = sync.sync("BENCH", invoice_ids, "BENCH")
+                elapsed_ms = (time.perf_counter() - start) * 1000.0
+                sync.close()
+                if not result.success or result.errors:
+                    raise RuntimeError(
+                        f"Sync failed: {result.apply_error or result.errors[0]}"
+                    )
+                print(
+                    f"    {'pooled sync, ' + str(sync.client.max_workers) + ' workers':<40} "
+                    f"{elapsed_ms:8.1f} ms  ({len(result.paid_invoice_ids)} paid, "
+                    f"{backend.connections_opened} connections)"
+                )
+        finally:
+            manager.close()
+
+
+def run_payment_links(args: argparse.Namespace) -> None:
+    from sqlalchemy import select
+
+    from config.database_config import db_manager
+    from controllers.financial_controller import FinancialController
+    from models import Invoice
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        manager = prepare_database(args.db, work_dir)
+        try:
+            _seed_invoices(args.invoices)
+            with db_manager().session_scope() as session:
+                invoice_ids = session.scalars(
+                    select(Invoice.invoice_id)
+                    .where(Invoice.balance_due > 0)
+                    .order_by(Invoice.invoice_id)
+                ).all()
+            print(
+                f"Source database: {args.db} ({len(invoice_ids)} open invoices, "
+                f"stand-in backend latency {args.latency_ms:.0f} ms)"
+            )
+
+            controller = FinancialController()
+            with _StandInPaymentBackend(args.latency_ms) as backend:
+                controller.backend_api_base_url = backend.base_url
+                start = time.perf_counter()
+                created, failed = controller.pregenerate_payment_links(
+                    invoice_ids, "sk_bench", "BENCH"
+                )
+                print(
+                    f"    {'pre-generate (pooled, background)':<40} "
+                    f"{(time.perf_counter() - start) * 1000.0:8.1f} ms  "
+                    f"({created} created, {failed} failed)"
+                )
+
+                links_before = backend.links_created
+                with db_manager().session_scope() as session:
+                    invoices = (
+                        session.query(Invoice)
+                        .filter(Invoice.invoice_id.in_(invoice_ids))
+                        .all()
+                    )
+                start = time.perf_counter()
+                for invoice in invoices:
+                    controller.get_or_create_payment_link(invoice, "sk_bench", "BENCH")
+                elapsed_ms = (time.perf_counter() - start) * 1000.0
+                print(
+                    f"    {'print path, cached links':<40} {elapsed_ms:8.1f} ms  "
+                    f"({backend.links_created - links_before} backend calls)"
+                )
+        finally:
+            manager.close()
+
+
+def _write_settlement_file(path: str, rows: int) -> None:
+    """
+    Writes a processor-style settlement CSV of `rows` rows: a quarter carry a
+    `WEBHOOK_INV<id>` reference, a quarter an owner account number and an open
+    balance (each for a different open invoice, while they last), and the rest
+    match nothing. Owners without an account number are given one first.
+    """
+    import csv
+
+    from sqlalchemy import select, update
+
+    from config.database_config import db_manager
+    from models import Invoice, Owner
+
+    with db_manager().session_scope() as session:
+        session.execute(
+            update(Owner)
+            .where(Owner.account_number.is_(None))
+            .values(account_number="BENCH" + Owner.owner_id)
+        )
+        open_invoices = iter(
+            session.execute(
+                select(Invoice.invoice_id, Invoice.balance_due, Owner.account_number)
+                .join(Owner, Owner.owner_id == Invoice.owner_id)
+                .where(Invoice.balance_due > 0)
+                .order_by(Invoice.invoice_id)
+            ).all()
+        )
+    with open(path, "w", newline="", encoding="utf-8") as settlement_file:
+        writer = csv.writer(settlement_file)
+        writer.writerow(
+            ["Settlement Date", "Transaction ID", "Customer", "Net", "Memo"]
+        )
+        for n in range(rows):
+            invoice = next(open_invoices, None) if n % 4 < 2 else None
+            if invoice and n % 4 == 0:
+                row = [
+                    "",
+                    invoice.balance_due,
+                    f"Payout WEBHOOK_INV{invoice.invoice_id}",
+                ]
+            elif invoice:
+                row = [invoice.account_number, invoice.balance_due, "Card payment"]
+            else:
+                row = [f"UNKNOWN{n}", f"{n % 997 + 0.37:.2f}", "Card payment"]
+            writer.writerow([date.today().isoformat(), f"txn_{n:08d}"] + row)
+
+
+def _check_reconcile_scenarios(work_dir: str) -> List[str]:
+    """
+    Reconciles small settlement files against one open invoice and returns a
+    description of every scenario that did not end as expected.
+    """
+    from sqlalchemy import select
+
+    from config.database_config import db_manager
+    from models import Invoice
+    from services.settlement_reconciliation import SettlementReconciler
+
+    with db_manager().session_scope() as session:
+        invoice_id = session.scalar(
+            select(Invoice.invoice_id)
+            .where(Invoice.balance_due >= 10)
+            .order_by(Invoice.invoice_id)
+            .limit(1)
+        )
+    if invoice_id is None:
+        return ["No open invoice with a balance of $10 or more to reconcile against."]
+    token = f"WEBHOOK_INV{invoice_id}"
+    header = "Date,Amount,Reference,Description\n"
+    # (name, file content, expected (matched, exceptions)), run in order
+    scenarios = [
+        ("trailing comma", header + "2026-10-01,1.00,TX1,some text,\n", (0, 1)),
+        ("token in description", header + f"2026-10-01,1.00,,Payout {token}\n", (1, 0)),
+        (
+            "token in description, re-imported",
+            header + f"2026-10-01,1.00,,Payout {token}\n",
+            (0, 1),
+        ),
+        ("token as reference", header + f"2026-10-02,1.00,{token},Card\n", (1, 0)),
+        (
+            "token as reference, later installment",
+            header + f"2026-10-03,1.00,{token},Card\n",
+            (1, 0),
+        ),
+        (
+            "token as reference, re-imported",
+            header + f"2026-10-03,1.00,{token},Card\n",
+            (0, 1),
+        ),
+    ]
+    reconciler = SettlementReconciler()
+    failures = []
+    for n, (name, content, expected) in enumerate(scenarios):
+        path = os.path.join(work_dir, f"check_{n}.csv")
+        with open(path, "w", newline="", encoding="utf-8") as settlement_file:
+            settlement_file.write(content)
+        try:
+            result = reconciler.reconcile_file(path, "bank", "ADMIN")
+            outcome = (result.matched, result.exceptions)
+        except Exception as e:
+            outcome = f"raised {e!r}"
+        status = "ok" if outcome == expected else "FAIL"
+        print(f"    [{status:>4}] {name}: {outcome} (expected {expected})")
+        if outcome != expected:
+            failures.append(name)
+    return failures
+
+
+def run_reconcile(args: argparse.Namespace) -> None:
+    import tracemalloc
+
+    from services.settlement_reconciliation import SettlementReconciler
+
+    failures = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        manager = prepare_database(args.db, work_dir)
+        try:
+            _seed_invoices(args.invoices)
+            if args.check:
+                print("Settlement file checks (matched, exceptions):")
+                failures = _check_reconcile_scenarios(work_dir)
+            settlement_path = os.path.join(work_dir, "settlement.csv")
+            _write_settlement_file(settlement_path, args.rows)
+            print(
+                f"Source database: {args.db} (+{args.invoices} synthetic invoices, "
+                f"{args.rows} settlement rows, "
+                f"{os.path.getsize(settlement_path) / 1e6:.1f} MB)"
+            )
+
+            # Memory under a dry run (tracemalloc slows everything down), then
+            # the real, recording run timed on its own
+            reconciler = SettlementReconciler()
+            tracemalloc.start()
+            reconciler.reconcile_file(
+                settlement_path, "processor", "ADMIN", dry_run=True
+            )
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            start = time.perf_counter()
+            result = reconciler.reconcile_file(settlement_path, "processor", "ADMIN")
+            elapsed = time.perf_counter() - start
+            print(
+                f"    {'reconcile (streamed, batched)':<40} {elapsed * 1000.0:8.1f} ms  "
+                f"({result.matched} matched, {result.exceptions} exceptions)"
+            )
+            print(f"    {'peak traced memory (dry run)':<40} {peak / 1e6:8.1f} MB")
+        finally:
+            manager.close()
+    if failures:
+        print(f"{len(failures)} settlement check(s) failed: {', '.join(failures)}")
+        sys.exit(1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    screens = subparsers.add_parser(
+        "screens", help="Time opening the horse screen and the charge-code tab."
+    )
+    screens.add_argument("--db", default=DEFAULT_SOURCE_DB)
+    screens.add_argument("--repeat", type=int, default=5)
+    screens.add_argument(
+        "--sql-log", help="Enable SQL instrumentation, writing JSON lines to FILE."
+    )
+    screens.add_argument(
+        "--profile", choices=list(SQLITE_PROFILES), default=DEFAULT_SQLITE_PROFILE
+    )
+    screens.add_argument(
+        "--warmup",
+        action="store_true",
+        help="Run the start-up warm-up tasks before timing the screens.",
+    )
+    screens.set_defaults(func=run_screens)
+
+    startup = subparsers.add_parser(
+        "startup", help="Time database initialization, unstamped vs stamped."
+    )
+    startup.add_argument("--db", default=DEFAULT_SOURCE_DB)
+    startup.add_argument("--repeat", type=int, default=5)
+    startup.set_defaults(func=run_startup)
+
+    commits = subparsers.add_parser(
+        "commits",
+        help="Measure commits/sec for add_charge_batch_to_horse per SQLite profile.",
+    )
+    commits.add_argument("--db", default=DEFAULT_SOURCE_DB)
+    commits.add_argument("--count", type=int, default=200)
+    commits.add_argument(
+        "--profile",
+        action="append",
+        choices=list(SQLITE_PROFILES),
+        help="Profile to measure (repeatable); defaults to all profiles.",
+    )
+    commits.set_defaults(func=run_commits)
+
+    invoices = subparsers.add_parser(
+        "invoices", help="Time invoice generation for charges on N horses."
+    )
+    invoices.add_argument("--db", default=DEFAULT_SOURCE_DB)
+    invoices.add_argument("--horses", type=int, default=200)
+    invoices.set_defaults(func=run_invoices)
+
+    billing_run = subparsers.add_parser(
+        "billing-run", help="Time a chunked month-end billing run over N horses."
+    )
+    billing_run.add_argument("--db", default=DEFAULT_SOURCE_DB)
+    billing_run.add_argument("--horses", type=int, default=400)
+    billing_run.add_argument(
+        "--chunk", type=int, default=AppConfig.BILLING_RUN_OWNERS_PER_CHUNK
+    )
+    billing_run.set_defaults(func=run_billing_run)
+
+    aging = subparsers.add_parser(
+        "aging", help="Time the A/R aging report over N synthetic invoices."
+    )
+    aging.add_argument("--db", default=DEFAULT_SOURCE_DB)
+    aging.add_argument("--invoices", type=int, default=50000)
+    aging.add_argument("--repeat", type=int, default=5)
+    aging.set_defaults(func=run_aging)
+
+    payment_sync = subparsers.add_parser(
+        "payment-sync",
+        help="Time a payment-status sync of N invoices against a local stand-in backend.",
+    )
+    payment_sync.add_argument("--db", default=DEFAULT_SOURCE_DB)
+    payment_sync.add_argument("--invoices", type=int, default=300)
+    payment_sync.add_argument("--latency-ms", type=float, default=50.0)
+    payment_sync.set_defaults(func=run_payment_sync)
+
+    payment_links = subparsers.add_parser(
+        "payment-links",
+        help="Time payment-link pre-generation and cached lookups against a local stand-in backend.",
+    )
+    payment_links.add_argument("--db", default=DEFAULT_SOURCE_DB)
+    payment_links.add_argument("--invoices", type=int, default=300)
+    payment_links.add_argument("--latency-ms", type=float, default=50.0)
+    payment_links.set_defaults(func=run_payment_links)
+
+    reconcile = subparsers.add_parser(
+        "reconcile",
+        help="Time reconciling an N-row settlement CSV against synthetic open invoices.",
+    )
+    reconcile.add_argument("--db", default=DEFAULT_SOURCE_DB)
+    reconcile.add_argument("--invoices", type=int, default=20000)
+    reconcile.add_argument("--rows", type=int, default=100000)
+    reconcile.add_argument(
+        "--check",
+        action="store_true",
+        help="First run the settlement edge-case files; exit non-zero if any fails.",
+    )
+    reconcile.set_defaults(func=run_reconcile)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
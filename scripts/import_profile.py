@@ -0,0 +1,175 @@
+# scripts/import_profile.py
+"""
+EDSI Veterinary Management System - Import Time Profiler
+Version: 1.0.0
+Purpose: Measures, with `python -X importtime` in fresh interpreters, what the
+         application imports before the splash screen is shown, and what each
+         deferred import (screens, dialogs, report generators, HTTP client) would
+         add back if it were imported eagerly again. `--check` exits non-zero
+         when the splash path exceeds `AppConfig.SPLASH_IMPORT_BUDGET_MS` or pulls
+         in a module that is supposed to be deferred, so a regression can fail a
+         build step.
+Last Updated: October 16, 2026
+Author: Gemini
+
+Usage:
+    python scripts/import_profile.py [--repeat N] [--budget-ms MS] [--top N] [--check]
+
+Changelog:
+- v1.0.0 (2026-10-16):
+    - Initial creation.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence, Tuple
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from config.app_config import AppConfig
+
+# Everything imported before SplashScreen.show(): main.py's module-level imports
+# plus the splash screen module that the registry loads first.
+SPLASH_PATH: Tuple[str, ...] = ("main", "views.auth.splash_screen")
+
+# label -> modules that must stay out of the splash path
+DEFERRED: Dict[str, Tuple[str, ...]] = {
+    "Login dialog (UserController, bcrypt)": ("views.auth.small_login_dialog",),
+    "Horse management screen": ("views.horse.horse_unified_management",),
+    "User management screen": ("views.admin.user_management_screen",),
+    "Report generators (ReportLab)": (
+        "reports.owner_statement_generator",
+        "reports.ar_aging_generator",
+        "reports.invoice_register_generator",
+        "reports.payment_history_generator",
+        "reports.charge_code_usage_generator",
+        "reports.horse_transaction_history_generator",
+        "reports.invoice_generator",
+    ),
+    "HTTP client (requests)": ("requests",),
+    "Financial and reports controllers": (
+        "controllers.financial_controller",
+        "controllers.reports_controller",
+    ),
+}
+
+_PHASE_MARKER = "--edms-import-phase--"
+
+
+@dataclass
+class ImportPhase:
+    """Modules newly imported by one phase of a profiled interpreter run."""
+
+    self_us: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(self.self_us.values()) / 1000.0
+
+
+def profile_imports(phases: Sequence[Sequence[str]]) -> List[ImportPhase]:
+    """
+    Imports each phase's modules in order in a fresh `-X importtime` interpreter
+    and returns the modules (with self time) that each phase added.
+    """
+    lines = ["import sys"]
+    for modules in phases:
+        lines.extend(f"import {module}" for module in modules)
+        lines.append(f"sys.stderr.write({_PHASE_MARKER!r} + '\\n')")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "\n".join(lines)],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1:] or ["unknown error"]
+        raise RuntimeError(f"Profiling {phases} failed: {error[0]}")
+
+    parsed = [ImportPhase()]
+    for line in result.stderr.splitlines():
+        if line == _PHASE_MARKER:
+            parsed.append(ImportPhase())
+            continue
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _cumulative, module = line[len("import time:") :].split("|")
+        parsed[-1].self_us[module.strip()] = int(self_us)
+    return parsed[: len(phases)]
+
+
+def _median_phase(runs: List[ImportPhase]) -> ImportPhase:
+    """The run with the median total (module sets are identical across runs)."""
+    return sorted(runs, key=lambda phase: phase.total_ms)[len(runs) // 2]
+
+
+def _package(module: str) -> str:
+    return module.split(".", 1)[0]
+
+
+def run_profile(args: argparse.Namespace) -> int:
+    splash = _median_phase(
+        [profile_imports([SPLASH_PATH])[0] for _ in range(args.repeat)]
+    )
+    by_package: Dict[str, int] = {}
+    for module, self_us in splash.self_us.items():
+        by_package[_package(module)] = by_package.get(_package(module), 0) + self_us
+
+    status = "ok" if splash.total_ms <= args.budget_ms else "OVER BUDGET"
+    print(
+        f"Splash path ({', '.join(SPLASH_PATH)}): {splash.total_ms:.1f} ms, "
+        f"{len(splash.self_us)} modules (budget {args.budget_ms} ms) - {status}"
+    )
+    for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[
+        : args.top
+    ]:
+        print(f"    {package:<30} {self_us / 1000.0:8.1f} ms")
+
+    eager = []
+    print("\nDeferred until first use (import cost removed from the splash path):")
+    for label, modules in DEFERRED.items():
+        loaded_early = [module for module in modules if module in splash.self_us]
+        if loaded_early:
+            eager.append((label, loaded_early))
+            print(f"    {label:<40} EAGER: {', '.join(loaded_early)}")
+            continue
+        added = _median_phase(
+            [profile_imports([SPLASH_PATH, modules])[1] for _ in range(args.repeat)]
+        )
+        print(
+            f"    {label:<40} {added.total_ms:8.1f} ms  "
+            f"({len(added.self_us)} modules)"
+        )
+
+    failed = splash.total_ms > args.budget_ms or bool(eager)
+    return 1 if (args.check and failed) else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--budget-ms", type=float, default=AppConfig.SPLASH_IMPORT_BUDGET_MS
+    )
+    parser.add_argument("--top", type=int, default=8, help="Heaviest packages to list.")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Exit with status 1 if the splash path is over budget or imports a "
+        "deferred module.",
+    )
+    args = parser.parse_args()
+    try:
+        sys.exit(run_profile(args))
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
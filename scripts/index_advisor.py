@@ -0,0 +1,330 @@
+# scripts/index_advisor.py
+"""
+EDSI Veterinary Management System - Query Plan / Index Advisor
+Version: 1.4.0
+Purpose: Runs the controllers' real queries against a temp copy of the database,
+         captures every SELECT they issue and prints SQLite's EXPLAIN QUERY PLAN
+         for it. Full-table scans on tables that are not expected to be scanned,
+         and pinned indexes that the planner no longer picks, are flagged.
+         `--check` exits non-zero on any finding so an index regression can fail
+         a build step.
+Last Updated: October 16, 2026
+Author: Gemini
+
+Usage:
+    python scripts/index_advisor.py [--db PATH] [--check] [--verbose]
+
+Changelog:
+- v1.4.0 (2026-10-16):
+    - "Report: charge code usage" also pins its whole-month read of
+      `charge_usage_rollups` to the table's primary key.
+- v1.3.0 (2026-10-16):
+    - "Invoice lines" now catalogues `get_invoice_line_items`, pinned to
+      `ix_transaction_allocations_invoice_id`.
+- v1.2.0 (2026-10-16):
+    - Catalogued `get_invoice_history_for_horse`, pinned to `ix_invoices_owner_id`.
+- v1.1.0 (2026-10-16):
+    - Catalogued `allocate_owner_payment`, pinned to `ix_invoices_owner_date`.
+- v1.0.1 (2026-10-16):
+    - Invoice generation no longer pins `ix_invoices_owner_period_seq`: sequence
+      numbers come from `invoice_sequences` and issue no SELECT on invoices.
+- v1.0.0 (2026-10-16):
+    - Initial creation with a catalogue covering the horse screen, invoicing,
+      owner statements and the financial reports.
+"""
+
+import argparse
+import logging
+import os
+import re
+import sys
+import tempfile
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPTS_DIR, ".."))
+for _path in (PROJECT_ROOT, SCRIPTS_DIR):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+from benchmark_db import DEFAULT_SOURCE_DB, prepare_database
+
+# "SCAN <table>" with no "USING ... INDEX" is a full-table scan.
+_FULL_SCAN_RE = re.compile(r"^SCAN (\w+)$")
+_ALIAS_SUFFIX_RE = re.compile(r"_\d+$")
+
+
+@dataclass
+class PlannedQuery:
+    """One catalogue entry: a controller call and what its plans must look like."""
+
+    name: str
+    run: Callable[[Dict[str, Any]], Any]
+    # table -> index that must appear in that table's plan lines
+    expected_indexes: Dict[str, str] = field(default_factory=dict)
+    # tables small or unselective enough that a full scan is acceptable
+    allowed_scans: Set[str] = field(default_factory=set)
+    setup: Optional[Callable[[Dict[str, Any]], None]] = None
+
+
+def _controllers() -> Dict[str, Any]:
+    from controllers.financial_controller import FinancialController
+    from controllers.horse_controller import HorseController
+    from controllers.reports_controller import ReportsController
+
+    return {
+        "financial": FinancialController(),
+        "horse": HorseController(),
+        "reports": ReportsController(),
+    }
+
+
+def _add_charges(ctx: Dict[str, Any]) -> None:
+    """Setup step: posts one charge so invoice generation has work to do."""
+    success, message, transactions = ctx["financial"].add_charge_batch_to_horse(
+        ctx["horse_id"],
+        ctx["owner_id"],
+        [
+            {
+                "charge_code_id": ctx["charge_code_id"],
+                "description": "Index advisor charge",
+                "quantity": Decimal("1.00"),
+                "unit_price": Decimal("10.00"),
+            }
+        ],
+        date.today(),
+        "ADMIN",
+    )
+    if not success:
+        raise RuntimeError(f"Setup failed: {message}")
+    ctx["transaction_ids"] = [t.transaction_id for t in transactions]
+
+
+PERIOD_START = date(date.today().year, 1, 1)
+PERIOD_END = date.today()
+
+CATALOGUE: List[PlannedQuery] = [
+    PlannedQuery(
+        "Horse screen: active charges for horse",
+        lambda ctx: ctx["financial"].get_transactions_for_horse(ctx["horse_id"]),
+        expected_indexes={"transactions": "ix_transactions_horse_status_date"},
+    ),
+    PlannedQuery(
+        "Horse screen: invoices for owner",
+        lambda ctx: ctx["financial"].get_invoices_for_owner(ctx["owner_id"]),
+        expected_indexes={"invoices": "ix_invoices_owner_date"},
+    ),
+    PlannedQuery(
+        "Horse screen: invoice history with line items",
+        lambda ctx: ctx["financial"].get_invoice_history_for_horse(ctx["horse_id"]),
+        expected_indexes={"invoices": "ix_invoices_owner_id"},
+    ),
+    PlannedQuery(
+        "Invoice generation",
+        lambda ctx: ctx["financial"].generate_invoices_from_transactions(
+            ctx["transaction_ids"], "ADMIN"
+        ),
+        setup=_add_charges,
+    ),
+    PlannedQuery(
+        "Invoice lines",
+        lambda ctx: ctx["financial"].get_invoice_line_items(ctx["invoice_id"]),
+        expected_indexes={
+            "transaction_allocations": "ix_transaction_allocations_invoice_id"
+        },
+    ),
+    PlannedQuery(
+        "Report: horse transaction history",
+        lambda ctx: ctx["reports"].get_horse_transaction_history_data(
+            ctx["horse_id"], PERIOD_START, PERIOD_END
+        ),
+        expected_indexes={"transactions": "ix_transactions_horse_date"},
+    ),
+    PlannedQuery(
+        "Report: charge code usage",
+        lambda ctx: ctx["reports"].get_charge_code_usage_data(
+            {"start_date": PERIOD_START, "end_date": PERIOD_END}
+        ),
+        expected_indexes={
+            "transactions": "ix_transactions_transaction_date",
+            # The rollup's primary key, led by month_start
+            "charge_usage_rollups": "sqlite_autoindex_charge_usage_rollups_1",
+        },
+    ),
+    PlannedQuery(
+        "Report: payment history",
+        lambda ctx: ctx["reports"].get_payment_history_data(PERIOD_START, PERIOD_END),
+        expected_indexes={"owner_payments": "ix_owner_payments_payment_date"},
+    ),
+    PlannedQuery(
+        "Report: invoice register",
+        lambda ctx: ctx["reports"].get_invoice_register_data(PERIOD_START, PERIOD_END),
+        expected_indexes={"invoices": "ix_invoices_invoice_date"},
+    ),
+    PlannedQuery(
+        "Report: owner statement",
+        lambda ctx: ctx["reports"].get_owner_statement_data(
+            ctx["owner_id"], PERIOD_START, PERIOD_END
+        ),
+        expected_indexes={
+            "owner_billing_history": "ix_owner_billing_history_owner_entry_date",
+            "invoices": "ix_invoices_owner_date",
+            "owner_payments": "ix_owner_payments_owner_payment_date",
+        },
+    ),
+    PlannedQuery(
+        "Report: A/R aging",
+        lambda ctx: ctx["reports"].get_ar_aging_data(PERIOD_END),
+        allowed_scans={"owners"},
+    ),
+    PlannedQuery(
+        "Report: all owner statements",
+        lambda ctx: ctx["reports"].get_data_for_all_owner_statements(
+            PERIOD_START, PERIOD_END
+        ),
+        expected_indexes={
+            "invoices": "ix_invoices_invoice_date",
+            "owner_payments": "ix_owner_payments_payment_date",
+        },
+        allowed_scans={"owners"},
+    ),
+    PlannedQuery(
+        "Payment allocation (owner's open invoices, oldest first)",
+        lambda ctx: ctx["financial"].allocate_owner_payment(
+            ctx["owner_id"],
+            {"amount": Decimal("1.00"), "payment_method": "Check"},
+            "ADMIN",
+        ),
+        expected_indexes={"invoices": "ix_invoices_owner_date"},
+    ),
+]
+
+
+def _sample_context() -> Dict[str, Any]:
+    """Picks a horse with an owner, a charge code and an invoice to query with."""
+    from controllers.charge_code_controller import ChargeCodeController
+
+    ctx = _controllers()
+    ctx.update(horse_id=0, owner_id=0, invoice_id=0, transaction_ids=[])
+    for horse in ctx["horse"].search_horses(status="active"):
+        owners = ctx["horse"].get_horse_owners(horse.horse_id)
+        if owners:
+            ctx["horse_id"], ctx["owner_id"] = horse.horse_id, owners[0]["owner_id"]
+            break
+    charge_codes = ChargeCodeController().get_all_charge_codes(status_filter="active")
+    ctx["charge_code_id"] = charge_codes[0].id if charge_codes else None
+    invoices = ctx["financial"].get_invoices_for_owner(ctx["owner_id"])
+    if invoices:
+        ctx["invoice_id"] = invoices[0].invoice_id
+    return ctx
+
+
+def _capture_selects(action: Callable[[], Any]) -> List[Tuple[Engine, str, Any]]:
+    """Runs `action` and returns every SELECT it sent to any engine."""
+    captured: List[Tuple[Engine, str, Any]] = []
+
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        if statement.lstrip().upper().startswith("SELECT") and not many:
+            captured.append((conn.engine, statement, parameters))
+
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    try:
+        action()
+    finally:
+        event.remove(Engine, "before_cursor_execute", _before_cursor_execute)
+    return captured
+
+
+def _explain(engine: Engine, statement: str, parameters: Any) -> List[str]:
+    with engine.connect() as connection:
+        rows = connection.exec_driver_sql(
+            f"EXPLAIN QUERY PLAN {statement}", parameters
+        ).fetchall()
+    return [row[-1] for row in rows]
+
+
+def _table_of(alias: str) -> str:
+    return _ALIAS_SUFFIX_RE.sub("", alias)
+
+
+def _review(entry: PlannedQuery, plans: List[Tuple[str, List[str]]]) -> List[str]:
+    """Returns the findings (problems) for one catalogue entry."""
+    findings = []
+    plan_lines = [line for _, lines in plans for line in lines]
+    for line in plan_lines:
+        match = _FULL_SCAN_RE.match(line)
+        if not match:
+            continue
+        table = _table_of(match.group(1))
+        if table.startswith("anon") or table in entry.allowed_scans:
+            continue
+        findings.append(f"full table scan: {line}")
+    for table, index_name in entry.expected_indexes.items():
+        if not any(
+            index_name in line and _table_of(line.split()[1]) == table
+            for line in plan_lines
+            if len(line.split()) > 1
+        ):
+            findings.append(f"{table} no longer uses {index_name}")
+    return findings
+
+
+def run_advisor(args: argparse.Namespace) -> int:
+    total_findings = 0
+    with tempfile.TemporaryDirectory() as work_dir:
+        manager = prepare_database(args.db, work_dir)
+        try:
+            ctx = _sample_context()
+            for entry in CATALOGUE:
+                if entry.setup:
+                    entry.setup(ctx)
+                selects = _capture_selects(lambda: entry.run(ctx))
+                plans = [
+                    (statement, _explain(engine, statement, parameters))
+                    for engine, statement, parameters in selects
+                ]
+                findings = _review(entry, plans)
+                total_findings += len(findings)
+
+                status = "FLAG" if findings else "ok"
+                print(f"[{status:>4}] {entry.name} ({len(plans)} queries)")
+                for finding in findings:
+                    print(f"         - {finding}")
+                if args.verbose or findings:
+                    for statement, lines in plans:
+                        print(f"         {' '.join(statement.split())[:110]}")
+                        for line in lines:
+                            print(f"             {line}")
+        finally:
+            manager.close()
+
+    print(f"{total_findings} finding(s) across {len(CATALOGUE)} catalogued calls.")
+    return 1 if (args.check and total_findings) else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", default=DEFAULT_SOURCE_DB)
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Exit with status 1 if any query is flagged.",
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Print every plan, not just flagged ones.",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(run_advisor(args))
+
+
+if __name__ == "__main__":
+    main()
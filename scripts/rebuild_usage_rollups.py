@@ -0,0 +1,69 @@
+# scripts/rebuild_usage_rollups.py
+"""
+EDSI Veterinary Management System - Charge Usage Rollup Rebuild
+Version: 1.0.0
+Purpose: Recomputes the monthly charge usage rollups (`ChargeUsageRollup`) of
+         the given months from their charges, live and archived. Use it after
+         charges were changed outside the application.
+Last Updated: October 16, 2026
+Author: Gemini
+
+Usage:
+    python scripts/rebuild_usage_rollups.py --month YYYY-MM [--month YYYY-MM ...]
+
+Changelog:
+- v1.0.0 (2026-10-16):
+    - Initial creation.
+"""
+
+import argparse
+import logging
+import os
+import sys
+from datetime import datetime
+
+# This allows the script to find the 'config' module
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from config.app_config import AppConfig
+from config.config_manager import config_manager
+from config.database_config import DatabaseManager, set_db_manager_instance
+from services.usage_rollup import UsageRollup
+
+
+def parse_month(value: str):
+    try:
+        return datetime.strptime(value, "%Y-%m").date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected YYYY-MM, got '{value}'.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--month",
+        type=parse_month,
+        action="append",
+        required=True,
+        help="Month to rebuild, as YYYY-MM (repeatable).",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    manager = DatabaseManager(AppConfig, config_manager)
+    set_db_manager_instance(manager)
+    manager.initialize_database()
+    rollup = UsageRollup()
+    try:
+        for month in sorted(set(args.month)):
+            with manager.session_scope() as session:
+                rows = rollup.rebuild_month(session, month)
+            print(f"{month:%Y-%m}: {rows} rollup row(s).")
+    finally:
+        manager.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# scripts/reconcile_settlements.py
+"""
+EDSI Veterinary Management System - Settlement Reconciliation Utility
+Version: 1.0.0
+Purpose: Reconciles a daily settlement CSV from the card processor or the bank
+         against the open invoices (`services.settlement_reconciliation`). Matched
+         rows are recorded as payments; the rest are written to an exceptions CSV
+         for manual review.
+Last Updated: October 16, 2026
+Author: Gemini
+
+Usage:
+    python scripts/reconcile_settlements.py FILE --source {processor,bank}
+        [--exceptions OUT.csv] [--user ID] [--dry-run]
+
+Changelog:
+- v1.0.0 (2026-10-16):
+    - Initial creation.
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+# This allows the script to find the 'config' module
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from config.app_config import AppConfig
+from config.config_manager import config_manager
+from config.database_config import DatabaseManager, set_db_manager_instance
+from services.settlement_reconciliation import PAYMENT_METHODS, SettlementReconciler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("file", help="Settlement CSV to reconcile.")
+    parser.add_argument("--source", choices=sorted(PAYMENT_METHODS), required=True)
+    parser.add_argument(
+        "--exceptions", help="Exceptions CSV (default: FILE_exceptions.csv)."
+    )
+    parser.add_argument("--user", default="ADMIN", help="User the payments are by.")
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Match and write exceptions, but record nothing.",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    manager = DatabaseManager(AppConfig, config_manager)
+    set_db_manager_instance(manager)
+    manager.initialize_database()
+    try:
+        result = SettlementReconciler().reconcile_file(
+            args.file,
+            args.source,
+            args.user,
+            exceptions_path=args.exceptions,
+            dry_run=args.dry_run,
+        )
+    finally:
+        manager.close()
+
+    print(
+        f"{result.rows_read} row(s) read, {result.matched} matched "
+        f"(${result.amount_recorded:.2f}"
+        f"{' not recorded, dry run' if args.dry_run else ' recorded'}), "
+        f"{result.exceptions} exception(s)."
+    )
+    for line, reason in result.sample_exceptions:
+        print(f"    line {line}: {reason}")
+    if result.exceptions:
+        print(f"Exceptions for review: {result.exceptions_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,20 @@
 # services/backup_manager.py
 """
 EDSI Veterinary Management System - Backup Manager Service
-Version: 1.0.2
+Version: 1.0.4
 Purpose: Provides core functionality for backing up and restoring application data.
          Handles the database file and configurable data directories (invoices, statements).
-Last Updated: June 23, 2025
+Last Updated: October 16, 2026
 Author: Gemini
 
 Changelog:
+- v1.0.4 (2026-10-16):
+    - The yearly archive files (the `archive` folder next to the database) are
+      backed up and restored with the data directories.
+- v1.0.3 (2026-10-16):
+    - `restore_backup` now also removes the database's `-wal` / `-shm` sidecar files
+      before recreating it. The default SQLite profile runs in WAL mode, and a stale
+      WAL left next to the restored file would be replayed over it.
 - v1.0.2 (2025-06-23):
     - Resolved `sqlite3.OperationalError: cannot start a transaction within a transaction` during database restore.
     - Removed explicit `BEGIN TRANSACTION;` and `COMMIT;` from the SQL script wrapper in `restore_backup` to prevent nested transactions.
@@ -37,7 +44,10 @@ from typing import Tuple, List, Optional  # Removed unused List, Optional import
 
 from config.app_config import AppConfig
 from config.config_manager import config_manager  # Removed unused ConfigManager import
-from config.database_config import db_manager  # Import db_manager function
+from config.database_config import (  # Import db_manager function
+    ARCHIVE_DIR_NAME,
+    db_manager,
+)
 
 
 class BackupManager:
@@ -70,6 +80,7 @@ class BackupManager:
             "log_dir": log_dir,
             "invoices_dir": invoices_dir,
             "statements_dir": statements_dir,
+            "archive_dir": os.path.join(os.path.dirname(db_path), ARCHIVE_DIR_NAME),
             "config_file_dir": config_file_dir,  # Directory containing the config.ini
             "config_file_name": config_file_name,  # Name of the config.ini file
         }
@@ -144,6 +155,7 @@ class BackupManager:
                 (invoices_dir, "invoices"),
                 (statements_dir, "statements"),
                 (log_dir, "logs"),
+                (paths["archive_dir"], "archive"),
             ]
 
             for src_dir, dest_name in directories_to_backup:
@@ -254,6 +266,12 @@ class BackupManager:
                     if os.path.exists(db_path):
                         os.remove(db_path)
                         self.logger.info(f"Removed existing database file: {db_path}")
+                    for sidecar_path in (f"{db_path}-wal", f"{db_path}-shm"):
+                        if os.path.exists(sidecar_path):
+                            os.remove(sidecar_path)
+                            self.logger.info(
+                                f"Removed WAL sidecar file: {sidecar_path}"
+                            )
 
                     # Ensure the directory for the target DB exists
                     os.makedirs(os.path.dirname(db_path), exist_ok=True)
@@ -288,6 +306,7 @@ class BackupManager:
                 ("invoices", invoices_dir),
                 ("statements", statements_dir),
                 ("logs", log_dir),
+                ("archive", paths["archive_dir"]),
             ]
 
             for src_name, dest_dir in directories_to_restore:
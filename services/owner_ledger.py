@@ -0,0 +1,276 @@
+# services/owner_ledger.py
+"""
+EDSI Veterinary Management System - Owner Balance Ledger
+Version: 1.0.0
+Purpose: Single write path for owner balances. `OwnerBillingHistory` is the
+         append-only ledger: every balance change is one entry carrying
+         `amount_change` and the resulting `new_balance`. `Owner.balance` is only
+         ever changed in SQL (`balance = balance + :amount`) inside the writer's
+         transaction, so two workstations posting to the same owner cannot lose an
+         update. `OwnerBalanceSnapshot` rows, taken at month close, make the balance
+         as of any date one indexed lookup plus the entries after the snapshot.
+         Methods take the caller's session and never commit.
+Last Updated: October 16, 2026
+Author: Gemini
+
+Changelog:
+- v1.0.0 (2026-10-16):
+    - Initial creation with `post`, `post_many`, `balance_as_of`,
+      `balances_as_of`, `take_snapshots` and `ensure_month_close_snapshot`.
+"""
+
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, bindparam, func, insert, select
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from models import Owner, OwnerBalanceSnapshot, OwnerBillingHistory
+
+ZERO = Decimal("0.00")
+
+
+@dataclass
+class LedgerEntry:
+    """One balance change to post for an owner."""
+
+    owner_id: int
+    amount_change: Decimal
+    description: str
+
+
+class OwnerLedger:
+    """Posts owner balance changes and answers balance-as-of queries."""
+
+    def __init__(self):
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def post(
+        self,
+        session: Session,
+        owner_id: int,
+        amount_change: Decimal,
+        description: str,
+        current_user_id: str,
+    ) -> Decimal:
+        """Applies one change atomically and returns the owner's new balance."""
+        return self.post_many(
+            session,
+            [LedgerEntry(owner_id, amount_change, description)],
+            current_user_id,
+        )[0]
+
+    def post_many(
+        self, session: Session, entries: List[LedgerEntry], current_user_id: str
+    ) -> List[Decimal]:
+        """
+        Applies `entries` in order: one executemany increment UPDATE per batch, one
+        SELECT of the resulting balances, and one executemany INSERT of the ledger
+        rows. Each entry's `new_balance` is derived from the balance after the
+        UPDATE, which holds the write lock, so it is exact even when another
+        workstation posted to the same owner a moment earlier. Returns each entry's
+        new balance.
+        """
+        if not entries:
+            return []
+
+        totals: Dict[int, Decimal] = defaultdict(lambda: ZERO)
+        for entry in entries:
+            totals[entry.owner_id] += entry.amount_change
+
+        owners = Owner.__table__
+        connection = session.connection()
+        connection.execute(
+            owners.update()
+            .where(owners.c.owner_id == bindparam("b_owner_id"))
+            .values(
+                balance=func.coalesce(owners.c.balance, 0)
+                + bindparam("b_amount", type_=owners.c.balance.type)
+            ),
+            [
+                {"b_owner_id": owner_id, "b_amount": amount}
+                for owner_id, amount in totals.items()
+            ],
+        )
+        final_balances = dict(
+            connection.execute(
+                select(owners.c.owner_id, owners.c.balance).where(
+                    owners.c.owner_id.in_(list(totals))
+                )
+            ).all()
+        )
+
+        # Walk forward from the balance each owner had before this batch
+        running = {
+            owner_id: final_balances[owner_id] - total
+            for owner_id, total in totals.items()
+        }
+        new_balances = []
+        history_rows = []
+        for entry in entries:
+            running[entry.owner_id] += entry.amount_change
+            new_balances.append(running[entry.owner_id])
+            history_rows.append(
+                {
+                    "owner_id": entry.owner_id,
+                    "description": entry.description,
+                    "amount_change": entry.amount_change,
+                    "new_balance": running[entry.owner_id],
+                    "created_by": current_user_id,
+                }
+            )
+        session.execute(
+            insert(OwnerBillingHistory).execution_options(render_nulls=True),
+            history_rows,
+        )
+
+        # Keep Owner objects already loaded in this session in step with the row
+        for owner_id, balance in final_balances.items():
+            owner = session.identity_map.get(session.identity_key(Owner, owner_id))
+            if owner is not None:
+                set_committed_value(owner, "balance", balance)
+        return new_balances
+
+    def balance_as_of(self, session: Session, owner_id: int, as_of: date) -> Decimal:
+        """The owner's balance at the start of `as_of` (entries dated before it)."""
+        return self.balances_as_of(session, [owner_id], as_of).get(owner_id, ZERO)
+
+    def balances_as_of(
+        self, session: Session, owner_ids: Iterable[int], as_of: date
+    ) -> Dict[int, Decimal]:
+        """
+        Balances at the start of `as_of` for several owners in at most three
+        queries. Owners with a snapshot on or before `as_of` get it plus the ledger
+        entries dated from the snapshot up to `as_of`. Owners without one get the
+        `new_balance` of their last entry before `as_of`, which also carries any
+        balance the owner had before the ledger began. Owners with no ledger
+        entries before `as_of` are omitted.
+        """
+        owner_ids = list(owner_ids)
+        if not owner_ids:
+            return {}
+
+        latest = self._latest_snapshots_subquery(owner_ids, as_of)
+        balances: Dict[int, Decimal] = {
+            owner_id: balance
+            for owner_id, balance in session.execute(
+                select(
+                    OwnerBalanceSnapshot.owner_id, OwnerBalanceSnapshot.balance
+                ).join(
+                    latest,
+                    and_(
+                        OwnerBalanceSnapshot.owner_id == latest.c.owner_id,
+                        OwnerBalanceSnapshot.as_of_date == latest.c.as_of_date,
+                    ),
+                )
+            )
+        }
+        if balances:
+            history = OwnerBillingHistory
+            for owner_id, delta in session.execute(
+                select(history.owner_id, func.sum(history.amount_change))
+                .join(latest, latest.c.owner_id == history.owner_id)
+                .where(
+                    history.entry_date >= latest.c.as_of_date,
+                    history.entry_date < as_of,
+                )
+                .group_by(history.owner_id)
+            ):
+                balances[owner_id] += delta or ZERO
+
+        unsnapshotted = [owner_id for owner_id in owner_ids if owner_id not in balances]
+        if unsnapshotted:
+            balances.update(self._last_entry_balances(session, unsnapshotted, as_of))
+        return balances
+
+    @staticmethod
+    def _last_entry_balances(
+        session: Session, owner_ids: List[int], as_of: date
+    ) -> Dict[int, Decimal]:
+        """`new_balance` of each owner's last ledger entry dated before `as_of`."""
+        history = OwnerBillingHistory
+        last_entry_ids = (
+            select(func.max(history.history_id))
+            .where(history.owner_id.in_(owner_ids), history.entry_date < as_of)
+            .group_by(history.owner_id)
+        )
+        return dict(
+            session.execute(
+                select(history.owner_id, history.new_balance).where(
+                    history.history_id.in_(last_entry_ids)
+                )
+            ).all()
+        )
+
+    def take_snapshots(self, session: Session, as_of: date) -> int:
+        """
+        Writes (or rewrites) the `as_of` snapshot of every owner with ledger
+        entries before that date, using `balances_as_of`. `as_of` may not be in the future: ledger
+        entries are stamped with UTC now, so a snapshot is only final once its date
+        has begun. Returns the number of snapshots written.
+        """
+        if as_of > datetime.utcnow().date():
+            raise ValueError(f"Cannot snapshot balances as of future date {as_of}.")
+
+        owner_ids = [
+            owner_id
+            for (owner_id,) in session.execute(
+                select(OwnerBillingHistory.owner_id)
+                .where(OwnerBillingHistory.entry_date < as_of)
+                .distinct()
+            )
+        ]
+        balances = self.balances_as_of(session, owner_ids, as_of)
+        session.query(OwnerBalanceSnapshot).filter(
+            OwnerBalanceSnapshot.as_of_date == as_of
+        ).delete(synchronize_session=False)
+        if balances:
+            session.execute(
+                insert(OwnerBalanceSnapshot),
+                [
+                    {"owner_id": owner_id, "as_of_date": as_of, "balance": balance}
+                    for owner_id, balance in balances.items()
+                ],
+            )
+        self.logger.info(
+            f"Wrote {len(balances)} owner balance snapshot(s) as of {as_of}."
+        )
+        return len(balances)
+
+    def ensure_month_close_snapshot(
+        self, session: Session, today: Optional[date] = None
+    ) -> int:
+        """
+        Snapshots balances as of the first of the current month unless that was
+        already done. Cheap to call after any month-end job. Returns the number of
+        snapshots written (0 if they already existed).
+        """
+        month_start = (today or datetime.utcnow().date()).replace(day=1)
+        already_taken = session.execute(
+            select(OwnerBalanceSnapshot.owner_id)
+            .where(OwnerBalanceSnapshot.as_of_date == month_start)
+            .limit(1)
+        ).first()
+        if already_taken:
+            return 0
+        return self.take_snapshots(session, month_start)
+
+    @staticmethod
+    def _latest_snapshots_subquery(owner_ids: List[int], as_of: date):
+        return (
+            select(
+                OwnerBalanceSnapshot.owner_id,
+                func.max(OwnerBalanceSnapshot.as_of_date).label("as_of_date"),
+            )
+            .where(
+                OwnerBalanceSnapshot.owner_id.in_(owner_ids),
+                OwnerBalanceSnapshot.as_of_date <= as_of,
+            )
+            .group_by(OwnerBalanceSnapshot.owner_id)
+            .subquery()
+        )
@@ -0,0 +1,207 @@
+# services/payment_status_sync.py
+"""
+EDSI Veterinary Management System - Payment Status Sync
+Version: 1.0.0
+Purpose: Checks the online payments backend for many invoices at once. A
+         `PaymentStatusClient` keeps one `requests.Session` whose keep-alive
+         connection pool is sized to its worker count, and polls
+         `/get-payment-status/<doctor>/<invoice>` from a bounded thread pool with
+         a timeout on every request. `PaymentStatusSync` then applies every
+         confirmed payment in one database transaction through
+         `FinancialController.apply_confirmed_online_payments`.
+         Nothing here touches Qt; the invoice tab runs `sync` on a QThread.
+Last Updated: October 16, 2026
+Author: Gemini
+
+Changelog:
+- v1.0.0 (2026-10-16):
+    - Initial creation with `PaymentStatusClient`, `PaymentStatusSync`,
+      `PaymentStatus` and `PaymentSyncResult`.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config.app_config import AppConfig
+
+# progress_callback(invoices_checked, invoices_total)
+SyncProgressCallback = Callable[[int, int], None]
+
+
+@dataclass
+class PaymentStatus:
+    """The backend's answer for one invoice. `is_paid` is None on error."""
+
+    invoice_id: int
+    is_paid: Optional[bool]
+    message: str
+
+    @property
+    def ok(self) -> bool:
+        return self.is_paid is not None
+
+
+@dataclass
+class PaymentSyncResult:
+    """Outcome of one `PaymentStatusSync.sync` call."""
+
+    checked: int = 0
+    paid_invoice_ids: List[int] = field(default_factory=list)
+    errors: List[PaymentStatus] = field(default_factory=list)
+    apply_error: Optional[str] = None
+
+    @property
+    def success(self) -> bool:
+        return self.apply_error is None
+
+
+class PaymentStatusClient:
+    """Pooled, bounded-concurrency HTTP client for the payment-status endpoint."""
+
+    def __init__(
+        self,
+        base_url: str,
+        max_workers: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.base_url = base_url.rstrip("/")
+        self.max_workers = max_workers or AppConfig.PAYMENT_SYNC_MAX_WORKERS
+        self.timeout = timeout or AppConfig.PAYMENT_API_TIMEOUT_SECONDS
+
+        # One connection per worker, reused across requests. Idempotent GETs are
+        # retried on connection errors and gateway hiccups.
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.max_workers,
+            max_retries=Retry(
+                total=2,
+                backoff_factor=0.2,
+                status_forcelist=(502, 503, 504),
+                allowed_methods=frozenset({"GET"}),
+            ),
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get_status(self, doctor_identifier: str, invoice_id: int) -> PaymentStatus:
+        endpoint = (
+            f"{self.base_url}/get-payment-status/{doctor_identifier}/{invoice_id}"
+        )
+        try:
+            response = self.session.get(endpoint, timeout=self.timeout)
+            response.raise_for_status()
+            response_data = response.json()
+        except requests.exceptions.RequestException as e:
+            self.logger.warning(
+                f"Network or API communication error checking payment status for Invoice {invoice_id}: {e}"
+            )
+            return PaymentStatus(
+                invoice_id, None, f"Network/API communication error: {e}"
+            )
+        except ValueError as e:
+            self.logger.error(
+                f"Backend API returned invalid JSON for Invoice {invoice_id}: {e}"
+            )
+            return PaymentStatus(invoice_id, None, "Invalid response from backend API.")
+
+        if "is_paid" not in response_data:
+            self.logger.error(
+                f"Backend API response missing 'is_paid' field for Invoice {invoice_id}: {response_data}"
+            )
+            return PaymentStatus(invoice_id, None, "Invalid response from backend API.")
+        return PaymentStatus(
+            invoice_id,
+            bool(response_data["is_paid"]),
+            "Payment status retrieved successfully.",
+        )
+
+    def get_statuses(
+        self,
+        doctor_identifier: str,
+        invoice_ids: List[int],
+        progress_callback: Optional[SyncProgressCallback] = None,
+    ) -> List[PaymentStatus]:
+        """
+        Polls every invoice with at most `max_workers` requests in flight.
+        Results come back in `invoice_ids` order; `progress_callback` is called
+        from the calling thread as each request finishes.
+        """
+        statuses = {}
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="PaymentStatus"
+        ) as pool:
+            futures = [
+                pool.submit(self.get_status, doctor_identifier, invoice_id)
+                for invoice_id in invoice_ids
+            ]
+            for done, future in enumerate(as_completed(futures), start=1):
+                status = future.result()
+                statuses[status.invoice_id] = status
+                if progress_callback:
+                    progress_callback(done, len(invoice_ids))
+        return [statuses[invoice_id] for invoice_id in invoice_ids]
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class PaymentStatusSync:
+    """Polls the backend for unpaid invoices and records confirmed payments."""
+
+    def __init__(
+        self, financial_controller, client: Optional[PaymentStatusClient] = None
+    ):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.financial_controller = financial_controller
+        self.client = client or PaymentStatusClient(
+            financial_controller.backend_api_base_url
+        )
+
+    def sync(
+        self,
+        doctor_identifier: str,
+        invoice_ids: List[int],
+        current_user_id: str = "SYSTEM_SYNC",
+        progress_callback: Optional[SyncProgressCallback] = None,
+    ) -> PaymentSyncResult:
+        """
+        Checks `invoice_ids` concurrently, then records a full payment for each
+        invoice the backend reports as paid, all in one commit.
+        """
+        result = PaymentSyncResult(checked=len(invoice_ids))
+        if not invoice_ids:
+            return result
+
+        statuses = self.client.get_statuses(
+            doctor_identifier, invoice_ids, progress_callback
+        )
+        result.errors = [status for status in statuses if not status.ok]
+        confirmed = [status.invoice_id for status in statuses if status.is_paid]
+        self.logger.info(
+            f"Payment sync checked {len(statuses)} invoice(s): {len(confirmed)} "
+            f"paid, {len(result.errors)} error(s)."
+        )
+        if not confirmed:
+            return result
+
+        success, message, applied = (
+            self.financial_controller.apply_confirmed_online_payments(
+                confirmed, current_user_id
+            )
+        )
+        if success:
+            result.paid_invoice_ids = applied
+        else:
+            result.apply_error = message
+        return result
+
+    def close(self) -> None:
+        self.client.close()
@@ -0,0 +1,199 @@
+# services/report_export.py
+"""
+EDSI Veterinary Management System - Report Spreadsheet Export
+Version: 1.0.0
+Purpose: Streams a report's rows straight from the database into a CSV or XLSX
+         file. `ReportsController` describes each exportable report as an
+         `ExportSpec`: a column-only SELECT (no ORM objects) plus headers and
+         column kinds. `ReportExporter.export` runs it in one `report_scope`
+         snapshot with `yield_per`, writing each batch as it arrives, so memory
+         stays flat however many rows the report has. XLSX files are written
+         with XlsxWriter in constant-memory mode (optional dependency); past the
+         worksheet row limit the rows continue on a new sheet. Nothing here
+         touches Qt; the reports tab runs `export` on a QThread.
+Last Updated: October 16, 2026
+Author: Gemini
+
+Changelog:
+- v1.0.0 (2026-10-16):
+    - Initial creation with `ReportExporter`, `ExportSpec` and
+      `EXPORT_FORMATS`.
+"""
+
+import csv
+import logging
+import os
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.sql import Select
+
+from config.database_config import db_manager
+
+# Column kinds, for XLSX cell formats
+TEXT, DATE, MONEY, NUMBER = "text", "date", "money", "number"
+
+# File extension -> format name, as offered by the save dialog
+EXPORT_FORMATS = {".csv": "CSV", ".xlsx": "Excel Workbook"}
+
+# Rows fetched from the database per batch
+EXPORT_BATCH_SIZE = 2000
+# Last row index of an XLSX worksheet (1,048,576 rows, header included)
+XLSX_MAX_ROW = 1_048_575
+
+# progress_callback(rows_written, rows_total)
+ExportProgressCallback = Callable[[int, int], None]
+
+
+@dataclass
+class ExportSpec:
+    """One report as a streamable, column-only query."""
+
+    title: str
+    headers: List[str]
+    kinds: List[str]
+    statement: Select
+    archive_range: Optional[Tuple[date, date]] = None
+    # Turns one result row into the exported values, in header order
+    row_formatter: Optional[Callable[[Any], Sequence[Any]]] = None
+
+
+class ReportExporter:
+    """Writes an `ExportSpec` to CSV or XLSX without loading it all in memory."""
+
+    def __init__(self, batch_size: int = EXPORT_BATCH_SIZE):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.batch_size = batch_size
+
+    def export(
+        self,
+        spec: ExportSpec,
+        file_path: str,
+        progress_callback: Optional[ExportProgressCallback] = None,
+        cancel_requested: Optional[Callable[[], bool]] = None,
+    ) -> Tuple[bool, str, int]:
+        """
+        Writes every row of `spec` to `file_path`, as CSV or XLSX by extension.
+        Progress is reported after each batch. A cancelled or failed export
+        removes the partial file. Returns (success, message, rows written).
+        """
+        extension = os.path.splitext(file_path)[1].lower()
+        if extension not in EXPORT_FORMATS:
+            return False, f"Unsupported export format '{extension}'.", 0
+        if extension == ".xlsx":
+            try:
+                import xlsxwriter  # noqa: F401
+            except ImportError:
+                return (
+                    False,
+                    "Excel export needs the XlsxWriter package. Export as CSV instead.",
+                    0,
+                )
+
+        rows_written = 0
+        try:
+            with db_manager().report_scope(archive_range=spec.archive_range) as session:
+                total = session.scalar(
+                    select(func.count()).select_from(spec.statement.subquery())
+                )
+                result = session.execute(
+                    spec.statement.execution_options(yield_per=self.batch_size)
+                )
+                writer = (
+                    _XlsxSink(file_path, spec)
+                    if extension == ".xlsx"
+                    else _CsvSink(file_path, spec)
+                )
+                try:
+                    for batch in result.partitions():
+                        for row in batch:
+                            writer.write(
+                                spec.row_formatter(row) if spec.row_formatter else row
+                            )
+                        rows_written += len(batch)
+                        if progress_callback:
+                            progress_callback(rows_written, total)
+                        if cancel_requested and cancel_requested():
+                            break
+                finally:
+                    result.close()
+                    writer.close()
+        except Exception as e:
+            self.logger.error(
+                f"Export of '{spec.title}' to {file_path} failed: {e}", exc_info=True
+            )
+            self._remove_partial(file_path)
+            return False, f"Export failed: {e}", rows_written
+
+        if cancel_requested and cancel_requested() and rows_written < total:
+            self._remove_partial(file_path)
+            return False, "Export cancelled.", rows_written
+        self.logger.info(
+            f"Exported {rows_written} row(s) of '{spec.title}' to {file_path}."
+        )
+        return True, f"Exported {rows_written:,} rows to:\n{file_path}", rows_written
+
+    def _remove_partial(self, file_path: str) -> None:
+        try:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        except OSError as e:
+            self.logger.warning(f"Could not remove partial export {file_path}: {e}")
+
+
+class _CsvSink:
+    """Plain CSV: ISO dates, amounts without currency formatting."""
+
+    def __init__(self, file_path: str, spec: ExportSpec):
+        # utf-8-sig so Excel opens non-ASCII names correctly
+        self._file = open(file_path, "w", newline="", encoding="utf-8-sig")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(spec.headers)
+
+    def write(self, values: Sequence[Any]) -> None:
+        self._writer.writerow(["" if value is None else value for value in values])
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class _XlsxSink:
+    """XlsxWriter in constant-memory mode: each row is flushed as it is written."""
+
+    def __init__(self, file_path: str, spec: ExportSpec):
+        import xlsxwriter
+
+        self._workbook = xlsxwriter.Workbook(
+            file_path, {"constant_memory": True, "default_date_format": "yyyy-mm-dd"}
+        )
+        self._title = spec.title[:25]
+        self._headers = spec.headers
+        money = self._workbook.add_format({"num_format": "#,##0.00"})
+        self._formats = [money if kind == MONEY else None for kind in spec.kinds]
+        self._bold = self._workbook.add_format({"bold": True})
+        self._sheets = 0
+        self._new_sheet()
+
+    def _new_sheet(self) -> None:
+        self._sheets += 1
+        name = self._title if self._sheets == 1 else f"{self._title} ({self._sheets})"
+        self._sheet = self._workbook.add_worksheet(name)
+        self._sheet.write_row(0, 0, self._headers, self._bold)
+        self._row = 0
+
+    def write(self, values: Sequence[Any]) -> None:
+        if self._row == XLSX_MAX_ROW:
+            self._new_sheet()
+        self._row += 1
+        for column, value in enumerate(values):
+            if value is None:
+                continue
+            if isinstance(value, Decimal):
+                value = float(value)
+            self._sheet.write(self._row, column, value, self._formats[column])
+
+    def close(self) -> None:
+        self._workbook.close()
@@ -0,0 +1,485 @@
+# services/settlement_reconciliation.py
+"""
+EDSI Veterinary Management System - Settlement Reconciliation
+Version: 1.1.0
+Purpose: Matches daily settlement CSVs from the card processor or the bank to
+         open invoices and records the matches as payments. The file is read one
+         row at a time; the state kept for a run is the open-invoice indexes
+         and the references already recorded, built once up front, a short hash
+         per distinct row and one batch of pending matches. A row matches, in order:
+           1. a `WEBHOOK_INV<id>` reference anywhere in the row, or
+           2. the owner's account number plus an amount exactly equal to one of
+              that owner's open balances (oldest invoice first).
+         Matches are recorded through `FinancialController.record_payments_batch`,
+         one commit per batch. Every other row is written to an exceptions CSV
+         with the reason, for manual review. Each recorded payment's reference
+         carries a digest of its source row (`settlement_reference`), so
+         re-importing a file skips rows already recorded, while a later
+         installment with the same reference is still recorded.
+Last Updated: October 16, 2026
+Author: Gemini
+
+Changelog:
+- v1.1.0 (2026-10-16):
+    - Re-run protection now covers every row, not only rows with a reference:
+      payments are stored under `settlement_reference` (the file's reference or
+      the matched `WEBHOOK_INV<id>`, plus a digest of date, amount and row
+      content) instead of the bare reference or invoice token. A second
+      installment for the same invoice on another day is no longer rejected.
+      Bare references recorded by v1.0.0 are still honoured.
+    - Rows with more fields than the header (e.g. a trailing comma) no longer
+      abort the run; only string cells are scanned for a webhook reference, and
+      a row that cannot be processed goes to the exceptions CSV.
+- v1.0.0 (2026-10-16):
+    - Initial creation with `SettlementReconciler` and `ReconciliationResult`.
+"""
+
+import csv
+import hashlib
+import logging
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from config.app_config import AppConfig
+from config.database_config import db_manager
+from models import Invoice, Owner, OwnerPayment
+
+WEBHOOK_REFERENCE = re.compile(r"WEBHOOK_INV(\d+)", re.IGNORECASE)
+
+PAYMENT_METHODS = {
+    "processor": "Card Processor Settlement",
+    "bank": "Bank Settlement",
+}
+
+# Normalized header -> field. Headers are lower-cased with spaces/underscores
+# collapsed, so "Settlement Date", "settlement_date" and "SETTLEMENT DATE" match.
+COLUMN_ALIASES = {
+    "amount": ("amount", "net", "net amount", "credit", "deposit", "gross"),
+    "date": ("date", "settlement date", "posted date", "post date", "created"),
+    "reference": (
+        "reference",
+        "reference number",
+        "transaction id",
+        "id",
+        "check number",
+        "check",
+    ),
+    "account": ("account", "account number", "customer", "customer id", "payer"),
+}
+
+DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y", "%Y-%m-%d %H:%M:%S")
+
+# Label of a recorded settlement row that had no reference and no webhook token
+NO_REFERENCE_LABEL = "SETTLEMENT"
+# Characters of the row digest kept in the stored reference
+REFERENCE_DIGEST_LENGTH = 16
+# `OwnerPayment.reference_number` is String(100): label + " #" + digest
+_LABEL_MAX_LENGTH = 100 - 2 - REFERENCE_DIGEST_LENGTH
+
+
+def settlement_reference(
+    payment_date: date, amount: Decimal, label: str, row_content: str, occurrence: int
+) -> str:
+    """
+    The reference a reconciled row is stored under: `label` (the file's reference,
+    the matched `WEBHOOK_INV<id>` or `NO_REFERENCE_LABEL`) and a digest of the
+    source row. `occurrence` numbers identical rows within one file, so each is
+    recorded once and a re-import of the same file matches them again.
+    """
+    digest = hashlib.sha256(
+        "\x1f".join(
+            [
+                payment_date.isoformat(),
+                f"{amount:.2f}",
+                label,
+                row_content,
+                str(occurrence),
+            ]
+        ).encode("utf-8")
+    ).hexdigest()[:REFERENCE_DIGEST_LENGTH]
+    return f"{label[:_LABEL_MAX_LENGTH]} #{digest}"
+
+
+@dataclass
+class ReconciliationResult:
+    """Outcome of one `SettlementReconciler.reconcile_file` run."""
+
+    rows_read: int = 0
+    matched: int = 0
+    amount_recorded: Decimal = Decimal("0.00")
+    exceptions: int = 0
+    exceptions_path: Optional[str] = None
+    # The first few exceptions, for display; the full list is in the CSV
+    sample_exceptions: List[Tuple[int, str]] = field(default_factory=list)
+
+
+class _OpenInvoice:
+    __slots__ = ("invoice_id", "account", "balance_due")
+
+    def __init__(self, invoice_id: int, account: str, balance_due: Decimal):
+        self.invoice_id = invoice_id
+        self.account = account
+        self.balance_due = balance_due
+
+
+class SettlementReconciler:
+    """Streams a settlement CSV, matches rows to open invoices and records them."""
+
+    SAMPLE_EXCEPTIONS = 20
+
+    def __init__(self, financial_controller=None, batch_size: Optional[int] = None):
+        from controllers.financial_controller import FinancialController
+
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.financial_controller = financial_controller or FinancialController()
+        self.batch_size = batch_size or AppConfig.RECONCILIATION_BATCH_SIZE
+
+    def reconcile_file(
+        self,
+        csv_path: str,
+        source: str,
+        current_user_id: str,
+        exceptions_path: Optional[str] = None,
+        dry_run: bool = False,
+    ) -> ReconciliationResult:
+        """
+        Reconciles `csv_path` from `source` ("processor" or "bank"). Exceptions go
+        to `exceptions_path` (default: next to the input, `*_exceptions.csv`).
+        With `dry_run` nothing is recorded; matches are only counted.
+        """
+        if source not in PAYMENT_METHODS:
+            raise ValueError(
+                f"Unknown settlement source '{source}'; expected one of {sorted(PAYMENT_METHODS)}."
+            )
+        payment_method = PAYMENT_METHODS[source]
+        exceptions_path = exceptions_path or re.sub(
+            r"(\.csv)?$", "_exceptions.csv", csv_path, count=1, flags=re.IGNORECASE
+        )
+        result = ReconciliationResult(exceptions_path=exceptions_path)
+
+        by_invoice_id, by_account_amount = self._build_indexes()
+        recorded_references = self._recorded_references(payment_method)
+        self.logger.info(
+            f"Reconciling {csv_path} ({source}) against {len(by_invoice_id)} open "
+            f"invoice(s)."
+        )
+
+        with open(csv_path, newline="", encoding="utf-8-sig") as source_file, open(
+            exceptions_path, "w", newline="", encoding="utf-8"
+        ) as exceptions_file:
+            reader = csv.DictReader(source_file)
+            columns = self._map_columns(reader.fieldnames or [])
+            exceptions_writer = csv.writer(exceptions_file)
+            exceptions_writer.writerow(
+                ["line", "reason"] + list(reader.fieldnames or [])
+            )
+
+            def reject(line: int, row: Dict[str, str], reason: str) -> None:
+                result.exceptions += 1
+                if len(result.sample_exceptions) < self.SAMPLE_EXCEPTIONS:
+                    result.sample_exceptions.append((line, reason))
+                exceptions_writer.writerow(
+                    [line, reason] + [row.get(name, "") for name in reader.fieldnames]
+                )
+
+            pending: List[Tuple[int, Dict[str, str], Dict[str, Any]]] = []
+            # Identical rows seen so far in this file, by content
+            occurrences: Dict[bytes, int] = defaultdict(int)
+            # Line 1 is the header
+            for line, row in enumerate(reader, start=2):
+                result.rows_read += 1
+                try:
+                    invoice, payment, reason = self._prepare_payment(
+                        row,
+                        columns,
+                        source,
+                        payment_method,
+                        by_invoice_id,
+                        by_account_amount,
+                        recorded_references,
+                        occurrences,
+                    )
+                except Exception as e:
+                    self.logger.warning(f"Settlement line {line} failed: {e}")
+                    invoice, reason = None, f"Could not process row: {e}"
+                if invoice is None:
+                    reject(line, row, reason)
+                    continue
+
+                # Reserve the amount now so later rows see the reduced balance
+                self._reduce_balance(
+                    invoice, payment["amount"], by_invoice_id, by_account_amount
+                )
+                recorded_references.add(payment["reference_number"])
+                pending.append((line, row, payment))
+                if len(pending) >= self.batch_size:
+                    self._record(pending, current_user_id, dry_run, result, reject)
+                    pending = []
+
+            if pending:
+                self._record(pending, current_user_id, dry_run, result, reject)
+
+        self.logger.info(
+            f"Reconciliation of {csv_path}: {result.rows_read} row(s), "
+            f"{result.matched} matched (${result.amount_recorded:.2f}), "
+            f"{result.exceptions} exception(s) in {exceptions_path}."
+        )
+        return result
+
+    def _prepare_payment(
+        self,
+        row: Dict[str, Any],
+        columns: Dict[str, str],
+        source: str,
+        payment_method: str,
+        by_invoice_id,
+        by_account_amount,
+        recorded_references: set,
+        occurrences: Dict[bytes, int],
+    ):
+        """
+        Matches one settlement row. Returns (invoice, payment values, None), or
+        (None, None, reason) when the row goes to the exceptions CSV.
+        """
+        amount = self._parse_amount(self._value(row, columns, "amount"))
+        if amount is None or amount <= 0:
+            return None, None, "No positive amount."
+
+        reference = self._value(row, columns, "reference")
+        token = self._webhook_reference(row)
+        if (
+            reference
+            and not WEBHOOK_REFERENCE.fullmatch(reference)
+            and reference in recorded_references
+        ):
+            # Stored bare by v1.0.0
+            return None, None, f"Reference {reference} was already recorded."
+
+        payment_date = (
+            self._parse_date(self._value(row, columns, "date")) or date.today()
+        )
+        row_content = "\x1f".join(self._cells(row))
+        # Counted by a short hash, so the counts stay small for a large file
+        content_key = hashlib.blake2b(
+            row_content.encode("utf-8"), digest_size=8
+        ).digest()
+        occurrences[content_key] += 1
+        stored_reference = settlement_reference(
+            payment_date,
+            amount,
+            reference or (token.group(0).upper() if token else NO_REFERENCE_LABEL),
+            row_content,
+            occurrences[content_key],
+        )
+        if stored_reference in recorded_references:
+            return (
+                None,
+                None,
+                f"Row was already recorded (reference {stored_reference}).",
+            )
+
+        invoice, reason = self._match(
+            row, columns, amount, token, by_invoice_id, by_account_amount
+        )
+        if invoice is None:
+            return None, None, reason
+        return (
+            invoice,
+            {
+                "invoice_id": invoice.invoice_id,
+                "amount": amount,
+                "payment_date": payment_date,
+                "payment_method": payment_method,
+                "reference_number": stored_reference,
+                "notes": f"Reconciled from {source} settlement file.",
+            },
+            None,
+        )
+
+    def _record(self, pending, current_user_id, dry_run, result, reject) -> None:
+        """Records one batch of matches in one commit."""
+        payments = [payment for _, _, payment in pending]
+        if dry_run:
+            result.matched += len(payments)
+            result.amount_recorded += sum(p["amount"] for p in payments)
+            return
+
+        success, message, _ = self.financial_controller.record_payments_batch(
+            payments, current_user_id
+        )
+        if success:
+            result.matched += len(payments)
+            result.amount_recorded += sum(p["amount"] for p in payments)
+            return
+
+        # Something changed under the batch (e.g. an invoice was paid at the front
+        # desk meanwhile): record the lines one by one so only the bad ones fail.
+        self.logger.warning(
+            f"Reconciliation batch rejected ({message}); retrying line by line."
+        )
+        for line, row, payment in pending:
+            success, message, errors = self.financial_controller.record_payments_batch(
+                [payment], current_user_id
+            )
+            if success:
+                result.matched += 1
+                result.amount_recorded += payment["amount"]
+            else:
+                reject(line, row, errors[0] if errors else message)
+
+    def _build_indexes(self):
+        """
+        One query over the open invoices: {invoice_id: invoice} and
+        {(ACCOUNT#, amount): [invoices, oldest first]}.
+        """
+        by_invoice_id: Dict[int, _OpenInvoice] = {}
+        by_account_amount: Dict[Tuple[str, Decimal], List[_OpenInvoice]] = defaultdict(
+            list
+        )
+        with db_manager().session_scope() as session:
+            rows = session.execute(
+                select(
+                    Invoice.invoice_id,
+                    Invoice.balance_due,
+                    Owner.account_number,
+                )
+                .join(Owner, Owner.owner_id == Invoice.owner_id)
+                .where(Invoice.balance_due > 0)
+                .order_by(Invoice.invoice_date, Invoice.invoice_id)
+            )
+            for invoice_id, balance_due, account in rows:
+                invoice = _OpenInvoice(
+                    invoice_id, (account or "").strip().upper(), balance_due
+                )
+                by_invoice_id[invoice_id] = invoice
+                if invoice.account:
+                    by_account_amount[(invoice.account, balance_due)].append(invoice)
+        return by_invoice_id, by_account_amount
+
+    @staticmethod
+    def _recorded_references(payment_method: str) -> set:
+        """References already imported from this source, so re-runs skip them."""
+        with db_manager().session_scope() as session:
+            return set(
+                session.scalars(
+                    select(OwnerPayment.reference_number).where(
+                        OwnerPayment.payment_method == payment_method,
+                        OwnerPayment.reference_number.is_not(None),
+                    )
+                )
+            )
+
+    @staticmethod
+    def _cells(row: Dict[str, Any]) -> List[str]:
+        """
+        The row's cells as stripped strings. Fields beyond the header (a trailing
+        comma, say) are a list under the `None` key; they are included.
+        """
+        cells = []
+        for value in row.values():
+            if isinstance(value, list):
+                cells.extend((item or "").strip() for item in value)
+            else:
+                cells.append((value or "").strip())
+        return cells
+
+    @staticmethod
+    def _webhook_reference(row: Dict[str, Any]) -> Optional[re.Match]:
+        """The first `WEBHOOK_INV<id>` in the row's string cells, if any."""
+        for value in row.values():
+            if isinstance(value, str):
+                found = WEBHOOK_REFERENCE.search(value)
+                if found:
+                    return found
+        return None
+
+    def _match(self, row, columns, amount, token, by_invoice_id, by_account_amount):
+        """Returns (invoice, None) or (None, reason)."""
+        if token:
+            invoice = by_invoice_id.get(int(token.group(1)))
+            if invoice is None:
+                return (
+                    None,
+                    f"Invoice {token.group(1)} is not open (or already matched).",
+                )
+            if amount > invoice.balance_due:
+                return (
+                    None,
+                    f"Amount ${amount:.2f} exceeds invoice {invoice.invoice_id}'s "
+                    f"balance due of ${invoice.balance_due:.2f}.",
+                )
+            return invoice, None
+
+        account = self._value(row, columns, "account")
+        if not account:
+            return None, "No invoice reference and no account number."
+        candidates = by_account_amount.get((account.strip().upper(), amount))
+        if not candidates:
+            return (
+                None,
+                f"No open invoice of account {account} for exactly ${amount:.2f}.",
+            )
+        return candidates[0], None
+
+    @staticmethod
+    def _reduce_balance(
+        invoice: _OpenInvoice, amount: Decimal, by_invoice_id, by_account_amount
+    ) -> None:
+        """Re-keys a matched invoice under its remaining balance, or drops it."""
+        if invoice.account:
+            key = (invoice.account, invoice.balance_due)
+            by_account_amount[key].remove(invoice)
+            if not by_account_amount[key]:
+                del by_account_amount[key]
+        invoice.balance_due -= amount
+        if invoice.balance_due <= 0:
+            del by_invoice_id[invoice.invoice_id]
+        elif invoice.account:
+            by_account_amount[(invoice.account, invoice.balance_due)].append(invoice)
+
+    @staticmethod
+    def _map_columns(fieldnames: List[str]) -> Dict[str, str]:
+        """Field -> the file's header for it, using `COLUMN_ALIASES`."""
+        normalized = {
+            re.sub(r"[\s_]+", " ", name.strip().lower()): name for name in fieldnames
+        }
+        columns = {}
+        for field_name, aliases in COLUMN_ALIASES.items():
+            for alias in aliases:
+                if alias in normalized:
+                    columns[field_name] = normalized[alias]
+                    break
+        return columns
+
+    @staticmethod
+    def _value(row: Dict[str, str], columns: Dict[str, str], field_name: str) -> str:
+        header = columns.get(field_name)
+        return (row.get(header) or "").strip() if header else ""
+
+    @staticmethod
+    def _parse_amount(text: str) -> Optional[Decimal]:
+        try:
+            cleaned = text.replace("$", "").replace(",", "")
+            if cleaned.startswith("(") and cleaned.endswith(")"):
+                cleaned = "-" + cleaned[1:-1]
+            return Decimal(cleaned).quantize(Decimal("0.01"))
+        except (InvalidOperation, ValueError):
+            return None
+
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def _parse_date(text: str) -> Optional[date]:
+        # A settlement file repeats a handful of dates, so parse each one once
+        for date_format in DATE_FORMATS:
+            try:
+                return datetime.strptime(text, date_format).date()
+            except ValueError:
+                continue
+        return None
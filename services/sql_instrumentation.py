@@ -0,0 +1,349 @@
+# services/sql_instrumentation.py
+"""
+EDSI Veterinary Management System - SQL Instrumentation Service
+Version: 1.0.0
+Purpose: Hooks SQLAlchemy's before/after_cursor_execute events to attribute every
+         statement to the controller method that issued it, keep per-method latency
+         histograms, and flag N+1 patterns (the same statement shape repeated more
+         than a threshold number of times within one UI action). Events are written
+         as JSON lines to a rotating file next to edsi_app.log.
+Last Updated: October 16, 2026
+Author: Gemini
+
+Changelog:
+- v1.0.0 (2026-10-16):
+    - Initial creation of the SQLInstrumentation class.
+    - Attribution walks the call stack: the innermost `controllers.*` frame names
+      the method; the outermost `views.*` frame (or an explicit `action()` block)
+      delimits the UI action used for N+1 detection.
+    - JSON-lines record types: `slow_query`, `n_plus_one`, `action` (per-action
+      totals, written when the next action starts) and `summary` (per-method
+      counts and latency histograms, written on shutdown).
+"""
+
+import json
+import logging
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from sqlalchemy import event
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended.
+LATENCY_BUCKETS_MS: Tuple[float, ...] = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+
+
+@lru_cache(maxsize=1024)
+def statement_shape(statement: str) -> str:
+    """
+    Normalizes a SQL statement so that repeats differing only in parameter count
+    (e.g. `IN (?, ?)` vs `IN (?, ?, ?)`) or whitespace share one shape. Cached,
+    since the ORM re-issues identical statement strings.
+    """
+    shape = _WHITESPACE_RE.sub(" ", statement).strip()
+    return _IN_LIST_RE.sub("(?)", shape)
+
+
+class _MethodStats:
+    """Running totals and a latency histogram for one controller method."""
+
+    __slots__ = ("count", "total_ms", "max_ms", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def add(self, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        for i, upper in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= upper:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        labels = [f"<={upper}ms" for upper in LATENCY_BUCKETS_MS] + [
+            f">{LATENCY_BUCKETS_MS[-1]}ms"
+        ]
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "histogram": dict(zip(labels, self.buckets)),
+        }
+
+
+class _ActionState:
+    """Per-thread bookkeeping for the UI action currently issuing statements."""
+
+    __slots__ = (
+        "key",
+        "label",
+        "statements",
+        "total_ms",
+        "shapes",
+        "methods",
+        "warned",
+    )
+
+    def __init__(self, key: Any = None, label: str = ""):
+        self.key = key
+        self.label = label
+        self.statements = 0
+        self.total_ms = 0.0
+        self.shapes: Counter = Counter()
+        self.methods: Counter = Counter()
+        self.warned: set = set()
+
+
+class SQLInstrumentation:
+    """
+    Collects per-controller SQL statistics for one or more SQLAlchemy engines.
+    Attach with `attach(engine)`; `DatabaseManager.enable_sql_instrumentation()`
+    does this for the main and report engines.
+    """
+
+    def __init__(
+        self,
+        log_file: Optional[str] = None,
+        n_plus_one_threshold: int = 10,
+        slow_query_ms: float = 250.0,
+        max_bytes: int = 5 * 1024 * 1024,
+        backup_count: int = 5,
+    ):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.log_file = log_file
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.slow_query_ms = slow_query_ms
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._method_stats: Dict[str, _MethodStats] = {}
+
+        # Dedicated non-propagating logger so JSON lines never reach edsi_app.log
+        self._events = logging.getLogger(f"{self.__class__.__name__}.events")
+        self._events.propagate = False
+        self._events.setLevel(logging.INFO)
+        self._file_handler: Optional[RotatingFileHandler] = None
+        if log_file:
+            self._file_handler = RotatingFileHandler(
+                log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+            )
+            self._file_handler.setFormatter(logging.Formatter("%(message)s"))
+            self._events.addHandler(self._file_handler)
+
+    # --- Engine hooks -------------------------------------------------------
+
+    def attach(self, engine) -> None:
+        """Registers the cursor-execute hooks on `engine`."""
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def detach(self, engine) -> None:
+        """Removes the hooks registered by `attach`."""
+        event.remove(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.remove(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):
+        if context is not None:
+            context._edms_sql_start = time.perf_counter()
+
+    def _after_cursor_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):
+        start = getattr(context, "_edms_sql_start", None)
+        if start is None:
+            return
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        method, action_key, action_label = self._attribute()
+        self._record(method, action_key, action_label, statement, elapsed_ms)
+
+    # --- Attribution --------------------------------------------------------
+
+    @contextmanager
+    def action(self, label: str) -> Iterator[None]:
+        """
+        Groups every statement issued in the block into one named action,
+        overriding the stack-derived view boundary (useful for scripts).
+        """
+        previous = getattr(self._local, "explicit_action", None)
+        self._local.explicit_action = (object(), label)
+        try:
+            yield
+        finally:
+            self._local.explicit_action = previous
+
+    @staticmethod
+    def _frame_label(frame) -> str:
+        owner = frame.f_locals.get("self")
+        if owner is not None:
+            return f"{type(owner).__name__}.{frame.f_code.co_name}"
+        module = frame.f_globals.get("__name__", "")
+        return f"{module.rsplit('.', 1)[-1]}.{frame.f_code.co_name}"
+
+    def _attribute(self) -> Tuple[str, Any, str]:
+        """
+        Returns (controller method, action key, action label) for the statement
+        being executed on this thread.
+        """
+        method_frame = None
+        outermost_controller = None
+        outermost_view = None
+        frame = sys._getframe(2)
+        while frame is not None:
+            module = frame.f_globals.get("__name__", "")
+            if module.startswith("controllers."):
+                if method_frame is None:
+                    method_frame = frame
+                outermost_controller = frame
+            elif module.startswith("views."):
+                outermost_view = frame
+            frame = frame.f_back
+
+        method = (
+            self._frame_label(method_frame)
+            if method_frame is not None
+            else "unattributed"
+        )
+
+        explicit = getattr(self._local, "explicit_action", None)
+        if explicit is not None:
+            return method, explicit[0], explicit[1]
+        action_frame = outermost_view or outermost_controller
+        if action_frame is None:
+            return method, None, method
+        # The frame object lives exactly as long as the call, so its identity
+        # delimits one invocation of the action.
+        return (
+            method,
+            (id(action_frame), action_frame.f_code),
+            self._frame_label(action_frame),
+        )
+
+    # --- Recording ----------------------------------------------------------
+
+    def _record(
+        self,
+        method: str,
+        action_key: Any,
+        action_label: str,
+        statement: str,
+        elapsed_ms: float,
+    ) -> None:
+        with self._lock:
+            stats = self._method_stats.get(method)
+            if stats is None:
+                stats = self._method_stats[method] = _MethodStats()
+            stats.add(elapsed_ms)
+
+        state: Optional[_ActionState] = getattr(self._local, "action", None)
+        if state is None or state.key != action_key or action_key is None:
+            if state is not None:
+                self._finish_action(state)
+            state = self._local.action = _ActionState(action_key, action_label)
+
+        shape = statement_shape(statement)
+        state.statements += 1
+        state.total_ms += elapsed_ms
+        state.methods[method] += 1
+        state.shapes[shape] += 1
+
+        if elapsed_ms >= self.slow_query_ms:
+            self._emit(
+                "slow_query",
+                method=method,
+                action=action_label,
+                elapsed_ms=round(elapsed_ms, 3),
+                statement=shape,
+            )
+
+        repeats = state.shapes[shape]
+        if repeats > self.n_plus_one_threshold and shape not in state.warned:
+            state.warned.add(shape)
+            self.logger.warning(
+                f"Possible N+1: '{action_label}' ran the same statement more than "
+                f"{self.n_plus_one_threshold} times (via {method}): {shape[:200]}"
+            )
+            self._emit(
+                "n_plus_one",
+                method=method,
+                action=action_label,
+                threshold=self.n_plus_one_threshold,
+                statement=shape,
+            )
+
+    def _finish_action(self, state: _ActionState) -> None:
+        if not state.statements:
+            return
+        repeated = {
+            shape: count
+            for shape, count in state.shapes.items()
+            if count > self.n_plus_one_threshold
+        }
+        self._emit(
+            "action",
+            action=state.label,
+            statements=state.statements,
+            total_ms=round(state.total_ms, 3),
+            methods=dict(state.methods),
+            repeated_statements=repeated,
+        )
+
+    def _emit(self, record_type: str, **fields: Any) -> None:
+        if not self._file_handler:
+            return
+        record = {
+            "ts": datetime.now().isoformat(timespec="milliseconds"),
+            "type": record_type,
+        }
+        record.update(fields)
+        self._events.info(json.dumps(record, default=str))
+
+    # --- Reporting ----------------------------------------------------------
+
+    def flush_action(self) -> None:
+        """Writes the current thread's in-progress action record, if any."""
+        state = getattr(self._local, "action", None)
+        if state is not None:
+            self._finish_action(state)
+            self._local.action = None
+
+    def get_summary(self) -> Dict[str, Dict[str, Any]]:
+        """Per-controller-method counts, timings and latency histograms."""
+        with self._lock:
+            return {
+                method: stats.as_dict()
+                for method, stats in sorted(self._method_stats.items())
+            }
+
+    def write_summary(self) -> None:
+        """Flushes the current action and writes a `summary` record."""
+        self.flush_action()
+        summary = self.get_summary()
+        if summary:
+            self._emit("summary", methods=summary)
+
+    def close(self) -> None:
+        """Writes the summary and releases the JSON-lines file."""
+        self.write_summary()
+        if self._file_handler:
+            self._events.removeHandler(self._file_handler)
+            self._file_handler.close()
+            self._file_handler = None
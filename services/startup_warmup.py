@@ -0,0 +1,105 @@
+# services/startup_warmup.py
+"""
+EDSI Veterinary Management System - Startup Warm-up Service
+Version: 1.0.0
+Purpose: Runs start-up work that does not depend on who logs in on a background
+         thread while the splash screen and login dialog wait for the user:
+         SQLAlchemy mapper configuration, the reference-data queries the horse
+         screen issues when it opens (warming SQLite's page cache and SQLAlchemy's
+         compiled-statement cache), and any extra tasks the caller adds, such as
+         importing the main screen's module tree.
+         Tasks must not create Qt widgets; those belong to the GUI thread.
+Last Updated: October 16, 2026
+Author: Gemini
+
+Changelog:
+- v1.0.0 (2026-10-16):
+    - Initial creation of the StartupWarmup class and the default
+      `reference_data_tasks()`.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+WarmupTask = Tuple[str, Callable[[], object]]
+
+
+def _configure_mappers() -> None:
+    from sqlalchemy.orm import configure_mappers
+
+    import models  # noqa: F401 - registers every mapped class
+
+    configure_mappers()
+
+
+def _load_reference_data() -> None:
+    from controllers.charge_code_controller import ChargeCodeController
+    from controllers.horse_controller import HorseController
+    from controllers.location_controller import LocationController
+
+    HorseController().search_horses(search_term="", status="active")
+    LocationController().get_all_locations(status_filter="active")
+    ChargeCodeController().get_all_charge_codes(status_filter="active")
+
+
+def reference_data_tasks() -> List[WarmupTask]:
+    """The default warm-up tasks: mapper configuration, then reference data."""
+    return [
+        ("model mappers", _configure_mappers),
+        ("reference data", _load_reference_data),
+    ]
+
+
+class StartupWarmup:
+    """
+    Runs warm-up tasks in order on one daemon thread. A failing task is logged
+    and skipped; warm-up only ever saves time, so it never fails start-up.
+    """
+
+    def __init__(
+        self,
+        tasks: Optional[List[WarmupTask]] = None,
+        on_finished: Optional[Callable[[], None]] = None,
+    ):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.tasks = list(tasks) if tasks is not None else reference_data_tasks()
+        self.on_finished = on_finished
+        self.timings_ms: Dict[str, float] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Starts the worker thread (once)."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self.run, name="StartupWarmup", daemon=True
+        )
+        self._thread.start()
+
+    def run(self) -> None:
+        """Runs every task on the calling thread; `start()` runs this in the worker."""
+        for label, task in self.tasks:
+            start = time.perf_counter()
+            try:
+                task()
+            except Exception as e:
+                self.logger.warning(
+                    f"Warm-up task '{label}' failed: {e}", exc_info=True
+                )
+            self.timings_ms[label] = (time.perf_counter() - start) * 1000.0
+
+        phases = ", ".join(
+            f"{label} {ms:.1f} ms" for label, ms in self.timings_ms.items()
+        )
+        self.logger.info(f"Startup warm-up finished: {phases}")
+        if self.on_finished:
+            self.on_finished()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Waits for the worker; returns True if it is no longer running."""
+        if self._thread is None:
+            return True
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
@@ -0,0 +1,174 @@
+# services/statement_batch.py
+"""
+EDSI Veterinary Management System - Statement Batch Rendering
+Version: 1.0.0
+Purpose: Renders a batch of owner statement PDFs across a pool of worker
+         processes, one per CPU by default (`STATEMENT_RENDER_MAX_WORKERS`).
+         ReportLab layout is pure Python and holds the GIL, so threads would not
+         help; separate processes render in parallel. Workers only receive plain
+         data: `statement_job` copies the owner and the company profile out of
+         their ORM objects, so a worker never opens the database. Each worker
+         builds one `OwnerStatementGenerator` and reuses it for every statement
+         it renders. Nothing here touches Qt; the reports tab runs `render` on a
+         QThread.
+Last Updated: October 16, 2026
+Author: Gemini
+
+Changelog:
+- v1.0.0 (2026-10-16):
+    - Initial creation with `StatementBatchRenderer`, `StatementJob`,
+      `StatementBatchResult` and `statement_job`.
+"""
+
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config.app_config import AppConfig
+
+# progress_callback(statements_done, statements_total)
+RenderProgressCallback = Callable[[int, int], None]
+
+# The generator of this worker process, built by _init_worker
+_worker_generator = None
+
+
+@dataclass
+class StatementJob:
+    """One statement to render: plain statement data and its output path."""
+
+    owner_id: int
+    owner_name: str
+    statement_data: Dict[str, Any]
+    file_path: str
+
+
+@dataclass
+class StatementBatchResult:
+    """Outcome of one `StatementBatchRenderer.render` call."""
+
+    total: int = 0
+    succeeded: int = 0
+    failures: List[Tuple[str, str]] = field(default_factory=list)  # (owner, error)
+    cancelled: bool = False
+
+    @property
+    def not_rendered(self) -> int:
+        return self.total - self.succeeded - len(self.failures)
+
+
+def plain_copy(record: Any) -> Optional[SimpleNamespace]:
+    """Column values of an ORM object as a picklable namespace."""
+    if record is None:
+        return None
+    return SimpleNamespace(
+        **{column.name: getattr(record, column.name) for column in record.__table__.columns}
+    )
+
+
+def statement_job(statement_data: Dict[str, Any], file_path: str) -> StatementJob:
+    """
+    A job for one statement from `ReportsController.get_owner_statement_data`
+    output. The owner becomes a plain copy; the items already are plain.
+    """
+    owner = statement_data["owner"]
+    return StatementJob(
+        owner_id=owner.owner_id,
+        owner_name=owner.last_name or f"Owner{owner.owner_id}",
+        statement_data={**statement_data, "owner": plain_copy(owner)},
+        file_path=file_path,
+    )
+
+
+def _init_worker(company_profile: Optional[SimpleNamespace]) -> None:
+    global _worker_generator
+    from reports.owner_statement_generator import OwnerStatementGenerator
+
+    _worker_generator = OwnerStatementGenerator(company_profile=company_profile)
+
+
+def _render(job: StatementJob) -> Tuple[bool, str]:
+    try:
+        return _worker_generator.generate_statement_pdf(
+            job.statement_data, job.file_path
+        )
+    except Exception as e:
+        return False, f"Failed to generate PDF: {e}"
+
+
+class StatementBatchRenderer:
+    """Renders statement PDFs in parallel worker processes."""
+
+    def __init__(
+        self,
+        company_profile: Optional[Any] = None,
+        max_workers: Optional[int] = None,
+    ):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.company_profile = plain_copy(company_profile)
+        self.max_workers = (
+            max_workers or AppConfig.STATEMENT_RENDER_MAX_WORKERS or os.cpu_count() or 1
+        )
+
+    def render(
+        self,
+        jobs: List[StatementJob],
+        progress_callback: Optional[RenderProgressCallback] = None,
+        cancel_requested: Optional[Callable[[], bool]] = None,
+    ) -> StatementBatchResult:
+        """
+        Renders every job and reports progress as each statement finishes. Once
+        `cancel_requested()` returns True, statements not yet started are
+        dropped; those already rendering are allowed to finish.
+        """
+        result = StatementBatchResult(total=len(jobs))
+        if not jobs:
+            return result
+
+        workers = min(self.max_workers, len(jobs))
+        self.logger.info(
+            f"Rendering {len(jobs)} statement(s) in {workers} worker process(es)."
+        )
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(self.company_profile,),
+        ) as executor:
+            futures = {executor.submit(_render, job): job for job in jobs}
+            done = 0
+            for future in as_completed(futures):
+                job = futures[future]
+                if future.cancelled():
+                    continue
+                try:
+                    success, message = future.result()
+                except Exception as e:
+                    # The worker process itself died
+                    success, message = False, f"Worker failed: {e}"
+                if success:
+                    result.succeeded += 1
+                else:
+                    self.logger.error(
+                        f"Statement for owner ID {job.owner_id} failed: {message}"
+                    )
+                    result.failures.append((job.owner_name, message))
+                done += 1
+                if progress_callback:
+                    progress_callback(done, len(jobs))
+                if (
+                    cancel_requested
+                    and not result.cancelled
+                    and cancel_requested()
+                ):
+                    result.cancelled = True
+                    for pending in futures:
+                        pending.cancel()
+
+        self.logger.info(
+            f"Statement batch finished: {result.succeeded} rendered, "
+            f"{len(result.failures)} failed, {result.not_rendered} not rendered."
+        )
+        return result
@@ -0,0 +1,284 @@
+# services/transaction_archive.py
+"""
+EDSI Veterinary Management System - Transaction Archive
+Version: 1.0.1
+Purpose: Moves closed years out of the live database into yearly SQLite archive
+         files, so the horse screens and everyday reports only scan recent rows.
+         A year can be archived once it has ended. What moves, for that year:
+           - invoices fully paid, whose payments and line items all fall in
+             the year, with their allocations (line items);
+           - charges that are billed and whose allocations all moved;
+           - payments recorded against a moved invoice, or unapplied;
+           - owner billing history (ledger) entries.
+         Everything else stays live: open invoices, unbilled charges, and
+         anything tied to another year. Owner balance snapshots are taken at
+         both ends of the year first, so opening balances never need an
+         archive. Reports that cover an archived year attach its file
+         (`DatabaseManager.report_scope(archive_range=...)`).
+Last Updated: October 16, 2026
+Author: Gemini
+
+Changelog:
+- v1.0.1 (2026-10-16):
+    - Moved invoices are also removed from `billing_run_invoices`.
+- v1.0.0 (2026-10-16):
+    - Initial creation with `TransactionArchiver`.
+"""
+
+import logging
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from sqlalchemy import Column, Index, MetaData, Table, create_engine, func, select
+
+from config.database_config import ARCHIVE_TABLES, Base, db_manager
+from models import Invoice, OwnerBalanceSnapshot, OwnerBillingHistory, Transaction
+from services.owner_ledger import OwnerLedger
+
+# Rows of one year that move, per table: a condition on the live table `t`.
+# _archive_* temp tables hold the IDs picked for the run.
+_ROWS_TO_MOVE = {
+    "invoices": "t.invoice_id IN (SELECT invoice_id FROM temp._archive_invoices)",
+    "transaction_allocations": (
+        "t.invoice_id IN (SELECT invoice_id FROM temp._archive_invoices)"
+    ),
+    "transactions": (
+        "t.transaction_id IN (SELECT transaction_id FROM temp._archive_transactions)"
+    ),
+    "owner_payments": (
+        "t.payment_id IN (SELECT payment_id FROM temp._archive_payments)"
+    ),
+    "owner_billing_history": "t.entry_date >= :start AND t.entry_date < :end",
+}
+
+# Delete order, children before parents (foreign keys are enforced)
+_DELETE_ORDER = (
+    "transaction_allocations",
+    "owner_payments",
+    "transactions",
+    "invoices",
+    "owner_billing_history",
+)
+
+
+class TransactionArchiver:
+    """Moves closed years into yearly archive files."""
+
+    def __init__(self):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.ledger = OwnerLedger()
+
+    def archivable_years(self) -> List[int]:
+        """Ended years that still have charges, invoices or ledger entries live."""
+        current_year = date.today().year
+        with db_manager().session_scope() as session:
+            earliest = [
+                session.scalar(select(func.min(Transaction.transaction_date))),
+                session.scalar(select(func.min(Invoice.invoice_date))),
+                session.scalar(select(func.min(OwnerBillingHistory.entry_date))),
+            ]
+        years = [value.year for value in earliest if value is not None]
+        if not years:
+            return []
+        return list(range(min(years), current_year))
+
+    def archive_year(
+        self, year: int, current_user_id: str = "SYSTEM_ARCHIVE", vacuum: bool = False
+    ) -> Tuple[bool, str, Dict[str, int]]:
+        """
+        Moves `year`'s closed rows into its archive file in one transaction on the
+        live database. Rows are copied with INSERT OR IGNORE before they are
+        deleted, so re-running after an interruption is safe. With `vacuum`, the
+        live file is compacted afterwards. Returns (success, message, rows moved
+        per table).
+        """
+        if year >= date.today().year:
+            return False, f"{year} has not ended yet and cannot be archived.", {}
+        manager = db_manager()
+        archive_path = manager.archive_path(year)
+        if archive_path is None:
+            return False, "Archiving needs a SQLite database file.", {}
+
+        start, end = date(year, 1, 1), date(year + 1, 1, 1)
+        try:
+            with manager.session_scope() as session:
+                for boundary in (start, end):
+                    taken = session.scalar(
+                        select(OwnerBalanceSnapshot.owner_id)
+                        .where(OwnerBalanceSnapshot.as_of_date == boundary)
+                        .limit(1)
+                    )
+                    if taken is None:
+                        self.ledger.take_snapshots(session, boundary)
+
+            self._create_archive_schema(archive_path)
+            moved = self._move_rows(manager.engine, archive_path, start, end)
+            if vacuum and any(moved.values()):
+                with manager.engine.connect() as connection:
+                    connection.exec_driver_sql("VACUUM")
+        except Exception as e:
+            self.logger.error(f"Archiving {year} failed: {e}", exc_info=True)
+            return False, f"Archiving {year} failed; nothing was moved: {e}", {}
+
+        summary = ", ".join(f"{count} {table}" for table, count in moved.items())
+        self.logger.info(
+            f"Archived {year} to {archive_path} by {current_user_id}: {summary}."
+        )
+        return True, f"{year} archived to {archive_path.name}: {summary}.", moved
+
+    @staticmethod
+    def _create_archive_schema(archive_path: Path) -> None:
+        """
+        Creates the archived tables (columns and indexes, no foreign keys) in the
+        archive file if they are not there yet.
+        """
+        archive_path.parent.mkdir(parents=True, exist_ok=True)
+        metadata = MetaData()
+        for table_name in ARCHIVE_TABLES:
+            live_table = Base.metadata.tables[table_name]
+            archive_table = Table(
+                table_name,
+                metadata,
+                *[
+                    Column(
+                        column.name,
+                        column.type,
+                        primary_key=column.primary_key,
+                        nullable=column.nullable,
+                        autoincrement=False,
+                    )
+                    for column in live_table.columns
+                ],
+            )
+            for index in live_table.indexes:
+                Index(
+                    index.name,
+                    *[archive_table.c[column.name] for column in index.columns],
+                )
+        engine = create_engine(f"sqlite:///{archive_path}")
+        try:
+            metadata.create_all(engine)
+        finally:
+            engine.dispose()
+
+    def _move_rows(
+        self, engine, archive_path: Path, start: date, end: date
+    ) -> Dict[str, int]:
+        """
+        Attaches the archive to a live connection and, in one IMMEDIATE
+        transaction, picks the year's closed rows, copies them and deletes them
+        from the live tables. Runs on the DBAPI connection: ATTACH is not allowed
+        inside a transaction.
+        """
+        params = {"start": start.isoformat(), "end": end.isoformat()}
+        raw_connection = engine.raw_connection()
+        dbapi_connection = raw_connection.driver_connection
+        isolation_level = dbapi_connection.isolation_level
+        dbapi_connection.isolation_level = None
+        try:
+            dbapi_connection.execute(
+                "ATTACH DATABASE ? AS archive", (str(archive_path),)
+            )
+            try:
+                dbapi_connection.execute("BEGIN IMMEDIATE")
+                try:
+                    self._select_rows(dbapi_connection, params)
+                    for table_name in ARCHIVE_TABLES:
+                        columns = self._shared_columns(dbapi_connection, table_name)
+                        dbapi_connection.execute(
+                            f"INSERT OR IGNORE INTO archive.{table_name} ({columns}) "
+                            f"SELECT {columns} FROM main.{table_name} AS t "
+                            f"WHERE {_ROWS_TO_MOVE[table_name]}",
+                            params,
+                        )
+                    for link_table in ("invoice_payment_links", "billing_run_invoices"):
+                        dbapi_connection.execute(
+                            f"DELETE FROM main.{link_table} WHERE invoice_id IN "
+                            "(SELECT invoice_id FROM temp._archive_invoices)"
+                        )
+                    moved = {}
+                    for table_name in _DELETE_ORDER:
+                        moved[table_name] = dbapi_connection.execute(
+                            f"DELETE FROM main.{table_name} AS t "
+                            f"WHERE {_ROWS_TO_MOVE[table_name]}",
+                            params,
+                        ).rowcount
+                    dbapi_connection.execute("COMMIT")
+                except Exception:
+                    dbapi_connection.execute("ROLLBACK")
+                    raise
+                finally:
+                    for temp_table in (
+                        "_archive_invoices",
+                        "_archive_transactions",
+                        "_archive_payments",
+                    ):
+                        dbapi_connection.execute(f"DROP TABLE IF EXISTS temp.{temp_table}")
+            finally:
+                dbapi_connection.execute("DETACH DATABASE archive")
+        finally:
+            dbapi_connection.isolation_level = isolation_level
+            raw_connection.close()
+        return moved
+
+    @staticmethod
+    def _select_rows(dbapi_connection, params: Dict[str, str]) -> None:
+        """Fills the _archive_* temp tables with the IDs of the year's closed rows."""
+        dbapi_connection.execute(
+            "CREATE TEMP TABLE _archive_invoices (invoice_id INTEGER PRIMARY KEY)"
+        )
+        dbapi_connection.execute(
+            "INSERT INTO temp._archive_invoices "
+            "SELECT i.invoice_id FROM main.invoices AS i "
+            "WHERE i.invoice_date >= :start AND i.invoice_date < :end "
+            "AND i.balance_due <= 0 "
+            "AND NOT EXISTS (SELECT 1 FROM main.owner_payments AS p "
+            "  WHERE p.invoice_id = i.invoice_id "
+            "  AND (p.payment_date < :start OR p.payment_date >= :end)) "
+            "AND NOT EXISTS (SELECT 1 FROM main.transactions AS c "
+            "  WHERE c.invoice_id = i.invoice_id "
+            "  AND (c.transaction_date < :start OR c.transaction_date >= :end))",
+            params,
+        )
+        dbapi_connection.execute(
+            "CREATE TEMP TABLE _archive_transactions (transaction_id INTEGER PRIMARY KEY)"
+        )
+        dbapi_connection.execute(
+            "INSERT INTO temp._archive_transactions "
+            "SELECT c.transaction_id FROM main.transactions AS c "
+            "WHERE c.transaction_date >= :start AND c.transaction_date < :end "
+            "AND c.status != 'ACTIVE' "
+            "AND (c.invoice_id IS NULL "
+            "  OR c.invoice_id IN (SELECT invoice_id FROM temp._archive_invoices)) "
+            "AND NOT EXISTS (SELECT 1 FROM main.transaction_allocations AS a "
+            "  WHERE a.transaction_id = c.transaction_id "
+            "  AND a.invoice_id NOT IN (SELECT invoice_id FROM temp._archive_invoices))",
+            params,
+        )
+        dbapi_connection.execute(
+            "CREATE TEMP TABLE _archive_payments (payment_id INTEGER PRIMARY KEY)"
+        )
+        dbapi_connection.execute(
+            "INSERT INTO temp._archive_payments "
+            "SELECT p.payment_id FROM main.owner_payments AS p "
+            "WHERE p.payment_date >= :start AND p.payment_date < :end "
+            "AND (p.invoice_id IS NULL "
+            "  OR p.invoice_id IN (SELECT invoice_id FROM temp._archive_invoices))",
+            params,
+        )
+
+    @staticmethod
+    def _shared_columns(dbapi_connection, table_name: str) -> str:
+        """Columns present in both the live and the archived table, comma-separated."""
+        archived = {
+            row[1]
+            for row in dbapi_connection.execute(
+                f"PRAGMA archive.table_info({table_name})"
+            )
+        }
+        return ", ".join(
+            row[1]
+            for row in dbapi_connection.execute(f"PRAGMA main.table_info({table_name})")
+            if row[1] in archived
+        )
@@ -0,0 +1,213 @@
+# services/usage_rollup.py
+"""
+EDSI Veterinary Management System - Charge Usage Rollups
+Version: 1.0.0
+Purpose: Keeps `ChargeUsageRollup` (charges and revenue per month, charge code
+         and administering user) in step with the `transactions` table. Every
+         path that adds, edits or deletes a charge calls `record` in its own
+         transaction, so a month's rollup rows always match its charges.
+         `rebuild_month` recomputes one month from the charges, including any
+         that were moved to that year's archive file. Methods take the caller's
+         session and never commit.
+Last Updated: October 16, 2026
+Author: Gemini
+
+Changelog:
+- v1.0.0 (2026-10-16):
+    - Initial creation with `record`, `rebuild_month`, `sync_category` and
+      `split_range`.
+"""
+
+import logging
+import sqlite3
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from config.database_config import db_manager
+from models import ChargeCode, ChargeUsageRollup, Transaction
+
+ZERO = Decimal("0.00")
+
+# (month_start, charge_code_id, administered_by_user_id)
+RollupKey = Tuple[date, int, str]
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def next_month(day: date) -> date:
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+class UsageRollup:
+    """Maintains and rebuilds the monthly charge usage rollups."""
+
+    def __init__(self):
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def record(
+        self, session: Session, transactions: Iterable[Transaction], sign: int = 1
+    ) -> None:
+        """
+        Adds (`sign=1`) or removes (`sign=-1`) `transactions` from their months'
+        rollups with one executemany upsert. To record an edit, remove the charge
+        before changing it and add it back afterwards. Rows left with no charges
+        are deleted.
+        """
+        totals: Dict[RollupKey, List] = defaultdict(lambda: [0, ZERO])
+        for transaction in transactions:
+            key = (
+                month_start(transaction.transaction_date),
+                transaction.charge_code_id,
+                transaction.administered_by_user_id or "",
+            )
+            totals[key][0] += sign
+            totals[key][1] += sign * (transaction.total_price or ZERO)
+        if not totals:
+            return
+
+        self._upsert(session, totals)
+        if sign < 0:
+            session.execute(
+                delete(ChargeUsageRollup).where(
+                    ChargeUsageRollup.month_start.in_({key[0] for key in totals}),
+                    ChargeUsageRollup.usage_count <= 0,
+                )
+            )
+
+    def rebuild_month(self, session: Session, month: date) -> int:
+        """
+        Recomputes every rollup row of `month` from its charges: the live ones
+        plus any in that year's archive file. Returns the number of rows written.
+        """
+        start, end = month_start(month), next_month(month)
+        totals: Dict[RollupKey, List] = defaultdict(lambda: [0, ZERO])
+        live = session.execute(
+            select(
+                Transaction.charge_code_id,
+                func.coalesce(Transaction.administered_by_user_id, ""),
+                func.count(Transaction.transaction_id),
+                func.sum(Transaction.total_price),
+            )
+            .where(
+                Transaction.transaction_date >= start,
+                Transaction.transaction_date < end,
+            )
+            .group_by(
+                Transaction.charge_code_id,
+                func.coalesce(Transaction.administered_by_user_id, ""),
+            )
+        )
+        archived = self._archived_usage(start, end)
+        for charge_code_id, user_id, count, revenue in [*live, *archived]:
+            key = (start, charge_code_id, user_id)
+            totals[key][0] += count
+            totals[key][1] += Decimal(str(revenue or 0)).quantize(ZERO)
+
+        session.execute(
+            delete(ChargeUsageRollup).where(ChargeUsageRollup.month_start == start)
+        )
+        self._upsert(session, totals)
+        self.logger.info(
+            f"Rebuilt {len(totals)} charge usage rollup row(s) for {start:%Y-%m}."
+        )
+        return len(totals)
+
+    @staticmethod
+    def sync_category(
+        session: Session, charge_code_id: int, category_id: Optional[int]
+    ) -> None:
+        """Moves a charge code's rollup rows to its new category."""
+        session.execute(
+            update(ChargeUsageRollup)
+            .where(ChargeUsageRollup.charge_code_id == charge_code_id)
+            .values(category_id=category_id)
+        )
+
+    @staticmethod
+    def split_range(
+        start: date, end: date
+    ) -> Tuple[Optional[Tuple[date, date]], List[Tuple[date, date]]]:
+        """
+        Splits the inclusive range into the whole months it covers, as (first
+        month, last month) or None, and the partial-month edges left over, as
+        inclusive (start, end) pairs to be read from the charges themselves.
+        """
+        first_month = start if start.day == 1 else next_month(start)
+        after_end = end + timedelta(days=1)
+        end_month = month_start(after_end)  # exclusive
+        if first_month >= end_month:
+            return None, [(start, end)] if start <= end else []
+        edges = []
+        if start < first_month:
+            edges.append((start, first_month - timedelta(days=1)))
+        if end_month < after_end:
+            edges.append((end_month, end))
+        last_month = month_start(end_month - timedelta(days=1))
+        return (first_month, last_month), edges
+
+    @staticmethod
+    def _upsert(session: Session, totals: Dict[RollupKey, List]) -> None:
+        """Adds `totals` onto the rollup rows, creating rows that do not exist."""
+        if not totals:
+            return
+        categories = dict(
+            session.execute(
+                select(ChargeCode.id, ChargeCode.category_id).where(
+                    ChargeCode.id.in_({key[1] for key in totals})
+                )
+            ).all()
+        )
+        statement = sqlite_insert(ChargeUsageRollup)
+        session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[
+                    ChargeUsageRollup.month_start,
+                    ChargeUsageRollup.charge_code_id,
+                    ChargeUsageRollup.administered_by_user_id,
+                ],
+                set_={
+                    "usage_count": ChargeUsageRollup.usage_count
+                    + statement.excluded.usage_count,
+                    "total_revenue": ChargeUsageRollup.total_revenue
+                    + statement.excluded.total_revenue,
+                    "category_id": statement.excluded.category_id,
+                },
+            ),
+            [
+                {
+                    "month_start": month,
+                    "charge_code_id": charge_code_id,
+                    "administered_by_user_id": user_id,
+                    "category_id": categories.get(charge_code_id),
+                    "usage_count": count,
+                    "total_revenue": revenue,
+                }
+                for (month, charge_code_id, user_id), (count, revenue) in totals.items()
+            ],
+        )
+
+    @staticmethod
+    def _archived_usage(start: date, end: date) -> List[Tuple]:
+        """Per charge code and user totals from the year's archive file, if any."""
+        path = db_manager().archive_path(start.year)
+        if path is None or not path.is_file():
+            return []
+        connection = sqlite3.connect(f"{path.as_uri()}?mode=ro", uri=True)
+        try:
+            return connection.execute(
+                "SELECT charge_code_id, COALESCE(administered_by_user_id, ''), "
+                "COUNT(transaction_id), SUM(total_price) FROM transactions "
+                "WHERE transaction_date >= ? AND transaction_date < ? "
+                "GROUP BY 1, 2",
+                (start.isoformat(), end.isoformat()),
+            ).fetchall()
+        finally:
+            connection.close()
@@ -1,13 +1,16 @@
 # views/admin/dialogs/add_edit_location_dialog.py
 """
 EDSI Veterinary Management System - Add/Edit Location Dialog
-Version: 1.1.7
+Version: 1.1.8
 Purpose: Dialog for creating and editing practice locations with detailed address fields,
          phone, email, contact person, and auto-populating country code.
-Last Updated: June 28, 2025
+Last Updated: October 16, 2026
 Author: Gemini
 
 Changelog:
+- v1.1.8 (2026-10-16):
+    - `_load_states_into_combobox` now reads through `db_manager().session_scope()`
+      instead of calling `db_manager().close()`, which disposed the shared engine.
 - v1.1.7 (2025-06-28):
     - **BUG FIX**: Corrected `db_manager.get_session()` to `db_manager().get_session()`
       in `_load_states_into_combobox` to correctly retrieve the `DatabaseManager`
@@ -339,20 +342,18 @@ class AddEditLocationDialog(QDialog):
         if not self.state_combo:
             return
         self.state_combo.addItem("", None)
-        session = None
         try:
             from config.database_config import db_manager
 
-            # CORRECTED: Call db_manager() to get the instance before calling .get_session()
-            session = db_manager().get_session()
-            states: List[StateProvinceModel] = (
-                session.query(StateProvinceModel)
-                .filter(StateProvinceModel.is_active == True)
-                .order_by(
-                    StateProvinceModel.country_code, StateProvinceModel.state_name
+            with db_manager().session_scope() as session:
+                states: List[StateProvinceModel] = (
+                    session.query(StateProvinceModel)
+                    .filter(StateProvinceModel.is_active == True)
+                    .order_by(
+                        StateProvinceModel.country_code, StateProvinceModel.state_name
+                    )
+                    .all()
                 )
-                .all()
-            )
             for state in states:
                 display_name = f"{state.state_name} ({state.state_code})"
                 self.state_combo.addItem(
@@ -368,10 +369,6 @@ class AddEditLocationDialog(QDialog):
             QMessageBox.warning(
                 self, "Data Load Error", "Could not load states for selection."
             )
-        finally:
-            if session:
-                # CORRECTED: Call db_manager().close() to close the session from the manager
-                db_manager().close()
 
     def _on_state_changed(self, index: int):
         if not self.state_combo or not self.country_code_input:
@@ -2,13 +2,18 @@
 
 """
 EDSI Veterinary Management System - Application Paths Tab
-Version: 1.0.4
+Version: 1.1.0
 Purpose: UI for configuring user-defined paths for the database, logs, invoices, statements, and accounting reports.
          Now receives ConfigManager via dependency injection.
-Last Updated: June 29, 2025
+Last Updated: October 16, 2026
 Author: Gemini
 
 Changelog:
+- v1.1.0 (2026-10-16):
+    - Added a 'Database Profile' selector (stored under ConfigManager's [Database]
+      section) and a read-only line showing the SQLite profile and pragmas that the
+      running engine actually applied. Profile changes take effect after restart,
+      like the paths.
 - v1.0.4 (2025-06-29):
     - Added UI elements (QLineEdit, QPushButton) for 'Accounting Reports Directory'.
     - Updated `_setup_ui` to include the new widgets in the form layout.
@@ -49,12 +54,18 @@ from PySide6.QtWidgets import (
     QLabel,
     QFileDialog,
     QMessageBox,
+    QComboBox,
     QApplication,
 )
 from PySide6.QtCore import Qt, Signal, QTimer, QCoreApplication
 from PySide6.QtGui import QFont, QPalette, QColor
 
 from config.app_config import AppConfig
+from config.database_config import (
+    db_manager,
+    SQLITE_PROFILES,
+    DEFAULT_SQLITE_PROFILE,
+)
 
 # Note: ConfigManager is imported via AppConfig for key definitions if needed,
 # but the instance is passed via dependency injection.
@@ -88,6 +99,8 @@ class ApplicationPathsTab(QWidget):
         self.invoices_dir_input: QLineEdit
         self.statements_dir_input: QLineEdit
         self.accounting_reports_dir_input: QLineEdit  # NEW: Accounting reports input
+        self.sqlite_profile_combo: QComboBox
+        self.sqlite_profile_status_label: QLabel
 
         self.save_button: QPushButton
         self.discard_button: QPushButton
@@ -104,11 +117,11 @@ class ApplicationPathsTab(QWidget):
     def _get_input_field_style(self) -> str:
         """Generates the standard style for input fields."""
         return (
-            f"QLineEdit {{ background-color: {AppConfig.DARK_INPUT_FIELD_BACKGROUND}; "
+            f"QLineEdit, QComboBox {{ background-color: {AppConfig.DARK_INPUT_FIELD_BACKGROUND}; "
             f"color: {AppConfig.DARK_TEXT_PRIMARY}; "
             f"border: 1px solid {AppConfig.DARK_BORDER}; border-radius: 4px; "
             f"padding: 6px 10px; font-size: 13px; min-height: 22px; }}"
-            f"QLineEdit:focus {{ border-color: {AppConfig.DARK_PRIMARY_ACTION}; }}"
+            f"QLineEdit:focus, QComboBox:focus {{ border-color: {AppConfig.DARK_PRIMARY_ACTION}; }}"
             f"QLineEdit:read-only {{ background-color: {AppConfig.DARK_HEADER_FOOTER}; "
             f"color: {AppConfig.DARK_TEXT_TERTIARY}; }}"
         )
@@ -209,6 +222,15 @@ class ApplicationPathsTab(QWidget):
             QLabel("Accounting Reports Directory:"), accounting_reports_h_layout
         )  # NEW
 
+        # SQLite performance profile (applied by DatabaseManager on connect)
+        self.sqlite_profile_combo = QComboBox()
+        self.sqlite_profile_combo.addItems(list(SQLITE_PROFILES.keys()))
+        form_layout.addRow(QLabel("Database Profile:"), self.sqlite_profile_combo)
+
+        self.sqlite_profile_status_label = QLabel()
+        self.sqlite_profile_status_label.setWordWrap(True)
+        form_layout.addRow(QLabel("Active Profile:"), self.sqlite_profile_status_label)
+
         main_layout.addLayout(form_layout)
 
         # Spacer to push buttons to the bottom if content is sparse
@@ -237,6 +259,11 @@ class ApplicationPathsTab(QWidget):
         for line_edit in self.findChildren(QLineEdit):
             line_edit.setStyleSheet(self._get_input_field_style())
             line_edit.setFont(QFont(AppConfig.DEFAULT_FONT_FAMILY, 10))
+        self.sqlite_profile_combo.setStyleSheet(self._get_input_field_style())
+        self.sqlite_profile_combo.setFont(QFont(AppConfig.DEFAULT_FONT_FAMILY, 10))
+        self.sqlite_profile_status_label.setStyleSheet(
+            f"color: {AppConfig.DARK_TEXT_SECONDARY};"
+        )
 
         # Buttons
         self.db_browse_btn.setStyleSheet(self._get_button_style("browse"))
@@ -279,6 +306,7 @@ class ApplicationPathsTab(QWidget):
         self.accounting_reports_dir_input.textChanged.connect(
             self._on_input_changed
         )  # NEW
+        self.sqlite_profile_combo.currentTextChanged.connect(self._on_input_changed)
 
         self.save_button.clicked.connect(self._save_paths)
         self.discard_button.clicked.connect(self._discard_changes)
@@ -305,6 +333,16 @@ class ApplicationPathsTab(QWidget):
             self._config_manager.get_path(ConfigManager.ACCOUNTING_REPORTS_DIR_KEY)
             or ""
         )
+        configured_profile = (
+            self._config_manager.get_setting(
+                ConfigManager.DATABASE_SECTION, ConfigManager.SQLITE_PROFILE_KEY
+            )
+            or DEFAULT_SQLITE_PROFILE
+        )
+        if configured_profile not in SQLITE_PROFILES:
+            configured_profile = DEFAULT_SQLITE_PROFILE
+        self.sqlite_profile_combo.setCurrentText(configured_profile)
+        self._update_sqlite_profile_status()
 
         # Store these as initial paths to check for changes
         self._initial_paths = self._get_current_input_paths()
@@ -322,8 +360,27 @@ class ApplicationPathsTab(QWidget):
             ConfigManager.INVOICES_DIR_KEY: self.invoices_dir_input.text().strip(),
             ConfigManager.STATEMENTS_DIR_KEY: self.statements_dir_input.text().strip(),
             ConfigManager.ACCOUNTING_REPORTS_DIR_KEY: self.accounting_reports_dir_input.text().strip(),  # NEW
+            ConfigManager.SQLITE_PROFILE_KEY: self.sqlite_profile_combo.currentText(),
         }
 
+    def _update_sqlite_profile_status(self):
+        """Shows the profile and key pragmas the running database engine applied."""
+        try:
+            status = db_manager().get_sqlite_pragma_status()
+        except Exception as e:
+            self.logger.warning(f"Could not read SQLite pragma status: {e}")
+            status = {}
+
+        if not status:
+            self.sqlite_profile_status_label.setText("Not available")
+            return
+        self.sqlite_profile_status_label.setText(
+            f"{status['profile']} (journal_mode={status['journal_mode']}, "
+            f"synchronous={status['synchronous']}, cache_size={status['cache_size']}, "
+            f"mmap_size={status['mmap_size']}, temp_store={status['temp_store']}, "
+            f"foreign_keys={status['foreign_keys']}, busy_timeout={status['busy_timeout']})"
+        )
+
     def _on_input_changed(self):
         """Slot to mark that there are unsaved changes."""
         if self._suppress_data_changed_signal:
@@ -422,6 +479,11 @@ class ApplicationPathsTab(QWidget):
                 ConfigManager.ACCOUNTING_REPORTS_DIR_KEY,
                 paths_to_save[ConfigManager.ACCOUNTING_REPORTS_DIR_KEY],
             )
+            self._config_manager.set_setting(
+                ConfigManager.DATABASE_SECTION,
+                ConfigManager.SQLITE_PROFILE_KEY,
+                paths_to_save[ConfigManager.SQLITE_PROFILE_KEY],
+            )
 
             self._initial_paths = paths_to_save
             self._has_unsaved_changes = False
@@ -1,14 +1,18 @@
 # views/admin/user_management_screen.py
 """
 EDSI Veterinary Management System - User Management Screen
-Version: 1.8.1
+Version: 1.8.2
 Purpose: Admin screen for managing users, locations, veterinarians, charge codes,
          categories, owners, company profile, configurable application paths,
          and now backup/restore operations, and Doctor Stripe Settings.
-Last Updated: June 25, 2025
+Last Updated: October 16, 2026
 Author: Gemini
 
 Changelog:
+- v1.8.2 (2026-10-16):
+    - The add/edit dialogs, the company profile dialog and the Stripe settings
+      dialog are imported inside the methods that open them. Opening the screen no
+      longer loads every dialog module up front.
 - v1.8.1 (2025-06-25):
     - Added 'Doctor Stripe Settings' button to the Company Profile tab.
     - Integrated `DoctorStripeSettingsDialog` to allow configuration of doctor's Stripe API keys.
@@ -78,19 +82,7 @@ from models import (
     Veterinarian,
 )
 
-# Import dialogs and other tabs
-from .dialogs.add_edit_user_dialog import AddEditUserDialog
-from .dialogs.add_edit_location_dialog import AddEditLocationDialog
-from .dialogs.add_edit_charge_code_dialog import AddEditChargeCodeDialog
-from .dialogs.add_edit_owner_dialog import AddEditOwnerDialog
-from .dialogs.add_edit_charge_code_category_dialog import (
-    AddEditChargeCodeCategoryDialog,
-)
-from .dialogs.add_edit_veterinarian_dialog import AddEditVeterinarianDialog
-from .dialogs.company_profile_dialog import CompanyProfileDialog
-from .dialogs.doctor_stripe_settings_dialog import (
-    DoctorStripeSettingsDialog,
-)  # NEW IMPORT
+# Dialogs are imported by the methods that open them, on first use.
 
 # Import custom tabs
 from .tabs.application_paths_tab import ApplicationPathsTab
@@ -682,6 +674,8 @@ class UserManagementScreen(BaseView):
         self.load_users_data()
 
     def _add_user(self):
+        from .dialogs.add_edit_user_dialog import AddEditUserDialog
+
         dialog = AddEditUserDialog(
             self,
             user_controller=self.user_controller,
@@ -693,6 +687,8 @@ class UserManagementScreen(BaseView):
             self.entity_updated.emit("user")
 
     def _edit_selected_user(self):
+        from .dialogs.add_edit_user_dialog import AddEditUserDialog
+
         if not self.users_table or not self.users_table.currentItem():
             self.show_info("Edit User", "Please select a user to edit.")
             return
@@ -899,6 +895,8 @@ class UserManagementScreen(BaseView):
         self.load_locations_data()
 
     def _add_location(self):
+        from .dialogs.add_edit_location_dialog import AddEditLocationDialog
+
         dialog = AddEditLocationDialog(
             self,
             controller=self.location_controller,
@@ -909,6 +907,8 @@ class UserManagementScreen(BaseView):
             self.entity_updated.emit("location")
 
     def _edit_selected_location(self):
+        from .dialogs.add_edit_location_dialog import AddEditLocationDialog
+
         if not self.locations_table or not self.locations_table.currentItem():
             self.show_info("Edit Location", "Please select a location to edit.")
             return
@@ -1095,6 +1095,8 @@ class UserManagementScreen(BaseView):
         self.load_veterinarians_data()
 
     def _add_veterinarian(self):
+        from .dialogs.add_edit_veterinarian_dialog import AddEditVeterinarianDialog
+
         dialog = AddEditVeterinarianDialog(
             parent_view=self,
             controller=self.veterinarian_controller,
@@ -1106,6 +1108,8 @@ class UserManagementScreen(BaseView):
             self.show_info("Success", "Veterinarian added successfully.")
 
     def _edit_selected_veterinarian(self):
+        from .dialogs.add_edit_veterinarian_dialog import AddEditVeterinarianDialog
+
         selected_rows = self.vets_table.selectionModel().selectedRows()
         if not selected_rows:
             self.show_info("Edit Veterinarian", "Please select a veterinarian to edit.")
@@ -1280,6 +1284,10 @@ class UserManagementScreen(BaseView):
         self.load_categories_processes_data()
 
     def _add_category_or_process(self, is_process: bool = False):
+        from .dialogs.add_edit_charge_code_category_dialog import (
+            AddEditChargeCodeCategoryDialog,
+        )
+
         selected_item = (
             self.categories_tree.currentItem() if self.categories_tree else None
         )
@@ -1311,6 +1319,10 @@ class UserManagementScreen(BaseView):
             self.entity_updated.emit("charge_code_category")
 
     def _edit_selected_category_process(self):
+        from .dialogs.add_edit_charge_code_category_dialog import (
+            AddEditChargeCodeCategoryDialog,
+        )
+
         if not self.categories_tree or not self.categories_tree.currentItem():
             self.show_info("Edit Item", "Please select a category or process to edit.")
             return
@@ -1543,6 +1555,8 @@ class UserManagementScreen(BaseView):
         self.load_charge_codes_data()
 
     def _add_charge_code(self):
+        from .dialogs.add_edit_charge_code_dialog import AddEditChargeCodeDialog
+
         dialog = AddEditChargeCodeDialog(
             self,
             controller=self.charge_code_controller,
@@ -1553,6 +1567,8 @@ class UserManagementScreen(BaseView):
             self.entity_updated.emit("charge_code")
 
     def _edit_selected_charge_code(self):
+        from .dialogs.add_edit_charge_code_dialog import AddEditChargeCodeDialog
+
         if not self.charge_codes_table or not self.charge_codes_table.currentItem():
             self.show_info("Edit Charge Code", "Please select a charge code to edit.")
             return
@@ -1772,6 +1788,8 @@ class UserManagementScreen(BaseView):
         self.load_owners_data()
 
     def _add_owner(self):
+        from .dialogs.add_edit_owner_dialog import AddEditOwnerDialog
+
         dialog = AddEditOwnerDialog(
             self,
             owner_controller=self.owner_controller,
@@ -1782,6 +1800,8 @@ class UserManagementScreen(BaseView):
             self.entity_updated.emit("owner")
 
     def _edit_selected_owner(self):
+        from .dialogs.add_edit_owner_dialog import AddEditOwnerDialog
+
         if not self.owners_table or not self.owners_table.currentItem():
             self.show_info("Edit Owner", "Please select an owner.")
             return
@@ -1933,12 +1953,16 @@ class UserManagementScreen(BaseView):
         return tab
 
     def _launch_company_profile_dialog(self):
+        from .dialogs.company_profile_dialog import CompanyProfileDialog
+
         dialog = CompanyProfileDialog(self, self.current_user_id)
         if dialog.exec() == QDialog.DialogCode.Accepted:
             self.entity_updated.emit("company_profile")
             self.show_info("Success", "Company profile has been updated.")
 
     def _launch_doctor_stripe_settings_dialog(self):  # NEW METHOD
+        from .dialogs.doctor_stripe_settings_dialog import DoctorStripeSettingsDialog
+
         dialog = DoctorStripeSettingsDialog(self, self.current_user_id)
         if dialog.exec() == QDialog.DialogCode.Accepted:
             self.entity_updated.emit("doctor_stripe_settings")
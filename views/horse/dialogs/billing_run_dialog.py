@@ -0,0 +1,327 @@
+# views/horse/dialogs/billing_run_dialog.py
+"""
+EDSI Veterinary Management System - Billing Run Dialog
+Version: 1.1.1
+Purpose: Starts or resumes a practice-wide month-end billing run and shows its
+         progress. The run itself executes on a QThread through
+         `BillingRunController.run_billing`, one committed chunk of owners at a
+         time, so the window stays responsive; Cancel stops the run after the
+         chunk in progress and leaves it resumable. After a completed run the
+         invoices' online payment links are created on a background thread.
+Last Updated: October 16, 2026
+Author: Gemini
+
+Changelog:
+- v1.1.1 (2026-10-16):
+    - The run's QThread is deleted once it finishes and `_thread` is cleared, so
+      each start or resume no longer leaves a finished thread behind.
+- v1.1.0 (2026-10-16):
+    - A completed run starts `BillingRunController.pregenerate_payment_links` on
+      a background thread when Stripe payments are enabled.
+- v1.0.0 (2026-10-16):
+    - Initial creation of the dialog and its `_BillingRunWorker`.
+"""
+import logging
+import threading
+from typing import Optional
+
+from PySide6.QtWidgets import (
+    QDialog,
+    QVBoxLayout,
+    QHBoxLayout,
+    QFormLayout,
+    QDateEdit,
+    QLabel,
+    QProgressBar,
+    QPushButton,
+    QMessageBox,
+)
+from PySide6.QtCore import Qt, QDate, QObject, QThread, Signal
+from PySide6.QtGui import QColor, QCloseEvent
+
+from controllers.billing_run_controller import BillingRunController
+from controllers.company_profile_controller import CompanyProfileController
+from config.app_config import AppConfig
+
+
+class _BillingRunWorker(QObject):
+    """Runs `BillingRunController.run_billing` on the thread it is moved to."""
+
+    progress = Signal(int, int, int)  # owners done, owners total, invoices created
+    finished = Signal(bool, str)
+
+    def __init__(
+        self,
+        controller: BillingRunController,
+        run_id: int,
+        current_user_id: str,
+    ):
+        super().__init__()
+        self.controller = controller
+        self.run_id = run_id
+        self.current_user_id = current_user_id
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def run(self):
+        success, message, _ = self.controller.run_billing(
+            self.run_id,
+            self.current_user_id,
+            progress_callback=self.progress.emit,
+            cancel_requested=self._cancel.is_set,
+        )
+        self.finished.emit(success, message)
+
+
+class BillingRunDialog(QDialog):
+    """Dialog for running month-end billing across all horses."""
+
+    billing_run_finished = Signal()
+
+    def __init__(self, current_user_id: str, parent=None):
+        super().__init__(parent)
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.current_user_id = current_user_id
+        self.controller = BillingRunController()
+        self.resumable_run = self.controller.get_resumable_run()
+
+        self._thread: Optional[QThread] = None
+        self._worker: Optional[_BillingRunWorker] = None
+        self._run_id: Optional[int] = None
+
+        self.setWindowTitle("Month-End Billing Run")
+        self.setMinimumWidth(480)
+
+        self._setup_ui()
+        self._apply_styles()
+        self._populate_form()
+
+        self.start_button.clicked.connect(self.start_run)
+        self.resume_button.clicked.connect(self.resume_run)
+        self.close_button.clicked.connect(self.close)
+
+    def _get_input_field_style(self) -> str:
+        return f"""
+            QDateEdit {{
+                background-color: {AppConfig.DARK_INPUT_FIELD_BACKGROUND};
+                color: {AppConfig.DARK_TEXT_PRIMARY};
+                border: 1px solid {AppConfig.DARK_BORDER};
+                border-radius: 4px;
+                padding: 5px;
+            }}
+            QDateEdit:focus {{
+                border: 1px solid {AppConfig.DARK_PRIMARY_ACTION};
+            }}
+        """
+
+    def _setup_ui(self):
+        layout = QVBoxLayout(self)
+        self.form_layout = QFormLayout()
+        self.form_layout.setLabelAlignment(Qt.AlignmentFlag.AlignRight)
+
+        self.start_date_input = QDateEdit()
+        self.end_date_input = QDateEdit()
+        self.form_layout.addRow("Charges From*:", self.start_date_input)
+        self.form_layout.addRow("Charges To*:", self.end_date_input)
+
+        self.resume_label = QLabel()
+        self.resume_label.setWordWrap(True)
+        self.progress_bar = QProgressBar()
+        self.status_label = QLabel("Invoices every unbilled charge in the period.")
+        self.status_label.setWordWrap(True)
+
+        button_layout = QHBoxLayout()
+        self.start_button = QPushButton("Start Run")
+        self.resume_button = QPushButton("Resume Run")
+        self.close_button = QPushButton("Close")
+        button_layout.addStretch()
+        button_layout.addWidget(self.resume_button)
+        button_layout.addWidget(self.start_button)
+        button_layout.addWidget(self.close_button)
+
+        layout.addLayout(self.form_layout)
+        layout.addWidget(self.resume_label)
+        layout.addWidget(self.progress_bar)
+        layout.addWidget(self.status_label)
+        layout.addLayout(button_layout)
+
+    def _apply_styles(self):
+        self.setStyleSheet(
+            f"background-color: {AppConfig.DARK_WIDGET_BACKGROUND}; color: {AppConfig.DARK_TEXT_PRIMARY};"
+        )
+        input_style = self._get_input_field_style()
+        for widget in [self.start_date_input, self.end_date_input]:
+            widget.setStyleSheet(input_style)
+            widget.setCalendarPopup(True)
+            widget.setDisplayFormat("yyyy-MM-dd")
+
+        base_button_style = """
+            QPushButton {
+                border: 1px solid white;
+                border-radius: 4px;
+                padding: 8px 16px;
+                min-width: 110px;
+                font-weight: bold;
+            }
+            QPushButton:disabled { background-color: #adb5bd; color: #f8f9fa; }
+        """
+        for button, color in [
+            (self.start_button, AppConfig.DARK_SUCCESS_ACTION),
+            (self.resume_button, AppConfig.DARK_PRIMARY_ACTION),
+        ]:
+            button.setStyleSheet(
+                base_button_style
+                + f"""
+                QPushButton {{ background-color: {color}; color: white; }}
+                QPushButton:hover {{ background-color: {QColor(color).lighter(115).name()}; }}
+                """
+            )
+        self.close_button.setStyleSheet(
+            base_button_style
+            + f"""
+            QPushButton {{ background-color: {AppConfig.DARK_BUTTON_BG}; color: {AppConfig.DARK_TEXT_PRIMARY}; }}
+            QPushButton:hover {{ background-color: {AppConfig.DARK_BUTTON_HOVER}; }}
+            """
+        )
+        self.resume_label.setStyleSheet(f"color: {AppConfig.DARK_WARNING_ACTION};")
+
+    def _populate_form(self):
+        today = QDate.currentDate()
+        self.start_date_input.setDate(QDate(today.year(), today.month(), 1))
+        self.end_date_input.setDate(today)
+        self.progress_bar.setRange(0, 1)
+        self.progress_bar.setValue(0)
+
+        run = self.resumable_run
+        self.resume_button.setVisible(run is not None)
+        self.resume_label.setVisible(run is not None)
+        if run:
+            self.resume_button.setText(f"Resume Run #{run.run_id}")
+            self.resume_label.setText(
+                f"Run #{run.run_id} ({run.period_start} to {run.period_end}) is "
+                f"{run.status.replace('_', ' ').lower()}: {run.owners_done} of "
+                f"{run.owners_total} owner(s) billed. Resume it to finish billing."
+            )
+            self.start_button.setEnabled(False)
+            self._show_progress(run.owners_done, run.owners_total, run.invoices_created)
+
+    def _show_progress(self, owners_done: int, owners_total: int, invoices: int):
+        self.progress_bar.setRange(0, max(owners_total, 1))
+        self.progress_bar.setValue(owners_done)
+        self.status_label.setText(
+            f"{owners_done} of {owners_total} owner(s) billed, {invoices} invoice(s) created."
+        )
+
+    def start_run(self):
+        period_start = self.start_date_input.date().toPython()
+        period_end = self.end_date_input.date().toPython()
+        confirm = QMessageBox.question(
+            self,
+            "Confirm Billing Run",
+            f"Invoice every unbilled charge dated {period_start} to {period_end} "
+            f"for all horses?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+        )
+        if confirm != QMessageBox.StandardButton.Yes:
+            return
+
+        success, message, run = self.controller.start_billing_run(
+            period_start, period_end, self.current_user_id
+        )
+        if not success:
+            QMessageBox.warning(self, "Billing Run", message)
+            return
+        self._show_progress(0, run.owners_total, 0)
+        self._launch(run.run_id)
+
+    def resume_run(self):
+        if self.resumable_run:
+            self.resume_label.setVisible(False)
+            self._launch(self.resumable_run.run_id)
+
+    def _launch(self, run_id: int):
+        """Runs the billing run on a worker thread."""
+        self.start_button.setEnabled(False)
+        self.resume_button.setEnabled(False)
+        self.start_date_input.setEnabled(False)
+        self.end_date_input.setEnabled(False)
+        self.close_button.setText("Cancel Run")
+        self._run_id = run_id
+
+        self._thread = QThread(self)
+        self._worker = _BillingRunWorker(self.controller, run_id, self.current_user_id)
+        self._worker.moveToThread(self._thread)
+        self._thread.started.connect(self._worker.run)
+        self._worker.progress.connect(self._show_progress)
+        self._worker.finished.connect(self._on_run_finished)
+        self._worker.finished.connect(self._thread.quit)
+        self._thread.finished.connect(self._worker.deleteLater)
+        self._thread.finished.connect(self._thread.deleteLater)
+        self._thread.start()
+
+    def _is_running(self) -> bool:
+        return self._thread is not None and self._thread.isRunning()
+
+    def _on_run_finished(self, success: bool, message: str):
+        self.logger.info(f"Billing run finished (success={success}): {message}")
+        self._worker = None
+        self._thread = None
+        self.close_button.setText("Close")
+        self.status_label.setText(message)
+        self.billing_run_finished.emit()
+        if success:
+            self._start_payment_link_pregeneration(self._run_id)
+            QMessageBox.information(self, "Billing Run Complete", message)
+        else:
+            QMessageBox.warning(self, "Billing Run Stopped", message)
+        self.resumable_run = self.controller.get_resumable_run()
+        self.resume_button.setEnabled(True)
+        self.start_date_input.setEnabled(True)
+        self.end_date_input.setEnabled(True)
+        self.start_button.setEnabled(self.resumable_run is None)
+        self.resume_button.setVisible(self.resumable_run is not None)
+        if self.resumable_run:
+            self.resume_button.setText(f"Resume Run #{self.resumable_run.run_id}")
+
+    def _start_payment_link_pregeneration(self, run_id: int):
+        """
+        Creates the run's online payment links on a background thread when Stripe
+        payments are enabled. It outlives the dialog; nothing waits for it.
+        """
+        company_profile = CompanyProfileController().get_company_profile()
+        secret_key = AppConfig.DOCTOR_STRIPE_SECRET_KEY
+        if (
+            not company_profile
+            or not company_profile.use_stripe_payments
+            or not secret_key
+            or secret_key == "sk_test_YOUR_DOCTOR_SECRET_KEY"
+        ):
+            return
+        threading.Thread(
+            target=self.controller.pregenerate_payment_links,
+            args=(run_id, secret_key, self.current_user_id),
+            name="PaymentLinkPregeneration",
+            daemon=True,
+        ).start()
+
+    def closeEvent(self, event: QCloseEvent):
+        if self._is_running():
+            # Stop after the chunk being committed; the dialog closes once the
+            # worker reports back.
+            if self._worker:
+                self._worker.cancel()
+            self.status_label.setText("Cancelling after the current chunk...")
+            self.close_button.setEnabled(False)
+            self._thread.finished.connect(self.close)
+            event.ignore()
+            return
+        super().closeEvent(event)
+
+    def reject(self):
+        # Escape while running cancels the run instead of abandoning the worker
+        if self._is_running():
+            self.close()
+            return
+        super().reject()
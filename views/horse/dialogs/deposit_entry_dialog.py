@@ -0,0 +1,353 @@
+# views/horse/dialogs/deposit_entry_dialog.py
+"""
+EDSI Veterinary Management System - Deposit Entry Dialog
+Version: 1.0.0
+Purpose: Posts a bank deposit: one line per check (invoice, amount, method,
+         check #) under a shared deposit date and deposit reference. All lines
+         are sent to `FinancialController.record_payments_batch`, which validates
+         every line before recording anything and then commits them together, so
+         the screen refreshes once per deposit instead of once per check.
+Last Updated: October 16, 2026
+Author: Gemini
+
+Changelog:
+- v1.0.0 (2026-10-16):
+    - Initial creation of the dialog.
+"""
+import logging
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional
+
+from PySide6.QtWidgets import (
+    QDialog,
+    QVBoxLayout,
+    QHBoxLayout,
+    QFormLayout,
+    QDateEdit,
+    QLineEdit,
+    QLabel,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QHeaderView,
+    QAbstractItemView,
+    QComboBox,
+    QCompleter,
+    QMessageBox,
+)
+from PySide6.QtCore import Qt, QDate, Signal
+from PySide6.QtGui import QColor
+
+from models import Invoice
+from controllers import FinancialController
+from config.app_config import AppConfig
+
+
+class DepositEntryDialog(QDialog):
+    """Dialog for recording all the checks of one bank deposit at once."""
+
+    PAYMENT_METHODS = ["Check", "Credit Card", "Cash", "Wire Transfer", "Other"]
+    COLUMNS = ["Invoice #", "Billed To", "Balance Due", "Amount", "Method", "Check #"]
+
+    deposit_recorded = Signal()
+
+    def __init__(
+        self,
+        financial_controller: FinancialController,
+        current_user_id: str,
+        parent=None,
+    ):
+        super().__init__(parent)
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.financial_controller = financial_controller
+        self.current_user_id = current_user_id
+
+        # display_invoice_id -> open invoice, loaded once for every line
+        self.open_invoices: Dict[str, Invoice] = {
+            invoice.display_invoice_id: invoice
+            for invoice in self.financial_controller.get_open_invoices()
+        }
+
+        self.setWindowTitle("Deposit Entry")
+        self.setMinimumSize(860, 520)
+
+        self._setup_ui()
+        self._apply_styles()
+        self._populate_form()
+
+        self.add_line_button.clicked.connect(self.add_line)
+        self.remove_line_button.clicked.connect(self.remove_selected_lines)
+        self.post_button.clicked.connect(self.post_deposit)
+        self.cancel_button.clicked.connect(self.reject)
+        self.lines_table.itemChanged.connect(self._on_line_changed)
+
+    def _get_input_field_style(self) -> str:
+        return f"""
+            QLineEdit, QDateEdit, QComboBox {{
+                background-color: {AppConfig.DARK_INPUT_FIELD_BACKGROUND};
+                color: {AppConfig.DARK_TEXT_PRIMARY};
+                border: 1px solid {AppConfig.DARK_BORDER};
+                border-radius: 4px;
+                padding: 5px;
+            }}
+            QLineEdit:focus, QDateEdit:focus, QComboBox:focus {{
+                border: 1px solid {AppConfig.DARK_PRIMARY_ACTION};
+            }}
+        """
+
+    def _setup_ui(self):
+        layout = QVBoxLayout(self)
+        self.form_layout = QFormLayout()
+        self.form_layout.setLabelAlignment(Qt.AlignmentFlag.AlignRight)
+
+        self.date_input = QDateEdit()
+        self.deposit_reference_input = QLineEdit()
+        self.deposit_reference_input.setPlaceholderText("Deposit slip #")
+        self.form_layout.addRow("Deposit Date*:", self.date_input)
+        self.form_layout.addRow("Deposit Reference:", self.deposit_reference_input)
+
+        self.lines_table = QTableWidget(0, len(self.COLUMNS))
+        self.lines_table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.lines_table.verticalHeader().setVisible(True)
+        self.lines_table.setSelectionBehavior(
+            QAbstractItemView.SelectionBehavior.SelectRows
+        )
+        self.lines_table.horizontalHeader().setSectionResizeMode(
+            1, QHeaderView.ResizeMode.Stretch
+        )
+
+        self.total_label = QLabel()
+
+        line_button_layout = QHBoxLayout()
+        self.add_line_button = QPushButton("Add Line")
+        self.remove_line_button = QPushButton("Remove Line(s)")
+        line_button_layout.addWidget(self.add_line_button)
+        line_button_layout.addWidget(self.remove_line_button)
+        line_button_layout.addStretch()
+        line_button_layout.addWidget(self.total_label)
+
+        button_layout = QHBoxLayout()
+        self.post_button = QPushButton("Post Deposit")
+        self.cancel_button = QPushButton("Cancel")
+        button_layout.addStretch()
+        button_layout.addWidget(self.post_button)
+        button_layout.addWidget(self.cancel_button)
+
+        layout.addLayout(self.form_layout)
+        layout.addWidget(self.lines_table)
+        layout.addLayout(line_button_layout)
+        layout.addLayout(button_layout)
+
+    def _apply_styles(self):
+        self.setStyleSheet(
+            f"background-color: {AppConfig.DARK_WIDGET_BACKGROUND}; color: {AppConfig.DARK_TEXT_PRIMARY};"
+        )
+        input_style = self._get_input_field_style()
+        for widget in [self.date_input, self.deposit_reference_input]:
+            widget.setStyleSheet(input_style)
+        self.date_input.setCalendarPopup(True)
+        self.date_input.setDisplayFormat("yyyy-MM-dd")
+
+        self.lines_table.setStyleSheet(
+            f"""
+            QTableWidget {{
+                gridline-color: {AppConfig.DARK_BORDER};
+                background-color: {AppConfig.DARK_INPUT_FIELD_BACKGROUND};
+                border-radius: 4px;
+            }}
+            QHeaderView::section {{
+                background-color: {AppConfig.DARK_HEADER_FOOTER};
+                color: {AppConfig.DARK_TEXT_SECONDARY};
+                padding: 5px; border: none;
+                border-bottom: 1px solid {AppConfig.DARK_BORDER};
+            }}
+            """
+        )
+        self.total_label.setStyleSheet("font-weight: bold;")
+
+        base_button_style = """
+            QPushButton {
+                border: 1px solid white;
+                border-radius: 4px;
+                padding: 8px 16px;
+                min-width: 110px;
+                font-weight: bold;
+            }
+        """
+        self.post_button.setStyleSheet(
+            base_button_style
+            + f"""
+            QPushButton {{ background-color: {AppConfig.DARK_SUCCESS_ACTION}; color: white; }}
+            QPushButton:hover {{ background-color: {QColor(AppConfig.DARK_SUCCESS_ACTION).lighter(115).name()}; }}
+            """
+        )
+        for button in [
+            self.add_line_button,
+            self.remove_line_button,
+            self.cancel_button,
+        ]:
+            button.setStyleSheet(
+                base_button_style
+                + f"""
+                QPushButton {{ background-color: {AppConfig.DARK_BUTTON_BG}; color: {AppConfig.DARK_TEXT_PRIMARY}; }}
+                QPushButton:hover {{ background-color: {AppConfig.DARK_BUTTON_HOVER}; }}
+                """
+            )
+
+    def _populate_form(self):
+        self.date_input.setDate(QDate.currentDate())
+        self.invoice_completer = QCompleter(list(self.open_invoices), self)
+        self.invoice_completer.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.invoice_completer.setFilterMode(Qt.MatchFlag.MatchContains)
+        self.add_line()
+
+    def add_line(self):
+        row = self.lines_table.rowCount()
+        self.lines_table.blockSignals(True)
+        self.lines_table.insertRow(row)
+
+        invoice_input = QLineEdit()
+        invoice_input.setCompleter(self.invoice_completer)
+        invoice_input.setPlaceholderText("e.g. WC001-2610-0001")
+        invoice_input.editingFinished.connect(
+            lambda widget=invoice_input: self._on_invoice_entered(widget)
+        )
+        self.lines_table.setCellWidget(row, 0, invoice_input)
+
+        for column in (1, 2):
+            item = QTableWidgetItem("")
+            item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
+            self.lines_table.setItem(row, column, item)
+        self.lines_table.setItem(row, 3, QTableWidgetItem(""))
+
+        method_combo = QComboBox()
+        method_combo.addItems(self.PAYMENT_METHODS)
+        self.lines_table.setCellWidget(row, 4, method_combo)
+        self.lines_table.setItem(row, 5, QTableWidgetItem(""))
+        self.lines_table.blockSignals(False)
+
+        invoice_input.setFocus()
+        self._update_total()
+
+    def remove_selected_lines(self):
+        rows = sorted(
+            {index.row() for index in self.lines_table.selectedIndexes()}, reverse=True
+        )
+        for row in rows:
+            self.lines_table.removeRow(row)
+        self._update_total()
+
+    def _row_of_widget(self, widget) -> int:
+        for row in range(self.lines_table.rowCount()):
+            if self.lines_table.cellWidget(row, 0) is widget:
+                return row
+        return -1
+
+    def _on_invoice_entered(self, invoice_input: QLineEdit):
+        row = self._row_of_widget(invoice_input)
+        if row < 0:
+            return
+        invoice = self.open_invoices.get(invoice_input.text().strip())
+        self.lines_table.blockSignals(True)
+        if invoice:
+            owner = invoice.owner
+            billed_to = (
+                (owner.farm_name or f"{owner.first_name} {owner.last_name}")
+                if owner
+                else "N/A"
+            )
+            self.lines_table.item(row, 1).setText(billed_to)
+            self.lines_table.item(row, 2).setText(f"${invoice.balance_due:.2f}")
+            if not self.lines_table.item(row, 3).text().strip():
+                self.lines_table.item(row, 3).setText(f"{invoice.balance_due:.2f}")
+        else:
+            self.lines_table.item(row, 1).setText("Unknown or fully paid invoice")
+            self.lines_table.item(row, 2).setText("")
+        self.lines_table.blockSignals(False)
+        self._update_total()
+
+    def _on_line_changed(self, item: QTableWidgetItem):
+        if item.column() == 3:
+            self._update_total()
+
+    @staticmethod
+    def _parse_amount(text: str) -> Optional[Decimal]:
+        try:
+            return Decimal(text.replace("$", "").replace(",", "").strip()).quantize(
+                Decimal("0.01")
+            )
+        except (InvalidOperation, ValueError):
+            return None
+
+    def _update_total(self):
+        total = Decimal("0.00")
+        for row in range(self.lines_table.rowCount()):
+            item = self.lines_table.item(row, 3)
+            amount = self._parse_amount(item.text()) if item else None
+            if amount:
+                total += amount
+        self.total_label.setText(
+            f"{self.lines_table.rowCount()} line(s), deposit total ${total:.2f}"
+        )
+
+    def _remove_blank_lines(self):
+        for row in reversed(range(self.lines_table.rowCount())):
+            if (
+                not self.lines_table.cellWidget(row, 0).text().strip()
+                and not self.lines_table.item(row, 3).text().strip()
+            ):
+                self.lines_table.removeRow(row)
+        self._update_total()
+
+    def get_payments(self) -> List[Dict[str, Any]]:
+        """One `record_payments_batch` entry per line, in table order."""
+        deposit_date = self.date_input.date().toPython()
+        deposit_reference = self.deposit_reference_input.text().strip()
+        payments = []
+        for row in range(self.lines_table.rowCount()):
+            invoice_text = self.lines_table.cellWidget(row, 0).text().strip()
+            amount_text = self.lines_table.item(row, 3).text().strip()
+            invoice = self.open_invoices.get(invoice_text)
+            check_number = self.lines_table.item(row, 5).text().strip()
+            payments.append(
+                {
+                    "invoice_id": invoice.invoice_id if invoice else None,
+                    "amount": self._parse_amount(amount_text),
+                    "payment_date": deposit_date,
+                    "payment_method": self.lines_table.cellWidget(row, 4).currentText(),
+                    "reference_number": check_number or None,
+                    "notes": (
+                        f"Deposit {deposit_reference}" if deposit_reference else None
+                    ),
+                }
+            )
+        return payments
+
+    def post_deposit(self):
+        # Line numbers in validation errors match the table's row numbers
+        self._remove_blank_lines()
+        payments = self.get_payments()
+        if not payments:
+            QMessageBox.warning(
+                self, "Validation Error", "Enter at least one payment line."
+            )
+            return
+
+        success, message, errors = self.financial_controller.record_payments_batch(
+            payments, self.current_user_id
+        )
+        if not success:
+            details = "\n".join(errors[:20])
+            if len(errors) > 20:
+                details += f"\n... and {len(errors) - 20} more."
+            QMessageBox.warning(
+                self,
+                "Deposit Not Posted",
+                f"{message}\n\n{details}" if details else message,
+            )
+            return
+
+        self.logger.info(f"Deposit posted by {self.current_user_id}: {message}")
+        QMessageBox.information(self, "Deposit Posted", message)
+        self.deposit_recorded.emit()
+        self.accept()
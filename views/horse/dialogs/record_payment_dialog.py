@@ -1,12 +1,19 @@
 # views/horse/dialogs/record_payment_dialog.py
 """
 EDSI Veterinary Management System - Record Payment Dialog
-Version: 1.0.1
+Version: 1.1.0
 Purpose: Dialog for recording a payment against a specific invoice.
-Last Updated: June 14, 2025
+Last Updated: October 16, 2026
 Author: Gemini
 
 Changelog:
+- v1.1.0 (2026-10-16):
+    - Added "Apply to the owner's oldest open invoices". When checked, the
+      amount may exceed this invoice's balance. It is recorded through
+      `FinancialController.allocate_owner_payment`, oldest invoice first, and any
+      remainder is held as credit.
+    - The amount is converted from the spin box through `str` and rounded to
+      cents, so no binary float residue reaches the ledger.
 - v1.0.1 (2025-06-14):
     - Styled the 'Record Payment' and 'Cancel' buttons to conform to the
       application's style guide.
@@ -29,6 +36,7 @@ from PySide6.QtWidgets import (
     QComboBox,
     QTextEdit,
     QLabel,
+    QCheckBox,
 )
 from PySide6.QtCore import Qt, QDate
 from PySide6.QtGui import QPalette, QColor, QFont
@@ -98,6 +106,9 @@ class RecordPaymentDialog(QDialog):
         self.method_combo = QComboBox()
         self.reference_input = QLineEdit()
         self.notes_edit = QTextEdit()
+        self.allocate_checkbox = QCheckBox(
+            "Apply to the owner's oldest open invoices (remainder held as credit)"
+        )
 
         self.form_layout.addRow("Owner:", self.owner_label)
         self.form_layout.addRow("Invoice #:", self.invoice_label)
@@ -107,6 +118,7 @@ class RecordPaymentDialog(QDialog):
         self.form_layout.addRow("Payment Method*:", self.method_combo)
         self.form_layout.addRow("Reference #:", self.reference_input)
         self.form_layout.addRow("Notes:", self.notes_edit)
+        self.form_layout.addRow("", self.allocate_checkbox)
 
         self.button_box = QDialogButtonBox(
             QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel
@@ -190,13 +202,13 @@ class RecordPaymentDialog(QDialog):
 
     def get_data(self) -> Optional[Dict[str, Any]]:
         """Collects data from the form fields."""
-        amount = Decimal(self.amount_input.value())
+        amount = Decimal(str(self.amount_input.value())).quantize(Decimal("0.01"))
         if amount <= 0:
             QMessageBox.warning(
                 self, "Validation Error", "Payment amount must be greater than zero."
             )
             return None
-        if amount > self.invoice.balance_due:
+        if amount > self.invoice.balance_due and not self.allocate_checkbox.isChecked():
             QMessageBox.warning(
                 self,
                 "Validation Error",
@@ -220,7 +232,12 @@ class RecordPaymentDialog(QDialog):
         if not payment_data:
             return
 
-        success, message = self.financial_controller.record_payment(payment_data)
+        if self.allocate_checkbox.isChecked():
+            success, message, _ = self.financial_controller.allocate_owner_payment(
+                self.invoice.owner_id, payment_data, self.current_user_id
+            )
+        else:
+            success, message = self.financial_controller.record_payment(payment_data)
 
         if success:
             QMessageBox.information(self, "Success", message)
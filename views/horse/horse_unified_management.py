@@ -1,12 +1,25 @@
 # views/horse/horse_unified_management.py
 """
 EDSI Veterinary Management System - Unified Horse Management Screen (Dark Theme)
-Version: 1.13.4
+Version: 1.16.0
 Purpose: Unified interface for horse management, including invoice history.
-Last Updated: July 17, 2025
+Last Updated: October 16, 2026
 Author: Gemini
 
 Changelog:
+- v1.16.0 (2026-10-16):
+    - Added the 🏦 header button. It opens `DepositEntryDialog` to post all the
+      checks of a bank deposit in one commit, then reloads the selected horse
+      once.
+- v1.15.0 (2026-10-16):
+    - Added the 🧾 header button, which opens the month-end `BillingRunDialog`.
+      When a run finishes, the selected horse is reloaded so its billing and
+      invoice tabs show the new invoices.
+- v1.14.0 (2026-10-16):
+    - Added `set_current_user` so the screen can be built while the login dialog
+      is still open (start-up warm-up) and bound to the user after login. It
+      updates the user menu button and the audit user cached by the owners and
+      location tabs.
 - v1.13.4 (2025-07-17):
     - **UI Enhancement**: Moved the search input field in the action bar to the
       left side, before the filter radio buttons, for improved user flow and
@@ -179,6 +192,19 @@ class HorseUnifiedManagement(BaseView):
             "HorseUnifiedManagement screen __init__ finished (initial data load deferred)."
         )
 
+    def set_current_user(self, current_user: str):
+        """
+        Binds a screen that was built before login to the user who logged in.
+        Updates everything that captured the user at construction time.
+        """
+        self.current_user = current_user
+        if self.user_menu_button:
+            self.user_menu_button.setText(f"👤 User: {self.current_user}")
+        for tab in (self.owners_tab, self.location_tab):
+            if tab is not None:
+                tab.current_user_login = self.current_user
+        self.logger.info(f"HorseUnifiedManagement bound to user: {current_user}")
+
     def setup_ui(self):
         self.logger.info("HorseUnifiedManagement.setup_ui: EXECUTION CONFIRMED.")
 
@@ -663,11 +689,17 @@ class HorseUnifiedManagement(BaseView):
         self.print_btn.setToolTip("Print Options")
         self.setup_icon_btn = QPushButton("⚙️")
         self.setup_icon_btn.setToolTip("System Setup")
+        self.billing_run_btn = QPushButton("🧾")
+        self.billing_run_btn.setToolTip("Month-End Billing Run")
+        self.deposit_btn = QPushButton("🏦")
+        self.deposit_btn.setToolTip("Deposit Entry")
         header_button_style = f"""QPushButton{{background-color:{DARK_BUTTON_BG};color:{DARK_TEXT_PRIMARY};border:1px solid {DARK_BORDER};border-radius:4px;padding:5px;font-size:14px;min-width:28px;max-width:28px;min-height:28px;max-height:28px;}} QPushButton:hover{{background-color:{DARK_BUTTON_HOVER};}} QPushButton:pressed{{background-color:{DARK_BUTTON_BG};}}"""
         for btn in [
             self.refresh_btn,
             self.help_btn,
             self.print_btn,
+            self.billing_run_btn,
+            self.deposit_btn,
             self.setup_icon_btn,
         ]:
             if btn:
@@ -689,6 +721,8 @@ class HorseUnifiedManagement(BaseView):
             self.refresh_btn,
             self.help_btn,
             self.print_btn,
+            self.billing_run_btn,
+            self.deposit_btn,
             self.setup_icon_btn,
             self.user_menu_button,
         ]:
@@ -1603,6 +1637,27 @@ class HorseUnifiedManagement(BaseView):
         self.update_status("Data refreshed.")
         self.logger.debug("refresh_data: FINISHED")
 
+    def open_billing_run_dialog(self):
+        from views.horse.dialogs.billing_run_dialog import BillingRunDialog
+
+        self.logger.info("Opening month-end billing run dialog.")
+        dialog = BillingRunDialog(self.current_user, self)
+        dialog.billing_run_finished.connect(self._on_billing_run_finished)
+        dialog.exec()
+
+    def _on_billing_run_finished(self):
+        self.logger.info("Billing run finished, refreshing the selected horse.")
+        if self.current_horse:
+            self.load_horse_details(self.current_horse.horse_id)
+
+    def open_deposit_entry_dialog(self):
+        from views.horse.dialogs.deposit_entry_dialog import DepositEntryDialog
+
+        self.logger.info("Opening deposit entry dialog.")
+        dialog = DepositEntryDialog(self.financial_controller, self.current_user, self)
+        dialog.deposit_recorded.connect(self._on_payment_recorded)
+        dialog.exec()
+
     def show_help(self):
         self.logger.debug("show_help: Displaying help message.")
         QMessageBox.information(
@@ -1703,6 +1758,10 @@ class HorseUnifiedManagement(BaseView):
             self.help_btn.clicked.connect(self.show_help)
         if hasattr(self, "setup_icon_btn") and self.setup_icon_btn:
             self.setup_icon_btn.clicked.connect(self.setup_requested.emit)
+        if hasattr(self, "billing_run_btn") and self.billing_run_btn:
+            self.billing_run_btn.clicked.connect(self.open_billing_run_dialog)
+        if hasattr(self, "deposit_btn") and self.deposit_btn:
+            self.deposit_btn.clicked.connect(self.open_deposit_entry_dialog)
         if hasattr(self, "active_only_radio") and self.active_only_radio:
             self.active_only_radio.toggled.connect(self.on_filter_changed)
         if hasattr(self, "all_horses_radio") and self.all_horses_radio:
@@ -1,12 +1,14 @@
 # views/horse/tabs/billing_tab.py
 """
 EDSI Veterinary Management System - Horse Billing Tab
-Version: 1.9.0
+Version: 1.9.1
 Purpose: UI for displaying and managing billing charges for a specific horse.
-Last Updated: June 9, 2025
+Last Updated: October 16, 2026
 Author: Gemini
 
 Changelog:
+- v1.9.1 (2026-10-16):
+    - The charge dialogs are imported when first opened rather than at module load.
 - v1.9.0 (2025-06-09):
     - Added invoice_created signal to notify parent views when an invoice
       has been successfully generated, allowing other UI components to refresh.
@@ -39,9 +41,6 @@ from PySide6.QtGui import QFont, QColor
 
 from models import Horse, Transaction
 from controllers import FinancialController
-from ..dialogs.add_charge_dialog import AddChargeDialog
-from ..dialogs.edit_charge_dialog import EditChargeDialog
-from ..dialogs.edit_all_charges_dialog import EditAllChargesDialog
 from config.app_config import AppConfig
 
 
@@ -327,6 +326,8 @@ class BillingTab(QWidget):
                 self.parent_view.show_error("Invoice Creation Failed", message)
 
     def _launch_add_charge_dialog(self):
+        from ..dialogs.add_charge_dialog import AddChargeDialog
+
         if not self.current_horse:
             return
         dialog = AddChargeDialog(self.current_horse, self.financial_controller, self)
@@ -337,6 +338,8 @@ class BillingTab(QWidget):
             self.load_transactions()
 
     def _launch_edit_all_charges_dialog(self):
+        from ..dialogs.edit_all_charges_dialog import EditAllChargesDialog
+
         if not self.current_horse or not self.transactions:
             return
         dialog = EditAllChargesDialog(
@@ -350,6 +353,8 @@ class BillingTab(QWidget):
 
     @Slot(int, int)
     def _edit_selected_charge(self, row=None, column=None):
+        from ..dialogs.edit_charge_dialog import EditChargeDialog
+
         selected_items = self.transactions_table.selectedItems()
         if not selected_items:
             return
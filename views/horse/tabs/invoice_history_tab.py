@@ -1,13 +1,40 @@
 # views/horse/tabs/invoice_history_tab.py
 """
 EDSI Veterinary Management System - Invoice History Tab
-Version: 2.9.0
+Version: 2.12.2
 Purpose: UI for displaying and managing historical invoices for a horse's owners.
          Now correctly implements 'Sync Payments' with all necessary imports.
-Last Updated: June 28, 2025
+Last Updated: October 16, 2026
 Author: Gemini
 
 Changelog:
+- v2.12.2 (2026-10-16):
+    - The payment sync thread is deleted once it finishes and `_sync_thread` is
+      cleared, so repeated syncs no longer leave finished QThreads behind as
+      children of the tab.
+- v2.12.1 (2026-10-16):
+    - `_on_invoice_selected` lists the invoice's `allocations` (its line items
+      since invoicing stopped copying charges).
+- v2.12.0 (2026-10-16):
+    - `load_invoices` loads the invoices of all the horse's owners with
+      `FinancialController.get_invoice_history_for_horse`: two queries with line
+      items prefetched, instead of one query per owner. `_on_invoice_selected`
+      shows line items from memory, so arrowing through the list runs no queries.
+- v2.11.0 (2026-10-16):
+    - `_get_payment_link_for_invoice` goes through
+      `FinancialController.get_or_create_payment_link`. Printing or emailing an
+      invoice reuses its stored link instead of asking the backend for a new one
+      each time.
+- v2.10.0 (2026-10-16):
+    - 'Sync Payments' no longer blocks the window. `_sync_payment_statuses` runs
+      `services.payment_status_sync.PaymentStatusSync` on a QThread
+      (`_PaymentSyncWorker`). It polls the backend over a pooled keep-alive
+      session with bounded concurrency and timeouts, and records all confirmed
+      payments in one transaction. The parent view is refreshed once at the end
+      instead of once per paid invoice.
+- v2.9.1 (2026-10-16):
+    - `InvoiceGenerator` (ReportLab) and `RecordPaymentDialog` are imported when
+      an invoice is first emailed/printed or a payment is recorded.
 - v2.9.0 (2025-06-28):
     - Modified `_get_payment_link_for_invoice` to check `CompanyProfile.use_stripe_payments`.
       If `False`, it will skip Stripe API calls and immediately return `None`, providing a user-configurable
@@ -76,7 +103,7 @@ import logging
 import os
 import webbrowser
 import urllib.parse
-from typing import Optional, List, Tuple
+from typing import Dict, Optional, List, Tuple
 from decimal import Decimal
 from datetime import datetime
 
@@ -95,14 +122,51 @@ from PySide6.QtWidgets import (
     QDialog,
     QApplication,
 )
-from PySide6.QtCore import Qt, Signal
+from PySide6.QtCore import Qt, Signal, QObject, QThread
 from PySide6.QtGui import QFont, QColor
 
 from models import Horse, Invoice, Transaction
 from controllers import FinancialController, CompanyProfileController
-from reports import InvoiceGenerator
 from config.app_config import AppConfig
-from ..dialogs.record_payment_dialog import RecordPaymentDialog
+
+
+class _PaymentSyncWorker(QObject):
+    """Runs `PaymentStatusSync.sync` on the thread it is moved to."""
+
+    progress = Signal(int, int)  # invoices checked, invoices total
+    finished = Signal(object)  # PaymentSyncResult
+
+    def __init__(
+        self,
+        financial_controller: FinancialController,
+        doctor_identifier: str,
+        invoice_ids: List[int],
+    ):
+        super().__init__()
+        self.financial_controller = financial_controller
+        self.doctor_identifier = doctor_identifier
+        self.invoice_ids = invoice_ids
+
+    def run(self):
+        from services.payment_status_sync import PaymentStatusSync, PaymentSyncResult
+
+        sync = PaymentStatusSync(self.financial_controller)
+        try:
+            result = sync.sync(
+                self.doctor_identifier,
+                self.invoice_ids,
+                progress_callback=self.progress.emit,
+            )
+        except Exception as e:
+            logging.getLogger(self.__class__.__name__).error(
+                f"Payment sync failed: {e}", exc_info=True
+            )
+            result = PaymentSyncResult(
+                checked=len(self.invoice_ids), apply_error=str(e)
+            )
+        finally:
+            sync.close()
+        self.finished.emit(result)
 
 
 class InvoiceHistoryTab(QWidget):
@@ -124,6 +188,9 @@ class InvoiceHistoryTab(QWidget):
         self.company_profile_controller = CompanyProfileController()
         self.current_horse: Optional[Horse] = None
         self.invoices: List[Invoice] = []
+        self.invoices_by_id: Dict[int, Invoice] = {}
+        self._sync_thread: Optional[QThread] = None
+        self._sync_worker: Optional[_PaymentSyncWorker] = None
 
         self._setup_ui()
         self._setup_connections()
@@ -289,20 +356,17 @@ class InvoiceHistoryTab(QWidget):
         self.invoices_table.setRowCount(0)
         self.invoice_details_table.setRowCount(0)
 
-        if not self.current_horse or not self.current_horse.owners:
+        if not self.current_horse:
             self.invoices = []
+            self.invoices_by_id = {}
             self.update_buttons_state()
             return
 
-        owner_ids = {owner.owner_id for owner in self.current_horse.owners}
-        all_invoices = []
-        for owner_id in owner_ids:
-            owner_invoices = self.financial_controller.get_invoices_for_owner(owner_id)
-            all_invoices.extend(owner_invoices)
-
-        self.invoices = sorted(
-            all_invoices, key=lambda inv: inv.invoice_date, reverse=True
+        # Newest first, with line items loaded, so selecting needs no query
+        self.invoices = self.financial_controller.get_invoice_history_for_horse(
+            self.current_horse.horse_id
         )
+        self.invoices_by_id = {inv.invoice_id: inv for inv in self.invoices}
 
         for inv in self.invoices:
             row = self.invoices_table.rowCount()
@@ -371,8 +435,10 @@ class InvoiceHistoryTab(QWidget):
             invoice_id = self.invoices_table.item(selected_row_index, 0).data(
                 Qt.ItemDataRole.UserRole
             )
-            transactions = self.financial_controller.get_transactions_for_invoice(
-                invoice_id
+            invoice = self.invoices_by_id.get(invoice_id)
+            transactions = sorted(
+                invoice.allocations if invoice else [],
+                key=lambda line: (line.transaction_date, line.transaction_id),
             )
             for trans in transactions:
                 row = self.invoice_details_table.rowCount()
@@ -423,6 +489,8 @@ class InvoiceHistoryTab(QWidget):
         return selected_invoices
 
     def _launch_record_payment_dialog(self):
+        from ..dialogs.record_payment_dialog import RecordPaymentDialog
+
         selected_invoices = self._get_selected_invoices()
         if len(selected_invoices) != 1:
             self.status_message.emit(
@@ -454,8 +522,9 @@ class InvoiceHistoryTab(QWidget):
 
     def _get_payment_link_for_invoice(self, invoice: Invoice) -> Optional[str]:
         """
-        Helper to generate a Stripe Payment Link for a single, unpaid invoice.
-        Retrieves the doctor's secret key from AppConfig.
+        Helper to get a Stripe Payment Link for a single, unpaid invoice.
+        Retrieves the doctor's secret key from AppConfig. A cached link is reused
+        while it is unexpired and the balance due is unchanged.
         Returns the URL or None if generation fails or not applicable.
         """
         # NEW: Check if Stripe payments are enabled in Company Profile
@@ -493,24 +562,11 @@ class InvoiceHistoryTab(QWidget):
             else "UNKNOWN_DOCTOR"
         )
 
-        owner_email = (
-            invoice.owner.email if invoice.owner and invoice.owner.email else None
-        )
-        owner_name = (
-            invoice.owner.farm_name
-            or f"{invoice.owner.first_name} {invoice.owner.last_name}"
-            if invoice.owner
-            else "N/A"
-        )
-
         success, message, payment_link_url = (
-            self.financial_controller.create_stripe_payment_link(
-                invoice_id=invoice.invoice_id,
-                amount=invoice.balance_due,
-                description=f"Payment for Invoice #{invoice.display_invoice_id} for {owner_name}",
+            self.financial_controller.get_or_create_payment_link(
+                invoice,
                 doctor_stripe_secret_key=doctor_stripe_secret_key,
                 doctor_identifier=doctor_identifier,
-                customer_email=owner_email,
             )
         )
         if success and payment_link_url:
@@ -527,8 +583,8 @@ class InvoiceHistoryTab(QWidget):
 
     def _sync_payment_statuses(self):
         """
-        Polls the backend API for payment statuses of all unpaid invoices and
-        updates local records if payments are confirmed.
+        Polls the backend API for payment statuses of all unpaid invoices on a
+        worker thread and records every confirmed payment in one transaction.
         """
         # NEW: Check if Stripe payments are enabled in Company Profile
         company_profile = self.company_profile_controller.get_company_profile()
@@ -574,87 +630,68 @@ class InvoiceHistoryTab(QWidget):
             )
             return
 
-        sync_count = 0
-        for invoice in unpaid_invoices:
-            success, is_paid, message = (
-                self.financial_controller.get_stripe_payment_status(
-                    doctor_identifier=doctor_identifier,
-                    internal_invoice_id=invoice.invoice_id,
-                )
-            )
+        if self._sync_thread is not None and self._sync_thread.isRunning():
+            self.status_message.emit("A payment sync is already running.")
+            return
 
-            if success:
-                if is_paid:
-                    # Update local database: mark as paid, record OwnerPayment, OwnerBillingHistory
-                    self.logger.info(
-                        f"Invoice #{invoice.display_invoice_id} confirmed paid by backend. Updating local DB."
-                    )
+        self.sync_payments_btn.setEnabled(False)
+        self._sync_thread = QThread(self)
+        self._sync_worker = _PaymentSyncWorker(
+            self.financial_controller,
+            doctor_identifier,
+            [inv.invoice_id for inv in unpaid_invoices],
+        )
+        self._sync_worker.moveToThread(self._sync_thread)
+        self._sync_thread.started.connect(self._sync_worker.run)
+        self._sync_worker.progress.connect(self._on_sync_progress)
+        self._sync_worker.finished.connect(self._on_sync_finished)
+        self._sync_worker.finished.connect(self._sync_thread.quit)
+        self._sync_thread.finished.connect(self._sync_worker.deleteLater)
+        self._sync_thread.finished.connect(self._sync_thread.deleteLater)
+        self._sync_thread.start()
+
+    def _on_sync_progress(self, checked: int, total: int):
+        self.status_message.emit(
+            f"Checked payment status for {checked} of {total} invoice(s)..."
+        )
 
-                    # Get the actual invoice object again from DB to ensure it's "fresh" and session-attached for updates
-                    # This is important before attempting to modify its status and recording payment details.
-                    # We need the full invoice object, not just the one from self.invoices list
-                    # as it might be detached from session
-                    invoice_to_update = self.financial_controller.get_invoice_by_id(
-                        invoice.invoice_id
-                    )
+    def _on_sync_finished(self, result):
+        self._sync_worker = None
+        self._sync_thread = None
+        self.update_buttons_state()
 
-                    if invoice_to_update:
-                        payment_data = {
-                            "invoice_id": invoice_to_update.invoice_id,
-                            "amount": invoice_to_update.balance_due,  # Use the balance due as the amount paid for full payment
-                            "payment_date": datetime.now().date(),  # Use current date as confirmation date
-                            "payment_method": "Stripe (Webhook Confirmed)",
-                            "reference_number": f"WEBHOOK_INV{invoice_to_update.invoice_id}",  # Reference from webhook
-                            "notes": "Automatically confirmed via Stripe webhook.",
-                            "user_id": "SYSTEM_SYNC",  # User ID for system-confirmed payments
-                        }
-
-                        record_success, record_msg = (
-                            self.financial_controller.record_payment(payment_data)
-                        )
-                        if record_success:
-                            sync_count += 1
-                            self.status_message.emit(
-                                f"Invoice #{invoice.display_invoice_id} marked as Paid in local DB."
-                            )
-                            self.payment_recorded.emit()  # Signal parent to refresh invoices/UI
-                        else:
-                            self.logger.error(
-                                f"Failed to update local DB for Invoice #{invoice.display_invoice_id} after backend confirmation: {record_msg}"
-                            )
-                            self.parent_view.show_error(
-                                "Local DB Update Failed",
-                                f"Invoice #{invoice.display_invoice_id} confirmed paid, but failed to update local records: {record_msg}",
-                            )
-                    else:
-                        self.logger.error(
-                            f"Could not retrieve Invoice #{invoice.display_invoice_id} from DB for update after backend confirmation."
-                        )
-                        self.parent_view.show_error(
-                            "Local DB Error",
-                            f"Failed to retrieve Invoice #{invoice.display_invoice_id} for update.",
-                        )
-                else:
-                    self.logger.info(
-                        f"Invoice #{invoice.display_invoice_id} still unpaid according to backend."
-                    )
-            else:
-                self.logger.error(
-                    f"Failed to get status for Invoice #{invoice.display_invoice_id} from backend: {message}"
-                )
-                self.status_message.emit(
-                    f"Error syncing Invoice #{invoice.display_invoice_id}: {message}"
-                )
+        display_ids = {inv.invoice_id: inv.display_invoice_id for inv in self.invoices}
+        for status in result.errors:
+            self.logger.error(
+                f"Failed to get status for Invoice #{display_ids.get(status.invoice_id, status.invoice_id)} from backend: {status.message}"
+            )
+
+        if result.apply_error:
+            self.parent_view.show_error(
+                "Local DB Update Failed",
+                f"Payments were confirmed by the backend, but local records could not be updated: {result.apply_error}",
+            )
+            return
 
-        if sync_count > 0:
+        error_note = (
+            f" {len(result.errors)} invoice(s) could not be checked."
+            if result.errors
+            else ""
+        )
+        if result.paid_invoice_ids:
             self.status_message.emit(
-                f"Sync complete. {sync_count} invoice(s) marked as paid."
+                f"Sync complete. {len(result.paid_invoice_ids)} invoice(s) marked as paid.{error_note}"
             )
+            self.payment_recorded.emit()  # Signal parent to refresh invoices/UI
             self.load_invoices()  # Reload table to show updated statuses
         else:
-            self.status_message.emit("Sync complete. No new payments found.")
+            self.status_message.emit(
+                f"Sync complete. No new payments found.{error_note}"
+            )
 
     def _email_selected_invoice(self):
+        from reports import InvoiceGenerator
+
         selected_invoices = self._get_selected_invoices()
         if not selected_invoices:
             self.status_message.emit("Please select one or more invoices to email.")
@@ -729,6 +766,8 @@ class InvoiceHistoryTab(QWidget):
         )
 
     def _print_selected_invoice(self):
+        from reports import InvoiceGenerator
+
         selected_invoices = self._get_selected_invoices()
         if not selected_invoices:
             self.status_message.emit("Please select one or more invoices to print.")
@@ -1,15 +1,17 @@
 # views/horse/tabs/location_tab.py
 """
 EDSI Veterinary Management System - Horse Location Tab
-Version: 1.0.1
+Version: 1.0.2
 Purpose: Manages the assignment of a single location to a horse.
          - Modified assign/remove location logic to call HorseController for
            database persistence BEFORE emitting location_assignment_changed signal,
            ensuring data integrity and proper UI updates in parent views.
-Last Updated: May 25, 2025
+Last Updated: October 16, 2026
 Author: Gemini
 
 Changelog:
+- v1.0.2 (2026-10-16):
+    - The location dialogs are imported when first opened rather than at module load.
 - v1.0.1 (2025-05-25):
     - Refactored `_assign_location_to_horse`: Now calls
       `horse_controller.assign_horse_to_location` to save the assignment
@@ -63,10 +65,6 @@ from models import (
 )  # LocationModel not directly used here, controller returns names/ids
 from controllers.horse_controller import HorseController
 from controllers.location_controller import LocationController
-from views.admin.dialogs.add_edit_location_dialog import AddEditLocationDialog
-from views.horse.dialogs.select_existing_location_dialog import (
-    SelectExistingLocationDialog,
-)
 
 
 class LocationTab(QWidget):
@@ -219,6 +217,8 @@ class LocationTab(QWidget):
         self.update_buttons_state()
 
     def _handle_create_and_link_location(self):
+        from views.admin.dialogs.add_edit_location_dialog import AddEditLocationDialog
+
         if not self.current_horse or self.current_horse.horse_id is None:
             self.parent_view.show_warning(
                 "Assign Location", "Please select a horse first."
@@ -263,6 +263,10 @@ class LocationTab(QWidget):
             self.logger.info("Create & Assign New Location dialog cancelled.")
 
     def _handle_link_existing_location(self):
+        from views.horse.dialogs.select_existing_location_dialog import (
+            SelectExistingLocationDialog,
+        )
+
         if not self.current_horse or self.current_horse.horse_id is None:
             self.parent_view.show_warning(
                 "Assign Location", "Please select a horse first."
@@ -1,12 +1,14 @@
 # views/horse/tabs/owners_tab.py
 """
 EDSI Veterinary Management System - Horse Owners Tab
-Version: 1.3.0
+Version: 1.3.1
 Purpose: Manages the association of owners with a specific horse.
-Last Updated: June 9, 2025
+Last Updated: October 16, 2026
 Author: Gemini
 
 Changelog:
+- v1.3.1 (2026-10-16):
+    - The owner dialogs are imported when first opened rather than at module load.
 - v1.3.0 (2025-06-09):
     - Added double-click functionality to the owners list. Users can now
       double-click a linked owner to open the AddEditOwnerDialog and edit
@@ -60,9 +62,6 @@ from models import Horse, Owner as OwnerModel
 from controllers.horse_controller import HorseController
 from controllers.owner_controller import OwnerController
 
-from ..dialogs.create_link_owner_dialog import CreateAndLinkOwnerDialog
-from ..dialogs.link_existing_owner_dialog import LinkExistingOwnerDialog
-from ...admin.dialogs.add_edit_owner_dialog import AddEditOwnerDialog
 from ..widgets.horse_owner_list_widget import HorseOwnerListWidget
 
 
@@ -243,6 +242,8 @@ class OwnersTab(QWidget):
 
     def _handle_edit_owner(self, item: QListWidgetItem):
         """Opens the AddEditOwnerDialog for the double-clicked owner."""
+        from ...admin.dialogs.add_edit_owner_dialog import AddEditOwnerDialog
+
         owner_id = item.data(Qt.ItemDataRole.UserRole)
         if owner_id is None:
             return
@@ -309,6 +310,8 @@ class OwnersTab(QWidget):
         return True
 
     def _handle_create_and_link_owner(self):
+        from ..dialogs.create_link_owner_dialog import CreateAndLinkOwnerDialog
+
         if not self.current_horse:
             self.parent_view.show_warning("Add Owner", "Select horse first.")
             return
@@ -371,6 +374,8 @@ class OwnersTab(QWidget):
             self.logger.info("Create & link owner dialog cancelled.")
 
     def _handle_link_existing_owner(self):
+        from ..dialogs.link_existing_owner_dialog import LinkExistingOwnerDialog
+
         if not self.current_horse:
             self.parent_view.show_warning("Link Owner", "Select horse first.")
             return
@@ -2,12 +2,40 @@
 
 """
 EDSI Veterinary Management System - Reports Tab
-Version: 1.9.0
+Version: 1.11.3
 Purpose: A UI tab to serve as a hub for selecting and running reports.
-Last Updated: June 29, 2025
+Last Updated: October 16, 2026
 Author: Gemini
 
 Changelog:
+- v1.11.3 (2026-10-16):
+    - Batch owner statements load their data on the worker thread too
+      (`_StatementBatchWorker.run`), so a practice-wide batch no longer freezes
+      the tab while it loads. The save folder is asked for first; the progress
+      dialog shows "Loading statement data..." until the statements are known.
+- v1.11.2 (2026-10-16):
+    - The spreadsheet export QThread is deleted once it finishes and
+      `_export_thread` is cleared, likewise.
+- v1.11.1 (2026-10-16):
+    - The statement batch QThread is deleted once it finishes and
+      `_batch_thread` is cleared, so each batch no longer leaves a finished
+      thread behind.
+- v1.11.0 (2026-10-16):
+    - Added "Export Spreadsheet" for the Invoice Register, Payment History and
+      Horse Transaction History reports. Rows are streamed to CSV or XLSX by
+      `services.report_export` on a QThread (`_ExportWorker`), with a progress
+      dialog whose Cancel stops the export and removes the partial file.
+- v1.10.0 (2026-10-16):
+    - Batch owner statements are rendered by `services.statement_batch` in
+      worker processes, driven from a QThread (`_StatementBatchWorker`), so the
+      window stays responsive. A progress dialog shows statements done and its
+      Cancel drops the statements not yet started. The summary names the owners
+      whose statement failed.
+    - Owners sharing a last name no longer overwrite each other's statement file;
+      later ones get their owner ID appended.
+- v1.9.1 (2026-10-16):
+    - Report generators (and with them ReportLab) are imported by the `_run_*`
+      methods, so ReportLab is only loaded once a report is produced.
 - v1.9.0 (2025-06-29):
     - Modified all report generation methods (`_run_owner_statement_report`, `_run_ar_aging_report`,
       `_run_invoice_register_report`, `_run_payment_history_report`, `_run_charge_code_usage_report`,
@@ -28,9 +56,10 @@ Changelog:
 
 import logging
 import os
+import threading
 import webbrowser
 import urllib.parse
-from typing import Optional, Dict
+from typing import List, Optional, Dict
 from datetime import date
 
 from PySide6.QtWidgets import (
@@ -45,20 +74,13 @@ from PySide6.QtWidgets import (
     QListWidgetItem,
     QFileDialog,
     QMessageBox,
+    QProgressDialog,
 )
-from PySide6.QtCore import Qt, Signal
+from PySide6.QtCore import Qt, QObject, QThread, Signal
 from PySide6.QtGui import QFont
 
 from config.app_config import AppConfig
 from controllers import ReportsController, HorseController
-from reports import (
-    OwnerStatementGenerator,
-    ARAgingGenerator,
-    InvoiceRegisterGenerator,
-    PaymentHistoryGenerator,
-    HorseTransactionHistoryGenerator,
-    ChargeCodeUsageGenerator,
-)
 from views.reports.options import (
     OwnerStatementOptionsWidget,
     ARAgingOptionsWidget,
@@ -68,6 +90,124 @@ from views.reports.options import (
     ChargeCodeUsageOptionsWidget,
 )
 from models import Owner
+from services.report_export import EXPORT_FORMATS, ExportSpec, ReportExporter
+from services.statement_batch import (
+    StatementBatchRenderer,
+    StatementBatchResult,
+    StatementJob,
+    statement_job,
+)
+
+# Failed owners listed by name in the batch summary; the rest are counted
+FAILURES_LISTED = 10
+
+# Reports that can be exported as a spreadsheet, with their file name prefix
+EXPORTABLE_REPORTS = {
+    "Invoice Register": "Invoice_Register",
+    "Payment History": "Payment_History",
+    "Horse Transaction History": "Transaction_History",
+}
+
+
+class _StatementBatchWorker(QObject):
+    """
+    Loads the statement data of all owners for a period and renders it with
+    `StatementBatchRenderer.render`, on the thread it is moved to.
+    """
+
+    progress = Signal(int, int)  # statements done, statements total
+    finished = Signal(object)  # StatementBatchResult
+
+    def __init__(
+        self,
+        reports_controller: ReportsController,
+        renderer: StatementBatchRenderer,
+        start_date: date,
+        end_date: date,
+        save_dir: str,
+    ):
+        super().__init__()
+        self.reports_controller = reports_controller
+        self.renderer = renderer
+        self.start_date = start_date
+        self.end_date = end_date
+        self.save_dir = save_dir
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def run(self):
+        jobs: List[StatementJob] = []
+        try:
+            jobs = self._jobs(
+                self.reports_controller.get_data_for_all_owner_statements(
+                    self.start_date, self.end_date
+                )
+            )
+            if self._cancel.is_set():
+                result = StatementBatchResult(total=len(jobs), cancelled=True)
+            else:
+                self.progress.emit(0, len(jobs))
+                result = self.renderer.render(
+                    jobs,
+                    progress_callback=self.progress.emit,
+                    cancel_requested=self._cancel.is_set,
+                )
+        except Exception as e:
+            # Loading failed or the pool could not start; report it as failed
+            logging.getLogger(self.__class__.__name__).error(
+                f"Statement batch failed: {e}", exc_info=True
+            )
+            result = StatementBatchResult(
+                total=len(jobs) or 1,
+                failures=[(job.owner_name, str(e)) for job in jobs]
+                or [("All owners", str(e))],
+            )
+        self.finished.emit(result)
+
+    def _jobs(self, all_data: List[Dict]) -> List[StatementJob]:
+        """One job per owner; owners sharing a last name get their ID appended."""
+        jobs = []
+        used_names = set()
+        for data in all_data:
+            owner = data["owner"]
+            file_name = f"Statement for {owner.last_name or f'Owner{owner.owner_id}'}"
+            if file_name.lower() in used_names:
+                file_name += f" ({owner.owner_id})"
+            used_names.add(file_name.lower())
+            jobs.append(
+                statement_job(
+                    data,
+                    os.path.join(self.save_dir, f"{file_name} {date.today()}.pdf"),
+                )
+            )
+        return jobs
+
+
+class _ExportWorker(QObject):
+    """Runs `ReportExporter.export` on the thread it is moved to."""
+
+    progress = Signal(int, int)  # rows written, rows total
+    finished = Signal(bool, bool, str)  # success, cancelled, message
+
+    def __init__(self, spec: ExportSpec, file_path: str):
+        super().__init__()
+        self.spec = spec
+        self.file_path = file_path
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def run(self):
+        success, message, _ = ReportExporter().export(
+            self.spec,
+            self.file_path,
+            progress_callback=self.progress.emit,
+            cancel_requested=self._cancel.is_set,
+        )
+        self.finished.emit(success, not success and self._cancel.is_set(), message)
 
 
 class ReportsTab(QWidget):
@@ -78,6 +218,12 @@ class ReportsTab(QWidget):
         self.logger = logging.getLogger(self.__class__.__name__)
         self.reports_controller = ReportsController()
         self.horse_controller = HorseController()
+        self._batch_thread: Optional[QThread] = None
+        self._batch_worker: Optional[_StatementBatchWorker] = None
+        self._batch_progress: Optional[QProgressDialog] = None
+        self._export_thread: Optional[QThread] = None
+        self._export_worker: Optional[_ExportWorker] = None
+        self._export_progress: Optional[QProgressDialog] = None
         self.setup_ui()
         self.setup_connections()
 
@@ -148,10 +294,14 @@ class ReportsTab(QWidget):
         self.email_report_button = QPushButton("Generate & Email")
         self.email_report_button.setEnabled(False)
         self.email_report_button.setMinimumHeight(36)
+        self.export_report_button = QPushButton("Export Spreadsheet")
+        self.export_report_button.setEnabled(False)
+        self.export_report_button.setMinimumHeight(36)
         self.run_report_button = QPushButton("Generate Report")
         self.run_report_button.setEnabled(False)
         self.run_report_button.setMinimumHeight(36)
         action_layout.addWidget(self.email_report_button)
+        action_layout.addWidget(self.export_report_button)
         action_layout.addWidget(self.run_report_button)
         right_layout.addLayout(action_layout)
 
@@ -166,13 +316,13 @@ class ReportsTab(QWidget):
             QPushButton:disabled {{ background-color: {AppConfig.DARK_HEADER_FOOTER}; color: {AppConfig.DARK_TEXT_TERTIARY}; }}
             """
         )
-        self.email_report_button.setStyleSheet(
-            f"""
+        secondary_style = f"""
             QPushButton {{ background-color: {AppConfig.DARK_BUTTON_BG}; color: {AppConfig.DARK_TEXT_PRIMARY}; border: 1px solid {AppConfig.DARK_PRIMARY_ACTION}; border-radius: 4px; padding: 8px 24px; font-weight: bold; }}
             QPushButton:hover {{ background-color: {AppConfig.DARK_BUTTON_HOVER}; }}
             QPushButton:disabled {{ background-color: {AppConfig.DARK_HEADER_FOOTER}; color: {AppConfig.DARK_TEXT_TERTIARY}; border: 1px solid {AppConfig.DARK_HEADER_FOOTER};}}
             """
-        )
+        self.email_report_button.setStyleSheet(secondary_style)
+        self.export_report_button.setStyleSheet(secondary_style)
 
     def setup_connections(self):
         self.report_list_widget.currentItemChanged.connect(
@@ -180,6 +330,7 @@ class ReportsTab(QWidget):
         )
         self.run_report_button.clicked.connect(self._on_run_report_clicked)
         self.email_report_button.clicked.connect(self._on_email_report_clicked)
+        self.export_report_button.clicked.connect(self._on_export_report_clicked)
 
     def populate_report_list(self):
         reports = [
@@ -198,6 +349,9 @@ class ReportsTab(QWidget):
     ):
         self.run_report_button.setEnabled(bool(current))
         self.email_report_button.setEnabled(False)
+        self.export_report_button.setEnabled(
+            bool(current) and current.text() in EXPORTABLE_REPORTS
+        )
         if not current:
             self.options_stack.setCurrentWidget(self.placeholder_widget)
             return
@@ -247,6 +401,8 @@ class ReportsTab(QWidget):
 
     def _run_charge_code_usage_report(self):
         """Orchestrates the generation of the Charge Code Usage report."""
+        from reports import ChargeCodeUsageGenerator
+
         options = self.charge_code_usage_options.get_options()
         self.logger.info(f"Generating Charge Code Usage report with options: {options}")
 
@@ -306,7 +462,104 @@ class ReportsTab(QWidget):
                 "Emailing is not available for this report type.",
             )
 
+    def _on_export_report_clicked(self):
+        current_item = self.report_list_widget.currentItem()
+        if not current_item or current_item.text() not in EXPORTABLE_REPORTS:
+            return
+        if self._export_thread is not None and self._export_thread.isRunning():
+            QMessageBox.information(
+                self, "Export In Progress", "A spreadsheet export is already running."
+            )
+            return
+
+        report_name = current_item.text()
+        if report_name == "Invoice Register":
+            options = self.invoice_register_options.get_options()
+            spec = self.reports_controller.get_invoice_register_export(
+                options["start_date"], options["end_date"]
+            )
+        elif report_name == "Payment History":
+            spec = self.reports_controller.get_payment_history_export(
+                **self.payment_history_options.get_options()
+            )
+        else:
+            options = self.horse_transaction_history_options.get_options()
+            if not options.get("horse_id"):
+                QMessageBox.warning(self, "Selection Required", "Please select a horse.")
+                return
+            spec = self.reports_controller.get_horse_transaction_history_export(
+                **options
+            )
+
+        default_path = os.path.join(
+            AppConfig.get_accounting_reports_dir(),
+            f"{EXPORTABLE_REPORTS[report_name]}_{date.today()}.csv",
+        )
+        filters = {
+            f"{name} (*{extension})": extension
+            for extension, name in EXPORT_FORMATS.items()
+        }
+        file_path, selected_filter = QFileDialog.getSaveFileName(
+            self, f"Export {report_name}", default_path, ";;".join(filters)
+        )
+        if not file_path:
+            return
+        if os.path.splitext(file_path)[1].lower() not in EXPORT_FORMATS:
+            file_path += filters.get(selected_filter, ".csv")
+        self.logger.info(f"Exporting {report_name} to {file_path}")
+
+        self._export_progress = QProgressDialog(
+            "Exporting rows...", "Cancel", 0, 0, self
+        )
+        self._export_progress.setWindowTitle(f"Export {report_name}")
+        self._export_progress.setWindowModality(Qt.WindowModality.WindowModal)
+        self._export_progress.setAutoClose(False)
+        self._export_progress.setAutoReset(False)
+        self._export_progress.setMinimumDuration(0)
+
+        self._export_thread = QThread(self)
+        self._export_worker = _ExportWorker(spec, file_path)
+        self._export_worker.moveToThread(self._export_thread)
+        self._export_thread.started.connect(self._export_worker.run)
+        self._export_worker.progress.connect(self._on_export_progress)
+        self._export_worker.finished.connect(self._on_export_finished)
+        self._export_worker.finished.connect(self._export_thread.quit)
+        self._export_thread.finished.connect(self._export_worker.deleteLater)
+        self._export_thread.finished.connect(self._export_thread.deleteLater)
+        self._export_progress.canceled.connect(self._cancel_export)
+        self._export_thread.start()
+
+    def _on_export_progress(self, done: int, total: int):
+        if self._export_progress is not None:
+            self._export_progress.setMaximum(max(total, 1))
+            self._export_progress.setValue(min(done, total))
+            self._export_progress.setLabelText(f"Exported {done:,} of {total:,} rows...")
+
+    def _cancel_export(self):
+        if self._export_worker is not None:
+            self._export_worker.cancel()
+        if self._export_progress is not None:
+            # Stays open until the batch being written has finished
+            self._export_progress.show()
+            self._export_progress.setLabelText("Cancelling...")
+            self._export_progress.setCancelButton(None)
+
+    def _on_export_finished(self, success: bool, cancelled: bool, message: str):
+        self._export_worker = None
+        self._export_thread = None
+        if self._export_progress is not None:
+            self._export_progress.close()
+            self._export_progress = None
+        if success:
+            QMessageBox.information(self, "Export Complete", message)
+        elif cancelled:
+            QMessageBox.information(self, "Export Cancelled", message)
+        else:
+            QMessageBox.critical(self, "Export Failed", message)
+
     def _run_horse_transaction_history_report(self):
+        from reports import HorseTransactionHistoryGenerator
+
         options = self.horse_transaction_history_options.get_options()
         if not options.get("horse_id"):
             QMessageBox.warning(self, "Selection Required", "Please select a horse.")
@@ -358,6 +611,8 @@ class ReportsTab(QWidget):
             QMessageBox.critical(self, "Error", f"An unexpected error occurred: {e}")
 
     def _run_payment_history_report(self):
+        from reports import PaymentHistoryGenerator
+
         options = self.payment_history_options.get_options()
         self.logger.info(
             f"Generating Payment History from {options['start_date']} to {options['end_date']} for owner: {options['owner_id']}"
@@ -394,6 +649,8 @@ class ReportsTab(QWidget):
             QMessageBox.critical(self, "Error", f"An unexpected error occurred: {e}")
 
     def _run_invoice_register_report(self):
+        from reports import InvoiceRegisterGenerator
+
         options = self.invoice_register_options.get_options()
         self.logger.info(
             f"Generating Invoice Register from {options['start_date']} to {options['end_date']}"
@@ -432,6 +689,8 @@ class ReportsTab(QWidget):
             QMessageBox.critical(self, "Error", f"An unexpected error occurred: {e}")
 
     def _run_ar_aging_report(self):
+        from reports import ARAgingGenerator
+
         options = self.ar_aging_options.get_options()
         as_of_date = options["as_of_date"]
         self.logger.info(f"Generating A/R Aging report for date: {as_of_date}")
@@ -482,17 +741,9 @@ class ReportsTab(QWidget):
             QMessageBox.warning(self, "Selection Required", "Please select an owner.")
 
     def _generate_batch_statements(self, start_date: date, end_date: date):
-        self.logger.info(
-            f"Generating batch owner statements from {start_date} to {end_date}"
-        )
-        all_data = self.reports_controller.get_data_for_all_owner_statements(
-            start_date, end_date
-        )
-        if not all_data:
+        if self._batch_thread is not None and self._batch_thread.isRunning():
             QMessageBox.information(
-                self,
-                "No Statements",
-                "No owners found with a balance or activity in the selected period.",
+                self, "Batch In Progress", "A statement batch is already running."
             )
             return
         # MODIFIED: Use AppConfig.get_accounting_reports_dir()
@@ -503,28 +754,102 @@ class ReportsTab(QWidget):
         )
         if not save_dir:
             return
-        generator = OwnerStatementGenerator()
-        success_count, fail_count = 0, 0
-        for data in all_data:
-            owner_name = data["owner"].last_name or f"Owner{data['owner'].owner_id}"
-            file_path = os.path.join(
-                save_dir, f"Statement for {owner_name} {date.today()}.pdf"
+        self.logger.info(
+            f"Generating batch owner statements from {start_date} to {end_date}"
+        )
+
+        # Indeterminate until the worker has loaded the statements
+        self._batch_progress = QProgressDialog(
+            "Loading statement data...", "Cancel", 0, 0, self
+        )
+        self._batch_progress.setWindowTitle("Owner Statements")
+        self._batch_progress.setWindowModality(Qt.WindowModality.WindowModal)
+        self._batch_progress.setAutoClose(False)
+        self._batch_progress.setAutoReset(False)
+        self._batch_progress.setMinimumDuration(0)
+        self._batch_progress.setValue(0)
+
+        self._batch_thread = QThread(self)
+        self._batch_worker = _StatementBatchWorker(
+            self.reports_controller,
+            StatementBatchRenderer(self.reports_controller.company_profile),
+            start_date,
+            end_date,
+            save_dir,
+        )
+        self._batch_worker.moveToThread(self._batch_thread)
+        self._batch_thread.started.connect(self._batch_worker.run)
+        self._batch_worker.progress.connect(self._on_batch_progress)
+        self._batch_worker.finished.connect(self._on_batch_finished)
+        self._batch_worker.finished.connect(self._batch_thread.quit)
+        self._batch_thread.finished.connect(self._batch_worker.deleteLater)
+        self._batch_thread.finished.connect(self._batch_thread.deleteLater)
+        self._batch_progress.canceled.connect(self._cancel_batch)
+        self._batch_thread.start()
+
+    def _on_batch_progress(self, done: int, total: int):
+        if self._batch_progress is not None:
+            self._batch_progress.setMaximum(total)
+            self._batch_progress.setValue(done)
+            self._batch_progress.setLabelText(
+                f"Generated {done} of {total} statements..."
             )
-            success, _ = generator.generate_statement_pdf(data, file_path)
-            if success:
-                success_count += 1
-            else:
-                fail_count += 1
-        summary_message = f"Successfully generated {success_count} statements."
-        if fail_count > 0:
+
+    def _cancel_batch(self):
+        if self._batch_worker is not None:
+            self._batch_worker.cancel()
+        if self._batch_progress is not None:
+            # Stays open until the statements already rendering have finished
+            self._batch_progress.show()
+            self._batch_progress.setLabelText("Cancelling...")
+            self._batch_progress.setCancelButton(None)
+
+    def _on_batch_finished(self, result: StatementBatchResult):
+        self._batch_worker = None
+        self._batch_thread = None
+        if self._batch_progress is not None:
+            self._batch_progress.close()
+            self._batch_progress = None
+
+        if result.total == 0:
+            QMessageBox.information(
+                self,
+                "No Statements",
+                "No owners found with a balance or activity in the selected period.",
+            )
+            return
+        summary_message = f"Successfully generated {result.succeeded} statements."
+        if result.cancelled:
+            summary_message = (
+                f"Cancelled. {summary_message}\n"
+                f"{result.not_rendered} statements were not generated."
+            )
+        if result.failures:
+            listed = "\n".join(
+                f"  {owner_name}: {message}"
+                for owner_name, message in result.failures[:FAILURES_LISTED]
+            )
+            more = len(result.failures) - FAILURES_LISTED
             summary_message += (
-                f"\nFailed to generate {fail_count} statements. Please check the logs."
+                f"\nFailed to generate {len(result.failures)} statements:\n{listed}"
             )
-        QMessageBox.information(self, "Batch Generation Complete", summary_message)
+            if more > 0:
+                summary_message += f"\n  ...and {more} more. Please check the logs."
+        title = (
+            "Batch Generation Cancelled"
+            if result.cancelled
+            else "Batch Generation Complete"
+        )
+        if result.failures:
+            QMessageBox.warning(self, title, summary_message)
+        else:
+            QMessageBox.information(self, title, summary_message)
 
     def _generate_single_statement(
         self, owner_id: int, options: Dict, email_after: bool
     ):
+        from reports import OwnerStatementGenerator
+
         self.logger.info(f"Generating owner statement for owner_id: {owner_id}")
         report_data = self.reports_controller.get_owner_statement_data(
             owner_id=owner_id,
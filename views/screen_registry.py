@@ -0,0 +1,66 @@
+# views/screen_registry.py
+"""
+EDSI Veterinary Management System - Screen Registry
+Version: 1.0.0
+Purpose: Maps top-level screen names to the module and class that implement them,
+         and imports each screen module the first time the screen is requested.
+         Keeps the horse and setup screens (and their tab/dialog trees) out of the
+         imports that run before the splash screen is shown.
+Last Updated: October 16, 2026
+Author: Gemini
+
+Changelog:
+- v1.0.0 (2026-10-16):
+    - Initial creation with the splash, login, horse management and user
+      management screens. First-use import times are kept in `import_timings_ms`.
+"""
+
+import importlib
+import logging
+import time
+from typing import Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+SPLASH_SCREEN = "splash"
+LOGIN_DIALOG = "login"
+HORSE_MANAGEMENT_SCREEN = "horse_management"
+USER_MANAGEMENT_SCREEN = "user_management"
+
+# screen name -> (module path, class name)
+SCREENS: Dict[str, Tuple[str, str]] = {
+    SPLASH_SCREEN: ("views.auth.splash_screen", "SplashScreen"),
+    LOGIN_DIALOG: ("views.auth.small_login_dialog", "SmallLoginDialog"),
+    HORSE_MANAGEMENT_SCREEN: (
+        "views.horse.horse_unified_management",
+        "HorseUnifiedManagement",
+    ),
+    USER_MANAGEMENT_SCREEN: (
+        "views.admin.user_management_screen",
+        "UserManagementScreen",
+    ),
+}
+
+_loaded: Dict[str, type] = {}
+
+# screen name -> milliseconds spent importing its module on first use
+import_timings_ms: Dict[str, float] = {}
+
+
+def get_screen_class(name: str) -> type:
+    """
+    Returns the class registered under `name`, importing its module on the
+    first call. Raises KeyError for an unknown screen name.
+    """
+    screen_class = _loaded.get(name)
+    if screen_class is not None:
+        return screen_class
+
+    module_path, class_name = SCREENS[name]
+    start = time.perf_counter()
+    module = importlib.import_module(module_path)
+    elapsed_ms = (time.perf_counter() - start) * 1000.0
+    screen_class = _loaded[name] = getattr(module, class_name)
+    import_timings_ms[name] = elapsed_ms
+    logger.info(f"Loaded screen '{name}' ({module_path}) in {elapsed_ms:.1f} ms")
+    return screen_class